@@ -8,6 +8,8 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from ...utils.keyword_matcher import KeywordMatcher
+
 
 @dataclass
 class SubTask:
@@ -43,8 +45,17 @@ class TaskCollaborator:
         "04": ["statistics", "collection", "reporting", "review"]
     }
     
+    # 子任务分解关键词: Agent ID -> 关键词（按执行顺序）
+    DECOMPOSE_KEYWORDS = {
+        "01": ["调研", "搜索", "研究", "分析"],
+        "02": ["开发", "代码", "实现", "修复"],
+        "03": ["创意", "文案", "包装", "展示"],
+        "04": ["总结", "复盘", "统计", "报告"],
+    }
+    
     def __init__(self):
         self._results_cache: Dict[str, Any] = {}
+        self._matcher = KeywordMatcher(self.DECOMPOSE_KEYWORDS)
     
     async def collaborate(
         self,
@@ -94,12 +105,12 @@ class TaskCollaborator:
     
     def _decompose_task(self, task: str) -> List[SubTask]:
         """分解任务为子任务"""
-        task_lower = task.lower()
+        scores = self._matcher.score(task)
         sub_tasks = []
         task_id = 1
         
         # 研究类任务 -> 01
-        if any(kw in task_lower for kw in ["调研", "搜索", "研究", "分析"]):
+        if scores["01"]:
             sub_tasks.append(SubTask(
                 task_id=task_id,
                 description="进行调研分析",
@@ -109,7 +120,7 @@ class TaskCollaborator:
             task_id += 1
         
         # 开发类任务 -> 02
-        if any(kw in task_lower for kw in ["开发", "代码", "实现", "修复"]):
+        if scores["02"]:
             sub_tasks.append(SubTask(
                 task_id=task_id,
                 description="开发实现",
@@ -119,7 +130,7 @@ class TaskCollaborator:
             task_id += 1
         
         # 创意类任务 -> 03
-        if any(kw in task_lower for kw in ["创意", "文案", "包装", "展示"]):
+        if scores["03"]:
             sub_tasks.append(SubTask(
                 task_id=task_id,
                 description="创意包装",
@@ -129,7 +140,7 @@ class TaskCollaborator:
             task_id += 1
         
         # 统计/总结类任务 -> 04
-        if any(kw in task_lower for kw in ["总结", "复盘", "统计", "报告"]):
+        if scores["04"]:
             sub_tasks.append(SubTask(
                 task_id=task_id,
                 description="总结报告",
@@ -34,6 +34,7 @@ class AgentSpec:
     quota: str = "中等"
     channels: List[str] = field(default_factory=lambda: ["feishu"])
     permissions: List[str] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)  # 路由关键词（AgentRouter 热加载）
 
 
 @dataclass
@@ -120,7 +121,8 @@ class AgentCreator:
             "quota": spec.quota,
             "skills": spec.skills,
             "channels": spec.channels,
-            "permissions": spec.permissions
+            "permissions": spec.permissions,
+            "keywords": spec.keywords
         }
         
         config_file = agent_dir / ".meta.json"
@@ -17,6 +17,7 @@ class AgentSpec:
     quota: str = "中等"
     channels: List[str] = field(default_factory=lambda: ["feishu"])
     permissions: List[str] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)  # 路由关键词（AgentRouter 热加载）
 
 
 class RequirementAnalyzer:
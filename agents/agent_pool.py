@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""Warm per-agent templates shared by CoPawAgent instances.
+
+Building a CoPawAgent used to re-register every tool function, walk the
+active_skills dir, re-read AGENTS.md / SOUL.md / PROFILE.md and create a
+new model client on each message. AgentPool builds those immutable parts
+once per agent_id (AgentTemplate) and hands them to each per-query agent,
+which only adds its own memory, hooks and MCP tools on a cheap toolkit
+copy.
+
+A template is rebuilt when its fingerprint changes: active skill dirs
+(name + SKILL.md mtime), prompt files (stat of working-dir and agent
+prompt files) or the active LLM slot. The fingerprint is recomputed at
+most every ``revalidate_interval`` seconds per agent, so back-to-back
+queries do not walk the skills dir.
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from agentscope.model import OpenAIChatModel
+from agentscope.tool import Toolkit
+
+from .prompt import (
+    PROMPT_FILE_ORDER,
+    build_agent_sys_prompt,
+    get_agent_prompt_paths,
+)
+from .skills_manager import (
+    ensure_skills_initialized,
+    get_working_skills_dir,
+    list_available_skills,
+)
+from .tools import (
+    execute_shell_command,
+    read_file,
+    write_file,
+    edit_file,
+    send_file_to_user,
+    desktop_screenshot,
+    browser_use,
+    get_current_time,
+)
+from ..constant import DASHSCOPE_BASE_URL, WORKING_DIR
+from ..providers import get_active_llm_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "qwen3-max"
+# Seconds a validated template is handed out without re-checking files
+DEFAULT_REVALIDATE_INTERVAL = 2.0
+
+
+@dataclass(frozen=True)
+class LLMSettings:
+    """Resolved model / api_key / base_url used by an agent template."""
+
+    model_name: str
+    api_key: str
+    base_url: str
+
+
+@dataclass
+class AgentTemplate:
+    """Immutable parts of a CoPawAgent, shared across queries."""
+
+    agent_id: str
+    fingerprint: Tuple[Any, ...]
+    toolkit: Toolkit
+    base_sys_prompt: str
+    model: OpenAIChatModel
+    formatter: Any
+
+    def new_toolkit(self) -> Toolkit:
+        """Return a toolkit copy that per-query agents may extend.
+
+        The containers are copied so memory_search / MCP registrations
+        stay local to one agent. Tool groups and registered tools are
+        copied too: their ``active`` flag and ``extended_model`` are
+        changed per query. Tool functions and skills stay shared.
+        """
+        toolkit = copy.copy(self.toolkit)
+        for name, value in vars(self.toolkit).items():
+            if isinstance(value, (dict, list, set)):
+                setattr(toolkit, name, copy.copy(value))
+        toolkit.groups = {
+            name: copy.copy(group)
+            for name, group in self.toolkit.groups.items()
+        }
+        toolkit.tools = {
+            name: copy.copy(tool)
+            for name, tool in self.toolkit.tools.items()
+        }
+        return toolkit
+
+
+def resolve_llm_settings() -> LLMSettings:
+    """Resolve the active LLM slot, falling back to DASHSCOPE_API_KEY."""
+    llm_cfg = get_active_llm_config()
+    if llm_cfg and llm_cfg.api_key:
+        return LLMSettings(
+            model_name=llm_cfg.model or DEFAULT_MODEL_NAME,
+            api_key=llm_cfg.api_key,
+            base_url=llm_cfg.base_url,
+        )
+    logger.warning(
+        "No active LLM configured — "
+        "falling back to DASHSCOPE_API_KEY env var",
+    )
+    return LLMSettings(
+        model_name=DEFAULT_MODEL_NAME,
+        api_key=os.getenv("DASHSCOPE_API_KEY", ""),
+        base_url=DASHSCOPE_BASE_URL,
+    )
+
+
+def _stat_key(path: Path) -> Tuple[Any, ...]:
+    try:
+        st = path.stat()
+    except OSError:
+        return (str(path), None)
+    return (str(path), st.st_mtime_ns, st.st_size)
+
+
+def _skills_fingerprint() -> Tuple[Any, ...]:
+    skills_dir = get_working_skills_dir()
+    entries = []
+    try:
+        with os.scandir(skills_dir) as it:
+            for entry in it:
+                if entry.is_dir():
+                    entries.append(
+                        _stat_key(Path(entry.path) / "SKILL.md"),
+                    )
+    except OSError:
+        return ()
+    return tuple(sorted(entries, key=lambda e: e[0]))
+
+
+@functools.lru_cache(maxsize=None)
+def _prompt_paths(agent_id: str) -> Tuple[Path, ...]:
+    paths = [Path(WORKING_DIR) / name for name, _ in PROMPT_FILE_ORDER]
+    paths.extend(get_agent_prompt_paths(agent_id))
+    return tuple(paths)
+
+
+def _prompt_fingerprint(agent_id: str) -> Tuple[Any, ...]:
+    return tuple(_stat_key(p) for p in _prompt_paths(agent_id))
+
+
+def compute_fingerprint(
+    agent_id: str,
+    llm: LLMSettings,
+) -> Tuple[Any, ...]:
+    """Fingerprint of everything an AgentTemplate is built from."""
+    return (
+        _skills_fingerprint(),
+        _prompt_fingerprint(agent_id),
+        llm,
+    )
+
+
+def _build_toolkit() -> Toolkit:
+    toolkit = Toolkit()
+    toolkit.register_tool_function(execute_shell_command)
+    toolkit.register_tool_function(read_file)
+    toolkit.register_tool_function(write_file)
+    toolkit.register_tool_function(edit_file)
+    toolkit.register_tool_function(browser_use)
+    # toolkit.register_tool_function(append_file)
+    toolkit.register_tool_function(desktop_screenshot)
+    toolkit.register_tool_function(send_file_to_user)
+    toolkit.register_tool_function(get_current_time)
+
+    # Check skills initialization
+    ensure_skills_initialized()
+
+    working_skills_dir = get_working_skills_dir()
+    for skill_name in list_available_skills():
+        skill_dir = working_skills_dir / skill_name
+        if skill_dir.exists():
+            try:
+                toolkit.register_agent_skill(str(skill_dir))
+                logger.debug("Registered skill: %s", skill_name)
+            except Exception as e:
+                logger.error(
+                    "Failed to register skill '%s': %s",
+                    skill_name,
+                    e,
+                )
+    return toolkit
+
+
+def build_agent_template(
+    agent_id: str,
+    llm: Optional[LLMSettings] = None,
+) -> AgentTemplate:
+    """Build a fresh AgentTemplate (tools, skills, prompt, model)."""
+    # Lazy import: react_agent imports this module.
+    from .react_agent import CoPawAgentFormatter
+
+    if llm is None:
+        llm = resolve_llm_settings()
+    fingerprint = compute_fingerprint(agent_id, llm)
+    return AgentTemplate(
+        agent_id=agent_id,
+        fingerprint=fingerprint,
+        toolkit=_build_toolkit(),
+        base_sys_prompt=build_agent_sys_prompt(agent_id),
+        model=OpenAIChatModel(
+            llm.model_name,
+            api_key=llm.api_key,
+            stream=True,
+            client_kwargs={"base_url": llm.base_url},
+        ),
+        formatter=CoPawAgentFormatter(),
+    )
+
+
+class AgentPool:
+    """Cache of AgentTemplate by agent_id, revalidated periodically."""
+
+    def __init__(
+        self,
+        revalidate_interval: float = DEFAULT_REVALIDATE_INTERVAL,
+    ) -> None:
+        """revalidate_interval: seconds a template is reused before its
+        fingerprint is recomputed (0 checks on every get())."""
+        self.revalidate_interval = revalidate_interval
+        self._templates: Dict[str, AgentTemplate] = {}
+        # agent_id -> time.monotonic() of the last fingerprint check
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, agent_id: str) -> AgentTemplate:
+        """Return a warm template, rebuilding it if its inputs changed."""
+        now = time.monotonic()
+        with self._lock:
+            template = self._templates.get(agent_id)
+            checked_at = self._checked_at.get(agent_id)
+            if (
+                template is not None
+                and checked_at is not None
+                and now - checked_at < self.revalidate_interval
+            ):
+                return template
+        llm = resolve_llm_settings()
+        fingerprint = compute_fingerprint(agent_id, llm)
+        if template is None or template.fingerprint != fingerprint:
+            logger.info("Building agent template: agent_id=%s", agent_id)
+            template = build_agent_template(agent_id, llm)
+        with self._lock:
+            self._templates[agent_id] = template
+            self._checked_at[agent_id] = now
+        return template
+
+    def invalidate(self, agent_id: Optional[str] = None) -> None:
+        """Drop one template (or all) so the next get() rebuilds it."""
+        with self._lock:
+            if agent_id is None:
+                self._templates.clear()
+                self._checked_at.clear()
+            else:
+                self._templates.pop(agent_id, None)
+                self._checked_at.pop(agent_id, None)
+
+
+# Global agent pool
+_agent_pool: Optional[AgentPool] = None
+
+
+def get_agent_pool() -> AgentPool:
+    """Return the process-wide AgentPool."""
+    global _agent_pool
+    if _agent_pool is None:
+        _agent_pool = AgentPool()
+    return _agent_pool
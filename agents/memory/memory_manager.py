@@ -30,7 +30,7 @@ from agentscope.message import (
 from agentscope.message import Msg
 from agentscope.tool import ToolResponse
 
-from ...config.utils import load_config
+from ...config.utils import get_config_snapshot
 from ...providers import get_active_llm_config
 
 logger = logging.getLogger(__name__)
@@ -327,7 +327,7 @@ class MemoryManager(ReMeFs):
             **kwargs,
         )
 
-        global_config = load_config()
+        global_config = get_config_snapshot()
         language = global_config.agents.language
 
         if language == "zh":
@@ -9,6 +9,13 @@ SYS_PROMPT = """
 You are a helpful assistant.
 """
 
+# Working-dir prompt files in loading order: (filename, required)
+PROMPT_FILE_ORDER = [
+    ("AGENTS.md", True),
+    ("SOUL.md", True),
+    ("PROFILE.md", False),
+]
+
 
 def build_system_prompt_from_working_dir() -> (
     str
@@ -37,17 +44,10 @@ def build_system_prompt_from_working_dir() -> (
 
     working_dir = Path(WORKING_DIR)
 
-    # Define file loading order: (filename, required)
-    file_order = [
-        ("AGENTS.md", True),
-        ("SOUL.md", True),
-        ("PROFILE.md", False),
-    ]
-
     prompt_parts = []
     loaded_count = 0
 
-    for filename, required in file_order:
+    for filename, required in PROMPT_FILE_ORDER:
         file_path = working_dir / filename
 
         if not file_path.exists():
@@ -116,6 +116,44 @@ def build_system_prompt_from_working_dir() -> (
     return final_prompt
 
 
+def get_agent_prompt_paths(agent_id: str) -> list[Path]:
+    """Candidate locations of an agent-specific system_prompt.md."""
+    from ..constant import WORKING_DIR
+
+    dirname = f"agent_{agent_id}_"
+    return [
+        Path(__file__).parent / dirname / "system_prompt.md",
+        Path(WORKING_DIR) / ".." / "agents" / dirname / "system_prompt.md",
+        Path.home() / ".cp9" / "agents" / dirname / "system_prompt.md",
+    ]
+
+
+def load_agent_prompt(agent_id: str) -> str:
+    """Load agent-specific system prompt; empty string if none found."""
+    for prompt_path in get_agent_prompt_paths(agent_id):
+        if prompt_path.exists():
+            try:
+                content = prompt_path.read_text(encoding="utf-8")
+                logger.info(
+                    "Loaded agent %s prompt from %s",
+                    agent_id,
+                    prompt_path,
+                )
+                return content
+            except Exception as e:
+                logger.warning(
+                    "Failed to load agent prompt from %s: %s",
+                    prompt_path,
+                    e,
+                )
+    return ""
+
+
+def build_agent_sys_prompt(agent_id: str) -> str:
+    """Agent-specific prompt if present, else the working-dir prompt."""
+    return load_agent_prompt(agent_id) or build_system_prompt_from_working_dir()
+
+
 def build_bootstrap_guidance(
     bootstrap_content: str,
     language: str = "zh",
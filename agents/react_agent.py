@@ -1,53 +1,39 @@
 # -*- coding: utf-8 -*-
 import logging
-import os
+import uuid
 from typing import Optional, Type, List, Sequence, Tuple, Any
 
 from agentscope.agent import ReActAgent
 from agentscope.agent._react_agent import _MemoryMark
 from agentscope.formatter import OpenAIChatFormatter
 from agentscope.memory import InMemoryMemory
-from agentscope.message import Msg, TextBlock
-from agentscope.model import OpenAIChatModel
-from agentscope.tool import Toolkit
+from agentscope.message import Msg, TextBlock, ToolUseBlock
 from pydantic import BaseModel
 
+from .agent_pool import AgentTemplate, build_agent_template
 from .prompt import (
-    build_system_prompt_from_working_dir,
     build_bootstrap_guidance,
+    load_agent_prompt,
 )
-from .skills_manager import (
-    ensure_skills_initialized,
-    get_working_skills_dir,
-    list_available_skills,
-)
-from .tools import (
-    execute_shell_command,
-    read_file,
-    write_file,
-    edit_file,
-    send_file_to_user,
-    desktop_screenshot,
-    browser_use,
-    create_memory_search_tool,
-    get_current_time,
-)
+from .tools import create_memory_search_tool
 from .utils import (
     process_file_and_media_blocks_in_message,
-    count_message_tokens,
+    _extract_text_from_messages,
+    count_text_tokens,
+    get_message_digest,
     check_valid_messages,
     extract_tool_ids,
     is_first_user_interaction,
     prepend_to_message_content,
 )
 from ..agents.memory import MemoryManager
-from ..config import load_config
+from ..config import get_config_snapshot
+from ..db.writer import get_configured_writer
 from ..constant import (
     MEMORY_COMPACT_THRESHOLD,
     MEMORY_COMPACT_KEEP_RECENT,
     WORKING_DIR,
 )
-from ..providers import get_active_llm_config
 
 logger = logging.getLogger(__name__)
 
@@ -295,7 +281,54 @@ CoPawAgentFormatter = create_file_block_support_formatter(
 
 
 class CoPawInMemoryMemory(InMemoryMemory):
-    """bugfix"""
+    """bugfix
+
+    Also caches per-message token counts (msg.id -> (content digest,
+    tokens)) so the compaction hook only tokenizes new or edited messages.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._token_counts: dict[str, tuple[str, int]] = {}
+
+    async def count_tokens(self, msgs: list[Msg], formatter: Any) -> int:
+        """Sum token counts of msgs, tokenizing only uncached messages.
+
+        Each uncached message is formatted on its own with ``formatter``
+        and all of them are tokenized in one batch.
+        """
+        total = 0
+        missing: list[tuple[Msg, str]] = []
+        for msg in msgs:
+            digest = get_message_digest(msg)
+            cached = self._token_counts.get(msg.id)
+            if cached is not None and cached[0] == digest:
+                total += cached[1]
+            else:
+                missing.append((msg, digest))
+
+        if missing:
+            texts = []
+            for msg, _ in missing:
+                formatted = await formatter.format(msgs=[msg])
+                texts.append(_extract_text_from_messages(formatted))
+            for (msg, digest), count in zip(
+                missing,
+                count_text_tokens(texts),
+            ):
+                self._token_counts[msg.id] = (digest, count)
+                total += count
+            self._prune_token_counts()
+        return total
+
+    def _prune_token_counts(self) -> None:
+        """Drop cached counts of messages no longer in memory."""
+        if len(self._token_counts) <= 2 * len(self.content):
+            return
+        live = {msg.id for msg, _ in self.content}
+        self._token_counts = {
+            k: v for k, v in self._token_counts.items() if k in live
+        }
 
     async def get_memory(
         self,
@@ -321,6 +354,9 @@ class CoPawInMemoryMemory(InMemoryMemory):
         return {
             "content": [[msg.to_dict(), marks] for msg, marks in self.content],
             "_compressed_summary": self._compressed_summary,
+            "_token_counts": {
+                k: list(v) for k, v in self._token_counts.items()
+            },
         }
 
     def load_state_dict(self, state_dict: dict, strict: bool = True) -> None:
@@ -349,6 +385,12 @@ class CoPawInMemoryMemory(InMemoryMemory):
                 )
 
         self._compressed_summary = state_dict.get("_compressed_summary", "")
+        live = {msg.id for msg, _ in self.content}
+        self._token_counts = {
+            k: (v[0], int(v[1]))
+            for k, v in state_dict.get("_token_counts", {}).items()
+            if k in live
+        }
 
 
 class CoPawAgent(ReActAgent):
@@ -359,6 +401,7 @@ class CoPawAgent(ReActAgent):
         mcp_clients: Optional[List[Any]] = None,
         memory_manager: MemoryManager | None = None,
         agent_id: str = "00",
+        template: Optional[AgentTemplate] = None,
     ):
         """Initialize CoPawAgent.
 
@@ -366,70 +409,27 @@ class CoPawAgent(ReActAgent):
             env_context: Optional environment context
             enable_memory_manager: Whether to enable memory manager
             agent_id: Agent ID for loading specific config
+            template: Warm AgentTemplate (from AgentPool) providing
+                toolkit, system prompt, model and formatter. Built from
+                scratch when omitted.
         """
         self.agent_id = agent_id
-        
-        toolkit = Toolkit()
         self._mcp_clients = mcp_clients or []
         self._env_context = env_context
-        toolkit.register_tool_function(execute_shell_command)
-        toolkit.register_tool_function(read_file)
-        toolkit.register_tool_function(write_file)
-        toolkit.register_tool_function(edit_file)
-        toolkit.register_tool_function(browser_use)
-        # toolkit.register_tool_function(append_file)
-        toolkit.register_tool_function(desktop_screenshot)
-        toolkit.register_tool_function(send_file_to_user)
-        toolkit.register_tool_function(get_current_time)
-
-        # Check skills initialization
-        ensure_skills_initialized()
-
-        working_skills_dir = get_working_skills_dir()
-        available_skills = list_available_skills()
-
-        for skill_name in available_skills:
-            skill_dir = working_skills_dir / skill_name
-            if skill_dir.exists():
-                try:
-                    toolkit.register_agent_skill(str(skill_dir))
-                    logger.debug("Registered skill: %s", skill_name)
-                except Exception as e:
-                    logger.error(
-                        "Failed to register skill '%s': %s",
-                        skill_name,
-                        e,
-                    )
 
-        sys_prompt = self._build_sys_prompt()
+        if template is None:
+            template = build_agent_template(agent_id)
+        self._template = template
 
-        # Resolve model / api_key / base_url from the active LLM slot
-        llm_cfg = get_active_llm_config()
-        if llm_cfg and llm_cfg.api_key:
-            model_name = llm_cfg.model or "qwen3-max"
-            api_key = llm_cfg.api_key
-            base_url = llm_cfg.base_url
-        else:
-            logger.warning(
-                "No active LLM configured — "
-                "falling back to DASHSCOPE_API_KEY env var",
-            )
-            model_name = "qwen3-max"
-            api_key = os.getenv("DASHSCOPE_API_KEY", "")
-            base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+        sys_prompt = self._build_sys_prompt()
 
         super().__init__(
             name="Friday",
-            model=OpenAIChatModel(
-                model_name,
-                api_key=api_key,
-                stream=True,
-                client_kwargs={"base_url": base_url},
-            ),
+            model=template.model,
             sys_prompt=sys_prompt,
-            toolkit=toolkit,
+            toolkit=template.new_toolkit(),
             memory=CoPawInMemoryMemory(),
-            formatter=CoPawAgentFormatter(),
+            formatter=template.formatter,
         )
         self.memory_manager = memory_manager
 
@@ -455,48 +455,27 @@ class CoPawAgent(ReActAgent):
             logger.debug("Registered memory compaction hook")
 
         self._bootstrap_checked = False
+        # Trace id shared by the tool spans of one reply
+        self._trace_id: Optional[str] = None
 
     def _build_sys_prompt(self) -> str:
-        """Build system prompt from working dir files and env context."""
-        # 首先尝试加载 Agent 专属配置
-        agent_sys_prompt = self._load_agent_prompt(self.agent_id)
-        if agent_sys_prompt:
-            sys_prompt = agent_sys_prompt
-        else:
-            sys_prompt = build_system_prompt_from_working_dir()
-        
+        """Build system prompt from the template and env context."""
+        sys_prompt = self._template.base_sys_prompt
         if self._env_context is not None:
             sys_prompt = self._env_context + "\n\n" + sys_prompt
         return sys_prompt
-    
+
     def _load_agent_prompt(self, agent_id: str) -> str:
         """Load agent-specific system prompt."""
-        import os
-        from pathlib import Path
-        
-        # Agent 配置目录
-        agent_dirs = [
-            Path(__file__).parent / f"agent_{agent_id}_" / "system_prompt.md",
-            Path(WORKING_DIR) / ".." / "agents" / f"agent_{agent_id}_" / "system_prompt.md",
-            Path.home() / ".cp9" / "agents" / f"agent_{agent_id}_" / "system_prompt.md",
-        ]
-        
-        for agent_dir in agent_dirs:
-            if agent_dir.exists():
-                try:
-                    with open(agent_dir, "r", encoding="utf-8") as f:
-                        logger.info(f"Loaded agent {agent_id} prompt from {agent_dir}")
-                        return f.read()
-                except Exception as e:
-                    logger.warning(f"Failed to load agent prompt from {agent_dir}: {e}")
-        
-        return ""
+        return load_agent_prompt(agent_id)
 
     def rebuild_sys_prompt(self) -> None:
         """Rebuild and replace the system prompt.
 
         Useful after load_session_state to ensure the prompt reflects
-        the latest AGENTS.md / SOUL.md / PROFILE.md on disk.
+        the latest AGENTS.md / SOUL.md / PROFILE.md on disk (the template
+        is revalidated against those files at most once per
+        ``AgentPool.revalidate_interval`` seconds).
 
         Updates both ``self._sys_prompt`` and the first system-role
         message stored in ``self.memory.content`` (if one exists).
@@ -534,7 +513,7 @@ class CoPawAgent(ReActAgent):
             if not is_first_user_interaction(messages):
                 return None
 
-            config = load_config()
+            config = get_config_snapshot()
             language = config.agents.language
             bootstrap_content = bootstrap_path.read_text(encoding="utf-8")
             bootstrap_guidance = build_bootstrap_guidance(
@@ -629,12 +608,16 @@ class CoPawAgent(ReActAgent):
                 messages_to_compact = remaining_messages
                 messages_to_keep = []
 
-            # Count tokens for compactable messages only
-            prompt = await self.formatter.format(msgs=messages_to_compact)
+            # Count tokens for compactable messages only (cached per msg)
             try:
-                estimated_tokens: int = await count_message_tokens(prompt)
+                estimated_tokens: int = await self.memory.count_tokens(
+                    messages_to_compact,
+                    self.formatter,
+                )
             except Exception as e:
-                estimated_tokens = len(str(prompt)) // 4
+                estimated_tokens = (
+                    sum(len(str(m.content)) for m in messages_to_compact) // 4
+                )
                 logger.exception(
                     f"Failed to count tokens: {e}\n"
                     f"using estimated_tokens={estimated_tokens}",
@@ -703,8 +686,22 @@ class CoPawAgent(ReActAgent):
             logger.info(f"Received command: {query}")
             return await self.system_process(query)
 
+        self._trace_id = uuid.uuid4().hex
         return await super().reply(msg=msg, structured_model=structured_model)
 
+    async def _acting(self, tool_call: ToolUseBlock) -> dict | None:
+        """Run a tool call, recorded as a trace span when a database is
+        configured (queued for the batch writer, no DB round-trip)."""
+        writer = get_configured_writer()
+        if writer is None:
+            return await super()._acting(tool_call)
+        with writer.span(
+            f"tool:{tool_call.get('name')}",
+            agent_id=self.agent_id,
+            trace_id=self._trace_id,
+        ):
+            return await super()._acting(tool_call)
+
     async def system_process(self, query: str):
         messages = await self.memory.get_memory(
             exclude_mark=_MemoryMark.COMPRESSED,
@@ -5,8 +5,14 @@
 Single tool with action-based API matching browser MCP: start, stop, open,
 navigate, navigate_back, screenshot, snapshot, click, type, eval, evaluate,
 resize, console_messages, handle_dialog, file_upload, fill_form, install,
-press_key, network_requests, run_code, drag, hover, select_option, tabs,
-wait_for, pdf, close. Uses refs from snapshot for ref-based actions.
+press_key, network_requests, capture_filter, run_code, drag, hover,
+select_option, tabs, wait_for, pdf, close. Uses refs from snapshot for
+ref-based actions.
+
+Each agent session works in its own browser context leased from a shared,
+warm browser (utils.browser_pool); pages, refs and logs are per session.
+Console and network capture is kept in bounded ring buffers
+(utils.browser_capture) and can be read incrementally with a cursor.
 """
 
 import asyncio
@@ -15,31 +21,68 @@ import logging
 import subprocess
 import sys
 import time
-from typing import Any
+from contextvars import ContextVar, Token
+from typing import Any, Optional
 
 from agentscope.message import TextBlock
 from agentscope.tool import ToolResponse
 
+from ...constant import (
+    BROWSER_CONSOLE_BUFFER_SIZE,
+    BROWSER_IDLE_TIMEOUT,
+    BROWSER_MAX_CONTEXTS,
+    BROWSER_MAX_PAGES,
+    BROWSER_NETWORK_BUFFER_SIZE,
+)
+from ...utils.browser_capture import CaptureFilter, PageCapture, level_rank
+from ...utils.browser_pool import BrowserPool, BrowserSession
 from .browser_snapshot import build_role_snapshot_from_aria
 
 logger = logging.getLogger(__name__)
 
-# Process-global browser state (one browser, multiple pages by page_id)
-_state: dict[str, Any] = {
-    "playwright": None,
-    "browser": None,
-    "context": None,
-    "pages": {},
-    "refs": {},  # page_id -> ref -> {role, name?, nth?}
-    "refs_frame": {},  # page_id -> frame for last snapshot
-    "console_logs": {},  # page_id -> list of {level, text}
-    "network_requests": {},  # page_id -> list of request dicts
-    "pending_dialogs": {},  # page_id -> dialog handlers
-    "pending_file_choosers": {},  # page_id -> FileChooser list
-    "headless": True,
-    "current_page_id": None,
-    "page_counter": 0,  # monotonic counter for page_N ids, avoids reuse after close
-}
+# One warm browser shared by all sessions; each session (see
+# set_browser_session) leases its own context holding its pages, refs and
+# per-page logs.
+_pool: Optional[BrowserPool] = None
+
+_browser_session: ContextVar[str] = ContextVar(
+    "browser_session",
+    default="default",
+)
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool (created on first use)."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool(
+            max_contexts=BROWSER_MAX_CONTEXTS,
+            max_pages=BROWSER_MAX_PAGES,
+            idle_timeout=BROWSER_IDLE_TIMEOUT,
+            console_capacity=BROWSER_CONSOLE_BUFFER_SIZE,
+            network_capacity=BROWSER_NETWORK_BUFFER_SIZE,
+            on_new_context=_attach_context_listeners,
+        )
+    return _pool
+
+
+def set_browser_session(key: str) -> Token:
+    """Bind browser_use calls in the current context to session key."""
+    return _browser_session.set(key or "default")
+
+
+def reset_browser_session(token: Token) -> None:
+    """Undo the set_browser_session call that returned token."""
+    try:
+        _browser_session.reset(token)
+    except ValueError:
+        # Generator finalized from another context (e.g. aclose on GC)
+        logger.debug("Browser session token reset in another context")
+
+
+def _session() -> Optional[BrowserSession]:
+    """Browser state of the calling session, None if it has no context."""
+    return get_browser_pool().get(_browser_session.get())
 
 
 def _tool_response(text: str) -> ToolResponse:
@@ -119,6 +162,8 @@ async def browser_use(  # pylint: disable=R0911,R0912
     text_gone: str = "",
     frame_selector: str = "",
     headed: bool = False,
+    since: int = -1,
+    capture_json: str = "",
 ) -> ToolResponse:
     """Control browser (Playwright). Default is headless. Use headed=True with
     action=start to open a visible browser window. Flow: start, open(url),
@@ -129,9 +174,9 @@ async def browser_use(  # pylint: disable=R0911,R0912
         action (str):
             Required. Action type. Values: start, stop, open, navigate,
             navigate_back, snapshot, screenshot, click, type, eval, evaluate,
-            resize, console_messages, network_requests, handle_dialog,
-            file_upload, fill_form, install, press_key, run_code, drag, hover,
-            select_option, tabs, wait_for, pdf, close.
+            resize, console_messages, network_requests, capture_filter,
+            handle_dialog, file_upload, fill_form, install, press_key,
+            run_code, drag, hover, select_option, tabs, wait_for, pdf, close.
         url (str):
             URL to open. Required for action=open or navigate.
         page_id (str):
@@ -230,9 +275,16 @@ async def browser_use(  # pylint: disable=R0911,R0912
         headed (bool):
             When True with action=start, launch a visible browser window
             (non-headless). User can see the real browser. Default False.
-        headed (bool):
-            When True with action=start, launch a visible browser window
-            (non-headless). User can see the real browser. Default False.
+        since (int):
+            Cursor for console_messages/network_requests: return only
+            entries after it. Pass the next_cursor of the previous call;
+            -1 (default) returns all retained entries.
+        capture_json (str):
+            JSON object for action=capture_filter limiting what pages
+            record from now on, e.g. {"resource_types": ["xhr", "fetch"],
+            "url_pattern": "api/", "min_status": 400,
+            "console_level": "warning"}. Also accepts
+            exclude_resource_types and max_status; empty resets to all.
     """
     action = (action or "").strip().lower()
     if not action:
@@ -245,14 +297,11 @@ async def browser_use(  # pylint: disable=R0911,R0912
         )
 
     page_id = (page_id or "default").strip() or "default"
-    current = _state.get("current_page_id")
-    pages = _state.get("pages") or {}
-    if page_id == "default" and current and current in pages:
-        page_id = current
-    current = _state.get("current_page_id")
-    pages = _state.get("pages") or {}
-    if page_id == "default" and current and current in pages:
-        page_id = current
+    session = _session()
+    if session is not None:
+        current = session.current_page_id
+        if page_id == "default" and current and current in session.pages:
+            page_id = current
 
     try:
         if action == "start":
@@ -321,6 +370,7 @@ async def browser_use(  # pylint: disable=R0911,R0912
                 page_id,
                 level,
                 filename or path,
+                since,
             )
         if action == "handle_dialog":
             return await _action_handle_dialog(page_id, accept, prompt_text)
@@ -337,7 +387,10 @@ async def browser_use(  # pylint: disable=R0911,R0912
                 page_id,
                 include_static,
                 filename or path,
+                since,
             )
+        if action == "capture_filter":
+            return await _action_capture_filter(capture_json)
         if action == "run_code":
             return await _action_run_code(page_id, code)
         if action == "drag":
@@ -395,12 +448,24 @@ async def browser_use(  # pylint: disable=R0911,R0912
 
 def _get_page(page_id: str):
     """Return page for page_id or None if not found."""
-    return _state["pages"].get(page_id)
+    session = _session()
+    return session.pages.get(page_id) if session is not None else None
 
 
 def _get_refs(page_id: str) -> dict[str, dict]:
     """Return refs map for page_id (ref -> {role, name?, nth?})."""
-    return _state["refs"].setdefault(page_id, {})
+    session = _session()
+    if session is None:
+        return {}
+    return session.refs.setdefault(page_id, {})
+
+
+def _page_state(name: str, page_id: str, default: Any) -> Any:
+    """Per-page entry of a BrowserSession mapping (e.g. pending_dialogs)."""
+    session = _session()
+    if session is None:
+        return default
+    return getattr(session, name).get(page_id, default)
 
 
 def _get_root(page, _page_id: str, frame_selector: str = ""):
@@ -431,130 +496,125 @@ def _get_locator_by_ref(
     return locator
 
 
-def _attach_page_listeners(page, page_id: str) -> None:
+def _attach_page_listeners(
+    page,
+    page_id: str,
+    session: BrowserSession,
+) -> None:
     """Attach console and request listeners for a page."""
-    logs = _state["console_logs"].setdefault(page_id, [])
+    capture = session.captures.get(page_id)
+    if capture is None:
+        capture = PageCapture(
+            session.console_capacity,
+            session.network_capacity,
+            session.capture_filter,
+        )
+        session.captures[page_id] = capture
 
     def on_console(msg):
-        logs.append({"level": msg.type, "text": msg.text})
+        capture.on_console(msg.type, msg.text)
 
     page.on("console", on_console)
-    requests_list = _state["network_requests"].setdefault(page_id, [])
 
     def on_request(req):
-        requests_list.append(
-            {
-                "url": req.url,
-                "method": req.method,
-                "resourceType": getattr(req, "resource_type", None),
-            },
+        capture.on_request(
+            req,
+            req.url,
+            req.method,
+            getattr(req, "resource_type", None),
         )
 
     def on_response(res):
-        for r in requests_list:
-            if r.get("url") == res.url and "status" not in r:
-                r["status"] = res.status
-                break
+        capture.on_response(res.request, res.status)
+
+    def on_request_failed(req):
+        capture.on_request_failed(req, req.failure or "")
 
     page.on("request", on_request)
     page.on("response", on_response)
-    dialogs = _state["pending_dialogs"].setdefault(page_id, [])
+    page.on("requestfailed", on_request_failed)
+    dialogs = session.pending_dialogs.setdefault(page_id, [])
 
     def on_dialog(dialog):
         dialogs.append(dialog)
 
     page.on("dialog", on_dialog)
-    choosers = _state["pending_file_choosers"].setdefault(page_id, [])
+    choosers = session.pending_file_choosers.setdefault(page_id, [])
 
     def on_filechooser(chooser):
         choosers.append(chooser)
 
     page.on("filechooser", on_filechooser)
 
+    def on_close(_page):
+        # Closed by the site or user: free its slot in the pool
+        if session.pages.get(page_id) is page:
+            session.remove_page(page_id)
 
-def _next_page_id() -> str:
-    """Return a unique page_id (page_N).
-    Uses monotonic counter so IDs are not reused after close."""
-    _state["page_counter"] = _state.get("page_counter", 0) + 1
-    return f"page_{_state['page_counter']}"
+    page.on("close", on_close)
 
 
-def _attach_context_listeners(context) -> None:
+def _attach_context_listeners(session: BrowserSession) -> None:
     """When the page opens a new tab (e.g. target=_blank, window.open),
     register it and set as current."""
 
     def on_page(page):
-        new_id = _next_page_id()
-        _state["refs"][new_id] = {}
-        _state["console_logs"][new_id] = []
-        _state["network_requests"][new_id] = []
-        _state["pending_dialogs"][new_id] = []
-        _state["pending_file_choosers"][new_id] = []
-        _attach_page_listeners(page, new_id)
-        _state["pages"][new_id] = page
-        _state["current_page_id"] = new_id
+        if session.opening or session.page_id_of(page) is not None:
+            # Opened by this tool; registered by the caller
+            return
+        new_id = session.next_page_id()
+        session.add_page(new_id, page)
+        _attach_page_listeners(page, new_id, session)
+        session.current_page_id = new_id
         logger.debug(
             "New tab opened by page, registered as page_id=%s",
             new_id,
         )
 
-    context.on("page", on_page)
+    session.context.on("page", on_page)
 
 
-async def _ensure_browser() -> bool:
-    """Start browser if not running. Return True if ready, False on failure."""
-    if _state["browser"] is not None and _state["context"] is not None:
-        return True
+async def _ensure_browser() -> Optional[BrowserSession]:
+    """Lease this session's context (starting the browser if needed).
+    Return None on failure."""
     try:
-        async_playwright = _ensure_playwright_async()
-        pw = await async_playwright().start()
-        pw_browser = await pw.chromium.launch(headless=_state["headless"])
-        context = await pw_browser.new_context()
-        _attach_context_listeners(context)
-        _state["playwright"] = pw
-        _state["browser"] = pw_browser
-        _state["context"] = context
-        return True
+        return await get_browser_pool().lease(_browser_session.get())
     except Exception:
-        return False
+        logger.debug("Browser lease failed", exc_info=True)
+        return None
+
+
+async def _open_page(session: BrowserSession, page_id: str):
+    """Open a new page registered as page_id (replacing any old one)."""
+    get_browser_pool().reserve_page(session)
+    old = session.pages.get(page_id)
+    page = await session.new_page()
+    if old is not None:
+        session.remove_page(page_id)
+        try:
+            await old.close()
+        except Exception:
+            pass
+    session.add_page(page_id, page)
+    _attach_page_listeners(page, page_id, session)
+    return page
 
 
 async def _action_start(headed: bool = False) -> ToolResponse:
-    # If user asks for visible window (headed=True)
-    # but browser is already running headless, restart with headed
-    if _state["browser"] is not None:
-        if headed and _state["headless"]:
-            try:
-                await _state["browser"].close()
-                if _state["playwright"] is not None:
-                    await _state["playwright"].stop()
-            except Exception:
-                pass
-            finally:
-                _state["playwright"] = None
-                _state["browser"] = None
-                _state["context"] = None
-                _state["pages"].clear()
-                _state["refs"].clear()
-                _state["refs_frame"].clear()
-                _state["console_logs"].clear()
-                _state["network_requests"].clear()
-                _state["pending_dialogs"].clear()
-                _state["pending_file_choosers"].clear()
-                _state["current_page_id"] = None
-                _state["page_counter"] = 0
-        else:
-            return _tool_response(
-                json.dumps(
-                    {"ok": True, "message": "Browser already running"},
-                    ensure_ascii=False,
-                    indent=2,
-                ),
-            )
-    # Default: headless (background). Only headed=True (e.g. browser_visible skill) shows window.
-    _state["headless"] = not headed
+    # If user asks for visible window (headed=True) but this session's
+    # browser is headless, its context is replaced by a headed one.
+    pool = get_browser_pool()
+    session = pool.get(_browser_session.get())
+    if session is not None and not (headed and session.headless):
+        return _tool_response(
+            json.dumps(
+                {"ok": True, "message": "Browser already running"},
+                ensure_ascii=False,
+                indent=2,
+            ),
+        )
     try:
-        async_playwright = _ensure_playwright_async()
+        _ensure_playwright_async()
     except ImportError as e:
         return _tool_response(
             json.dumps(
@@ -564,21 +624,15 @@ async def _action_start(headed: bool = False) -> ToolResponse:
             ),
         )
     try:
-        pw = await async_playwright().start()
-        pw_browser = await pw.chromium.launch(headless=_state["headless"])
-        context = await pw_browser.new_context()
-        _attach_context_listeners(context)
-        _state["playwright"] = pw
-        _state["browser"] = pw_browser
-        _state["context"] = context
-        msg = (
-            "Browser started (visible window)"
-            if _state["headless"] is False
-            else "Browser started"
+        # Default: headless (background). Only headed=True (e.g.
+        # browser_visible skill) shows window.
+        session = await pool.lease(
+            _browser_session.get(),
+            headless=not headed,
         )
         msg = (
             "Browser started (visible window)"
-            if _state["headless"] is False
+            if session.headless is False
             else "Browser started"
         )
         return _tool_response(
@@ -599,40 +653,26 @@ async def _action_start(headed: bool = False) -> ToolResponse:
 
 
 async def _action_stop() -> ToolResponse:
-    if _state["browser"] is None:
+    # Closes this session's context; the shared browser stays warm for
+    # the next start (and for other sessions).
+    try:
+        released = await get_browser_pool().release(_browser_session.get())
+    except Exception as e:
         return _tool_response(
             json.dumps(
-                {"ok": True, "message": "Browser not running"},
+                {"ok": False, "error": f"Browser stop failed: {e!s}"},
                 ensure_ascii=False,
                 indent=2,
             ),
         )
-    try:
-        await _state["browser"].close()
-        if _state["playwright"] is not None:
-            await _state["playwright"].stop()
-    except Exception as e:
+    if not released:
         return _tool_response(
             json.dumps(
-                {"ok": False, "error": f"Browser stop failed: {e!s}"},
+                {"ok": True, "message": "Browser not running"},
                 ensure_ascii=False,
                 indent=2,
             ),
         )
-    finally:
-        _state["playwright"] = None
-        _state["browser"] = None
-        _state["context"] = None
-        _state["pages"].clear()
-        _state["refs"].clear()
-        _state["refs_frame"].clear()
-        _state["console_logs"].clear()
-        _state["network_requests"].clear()
-        _state["pending_dialogs"].clear()
-        _state["pending_file_choosers"].clear()
-        _state["current_page_id"] = None
-        _state["page_counter"] = 0
-        _state["headless"] = True  # next start defaults to background
     return _tool_response(
         json.dumps(
             {"ok": True, "message": "Browser stopped"},
@@ -652,7 +692,8 @@ async def _action_open(url: str, page_id: str) -> ToolResponse:
                 indent=2,
             ),
         )
-    if not await _ensure_browser():
+    session = await _ensure_browser()
+    if session is None:
         return _tool_response(
             json.dumps(
                 {"ok": False, "error": "Browser not started"},
@@ -661,17 +702,9 @@ async def _action_open(url: str, page_id: str) -> ToolResponse:
             ),
         )
     try:
-        page = await _state["context"].new_page()
-        _state["refs"][page_id] = {}
-        _state["console_logs"][page_id] = []
-        _state["network_requests"][page_id] = []
-        _state["pending_dialogs"][page_id] = []
-        _state["pending_file_choosers"][page_id] = []
-        _attach_page_listeners(page, page_id)
+        page = await _open_page(session, page_id)
         await page.goto(url)
-        _state["pages"][page_id] = page
-        _state["current_page_id"] = page_id
-        _state["current_page_id"] = page_id
+        session.current_page_id = page_id
         return _tool_response(
             json.dumps(
                 {
@@ -715,8 +748,9 @@ async def _action_navigate(url: str, page_id: str) -> ToolResponse:
         )
     try:
         await page.goto(url)
-        _state["current_page_id"] = page_id
-        _state["current_page_id"] = page_id
+        session = _session()
+        if session is not None:
+            session.current_page_id = page_id
         return _tool_response(
             json.dumps(
                 {
@@ -1065,22 +1099,9 @@ async def _action_close(page_id: str) -> ToolResponse:
         )
     try:
         await page.close()
-        del _state["pages"][page_id]
-        for key in (
-            "refs",
-            "refs_frame",
-            "console_logs",
-            "network_requests",
-            "pending_dialogs",
-            "pending_file_choosers",
-        ):
-            _state[key].pop(page_id, None)
-        if _state.get("current_page_id") == page_id:
-            remaining = list(_state["pages"].keys())
-            _state["current_page_id"] = remaining[0] if remaining else None
-        if _state.get("current_page_id") == page_id:
-            remaining = list(_state["pages"].keys())
-            _state["current_page_id"] = remaining[0] if remaining else None
+        session = _session()
+        if session is not None:
+            session.remove_page(page_id)
         return _tool_response(
             json.dumps(
                 {"ok": True, "message": f"Closed page '{page_id}'"},
@@ -1122,10 +1143,12 @@ async def _action_snapshot(
             interactive=False,
             compact=False,
         )
-        _state["refs"][page_id] = refs
-        _state["refs_frame"][page_id] = (
-            frame_selector.strip() if frame_selector else ""
-        )
+        session = _session()
+        if session is not None:
+            session.refs[page_id] = refs
+            session.refs_frame[page_id] = (
+                frame_selector.strip() if frame_selector else ""
+            )
         out = {
             "ok": True,
             "snapshot": snapshot,
@@ -1291,14 +1314,18 @@ async def _action_resize(
         )
 
 
+def _get_capture(page_id: str) -> Optional[PageCapture]:
+    session = _session()
+    return session.captures.get(page_id) if session is not None else None
+
+
 async def _action_console_messages(
     page_id: str,
     level: str,
     filename: str,
+    since: int = -1,
 ) -> ToolResponse:
     level = (level or "info").strip().lower()
-    order = ("error", "warning", "info", "debug")
-    idx = order.index(level) if level in order else 2
     page = _get_page(page_id)
     if not page:
         return _tool_response(
@@ -1308,12 +1335,14 @@ async def _action_console_messages(
                 indent=2,
             ),
         )
-    logs = _state["console_logs"].get(page_id, [])
-    filtered = (
-        [m for m in logs if order.index(m["level"]) <= idx]
-        if level in order
-        else logs
+    capture = _get_capture(page_id)
+    records, next_cursor, missed = (
+        capture.console.since(since) if capture is not None else ([], 0, 0)
     )
+    max_rank = level_rank(level)
+    filtered = [
+        r.to_dict() for r in records if level_rank(r.level) <= max_rank
+    ]
     lines = [f"[{m['level']}] {m['text']}" for m in filtered]
     text = "\n".join(lines)
     if filename and filename.strip():
@@ -1325,18 +1354,21 @@ async def _action_console_messages(
                     "ok": True,
                     "message": f"Console messages saved to {filename}",
                     "filename": filename.strip(),
+                    "next_cursor": next_cursor,
                 },
                 ensure_ascii=False,
                 indent=2,
             ),
         )
-    return _tool_response(
-        json.dumps(
-            {"ok": True, "messages": filtered, "text": text},
-            ensure_ascii=False,
-            indent=2,
-        ),
-    )
+    out = {
+        "ok": True,
+        "messages": filtered,
+        "text": text,
+        "next_cursor": next_cursor,
+    }
+    if missed:
+        out["missed"] = missed
+    return _tool_response(json.dumps(out, ensure_ascii=False, indent=2))
 
 
 async def _action_handle_dialog(
@@ -1353,7 +1385,7 @@ async def _action_handle_dialog(
                 indent=2,
             ),
         )
-    dialogs = _state["pending_dialogs"].get(page_id, [])
+    dialogs = _page_state("pending_dialogs", page_id, [])
     if not dialogs:
         return _tool_response(
             json.dumps(
@@ -1402,7 +1434,7 @@ async def _action_file_upload(page_id: str, paths_json: str) -> ToolResponse:
     if not isinstance(paths, list):
         paths = []
     try:
-        choosers = _state["pending_file_choosers"].get(page_id, [])
+        choosers = _page_state("pending_file_choosers", page_id, [])
         if not choosers:
             return _tool_response(
                 json.dumps(
@@ -1463,7 +1495,7 @@ async def _action_fill_form(page_id: str, fields_json: str) -> ToolResponse:
         )
     refs = _get_refs(page_id)
     # Use last snapshot's frame so fill_form works after iframe snapshot
-    frame = _state["refs_frame"].get(page_id, "")
+    frame = _page_state("refs_frame", page_id, "")
     try:
         for f in fields:
             ref = (f.get("ref") or "").strip()
@@ -1574,6 +1606,7 @@ async def _action_network_requests(
     page_id: str,
     include_static: bool,
     filename: str,
+    since: int = -1,
 ) -> ToolResponse:
     page = _get_page(page_id)
     if not page:
@@ -1584,12 +1617,17 @@ async def _action_network_requests(
                 indent=2,
             ),
         )
-    requests = _state["network_requests"].get(page_id, [])
+    capture = _get_capture(page_id)
+    records, next_cursor, missed = (
+        capture.network.since(since) if capture is not None else ([], 0, 0)
+    )
     if not include_static:
         static = ("image", "stylesheet", "font", "media")
-        requests = [r for r in requests if r.get("resourceType") not in static]
+        records = [r for r in records if r.resource_type not in static]
+    requests = [r.to_dict() for r in records]
     lines = [
-        f"{r.get('method', '')} {r.get('url', '')} {r.get('status', '')}"
+        f"{r.get('method', '')} {r.get('url', '')} "
+        f"{r.get('status', r.get('failure', ''))}"
         for r in requests
     ]
     text = "\n".join(lines)
@@ -1602,14 +1640,58 @@ async def _action_network_requests(
                     "ok": True,
                     "message": f"Network requests saved to {filename}",
                     "filename": filename.strip(),
+                    "next_cursor": next_cursor,
                 },
                 ensure_ascii=False,
                 indent=2,
             ),
         )
+    out = {
+        "ok": True,
+        "requests": requests,
+        "text": text,
+        "next_cursor": next_cursor,
+    }
+    if missed:
+        out["missed"] = missed
+    return _tool_response(json.dumps(out, ensure_ascii=False, indent=2))
+
+
+async def _action_capture_filter(capture_json: str) -> ToolResponse:
+    """Set (or with empty capture_json reset) what pages of this session
+    record in their console/network buffers."""
+    session = _session()
+    if session is None:
+        return _tool_response(
+            json.dumps(
+                {"ok": False, "error": "Browser not started"},
+                ensure_ascii=False,
+                indent=2,
+            ),
+        )
+    spec = _parse_json_param(capture_json, {})
+    if not isinstance(spec, dict):
+        return _tool_response(
+            json.dumps(
+                {"ok": False, "error": "capture_json must be a JSON object"},
+                ensure_ascii=False,
+                indent=2,
+            ),
+        )
+    try:
+        capture_filter = CaptureFilter.from_dict(spec)
+    except ValueError as e:
+        return _tool_response(
+            json.dumps(
+                {"ok": False, "error": str(e)},
+                ensure_ascii=False,
+                indent=2,
+            ),
+        )
+    session.set_capture_filter(capture_filter)
     return _tool_response(
         json.dumps(
-            {"ok": True, "requests": requests, "text": text},
+            {"ok": True, "filter": capture_filter.to_dict()},
             ensure_ascii=False,
             indent=2,
         ),
@@ -1888,7 +1970,8 @@ async def _action_tabs(  # pylint: disable=too-many-return-statements
                 indent=2,
             ),
         )
-    pages = _state["pages"]
+    session = _session()
+    pages = session.pages if session is not None else {}
     page_ids = list(pages.keys())
     if tab_action == "list":
         return _tool_response(
@@ -1899,9 +1982,9 @@ async def _action_tabs(  # pylint: disable=too-many-return-statements
             ),
         )
     if tab_action == "new":
-        if not _state["context"]:
-            ok = await _ensure_browser()
-            if not ok:
+        if session is None:
+            session = await _ensure_browser()
+            if session is None:
                 return _tool_response(
                     json.dumps(
                         {"ok": False, "error": "Browser not started"},
@@ -1910,21 +1993,15 @@ async def _action_tabs(  # pylint: disable=too-many-return-statements
                     ),
                 )
         try:
-            page = await _state["context"].new_page()
-            new_id = _next_page_id()
-            _state["refs"][new_id] = {}
-            _state["console_logs"][new_id] = []
-            _state["network_requests"][new_id] = []
-            _state["pending_dialogs"][new_id] = []
-            _attach_page_listeners(page, new_id)
-            _state["pages"][new_id] = page
-            _state["current_page_id"] = new_id
+            new_id = session.next_page_id()
+            await _open_page(session, new_id)
+            session.current_page_id = new_id
             return _tool_response(
                 json.dumps(
                     {
                         "ok": True,
                         "page_id": new_id,
-                        "tabs": list(_state["pages"].keys()),
+                        "tabs": list(session.pages.keys()),
                     },
                     ensure_ascii=False,
                     indent=2,
@@ -1943,8 +2020,8 @@ async def _action_tabs(  # pylint: disable=too-many-return-statements
         return await _action_close(target_id)
     if tab_action == "select":
         target_id = page_ids[index] if 0 <= index < len(page_ids) else page_id
-        _state["current_page_id"] = target_id
-        _state["current_page_id"] = target_id
+        if session is not None:
+            session.current_page_id = target_id
         return _tool_response(
             json.dumps(
                 {
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # flake8: noqa: E501
 # pylint: disable=line-too-long
+import asyncio
 import os
 from pathlib import Path
 from typing import Optional
@@ -9,6 +10,7 @@ from agentscope.message import TextBlock
 from agentscope.tool import ToolResponse
 
 from ...constant import WORKING_DIR
+from ...utils.file_lines import read_line_window, replace_in_file
 
 
 def _resolve_file_path(file_path: str) -> str:
@@ -28,6 +30,16 @@ def _resolve_file_path(file_path: str) -> str:
         return str(WORKING_DIR / file_path)
 
 
+def _read_text(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write_text(file_path: str, content: str, mode: str) -> None:
+    with open(file_path, mode, encoding="utf-8") as f:
+        f.write(content)
+
+
 async def read_file(  # pylint: disable=too-many-return-statements
     file_path: str,
     start_line: Optional[int] = None,
@@ -70,15 +82,17 @@ async def read_file(  # pylint: disable=too-many-return-statements
         )
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
-
         range_requested = start_line is not None or end_line is not None
 
         if range_requested:
-            total = len(all_lines)
-            s = max(1, start_line if start_line is not None else 1)
-            e = min(total, end_line if end_line is not None else total)
+            # Only the requested window is read (via a cached line index)
+            window = await asyncio.to_thread(
+                read_line_window,
+                file_path,
+                start_line,
+                end_line,
+            )
+            s, e, total = window.start, window.end, window.total
 
             if s > total:
                 return ToolResponse(
@@ -106,19 +120,17 @@ async def read_file(  # pylint: disable=too-many-return-statements
                     ],
                 )
 
-            selected = all_lines[s - 1 : e]
-            content = "".join(selected)
             header = f"{file_path}  (lines {s}-{e} of {total})\n"
             return ToolResponse(
                 content=[
                     TextBlock(
                         type="text",
-                        text=header + content,
+                        text=header + window.text,
                     ),
                 ],
             )
         else:
-            content = "".join(all_lines)
+            content = await asyncio.to_thread(_read_text, file_path)
             return ToolResponse(
                 content=[
                     TextBlock(
@@ -165,8 +177,7 @@ async def write_file(
     file_path = _resolve_file_path(file_path)
 
     try:
-        with open(file_path, "w", encoding="utf-8") as file:
-            file.write(content)
+        await asyncio.to_thread(_write_text, file_path, content, "w")
         return ToolResponse(
             content=[
                 TextBlock(
@@ -203,23 +214,31 @@ async def edit_file(
             Replacement text.
     """
 
-    response = await read_file(file_path=file_path)
-    if response.content and len(response.content) > 0:
-        error_text = response.content[0].get("text", "")
-        if error_text.startswith("Error:"):
-            return response
-    if not response.content or len(response.content) == 0:
+    file_path = _resolve_file_path(file_path)
+
+    if not os.path.isfile(file_path):
+        # Same messages as read_file
+        return await read_file(file_path=file_path)
+
+    try:
+        # Streamed into a temp file that replaces the original atomically
+        count = await asyncio.to_thread(
+            replace_in_file,
+            file_path,
+            old_text,
+            new_text,
+        )
+    except Exception as e:
         return ToolResponse(
             content=[
                 TextBlock(
                     type="text",
-                    text=f"Error: Failed to read file {file_path}.",
+                    text=f"Error: Edit file failed due to \n{e}",
                 ),
             ],
         )
 
-    content = response.content[0].get("text", "")
-    if old_text not in content:
+    if not count:
         return ToolResponse(
             content=[
                 TextBlock(
@@ -229,14 +248,6 @@ async def edit_file(
             ],
         )
 
-    new_content = content.replace(old_text, new_text)
-    write_response = await write_file(file_path=file_path, content=new_content)
-
-    if write_response.content and len(write_response.content) > 0:
-        write_text = write_response.content[0].get("text", "")
-        if write_text.startswith("Error:"):
-            return write_response
-
     return ToolResponse(
         content=[
             TextBlock(
@@ -274,8 +285,7 @@ async def append_file(
     file_path = _resolve_file_path(file_path)
 
     try:
-        with open(file_path, "a", encoding="utf-8") as file:
-            file.write(content)
+        await asyncio.to_thread(_write_text, file_path, content, "a")
         return ToolResponse(
             content=[
                 TextBlock(
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 # flake8: noqa: E501
 # pylint: disable=line-too-long
-"""File search tools: grep (content search) and glob (file discovery)."""
+"""File search tools: grep (content search) and glob (file discovery).
 
+Both walk the tree lazily (``utils.file_walker``), honor ``.gitignore``
+files, stop at ``_MAX_MATCHES`` and run off the event loop.
+"""
+
+import asyncio
 import re
 from pathlib import Path
 from typing import Optional
@@ -11,6 +16,7 @@ from agentscope.message import TextBlock
 from agentscope.tool import ToolResponse
 
 from ...constant import WORKING_DIR
+from ...utils.file_walker import grep, iter_glob, literal_prefilter, walk
 from .file_io import _resolve_file_path
 
 # Skip binary / large files
@@ -67,18 +73,6 @@ _MAX_MATCHES = 200
 _MAX_FILE_SIZE = 2 * 1024 * 1024  # 2 MB
 
 
-def _is_text_file(path: Path) -> bool:
-    """Heuristic check: skip known binary extensions and large files."""
-    if path.suffix.lower() in _BINARY_EXTENSIONS:
-        return False
-    try:
-        if path.stat().st_size > _MAX_FILE_SIZE:
-            return False
-    except OSError:
-        return False
-    return True
-
-
 async def grep_search(  # pylint: disable=too-many-branches
     pattern: str,
     path: Optional[str] = None,
@@ -141,53 +135,29 @@ async def grep_search(  # pylint: disable=too-many-branches
             ],
         )
 
-    matches: list[str] = []
-    truncated = False
-
-    # Collect files to search
+    # Collect files to search (lazily; scanned in a thread pool)
     single_file = search_root.is_file()
     if single_file:
-        files = [search_root]
+        files = iter([(search_root, search_root.name)])
     else:
-        files = sorted(
-            f
-            for f in search_root.rglob("*")
-            if f.is_file() and _is_text_file(f)
+        files = (
+            (file_path, rel)
+            for file_path, rel, _ in walk(
+                search_root,
+                skip_suffixes=_BINARY_EXTENSIONS,
+                max_file_size=_MAX_FILE_SIZE,
+            )
         )
 
-    for file_path in files:
-        if truncated:
-            break
-        try:
-            lines = file_path.read_text(
-                encoding="utf-8",
-                errors="ignore",
-            ).splitlines()
-        except OSError:
-            continue
-
-        for line_no, line in enumerate(lines, start=1):
-            if regex.search(line):
-                if len(matches) >= _MAX_MATCHES:
-                    truncated = True
-                    break
-
-                # Context window
-                start = max(0, line_no - 1 - context_lines)
-                end = min(len(lines), line_no + context_lines)
-
-                # For single-file search show the filename, not '.'
-                if single_file:
-                    rel = file_path.name
-                else:
-                    rel = _relative_display(file_path, search_root)
-                for ctx_idx in range(start, end):
-                    prefix = ">" if ctx_idx == line_no - 1 else " "
-                    matches.append(
-                        f"{rel}:{ctx_idx + 1}:{prefix} {lines[ctx_idx]}",
-                    )
-                if context_lines > 0:
-                    matches.append("---")
+    matches, truncated = await asyncio.to_thread(
+        grep,
+        files,
+        regex,
+        _MAX_MATCHES,
+        context_lines=max(0, context_lines),
+        prefilter=literal_prefilter(pattern, is_regex, case_sensitive),
+        sniff=not single_file,
+    )
 
     if not matches:
         return ToolResponse(
@@ -258,16 +228,16 @@ async def glob_search(
             ],
         )
 
-    try:
+    def _collect() -> tuple[list[str], bool]:
         results: list[str] = []
-        truncated = False
-        for entry in sorted(search_root.glob(pattern)):
-            rel = _relative_display(entry, search_root)
-            suffix = "/" if entry.is_dir() else ""
-            results.append(f"{rel}{suffix}")
+        for _, rel, is_dir in iter_glob(search_root, pattern):
+            results.append(f"{rel}/" if is_dir else rel)
             if len(results) >= _MAX_MATCHES:
-                truncated = True
-                break
+                return results, True
+        return results, False
+
+    try:
+        results, truncated = await asyncio.to_thread(_collect)
 
         if not results:
             return ToolResponse(
@@ -301,10 +271,3 @@ async def glob_search(
             ],
         )
 
-
-def _relative_display(target: Path, root: Path) -> str:
-    """Return a relative path string if possible, otherwise absolute."""
-    try:
-        return str(target.relative_to(root))
-    except ValueError:
-        return str(target)
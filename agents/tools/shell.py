@@ -7,13 +7,25 @@ import asyncio
 import json
 import locale
 import re
+import time
 from pathlib import Path
-from typing import Optional
+from typing import AsyncGenerator, Optional
 
 from agentscope.tool import ToolResponse
 from agentscope.message import TextBlock
 
-from cp9.constant import WORKING_DIR
+from cp9.constant import (
+    SHELL_OUTPUT_DIR,
+    SHELL_OUTPUT_HEAD_BYTES,
+    SHELL_OUTPUT_KEEP_FILES,
+    SHELL_OUTPUT_TAIL_BYTES,
+    SHELL_PROGRESS_INTERVAL,
+    WORKING_DIR,
+)
+from cp9.utils.shell_exec import ShellResult, run_shell
+
+# Bytes of recent output shown in progress updates
+_PROGRESS_BYTES = 2048
 
 
 _HIMALAYA_SEND_PATTERN = re.compile(
@@ -34,12 +46,53 @@ def _blocked_response(message: str) -> ToolResponse:
     )
 
 
-# pylint: disable=too-many-branches
+def _text_response(
+    text: str,
+    stream: bool = False,
+    is_last: bool = True,
+) -> ToolResponse:
+    return ToolResponse(
+        content=[TextBlock(type="text", text=text)],
+        stream=stream,
+        is_last=is_last,
+    )
+
+
+def _format_result(result: ShellResult, timeout: int, encoding: str) -> str:
+    stdout_str = result.stdout.render(encoding)
+    stderr_str = result.stderr.render(encoding)
+    if result.timed_out:
+        stderr_suffix = (
+            f"⚠️ TimeoutError: The command execution exceeded "
+            f"the timeout of {timeout} seconds. "
+            f"Please consider increasing the timeout value if this command "
+            f"requires more time to complete."
+        )
+        if stderr_str:
+            stderr_str += f"\n{stderr_suffix}"
+        else:
+            stderr_str = stderr_suffix
+
+    # Format the response in a human-friendly way
+    if result.returncode == 0:
+        # Success case: just show the output
+        if stdout_str:
+            return stdout_str
+        return "Command executed successfully (no output)."
+    # Error case: show detailed information
+    response_parts = [f"Command failed with exit code {result.returncode}."]
+    if stdout_str:
+        response_parts.append(f"\n[stdout]\n{stdout_str}")
+    if stderr_str:
+        response_parts.append(f"\n[stderr]\n{stderr_str}")
+    return "".join(response_parts)
+
+
 async def execute_shell_command(
     command: str,
     timeout: int = 60,
     cwd: Optional[Path] = None,
-) -> ToolResponse:
+) -> AsyncGenerator[ToolResponse, None]:
     """Execute given command and return the return code, standard output and
     error within <returncode></returncode>, <stdout></stdout> and
     <stderr></stderr> tags.
@@ -55,102 +108,85 @@ async def execute_shell_command(
             If None, defaults to WORKING_DIR.
 
     Returns:
-        `ToolResponse`:
-            The tool response containing the return code, standard output, and
-            standard error of the executed command. If timeout occurs, the
-            return code will be -1 and stderr will contain timeout information.
+        `AsyncGenerator[ToolResponse, None]`:
+            Progress updates with the latest output while the command runs,
+            then the return code, standard output, and standard error of the
+            executed command. Long output is cut to its beginning and end;
+            the full text is saved to a file whose path is shown in place of
+            the omitted part. If timeout occurs, the return code will be -1
+            and stderr will contain timeout information.
     """
 
     cmd = (command or "").strip()
     if not cmd:
-        return _blocked_response("command required")
+        yield _blocked_response("command required")
+        return
     if _HIMALAYA_SEND_PATTERN.search(cmd):
-        return _blocked_response(
+        yield _blocked_response(
             "Blocked: sending email via himalaya is disabled.",
         )
+        return
 
     # Set working directory
     working_dir = cwd if cwd is not None else WORKING_DIR
+    encoding = locale.getpreferredencoding(False) or "utf-8"
 
-    try:
-        proc = await asyncio.create_subprocess_shell(
-            cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            bufsize=0,
-            cwd=str(working_dir),
-        )
+    # Recent output (both streams) for progress updates
+    recent = bytearray()
+    fresh = False
 
-        try:
-            await asyncio.wait_for(proc.wait(), timeout=timeout)
-            stdout, stderr = await proc.communicate()
-            encoding = locale.getpreferredencoding(False) or "utf-8"
-            stdout_str = stdout.decode(encoding, errors="replace")
-            stderr_str = stderr.decode(encoding, errors="replace")
-            returncode = proc.returncode
-
-        except asyncio.TimeoutError:
-            # Handle timeout
-            stderr_suffix = (
-                f"⚠️ TimeoutError: The command execution exceeded "
-                f"the timeout of {timeout} seconds. "
-                f"Please consider increasing the timeout value if this command "
-                f"requires more time to complete."
-            )
-            returncode = -1
-            try:
-                proc.terminate()
-                # Wait a bit for graceful termination
-                try:
-                    await asyncio.wait_for(proc.wait(), timeout=1)
-                except asyncio.TimeoutError:
-                    # Force kill if graceful termination fails
-                    proc.kill()
-                    await proc.wait()
-
-                stdout, stderr = await proc.communicate()
-                encoding = locale.getpreferredencoding(False) or "utf-8"
-                stdout_str = stdout.decode(encoding, errors="replace")
-                stderr_str = stderr.decode(encoding, errors="replace")
-                if stderr_str:
-                    stderr_str += f"\n{stderr_suffix}"
-                else:
-                    stderr_str = stderr_suffix
-            except ProcessLookupError:
-                stdout_str = ""
-                stderr_str = stderr_suffix
-
-        # Format the response in a human-friendly way
-        if returncode == 0:
-            # Success case: just show the output
-            if stdout_str:
-                response_text = stdout_str
-            else:
-                response_text = "Command executed successfully (no output)."
-        else:
-            # Error case: show detailed information
-            response_parts = [f"Command failed with exit code {returncode}."]
-            if stdout_str:
-                response_parts.append(f"\n[stdout]\n{stdout_str}")
-            if stderr_str:
-                response_parts.append(f"\n[stderr]\n{stderr_str}")
-            response_text = "".join(response_parts)
-
-        return ToolResponse(
-            content=[
-                TextBlock(
-                    type="text",
-                    text=response_text,
-                ),
-            ],
-        )
+    def on_output(_name: str, chunk: bytes) -> None:
+        nonlocal fresh
+        recent.extend(chunk)
+        del recent[:-_PROGRESS_BYTES]
+        fresh = True
 
+    started = time.monotonic()
+    task = asyncio.create_task(
+        run_shell(
+            cmd,
+            cwd=working_dir,
+            timeout=timeout,
+            on_output=on_output,
+            head_bytes=SHELL_OUTPUT_HEAD_BYTES,
+            tail_bytes=SHELL_OUTPUT_TAIL_BYTES,
+            spill_dir=SHELL_OUTPUT_DIR,
+            keep_spill_files=SHELL_OUTPUT_KEEP_FILES,
+        ),
+    )
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {task},
+                timeout=SHELL_PROGRESS_INTERVAL,
+            )
+            if done:
+                break
+            if fresh:
+                fresh = False
+                elapsed = time.monotonic() - started
+                text = bytes(recent).decode(encoding, errors="replace")
+                yield _text_response(
+                    f"[running for {elapsed:.0f}s, latest output]\n{text}",
+                    stream=True,
+                    is_last=False,
+                )
+        result = task.result()
     except Exception as e:
-        return ToolResponse(
-            content=[
-                TextBlock(
-                    type="text",
-                    text=f"Error: Shell command execution failed due to \n{e}",
-                ),
-            ],
+        yield _text_response(
+            f"Error: Shell command execution failed due to \n{e}",
+            stream=True,
         )
+        return
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    yield _text_response(
+        _format_result(result, timeout, encoding),
+        stream=True,
+    )
@@ -2,9 +2,10 @@
 import os
 import base64
 import hashlib
+import json
 import logging
+import asyncio
 import shutil
-import subprocess
 import urllib.parse
 from typing import Optional
 from pathlib import Path
@@ -14,6 +15,21 @@ logger = logging.getLogger(__name__)
 # Global token counter instance (lazy initialization)
 _token_counter = None
 
+# Global attachment download cache (lazy initialization)
+_download_cache = None
+
+# Global fast tokenizer built from the local vocab/merges (lazy
+# initialization; False means it is unavailable and should not be retried)
+_fast_tokenizer = None
+
+_LOCAL_TOKENIZER_DIR = Path(__file__).parent.parent / "tokenizer"
+
+# Qwen2 pre-tokenization pattern (same as the upstream tokenizer.json)
+_QWEN_PRETOKENIZE_PATTERN = (
+    r"(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}"
+    r"| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"
+)
+
 
 async def download_file_from_base64(
     base64_data: str,
@@ -62,13 +78,38 @@ async def download_file_from_base64(
         raise
 
 
+def _get_download_cache():
+    """Get or initialize the global attachment download cache."""
+    global _download_cache
+    if _download_cache is None:
+        from ..constant import (
+            DOWNLOAD_CACHE_DIR,
+            DOWNLOAD_CACHE_MAX_BYTES,
+            DOWNLOAD_MAX_BYTES,
+            DOWNLOAD_MAX_CONCURRENCY,
+        )
+        from ..utils.download_cache import DownloadCache
+
+        _download_cache = DownloadCache(
+            DOWNLOAD_CACHE_DIR,
+            max_bytes=DOWNLOAD_MAX_BYTES,
+            max_cache_bytes=DOWNLOAD_CACHE_MAX_BYTES,
+            max_concurrency=DOWNLOAD_MAX_CONCURRENCY,
+        )
+    return _download_cache
+
+
 async def download_file_from_url(
     url: str,
     filename: Optional[str] = None,
     download_dir: str = "downloads",
 ) -> str:
     """
-    Download a file from URL to local download directory using wget or curl.
+    Download a file from URL to local download directory.
+
+    The body is fetched once through the shared download cache (streamed,
+    size-capped, de-duplicated across concurrent callers) and copied to
+    ``download_dir``.
 
     Args:
         url (`str`):
@@ -83,90 +124,23 @@ async def download_file_from_url(
         `str`:
             The local file path.
     """
-    try:
-        # Create download directory if not exists
-        download_path = Path(download_dir)
-        download_path.mkdir(parents=True, exist_ok=True)
-
-        # Generate filename if not provided
-        if not filename:
-            # Try to extract filename from URL
-            parsed_url = urllib.parse.urlparse(url)
-            url_filename = os.path.basename(parsed_url.path)
-            if url_filename:
-                filename = url_filename
-            else:
-                # Use hash of URL as filename
-                url_hash = hashlib.md5(url.encode()).hexdigest()
-                filename = f"file_{url_hash}"
-
-        # Full local file path
-        local_file_path = download_path / filename
-
-        # Try wget first, then curl, then fall back to urllib (for Windows)
-        download_success = False
-        try:
-            subprocess.run(
-                ["wget", "-q", "-O", str(local_file_path), url],
-                capture_output=True,
-                timeout=60,
-                check=True,
-            )
-            logger.debug("Downloaded file via wget to: %s", local_file_path)
-            download_success = True
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            # wget failed or not available, try curl
-            logger.debug("wget failed, trying curl: %s", e)
-            try:
-                subprocess.run(
-                    ["curl", "-s", "-L", "-o", str(local_file_path), url],
-                    capture_output=True,
-                    timeout=60,
-                    check=True,
-                )
-                logger.debug(
-                    "Downloaded file via curl to: %s",
-                    local_file_path,
-                )
-                download_success = True
-            except (
-                subprocess.CalledProcessError,
-                FileNotFoundError,
-            ) as curl_err:
-                # curl also failed, fall back to urllib
-                logger.debug("curl failed, trying urllib: %s", curl_err)
-                try:
-                    import urllib.request as _urlreq
-
-                    _urlreq.urlretrieve(url, str(local_file_path))
-                    logger.debug(
-                        "Downloaded file via urllib to: %s",
-                        local_file_path,
-                    )
-                    download_success = True
-                except Exception as urllib_err:
-                    logger.error(
-                        "wget, curl and urllib all failed for URL %s: %s",
-                        url,
-                        urllib_err,
-                    )
-                    raise RuntimeError(
-                        "Failed to download file: "
-                        "wget, curl and urllib all failed",
-                    ) from urllib_err
-
-        # Verify file was downloaded
-        if not download_success or not local_file_path.exists():
-            raise FileNotFoundError("Downloaded file does not exist")
-
-        if local_file_path.stat().st_size == 0:
-            raise ValueError("Downloaded file is empty")
+    # Generate filename if not provided
+    if not filename:
+        # Try to extract filename from URL
+        parsed_url = urllib.parse.urlparse(url)
+        url_filename = os.path.basename(parsed_url.path)
+        if url_filename:
+            filename = url_filename
+        else:
+            # Use hash of URL as filename
+            url_hash = hashlib.md5(url.encode()).hexdigest()
+            filename = f"file_{url_hash}"
 
+    local_file_path = Path(download_dir) / filename
+    try:
+        await _get_download_cache().download(url, local_file_path)
+        logger.debug("Downloaded file to: %s", local_file_path)
         return str(local_file_path.absolute())
-
-    except subprocess.TimeoutExpired as e:
-        logger.error("Download timeout for URL: %s", url)
-        raise TimeoutError(f"Download timeout for URL: {url}") from e
     except Exception as e:
         logger.error("Failed to download file from URL %s: %s", url, e)
         raise
@@ -352,21 +326,25 @@ async def process_file_and_media_blocks_in_message(msg) -> None:
         if not isinstance(message.content, list):
             continue
 
-        # Collect download results with their indices
-        downloaded_files = []
-
-        # Process each content block
-        for i, block in enumerate(message.content):
-            if not isinstance(block, dict):
-                continue
-
-            block_type = block.get("type")
-            if block_type not in ["file", "image", "audio", "video"]:
-                continue
-
-            local_path = await _process_single_block(message.content, i, block)
-            if local_path:
-                downloaded_files.append((i, local_path))
+        # Download all file/media blocks concurrently; each task only
+        # replaces its own index in message.content
+        indices = [
+            i
+            for i, block in enumerate(message.content)
+            if isinstance(block, dict)
+            and block.get("type") in ["file", "image", "audio", "video"]
+        ]
+        local_paths = await asyncio.gather(
+            *[
+                _process_single_block(message.content, i, message.content[i])
+                for i in indices
+            ],
+        )
+        downloaded_files = [
+            (i, local_path)
+            for i, local_path in zip(indices, local_paths)
+            if local_path
+        ]
 
         # Add text blocks for successfully downloaded files
         for i, local_path in reversed(downloaded_files):
@@ -456,11 +434,11 @@ def _get_token_counter():
         # Qwen3 series uses the same tokenizer as Qwen2.5
 
         # Try local tokenizer first, fall back to online if not found
-        local_tokenizer_path = Path(__file__).parent.parent / "tokenizer"
+        local_tokenizer_path = _LOCAL_TOKENIZER_DIR
 
-        if (
-            local_tokenizer_path.exists()
-            and (local_tokenizer_path / "tokenizer.json").exists()
+        if local_tokenizer_path.exists() and (
+            (local_tokenizer_path / "tokenizer.json").exists()
+            or (local_tokenizer_path / "vocab.json").exists()
         ):
             tokenizer_path = str(local_tokenizer_path)
             logger.info(f"Using local Qwen tokenizer from {tokenizer_path}")
@@ -511,6 +489,121 @@ def _extract_text_from_messages(messages: list[dict]) -> str:
     return "\n".join(parts)
 
 
+def _get_fast_tokenizer():
+    """Get the Rust BPE tokenizer built from the local vocab/merges.
+
+    Built directly with the ``tokenizers`` library from
+    ``tokenizer/vocab.json`` and ``tokenizer/merges.txt`` (Qwen2 byte-level
+    BPE), so counting tokens neither loads transformers nor downloads
+    anything, and supports batched encoding.
+
+    Returns:
+        tokenizers.Tokenizer or None if the files or library are missing.
+    """
+    global _fast_tokenizer
+    if _fast_tokenizer is None:
+        _fast_tokenizer = False
+        vocab = _LOCAL_TOKENIZER_DIR / "vocab.json"
+        merges = _LOCAL_TOKENIZER_DIR / "merges.txt"
+        if not (vocab.exists() and merges.exists()):
+            return None
+        try:
+            from tokenizers import (
+                AddedToken,
+                Regex,
+                Tokenizer,
+                models,
+                normalizers,
+                pre_tokenizers,
+            )
+
+            tokenizer = Tokenizer(
+                models.BPE.from_file(str(vocab), str(merges)),
+            )
+            tokenizer.normalizer = normalizers.NFC()
+            tokenizer.pre_tokenizer = pre_tokenizers.Sequence(
+                [
+                    pre_tokenizers.Split(
+                        Regex(_QWEN_PRETOKENIZE_PATTERN),
+                        behavior="isolated",
+                        invert=False,
+                    ),
+                    pre_tokenizers.ByteLevel(
+                        add_prefix_space=False,
+                        use_regex=False,
+                    ),
+                ],
+            )
+            config_path = _LOCAL_TOKENIZER_DIR / "tokenizer_config.json"
+            if config_path.exists():
+                config = json.loads(config_path.read_text(encoding="utf-8"))
+                added = config.get("added_tokens_decoder", {}).values()
+                tokenizer.add_special_tokens(
+                    [
+                        AddedToken(
+                            tok["content"],
+                            special=True,
+                            normalized=False,
+                        )
+                        for tok in added
+                    ],
+                )
+            _fast_tokenizer = tokenizer
+            logger.debug("Fast tokenizer initialized from local vocab")
+        except Exception as e:
+            logger.warning(f"Failed to build fast tokenizer: {e}")
+    return _fast_tokenizer or None
+
+
+def count_text_tokens(texts: list[str]) -> list[int]:
+    """Count tokens for each text in one batch.
+
+    Uses the local fast tokenizer (batched, multi-threaded encode) and
+    falls back to the HuggingFace token counter.
+
+    Args:
+        texts: Texts to count.
+
+    Returns:
+        list[int]: Token count of each text, in the same order.
+
+    Raises:
+        RuntimeError: If no tokenizer can be initialized.
+    """
+    if not texts:
+        return []
+    fast_tokenizer = _get_fast_tokenizer()
+    if fast_tokenizer is not None:
+        encodings = fast_tokenizer.encode_batch(
+            texts,
+            add_special_tokens=False,
+        )
+        return [len(enc.ids) for enc in encodings]
+    tokenizer = _get_token_counter().tokenizer
+    return [len(tokenizer.encode(text)) for text in texts]
+
+
+def get_message_digest(msg) -> str:
+    """Return a content hash of a Msg, used to validate cached counts.
+
+    Args:
+        msg: A Msg object.
+
+    Returns:
+        str: Hex digest of the message role, name and content.
+    """
+    payload = json.dumps(
+        [msg.role, msg.name, msg.content],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.blake2b(
+        payload.encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+
+
 async def count_message_tokens(
     messages: list[dict],
 ) -> int:
@@ -529,10 +622,8 @@ async def count_message_tokens(
     Raises:
         RuntimeError: If token counter fails to initialize.
     """
-    token_counter = _get_token_counter()
     text = _extract_text_from_messages(messages)
-    token_ids = token_counter.tokenizer.encode(text)
-    token_count = len(token_ids)
+    token_count = count_text_tokens([text])[0]
     logger.debug(
         "Counted %d tokens in %d messages",
         token_count,
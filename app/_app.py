@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=redefined-outer-name,unused-argument
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -16,18 +17,35 @@ from ..config import (  # pylint: disable=no-name-in-module
     update_last_dispatch,
     ConfigWatcher,
 )
-from ..config.utils import get_jobs_path, get_chats_path
-from ..constant import DOCS_ENABLED, LOG_LEVEL_ENV
+from ..config.utils import (
+    get_chats_db_path,
+    get_chats_path,
+    get_cron_runs_path,
+    get_jobs_db_path,
+    get_jobs_path,
+)
+from ..constant import (
+    CHAT_REPO_BACKEND,
+    DOCS_ENABLED,
+    JOB_REPO_BACKEND,
+    LOG_LEVEL_ENV,
+)
 from ..__version__ import __version__
 from ..utils.logging import setup_logger
 from .channels import ChannelManager  # pylint: disable=no-name-in-module
 from .channels.utils import make_process_from_runner
 from .runner.repo.json_repo import JsonChatRepository
+from .runner.repo.sqlite_repo import SqliteChatRepository
 from .crons.repo.json_repo import JsonJobRepository
+from .crons.repo.sqlite_repo import SqliteJobRepository
 from .crons.manager import CronManager
+from .crons.history import CronRunHistory
 from .runner.manager import ChatManager
 from .routers import router as api_router
 from ..envs import load_envs_into_environ
+from .brain.http_client import close_http_client_pool
+from .brain.thalamus import close_thalamus
+from ..db.writer import close_writer
 
 # Apply log level on load so reload child process gets same level as CLI.
 logger = setup_logger(os.environ.get(LOG_LEVEL_ENV, "info"))
@@ -61,17 +79,30 @@ async def lifespan(app: FastAPI):
     await channel_manager.start_all()
 
     # --- cron init/start ---
-    repo = JsonJobRepository(get_jobs_path())
+    if JOB_REPO_BACKEND == "sqlite":
+        repo = SqliteJobRepository(
+            get_jobs_db_path(),
+            import_from=get_jobs_path(),
+        )
+    else:
+        repo = JsonJobRepository(get_jobs_path())
     cron_manager = CronManager(
         repo=repo,
         runner=runner,
         channel_manager=channel_manager,
         timezone="UTC",
+        history=CronRunHistory(get_cron_runs_path()),
     )
     await cron_manager.start()
 
     # --- chat manager init and connect to runner.session ---
-    chat_repo = JsonChatRepository(get_chats_path())
+    if CHAT_REPO_BACKEND == "sqlite":
+        chat_repo = SqliteChatRepository(
+            get_chats_db_path(),
+            import_from=get_chats_path(),
+        )
+    else:
+        chat_repo = JsonChatRepository(get_chats_path())
     chat_manager = ChatManager(
         repo=chat_repo,
     )
@@ -80,6 +111,10 @@ async def lifespan(app: FastAPI):
 
     # --- config file watcher (auto-reload channels on config.json change) ---
     config_watcher = ConfigWatcher(channel_manager=channel_manager)
+    config_watcher.subscribe(
+        "heartbeat",
+        lambda _change: cron_manager.reschedule_heartbeat(),
+    )
     await config_watcher.start()
 
     # expose to endpoints
@@ -102,6 +137,15 @@ async def lifespan(app: FastAPI):
         finally:
             await channel_manager.stop_all()
             await runner.stop()
+            await chat_repo.close()
+            await repo.close()
+            await close_http_client_pool()
+            try:
+                close_thalamus()
+            except Exception:
+                logger.warning("Failed to save thalamus memory", exc_info=True)
+            # Flush queued trace/credit rows before the process exits
+            await asyncio.to_thread(close_writer)
 
 
 app = FastAPI(
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP Client Pool - 模型调用共享异步 HTTP 客户端
+
+功能:
+- 按提供商复用 httpx.AsyncClient（keep-alive 连接池）
+- 按提供商限制并发连接数
+- 安装 h2 时启用 HTTP/2
+- 流式读取 SSE (OpenAI 兼容 chat/completions) 增量
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger("brain.http_client")
+
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    """单个提供商的连接池配置"""
+    max_connections: int = 20           # 最大连接数
+    max_keepalive_connections: int = 10  # 最大空闲保活连接数
+    keepalive_expiry: float = 60.0      # 空闲连接保活时间(秒)
+    connect_timeout: float = 10.0       # 建连超时(秒)
+    read_timeout: float = 60.0          # 读超时(秒)
+
+
+DEFAULT_LIMITS = ProviderLimits()
+
+
+def _http2_available() -> bool:
+    """是否安装了 h2（httpx HTTP/2 依赖）"""
+    try:
+        import h2  # noqa: F401  pylint: disable=unused-import
+    except ImportError:
+        return False
+    return True
+
+
+class HTTPClientPool:
+    """按提供商复用的异步 HTTP 客户端池"""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ProviderLimits]] = None,
+        http2: Optional[bool] = None,
+    ):
+        """
+        初始化客户端池。
+
+        Args:
+            limits: 提供商 -> 连接池配置，未配置的使用 DEFAULT_LIMITS
+            http2: 是否启用 HTTP/2，None 表示安装了 h2 时自动启用
+        """
+        self._limits = dict(limits or {})
+        self._http2 = _http2_available() if http2 is None else http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._lock = asyncio.Lock()
+
+    def set_limits(self, provider: str, limits: ProviderLimits) -> None:
+        """设置提供商连接池配置（对之后新建的客户端生效）"""
+        self._limits[provider] = limits
+
+    async def get_client(self, provider: str) -> httpx.AsyncClient:
+        """获取（或创建）提供商的共享客户端"""
+        client = self._clients.get(provider)
+        if client is not None and not client.is_closed:
+            return client
+        async with self._lock:
+            client = self._clients.get(provider)
+            if client is None or client.is_closed:
+                client = self._create_client(provider)
+                self._clients[provider] = client
+            return client
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        cfg = self._limits.get(provider, DEFAULT_LIMITS)
+        logger.info(
+            f"[HTTPClientPool] 创建客户端 provider={provider} "
+            f"max_connections={cfg.max_connections} http2={self._http2}"
+        )
+        return httpx.AsyncClient(
+            http2=self._http2,
+            limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive_connections,
+                keepalive_expiry=cfg.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                cfg.read_timeout,
+                connect=cfg.connect_timeout,
+            ),
+        )
+
+    async def post_json(
+        self,
+        provider: str,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict,
+    ) -> Dict:
+        """POST JSON 并返回 JSON 响应"""
+        client = await self.get_client(provider)
+        response = await client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def stream_sse(
+        self,
+        provider: str,
+        url: str,
+        headers: Dict[str, str],
+        payload: Dict,
+    ) -> AsyncIterator[Dict]:
+        """POST 并逐条产出 SSE `data:` 事件 (JSON)，遇到 [DONE] 结束"""
+        client = await self.get_client(provider)
+        async with client.stream(
+            "POST",
+            url,
+            headers=headers,
+            json=payload,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                line = line.strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if not data:
+                    continue
+                if data == "[DONE]":
+                    return
+                try:
+                    yield json.loads(data)
+                except json.JSONDecodeError:
+                    logger.debug(f"[HTTPClientPool] 跳过无法解析的事件: {data[:100]}")
+
+    async def aclose(self) -> None:
+        """关闭所有客户端"""
+        async with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"[HTTPClientPool] 关闭客户端失败: {e}")
+
+
+# 全局客户端池
+_http_client_pool: Optional[HTTPClientPool] = None
+
+
+def get_http_client_pool() -> HTTPClientPool:
+    """获取全局 HTTP 客户端池"""
+    global _http_client_pool
+    if _http_client_pool is None:
+        _http_client_pool = HTTPClientPool()
+    return _http_client_pool
+
+
+async def close_http_client_pool() -> None:
+    """关闭全局 HTTP 客户端池"""
+    global _http_client_pool
+    if _http_client_pool is not None:
+        await _http_client_pool.aclose()
+        _http_client_pool = None
+
+
+__all__ = [
+    "HTTPClientPool",
+    "ProviderLimits",
+    "DEFAULT_LIMITS",
+    "get_http_client_pool",
+    "close_http_client_pool",
+]
@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""
+Memory Index - 丘脑记忆向量索引
+
+功能:
+- NumPy 嵌入矩阵 + 余弦 top-k (argpartition)
+- 按用户分区 (MemoryItem.session_id)
+- 每分区 LRU 淘汰 + TTL 过期
+- 内存映射文件持久化 (.npy + 元数据 JSON，manifest 原子切换)，重启后恢复
+- 可插拔的本地嵌入函数，默认哈希 n-gram（完全离线）
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("brain.memory_index")
+
+# 嵌入函数: 文本列表 -> (n, dim) float32 矩阵（应已 L2 归一化）
+EmbeddingFunction = Callable[[Sequence[str]], np.ndarray]
+
+# 持久化目录中指向当前一代数据文件的清单
+MANIFEST_NAME = "manifest.json"
+_DATA_FILE = re.compile(r"(?:vectors-\d+\.npy|items-\d+\.json)")
+
+
+class HashedNgramEmbedder:
+    """哈希字符 n-gram 嵌入（无模型、确定性、可跨进程复现）"""
+
+    def __init__(self, dim: int = 256, ngram_range: Tuple[int, int] = (1, 3)):
+        """
+        Args:
+            dim: 向量维度
+            ngram_range: 字符 n-gram 长度范围 (含两端)
+        """
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        lo, hi = self.ngram_range
+        for row, text in enumerate(texts):
+            text = (text or "").lower()
+            for n in range(lo, hi + 1):
+                for i in range(len(text) - n + 1):
+                    # crc32 而非 hash()：保证重启后向量一致
+                    h = zlib.crc32(text[i:i + n].encode("utf-8"))
+                    sign = 1.0 if h & 0x80000000 else -1.0
+                    out[row, h % self.dim] += sign
+        return _normalize(out)
+
+
+def _grow(array: np.ndarray, capacity: int, size: int) -> np.ndarray:
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Partition:
+    """单个用户的记忆分区：连续存储的向量矩阵 + 元数据"""
+
+    __slots__ = ("vectors", "items", "accessed", "created", "size")
+
+    def __init__(self, dim: int, capacity: int = 16):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.items: List[Any] = []
+        self.accessed = np.zeros(capacity, dtype=np.int64)  # LRU 时钟
+        self.created = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+
+    def append(self, vector: np.ndarray, item: Any, tick: int) -> None:
+        if self.size == len(self.vectors):
+            capacity = max(16, self.size * 2)
+            self.vectors = _grow(self.vectors, capacity, self.size)
+            self.accessed = _grow(self.accessed, capacity, self.size)
+            self.created = _grow(self.created, capacity, self.size)
+        self.vectors[self.size] = vector
+        self.accessed[self.size] = tick
+        self.created[self.size] = getattr(item, "timestamp", None) or time.time()
+        self.items.append(item)
+        self.size += 1
+
+    def remove_rows(self, rows: np.ndarray) -> None:
+        """删除若干行（保持剩余行顺序，矩阵仍然连续）"""
+        if len(rows) == 0:
+            return
+        keep = np.ones(self.size, dtype=bool)
+        keep[rows] = False
+        n = int(keep.sum())
+        self.vectors[:n] = self.vectors[:self.size][keep]
+        self.accessed[:n] = self.accessed[:self.size][keep]
+        self.created[:n] = self.created[:self.size][keep]
+        self.items = [it for it, k in zip(self.items, keep) if k]
+        self.size = n
+
+
+class MemoryIndex:
+    """按用户分区的内存向量索引"""
+
+    def __init__(
+        self,
+        embed_fn: Optional[EmbeddingFunction] = None,
+        dim: Optional[int] = None,
+        max_items_per_partition: int = 1000,
+        ttl: Optional[float] = None,
+        path: Optional[str] = None,
+        save_every: int = 100,
+    ):
+        """
+        初始化记忆索引。
+
+        Args:
+            embed_fn: 嵌入函数，None 时使用 HashedNgramEmbedder
+            dim: 向量维度，None 时由 embed_fn.dim 或首次嵌入结果决定
+            max_items_per_partition: 每个分区最多条数，超出按 LRU 淘汰
+            ttl: 记忆存活时间(秒)，按 MemoryItem.timestamp 计算，None 不过期
+            path: 持久化目录（manifest.json + 数据文件），None 不持久化
+            save_every: 累计多少次写入后自动保存（需配置 path）
+        """
+        if embed_fn is None:
+            embed_fn = HashedNgramEmbedder()
+        self._embed_fn = embed_fn
+        self._dim = dim or getattr(embed_fn, "dim", None)
+        self.max_items_per_partition = max(1, max_items_per_partition)
+        self.ttl = ttl
+        self._path = Path(path).expanduser() if path else None
+        self._save_every = save_every
+        self._dirty = 0
+        self._tick = 0  # 单调递增的访问时钟（LRU）
+        self._partitions: Dict[str, _Partition] = {}
+        self._lock = threading.RLock()
+
+        if self._path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return sum(p.size for p in self._partitions.values())
+
+    @property
+    def partitions(self) -> List[str]:
+        """所有分区 key"""
+        return list(self._partitions)
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self._embed_fn(list(texts)), dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self._dim is None:
+            self._dim = vectors.shape[1]
+        return _normalize(vectors)
+
+    # ---- 写入 ----
+
+    def add(self, item: Any, partition: Optional[str] = None) -> None:
+        """添加一条记忆（partition 默认取 item.session_id）"""
+        self.add_many([item], partition)
+
+    def add_many(
+        self,
+        items: Sequence[Any],
+        partition: Optional[str] = None,
+    ) -> None:
+        """批量添加记忆（一次批量嵌入）"""
+        if not items:
+            return
+        vectors = self._embed([it.content for it in items])
+        now = time.time()
+        with self._lock:
+            for vector, item in zip(vectors, items):
+                key = partition if partition is not None else item.session_id
+                part = self._partitions.get(key)
+                if part is None:
+                    part = self._partitions[key] = _Partition(self._dim)
+                self._tick += 1
+                part.append(vector, item, self._tick)
+                self._evict(key, part, now)
+            self._dirty += len(items)
+            should_save = (
+                self._path is not None
+                and self._save_every
+                and self._dirty >= self._save_every
+            )
+        if should_save:
+            self.save()
+
+    def _evict(self, key: str, part: _Partition, now: float) -> None:
+        """TTL 过期 + LRU 淘汰（需持有锁）"""
+        if self.ttl is not None:
+            expired = np.flatnonzero(
+                now - part.created[:part.size] > self.ttl
+            )
+            part.remove_rows(expired)
+        overflow = part.size - self.max_items_per_partition
+        if overflow > 0:
+            lru = np.argpartition(part.accessed[:part.size], overflow - 1)
+            part.remove_rows(lru[:overflow])
+        if part.size == 0:
+            del self._partitions[key]
+
+    def remove_partition(self, partition: str) -> bool:
+        """删除整个分区"""
+        with self._lock:
+            if self._partitions.pop(partition, None) is None:
+                return False
+            self._dirty += 1
+            return True
+
+    # ---- 检索 ----
+
+    def search(
+        self,
+        query: str,
+        partition: Optional[str] = None,
+        k: int = 5,
+    ) -> List[Tuple[Any, float]]:
+        """
+        余弦相似度 top-k。
+
+        Args:
+            query: 查询文本
+            partition: 分区 key，None 时检索全部分区
+            k: 返回数量
+
+        Returns:
+            [(item, score)]，按 score 降序
+        """
+        if k <= 0:
+            return []
+        query_vec = self._embed([query])[0]
+        now = time.time()
+        with self._lock:
+            if partition is not None:
+                keys = [partition] if partition in self._partitions else []
+            else:
+                keys = list(self._partitions)
+            for key in keys:
+                self._evict(key, self._partitions[key], now)
+            keys = [key for key in keys if key in self._partitions]
+
+            candidates: List[Tuple[_Partition, np.ndarray, np.ndarray]] = []
+            for key in keys:
+                part = self._partitions[key]
+                scores = part.vectors[:part.size] @ query_vec
+                top = _top_k(scores, k)
+                candidates.append((part, top, scores[top]))
+            if not candidates:
+                return []
+
+            # 合并各分区 top-k
+            all_scores = np.concatenate([c[2] for c in candidates])
+            owners = np.concatenate([
+                np.full(len(c[1]), i) for i, c in enumerate(candidates)
+            ])
+            rows = np.concatenate([c[1] for c in candidates])
+            results = []
+            self._tick += 1
+            for idx in _top_k(all_scores, k):
+                part = candidates[owners[idx]][0]
+                row = rows[idx]
+                part.accessed[row] = self._tick
+                results.append((part.items[row], float(all_scores[idx])))
+            return results
+
+    # ---- 持久化 ----
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            manifest = json.loads(
+                (self._path / MANIFEST_NAME).read_text("utf-8")
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"[MemoryIndex] manifest 无法读取: {e}")
+            return None
+        return manifest if isinstance(manifest, dict) else None
+
+    def save(self) -> None:
+        """
+        写入新一代 vectors-N.npy（内存映射）与 items-N.json，
+        再原子替换 manifest.json 指向它们，最后清理旧文件。
+        任何时刻 manifest 指向的都是一组完整的文件。
+        """
+        if self._path is None:
+            return
+        with self._lock:
+            self._path.mkdir(parents=True, exist_ok=True)
+            previous = self._read_manifest() or {}
+            version = int(previous.get("version", 0)) + 1
+            vec_name = f"vectors-{version}.npy"
+            meta_name = f"items-{version}.json"
+            parts = [(k, p) for k, p in self._partitions.items() if p.size]
+            total = sum(p.size for _, p in parts)
+            dim = self._dim or 0
+            mm = np.lib.format.open_memmap(
+                self._path / vec_name,
+                mode="w+",
+                dtype=np.float32,
+                shape=(total, dim),
+            )
+            meta: Dict[str, Any] = {"dim": dim, "partitions": []}
+            offset = 0
+            for key, part in parts:
+                mm[offset:offset + part.size] = part.vectors[:part.size]
+                meta["partitions"].append({
+                    "key": key,
+                    "offset": offset,
+                    "size": part.size,
+                    "accessed": part.accessed[:part.size].tolist(),
+                    "items": [asdict(it) for it in part.items],
+                })
+                offset += part.size
+            mm.flush()
+            del mm
+            (self._path / meta_name).write_text(
+                json.dumps(meta, ensure_ascii=False), "utf-8"
+            )
+            manifest_tmp = self._path / (MANIFEST_NAME + ".tmp")
+            manifest_tmp.write_text(
+                json.dumps({
+                    "version": version,
+                    "vectors": vec_name,
+                    "items": meta_name,
+                }),
+                "utf-8",
+            )
+            os.replace(manifest_tmp, self._path / MANIFEST_NAME)
+            self._dirty = 0
+            for stale in self._path.glob("*-*.*"):
+                if stale.name not in (vec_name, meta_name) and (
+                    _DATA_FILE.fullmatch(stale.name)
+                ):
+                    stale.unlink(missing_ok=True)
+        logger.debug(f"[MemoryIndex] 已保存 {total} 条记忆 -> {self._path}")
+
+    def flush(self) -> None:
+        """有未保存的写入时保存（用于关闭时）"""
+        if self._dirty:
+            self.save()
+
+    def load(self) -> None:
+        """
+        按 manifest.json 恢复（向量以只读内存映射打开后拷贝到分区）。
+        数据缺失、损坏或形状不符时忽略持久化数据，保持空索引。
+        """
+        if self._path is None:
+            return
+        manifest = self._read_manifest()
+        if manifest is None:
+            return
+        # Lazy import: thalamus imports this module.
+        from .thalamus import MemoryItem
+
+        try:
+            meta = json.loads(
+                (self._path / manifest["items"]).read_text("utf-8")
+            )
+            vectors = np.load(self._path / manifest["vectors"], mmap_mode="r")
+            dim = int(meta["dim"])
+            if self._dim is not None and dim != self._dim:
+                raise ValueError(f"向量维度不一致 ({dim} != {self._dim})")
+            if vectors.ndim != 2 or vectors.shape[1] != dim:
+                raise ValueError(f"向量形状 {vectors.shape} 与 dim={dim} 不符")
+            partitions: Dict[str, _Partition] = {}
+            tick = 0
+            for entry in meta["partitions"]:
+                size, offset = int(entry["size"]), int(entry["offset"])
+                if (
+                    size < 0
+                    or offset < 0
+                    or offset + size > len(vectors)
+                    or len(entry["accessed"]) != size
+                    or len(entry["items"]) != size
+                ):
+                    raise ValueError(f"分区 {entry['key']!r} 数据不完整")
+                part = _Partition(dim, capacity=max(16, size))
+                part.vectors[:size] = vectors[offset:offset + size]
+                part.accessed[:size] = entry["accessed"]
+                part.items = [MemoryItem(**it) for it in entry["items"]]
+                part.created[:size] = [it.timestamp for it in part.items]
+                part.size = size
+                if size:
+                    partitions[entry["key"]] = part
+                    tick = max(tick, int(part.accessed[:size].max()))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"[MemoryIndex] 加载失败，忽略持久化数据: {e}")
+            return
+        with self._lock:
+            self._dim = dim
+            self._partitions = partitions
+            self._tick = max(self._tick, tick)
+            self._dirty = 0
+        logger.info(f"[MemoryIndex] 已加载 {len(self)} 条记忆 <- {self._path}")
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """按分数降序返回前 k 个下标（argpartition + 局部排序）"""
+    n = len(scores)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+__all__ = [
+    "EmbeddingFunction",
+    "HashedNgramEmbedder",
+    "MemoryIndex",
+]
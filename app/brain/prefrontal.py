@@ -9,14 +9,18 @@ Prefrontal - 前额叶模块
 - 生成回复
 """
 
+import inspect
 import logging
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator, Callable
 from dataclasses import dataclass, field
 from enum import Enum
 
 logger = logging.getLogger("brain.prefrontal")
 
+# 流式输出回调：每收到一段增量文本调用一次（同步或异步函数均可）
+TokenCallback = Callable[[str], Any]
+
 
 class ModelProvider(Enum):
     """模型提供商"""
@@ -149,7 +153,8 @@ class Prefrontal:
         self,
         prompt: str,
         context: Dict[str, Any] = None,
-        model: str = None
+        model: str = None,
+        on_token: TokenCallback = None,
     ) -> GenerationResult:
         """
         深度思考。
@@ -158,31 +163,63 @@ class Prefrontal:
             prompt: 提示词
             context: 上下文
             model: 指定模型
+            on_token: 流式输出回调，提供时按增量回调生成文本
         
         Returns:
             GenerationResult 生成结果
         """
-        model = model or self.primary_model
-        
         # 构建消息
         messages = self._build_messages(prompt, context)
         
-        # 调用 API
+        # 调用 API（失败时降级到备用模型）
+        return await self._call_with_fallback(messages, model, on_token)
+    
+    async def stream_think(
+        self,
+        prompt: str,
+        context: Dict[str, Any] = None,
+        model: str = None,
+    ) -> AsyncIterator[str]:
+        """
+        流式深度思考，逐段产出生成文本。
+        
+        Args:
+            prompt: 提示词
+            context: 上下文
+            model: 指定模型
+        
+        Yields:
+            增量文本
+        """
+        import asyncio
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        async def produce():
+            try:
+                await self.think(prompt, context, model, on_token=queue.put)
+            finally:
+                await queue.put(done)
+        
+        task = asyncio.create_task(produce())
         try:
-            result = await self._call_api(model, messages)
-            return result
-        except Exception as e:
-            logger.error(f"[Prefrontal] 调用失败: {e}")
-            # 尝试降级
-            if model != self.fallback_model:
-                logger.info(f"[Prefrontal] 尝试降级到 {self.fallback_model}")
-                return await self.think(prompt, context, self.fallback_model)
-            raise
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                yield item
+            # 抛出生成过程中的异常
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
     
     async def reason(
         self,
         problem: str,
-        context: Dict[str, Any] = None
+        context: Dict[str, Any] = None,
+        on_token: TokenCallback = None,
     ) -> ReasoningResult:
         """
         推理分析。
@@ -190,6 +227,7 @@ class Prefrontal:
         Args:
             problem: 问题描述
             context: 上下文
+            on_token: 流式输出回调
         
         Returns:
             ReasoningResult 推理结果
@@ -200,7 +238,7 @@ class Prefrontal:
 
 请进行详细推理，给出推理过程和结论。"""
         
-        result = await self.think(prompt, context)
+        result = await self.think(prompt, context, on_token=on_token)
         
         # 解析推理结果
         return self._parse_reasoning_result(result.text)
@@ -208,7 +246,8 @@ class Prefrontal:
     async def plan(
         self,
         goal: str,
-        context: Dict[str, Any] = None
+        context: Dict[str, Any] = None,
+        on_token: TokenCallback = None,
     ) -> PlanResult:
         """
         规划决策。
@@ -216,6 +255,7 @@ class Prefrontal:
         Args:
             goal: 目标
             context: 上下文
+            on_token: 流式输出回调
         
         Returns:
             PlanResult 规划结果
@@ -232,7 +272,7 @@ class Prefrontal:
 
 请以 JSON 格式输出。"""
         
-        result = await self.think(prompt, context)
+        result = await self.think(prompt, context, on_token=on_token)
         
         # 解析计划
         return self._parse_plan_result(result.text)
@@ -241,7 +281,8 @@ class Prefrontal:
         self,
         prompt: str,
         context: Dict[str, Any] = None,
-        system_prompt: str = None
+        system_prompt: str = None,
+        on_token: TokenCallback = None,
     ) -> str:
         """
         生成内容。
@@ -250,6 +291,7 @@ class Prefrontal:
             prompt: 用户提示
             context: 上下文
             system_prompt: 系统提示
+            on_token: 流式输出回调
         
         Returns:
             生成的文本
@@ -268,7 +310,7 @@ class Prefrontal:
         # 用户提示
         messages.append({"role": "user", "content": prompt})
         
-        result = await self._call_api(self.primary_model, messages)
+        result = await self._call_with_fallback(messages, on_token=on_token)
         return result.text
     
     def _build_messages(
@@ -289,68 +331,122 @@ class Prefrontal:
         
         return messages
     
+    async def _call_with_fallback(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = None,
+        on_token: TokenCallback = None,
+    ) -> GenerationResult:
+        """调用模型，失败时降级到备用模型
+        
+        流式调用若已输出部分内容则不再降级，避免重复输出。
+        """
+        model = model or self.primary_model
+        emitted = False
+        
+        async def track(delta: str):
+            nonlocal emitted
+            emitted = True
+            ret = on_token(delta)
+            if inspect.isawaitable(ret):
+                await ret
+        
+        try:
+            return await self._call_api(
+                model,
+                messages,
+                on_token=track if on_token else None,
+            )
+        except Exception as e:
+            logger.error(f"[Prefrontal] 调用失败: {e}")
+            # 尝试降级
+            if model != self.fallback_model and not emitted:
+                logger.info(f"[Prefrontal] 尝试降级到 {self.fallback_model}")
+                return await self._call_api(
+                    self.fallback_model,
+                    messages,
+                    on_token=on_token,
+                )
+            raise
+    
+    def _resolve_endpoint(self, model: str) -> tuple:
+        """解析模型对应的 (api_base, api_key)
+        
+        主模型使用初始化时传入/加载的配置；其他模型（如备用模型）
+        使用各自 MODEL_CONFIG 中的地址和环境变量中的 Key。
+        """
+        import os
+        
+        if model == self.primary_model:
+            return self.api_base, self.api_key
+        config = self.MODEL_CONFIG.get(model, {})
+        api_base = config.get("api_base", "") or self.api_base
+        api_key = os.getenv(config.get("api_key_env", ""), "") or self.api_key
+        return api_base, api_key
+    
     async def _call_api(
         self,
         model: str,
-        messages: List[Dict[str, str]]
+        messages: List[Dict[str, str]],
+        on_token: TokenCallback = None,
     ) -> GenerationResult:
         """调用 API"""
-        import requests
-        
         config = self.MODEL_CONFIG.get(model, {})
         provider = config.get("provider", ModelProvider.ZHIPU)
         
         if provider == ModelProvider.ZHIPU:
-            return await self._call_zhipu(model, messages)
+            return await self._call_zhipu(model, messages, on_token)
         elif provider == ModelProvider.MINIMAX:
-            return await self._call_minimax(model, messages)
+            return await self._call_minimax(model, messages, on_token)
         else:
             raise ValueError(f"不支持的模型提供商: {provider}")
     
     async def _call_zhipu(
         self,
         model: str,
-        messages: List[Dict[str, str]]
+        messages: List[Dict[str, str]],
+        on_token: TokenCallback = None,
     ) -> GenerationResult:
         """调用智谱 API"""
-        import requests
-        
-        url = f"{self.api_base}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": model,
-            "messages": messages,
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
-        
-        return GenerationResult(
-            text=result["choices"][0]["message"]["content"],
-            model=model,
-            tokens_used=result.get("usage", {}).get("total_tokens", 0),
-            finish_reason=result["choices"][0].get("finish_reason", "stop")
+        api_base, _ = self._resolve_endpoint(model)
+        return await self._chat_completion(
+            ModelProvider.ZHIPU,
+            f"{api_base}/chat/completions",
+            model,
+            messages,
+            on_token,
         )
     
     async def _call_minimax(
         self,
         model: str,
-        messages: List[Dict[str, str]]
+        messages: List[Dict[str, str]],
+        on_token: TokenCallback = None,
     ) -> GenerationResult:
         """调用 MiniMax API"""
-        import requests
+        api_base, _ = self._resolve_endpoint(model)
+        return await self._chat_completion(
+            ModelProvider.MINIMAX,
+            f"{api_base}/text/chatcompletion_v2",
+            model,
+            messages,
+            on_token,
+        )
+    
+    async def _chat_completion(
+        self,
+        provider: ModelProvider,
+        url: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        on_token: TokenCallback = None,
+    ) -> GenerationResult:
+        """通过共享连接池调用 OpenAI 兼容的 chat/completions 接口"""
+        from .http_client import get_http_client_pool
         
-        url = f"{self.api_base}/text/chatcompletion_v2"
+        _, api_key = self._resolve_endpoint(model)
         headers = {
-            "Authorization": f"Bearer {self.api_key}",
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
         
@@ -361,16 +457,40 @@ class Prefrontal:
             "max_tokens": self.max_tokens,
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
+        pool = get_http_client_pool()
+        
+        if on_token is None:
+            result = await pool.post_json(provider.value, url, headers, data)
+            return GenerationResult(
+                text=result["choices"][0]["message"]["content"],
+                model=model,
+                tokens_used=result.get("usage", {}).get("total_tokens", 0),
+                finish_reason=result["choices"][0].get("finish_reason", "stop")
+            )
+        
+        # 流式输出
+        data["stream"] = True
+        chunks: List[str] = []
+        tokens_used = 0
+        finish_reason = "stop"
+        async for event in pool.stream_sse(provider.value, url, headers, data):
+            usage = event.get("usage") or {}
+            tokens_used = usage.get("total_tokens", tokens_used)
+            for choice in event.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    chunks.append(delta)
+                    ret = on_token(delta)
+                    if inspect.isawaitable(ret):
+                        await ret
+                if choice.get("finish_reason"):
+                    finish_reason = choice["finish_reason"]
         
         return GenerationResult(
-            text=result["choices"][0]["message"]["content"],
+            text="".join(chunks),
             model=model,
-            tokens_used=result.get("usage", {}).get("total_tokens", 0),
-            finish_reason=result["choices"][0].get("finish_reason", "stop")
+            tokens_used=tokens_used,
+            finish_reason=finish_reason
         )
     
     def _parse_reasoning_result(self, text: str) -> ReasoningResult:
@@ -456,6 +576,7 @@ __all__ = [
     "PlanStep",
     "GenerationResult",
     "ModelProvider",
+    "TokenCallback",
     "get_prefrontal",
     "init_prefrontal",
 ]
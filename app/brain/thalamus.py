@@ -9,12 +9,20 @@ Thalamus - 丘脑模块
 """
 
 import logging
+import re
 from typing import Optional, Dict, Any, List
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 
+from ...constant import THALAMUS_MEMORY_DIR
+from ...utils.keyword_matcher import KeywordMatcher
+from .memory_index import EmbeddingFunction, MemoryIndex
+
 logger = logging.getLogger("brain.thalamus")
 
+# Agent 编号提取
+_AGENT_ID_PATTERN = re.compile(r'(?:agent|号|00|01|02|03|04)[：:\s]*(\d{2})')
+
 
 class IntentType(Enum):
     """意图类型"""
@@ -76,6 +84,10 @@ class Thalamus:
         device: str = "cuda",
         max_length: int = 2048,
         temperature: float = 0.7,
+        memory_path: str = None,
+        memory_ttl: float = None,
+        max_memory_per_user: int = 1000,
+        embed_fn: EmbeddingFunction = None,
     ):
         """
         初始化丘脑。
@@ -85,6 +97,10 @@ class Thalamus:
             device: 设备 (cuda/cpu)
             max_length: 最大生成长度
             temperature: 温度参数
+            memory_path: 记忆索引持久化目录（None 不持久化）
+            memory_ttl: 记忆存活时间(秒)，None 不过期
+            max_memory_per_user: 每个用户最多记忆条数（LRU 淘汰）
+            embed_fn: 嵌入函数，None 使用本地哈希 n-gram
         """
         self.model_path = model_path
         self.device = device
@@ -95,8 +111,16 @@ class Thalamus:
         self._model = None
         self._tokenizer = None
         
-        # 记忆存储
-        self._memory_store: List[MemoryItem] = []
+        # 记忆存储（按用户分区的向量索引）
+        self._memory_store = MemoryIndex(
+            embed_fn=embed_fn,
+            max_items_per_partition=max_memory_per_user,
+            ttl=memory_ttl,
+            path=memory_path,
+        )
+        
+        # 关键词匹配器（由 KEYWORD_TO_INTENT 编译，单次扫描）
+        self._keyword_matcher = KeywordMatcher(self.KEYWORD_TO_INTENT)
         
         logger.info(f"[Thalamus] 初始化完成 (device={device})")
     
@@ -171,14 +195,8 @@ class Thalamus:
         context: Dict[str, Any] = None
     ) -> IntentResult:
         """使用关键词识别意图"""
-        message_lower = message.lower()
-        scores = {intent: 0 for intent in IntentType}
-        
-        # 关键词计分
-        for intent, keywords in self.KEYWORD_TO_INTENT.items():
-            for keyword in keywords:
-                if keyword.lower() in message_lower:
-                    scores[intent] += 1
+        # 关键词计分（一次扫描得到全部意图得分和命中关键词）
+        scores, matched = self._keyword_matcher.scan(message)
         
         # 找出最高分
         best_intent = max(scores, key=scores.get)
@@ -190,7 +208,7 @@ class Thalamus:
             confidence = 0.5
         
         # 提取实体
-        entities = self._extract_entities(message)
+        entities = self._extract_entities(message, matched)
         
         return IntentResult(
             intent=best_intent,
@@ -199,22 +217,26 @@ class Thalamus:
             next_action=self._decide_next_action(best_intent)
         )
     
-    def _extract_entities(self, message: str) -> Dict[str, Any]:
+    def set_intent_keywords(self, intent: IntentType, keywords: List[str]):
+        """热更新某个意图的关键词"""
+        self._keyword_matcher.set_keywords(intent, keywords)
+    
+    def _extract_entities(
+        self,
+        message: str,
+        keywords: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
         """提取实体"""
         entities = {}
         
         # 提取 Agent 编号
-        import re
-        agent_match = re.search(r'(?:agent|号|00|01|02|03|04)[：:\s]*(\d{2})', message)
+        agent_match = _AGENT_ID_PATTERN.search(message)
         if agent_match:
             entities["agent_id"] = agent_match.group(1)
         
         # 提取关键词
-        keywords = []
-        for keywords_list in self.KEYWORD_TO_INTENT.values():
-            for kw in keywords_list:
-                if kw in message.lower():
-                    keywords.append(kw)
+        if keywords is None:
+            keywords = self._keyword_matcher.matched_keywords(message)
         if keywords:
             entities["keywords"] = keywords
         
@@ -280,26 +302,23 @@ class Thalamus:
         Returns:
             相关记忆列表
         """
-        # TODO: 实现向量检索
-        # 目前返回空列表
-        results = []
-        
-        # 过滤用户
-        if user_id:
-            results = [m for m in self._memory_store if m.session_id == user_id]
-        
-        # 按相关性排序
-        results.sort(key=lambda x: x.relevance, reverse=True)
-        
-        return results[:limit]
+        # 只检索该用户的分区，不跨用户；relevance 为余弦相似度
+        if not user_id:
+            return []
+        hits = self._memory_store.search(query, partition=user_id, k=limit)
+        return [replace(item, relevance=score) for item, score in hits]
     
     def add_memory(self, item: MemoryItem):
-        """添加记忆"""
-        self._memory_store.append(item)
-        
-        # 限制记忆数量
-        if len(self._memory_store) > 1000:
-            self._memory_store = self._memory_store[-1000:]
+        """添加记忆（按 session_id 分区，超出上限按 LRU 淘汰）"""
+        self._memory_store.add(item)
+    
+    def save_memory(self):
+        """持久化记忆索引"""
+        self._memory_store.save()
+    
+    def close(self):
+        """关闭前保存尚未持久化的记忆"""
+        self._memory_store.flush()
     
     def _generate(self, prompt: str) -> str:
         """生成文本（待实现）"""
@@ -315,10 +334,16 @@ def get_thalamus() -> Thalamus:
     """获取全局丘脑实例"""
     global _thalamus
     if _thalamus is None:
-        _thalamus = Thalamus()
+        _thalamus = Thalamus(memory_path=str(THALAMUS_MEMORY_DIR))
     return _thalamus
 
 
+def close_thalamus() -> None:
+    """关闭时持久化全局丘脑的记忆索引（未创建时不做任何事）"""
+    if _thalamus is not None:
+        _thalamus.close()
+
+
 def init_thalamus(
     model_path: str = None,
     device: str = "cuda",
@@ -341,4 +366,5 @@ __all__ = [
     "MemoryItem",
     "get_thalamus",
     "init_thalamus",
+    "close_thalamus",
 ]
@@ -14,13 +14,19 @@ from typing import (
     Any,
     List,
     AsyncIterator,
+    Awaitable,
     Callable,
     TYPE_CHECKING,
 )
 
 from agentscope_runtime.engine.schemas.agent_schemas import RunStatus
 
-from .schema import Incoming, ChannelType
+from ...constant import (
+    CHANNEL_DEBOUNCE_MAX_BATCH,
+    CHANNEL_DEBOUNCE_MAX_LATENCY,
+)
+from .debounce import MessageDebouncer
+from .schema import Incoming, IncomingContentItem, ChannelType
 
 # Called when a user-originated reply was sent (channel, user_id, session_id)
 OnReplySent = Optional[Callable[[str, str, str], None]]
@@ -46,6 +52,14 @@ OutgoingContentPart = Dict[str, Any]
 class BaseChannel(ABC):
     channel: ChannelType
 
+    # Inbound debounce window in seconds (0: off). Channels that opt in
+    # create a debouncer with _make_debouncer() and feed it from their
+    # consume loop.
+    debounce_seconds: float = 0.0
+    # Meta keys that a merged message takes from the last message of the
+    # batch rather than the first (e.g. reply handles).
+    merge_last_meta_keys: tuple = ()
+
     def __init__(
         self,
         process: ProcessHandler,
@@ -147,6 +161,70 @@ class BaseChannel(ABC):
             channel=incoming.channel,
         )
 
+    def _session_key(self, incoming: Incoming) -> str:
+        """Key used by the consumer pool to keep one conversation ordered.
+
+        Must match the session_id produced by to_agent_request(); channels
+        that override the session_id should override this too (cheaper
+        than building the full AgentRequest).
+        """
+        return f"{incoming.channel}:{incoming.sender}"
+
+    def _debounce_key(self, incoming: Incoming) -> str:
+        """Key whose messages are merged: one sender in one session."""
+        return f"{self._session_key(incoming)}:{incoming.sender}"
+
+    def _merge_incoming(self, items: List[Incoming]) -> Incoming:
+        """Merge a debounced batch into one Incoming."""
+        if len(items) == 1:
+            return items[0]
+        first = items[0]
+        merged_texts: List[str] = []
+        merged_content: List[IncomingContentItem] = []
+        for it in items:
+            t = (it.text or "").strip()
+            if t:
+                merged_texts.append(t)
+            if it.content:
+                merged_content.extend(it.content)
+
+        merged = Incoming(
+            channel=first.channel,
+            sender=first.sender,
+            text="\n".join(merged_texts).strip(),
+            content=merged_content,
+            meta=dict(first.meta or {}),
+        )
+        last_meta = items[-1].meta or {}
+        for k in self.merge_last_meta_keys:
+            if k in last_meta:
+                merged.meta[k] = last_meta[k]
+        merged.meta["batched_count"] = len(items)
+        return merged
+
+    def _make_debouncer(
+        self,
+        handle: Callable[[Incoming], Awaitable[None]],
+    ) -> Optional[MessageDebouncer]:
+        """Debouncer that passes merged batches to handle; None if off."""
+        if self.debounce_seconds <= 0:
+            return None
+
+        async def flush(_key: str, items: List[Incoming]) -> None:
+            await handle(self._merge_incoming(items))
+
+        return MessageDebouncer(
+            flush,
+            window=self.debounce_seconds,
+            max_batch=CHANNEL_DEBOUNCE_MAX_BATCH,
+            max_latency=CHANNEL_DEBOUNCE_MAX_LATENCY,
+            name=str(self.channel),
+        )
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters of this channel's lookup caches, by name."""
+        return {}
+
     async def send_response(
         self,
         to_handle: str,
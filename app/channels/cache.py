@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""Bounded LRU + TTL cache for channel lookups, with optional persistence.
+
+Channels keep small key -> value maps next to their API clients: Feishu
+nicknames by open_id, Feishu receive ids and DingTalk session webhooks by
+session. ``LRUCache`` gives them one implementation:
+
+- LRU eviction once ``max_size`` entries are held;
+- per-entry expiry (``ttl``), plus negative entries for failed lookups
+  (``set_negative``, kept for ``negative_ttl``) so a missing permission
+  or unknown user is not re-queried on every message;
+- hit / miss / eviction counters via ``stats()``;
+- if ``path`` is set, write-behind persistence: changes are batched and
+  written ``flush_delay`` seconds later (atomically, in a worker thread).
+  The file is a plain ``{key: value}`` JSON object; expiry times and
+  negative entries are not persisted.
+
+Meant for use from one event loop; methods do not block on disk except
+``load()``, which is called once at channel start.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+# Sentinel value of negative entries
+_NEGATIVE = object()
+
+
+class LRUCache(Generic[V]):
+    """String-keyed LRU cache with TTL, negative entries and persistence."""
+
+    def __init__(
+        self,
+        max_size: int,
+        *,
+        ttl: Optional[float] = None,
+        negative_ttl: float = 300.0,
+        path: Optional[Path] = None,
+        flush_delay: float = 1.0,
+        decode: Optional[Callable[[Any], Optional[V]]] = None,
+        encode: Optional[Callable[[V], Any]] = None,
+        name: str = "cache",
+    ):
+        """decode/encode convert persisted JSON values (decode may return
+        None to skip an entry)."""
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.path = path
+        self.flush_delay = flush_delay
+        self._decode = decode or (lambda v: v)
+        self._encode = encode or (lambda v: v)
+        self._name = name
+        # key -> (value or _NEGATIVE, expires_at monotonic or None)
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._io_lock = asyncio.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+
+    # ---- lookup ----
+
+    def lookup(self, key: str) -> Tuple[bool, Optional[V]]:
+        """(hit, value); a negative entry is a hit with value None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return False, None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._expired += 1
+            self._misses += 1
+            self._drop(key, value)
+            return False, None
+        self._entries.move_to_end(key)
+        if value is _NEGATIVE:
+            self._negative_hits += 1
+            return True, None
+        self._hits += 1
+        return True, value
+
+    def get(self, key: str, default: Optional[V] = None) -> Optional[V]:
+        """Cached value, or default when missing, expired or negative."""
+        _, value = self.lookup(key)
+        return default if value is None else value
+
+    def items(self) -> Iterator[Tuple[str, V]]:
+        """Live positive entries (does not touch LRU order or counters)."""
+        now = time.monotonic()
+        for key, (value, expires_at) in list(self._entries.items()):
+            if value is _NEGATIVE:
+                continue
+            if expires_at is None or now < expires_at:
+                yield key, value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.lookup(key)[0]
+
+    # ---- update ----
+
+    def set(self, key: str, value: V, ttl: Optional[float] = None) -> None:
+        """Store value; ttl overrides the cache default."""
+        old = self._entries.get(key)
+        evicted = self._store(key, value, self.ttl if ttl is None else ttl)
+        if evicted or old is None or old[0] != value:
+            self._mark_dirty()
+
+    def set_negative(self, key: str, ttl: Optional[float] = None) -> None:
+        """Remember that key has no value (for negative_ttl seconds)."""
+        old = self._entries.get(key)
+        ttl = self.negative_ttl if ttl is None else ttl
+        evicted = self._store(key, _NEGATIVE, ttl)
+        if evicted or (old is not None and old[0] is not _NEGATIVE):
+            self._mark_dirty()
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[0] is not _NEGATIVE:
+            self._mark_dirty()
+
+    def _store(self, key: str, value: Any, ttl: Optional[float]) -> bool:
+        """Insert as most recent; True if a positive entry was evicted."""
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        evicted = False
+        while len(self._entries) > self.max_size:
+            _, (old_value, _) = self._entries.popitem(last=False)
+            self._evictions += 1
+            evicted = evicted or old_value is not _NEGATIVE
+        return evicted
+
+    def _drop(self, key: str, value: Any) -> None:
+        del self._entries[key]
+        if value is not _NEGATIVE:
+            self._mark_dirty()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._negative_hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "negative_hits": self._negative_hits,
+            "misses": self._misses,
+            "hit_rate": (
+                round((self._hits + self._negative_hits) / lookups, 4)
+                if lookups
+                else 0.0
+            ),
+            "evictions": self._evictions,
+            "expired": self._expired,
+        }
+
+    # ---- persistence ----
+
+    def load(self) -> None:
+        """Read persisted entries (blocking; call once at start)."""
+        if self.path is None or not self.path.is_file():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            logger.debug(
+                "%s: load from %s failed",
+                self._name,
+                self.path,
+                exc_info=True,
+            )
+            return
+        if not isinstance(data, dict):
+            return
+        for key, raw in data.items():
+            value = self._decode(raw)
+            if value is not None:
+                self._store(str(key), value, self.ttl)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {key: self._encode(value) for key, value in self.items()}
+
+    def _write(self, payload: Dict[str, Any]) -> bool:
+        assert self.path is not None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2, ensure_ascii=False)
+            tmp_path.replace(self.path)
+            return True
+        except Exception:
+            logger.debug(
+                "%s: save to %s failed",
+                self._name,
+                self.path,
+                exc_info=True,
+            )
+            return False
+
+    async def flush(self) -> None:
+        """Write pending changes now (no-op when clean or not persisted)."""
+        async with self._io_lock:
+            if not self._dirty or self.path is None:
+                return
+            self._dirty = False
+            if not await asyncio.to_thread(self._write, self._snapshot()):
+                self._dirty = True
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_delay)
+            await self.flush()
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+
+    def _mark_dirty(self) -> None:
+        if self.path is None:
+            return
+        self._dirty = True
+        if self._flush_task is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (e.g. a sync caller): write through.
+            self._dirty = not self._write(self._snapshot())
+            return
+        self._flush_task = loop.create_task(
+            self._delayed_flush(),
+            name=f"{self._name}_flush",
+        )
+
+    async def close(self) -> None:
+        """Cancel the pending timer and flush outstanding changes."""
+        task = self._flush_task
+        self._flush_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Per-key debounce / coalescing of inbound channel messages.
+
+Users of chat apps often send one thought as several short messages.
+MessageDebouncer collects the messages of each key (typically a session
+and sender) and hands them to ``flush`` as one batch once no new message
+arrived for ``window`` seconds.
+
+All keys share one heap of deadlines and one flush task, woken by a
+single loop timer, instead of a sleeping task per message. A batch is
+flushed early once it holds ``max_batch`` items or its first item has
+waited ``max_latency`` seconds, so a chatty group cannot postpone its
+reply forever.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Called with (key, items) for each batch, items in arrival order
+FlushHandler = Callable[[str, List[Any]], Awaitable[None]]
+
+
+@dataclass
+class _Batch:
+    first_at: float
+    deadline: float
+    items: List[Any] = field(default_factory=list)
+    # Bumped on every deadline change; older heap entries are stale
+    gen: int = 0
+    # Deadline set by max_batch / max_latency rather than the window
+    capped: bool = False
+
+
+class MessageDebouncer:
+    """Coalesce items per key and flush each batch after a quiet window.
+
+    - ``window``: seconds of silence that end a batch (``add()`` may
+      override it per key);
+    - ``max_batch``: flush once a batch holds this many items (0: no cap);
+    - ``max_latency``: flush at most this many seconds after the batch's
+      first item, however busy the key is (0: no cap).
+
+    Batches are flushed one at a time from a single task, so ``flush``
+    should hand work off (e.g. to a worker pool) rather than process it.
+    """
+
+    def __init__(
+        self,
+        flush: FlushHandler,
+        *,
+        window: float,
+        max_batch: int = 0,
+        max_latency: float = 0.0,
+        name: str = "channel",
+    ):
+        self._flush = flush
+        self._window = window
+        self._max_batch = max(0, int(max_batch))
+        self._max_latency = max(0.0, float(max_latency))
+        self._name = name
+
+        self._batches: Dict[str, _Batch] = {}
+        # (deadline, seq, key, gen)
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closed = False
+
+        self._batch_sizes: Counter = Counter()
+        self._capped = 0
+
+    # ---- public ----
+
+    @property
+    def pending(self) -> int:
+        """Items waiting in open batches."""
+        return sum(len(b.items) for b in self._batches.values())
+
+    def last(self, key: str) -> Optional[Any]:
+        """Most recent item of key's open batch, if any."""
+        batch = self._batches.get(key)
+        return batch.items[-1] if batch else None
+
+    def add(self, key: str, item: Any, window: Optional[float] = None) -> None:
+        """Add item to key's batch and push its deadline out.
+
+        Must be called from the event loop thread.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self._name} debouncer is closed")
+        loop = asyncio.get_running_loop()
+        self._ensure_task()
+        now = loop.time()
+        window = self._window if window is None else window
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(first_at=now, deadline=now)
+        batch.items.append(item)
+
+        deadline = now + max(0.0, window)
+        capped = False
+        if (
+            self._max_latency
+            and batch.first_at + self._max_latency < deadline
+        ):
+            deadline = batch.first_at + self._max_latency
+            capped = True
+        if self._max_batch and len(batch.items) >= self._max_batch:
+            deadline = now
+            capped = True
+        batch.gen += 1
+        batch.deadline = deadline
+        batch.capped = capped
+        heapq.heappush(self._heap, (deadline, next(self._seq), key, batch.gen))
+        if self._heap[0][2] == key and self._heap[0][3] == batch.gen:
+            # New earliest deadline: re-arm the timer
+            self._arm(loop)
+
+    def stats(self) -> Dict[str, Any]:
+        """Merge metrics: batch size histogram and current backlog."""
+        batches = sum(self._batch_sizes.values())
+        items = sum(size * n for size, n in self._batch_sizes.items())
+        return {
+            "open_batches": len(self._batches),
+            "pending": self.pending,
+            "batches": batches,
+            "items": items,
+            "avg_batch": round(items / batches, 2) if batches else 0.0,
+            "max_batch": max(self._batch_sizes, default=0),
+            "capped": self._capped,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+        }
+
+    async def close(self, flush_pending: bool = True) -> None:
+        """Stop the flush task; flush open batches first if asked."""
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = self._task
+        self._task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        batches = list(self._batches.items())
+        self._batches.clear()
+        self._heap.clear()
+        if flush_pending:
+            for key, batch in batches:
+                await self._flush_batch(key, batch)
+
+    # ---- internals ----
+
+    def _ensure_task(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(
+                self._run(),
+                name=f"{self._name}_debounce",
+            )
+
+    def _arm(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(self._heap[0][0], self._wakeup.set)
+
+    def _pop_due(self, now: float) -> Optional[Tuple[str, _Batch]]:
+        """Drop stale heap entries; pop the first due batch, if any."""
+        while self._heap:
+            deadline, _, key, gen = self._heap[0]
+            batch = self._batches.get(key)
+            if batch is None or batch.gen != gen:
+                heapq.heappop(self._heap)
+                continue
+            if deadline > now:
+                return None
+            heapq.heappop(self._heap)
+            del self._batches[key]
+            return key, batch
+        return None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            due = self._pop_due(loop.time())
+            if due is not None:
+                await self._flush_batch(*due)
+                continue
+            if self._heap:
+                self._arm(loop)
+            await self._wakeup.wait()
+
+    async def _flush_batch(self, key: str, batch: _Batch) -> None:
+        size = len(batch.items)
+        self._batch_sizes[size] += 1
+        if batch.capped:
+            self._capped += 1
+        try:
+            await self._flush(key, batch.items)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(
+                "%s debounce flush failed for key=%s",
+                self._name,
+                key,
+            )
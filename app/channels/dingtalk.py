@@ -35,9 +35,14 @@ from agentscope_runtime.engine.schemas.agent_schemas import RunStatus
 
 from ...config.config import DingTalkConfig as DingTalkChannelConfig
 from ...config.utils import get_config_path
+from ...constant import CHANNEL_MAX_CONCURRENCY, CHANNEL_MAX_PENDING
 
 from .schema import Incoming, IncomingContentItem
 from .base import BaseChannel, OnReplySent, OutgoingContentPart, ProcessHandler
+from .cache import LRUCache
+from .debounce import MessageDebouncer
+from .worker_pool import SessionWorkerPool
+from .http_pool import get_token_cache, shared_session
 
 if TYPE_CHECKING:
     from agentscope_runtime.engine.schemas.agent_schemas import AgentRequest
@@ -57,9 +62,8 @@ DINGTALK_DEBOUNCE_SECONDS = 0.3  # 300ms
 # webhook_key so cron can use the same short session_id to look up webhook).
 DINGTALK_SESSION_ID_SUFFIX_LEN = 8
 
-_DINGTALK_TOKEN_LOCK = asyncio.Lock()
-_DINGTALK_TOKEN_VALUE: Optional[str] = None
-_DINGTALK_TOKEN_EXPIRES_AT: float = 0.0  # monotonic seconds
+# Max sessionWebhook mappings kept (and persisted) for proactive send
+DINGTALK_SESSION_WEBHOOK_CACHE_MAX = 10000
 
 _DINGTALK_TYPE_MAPPING = {
     "picture": "image",
@@ -452,6 +456,16 @@ class DingTalkChannel(BaseChannel):
       have spoken, consider Open API (corp_id + batchSend) instead.
     """
 
+    debounce_seconds = DINGTALK_DEBOUNCE_SECONDS
+    # Keep the last message's reply handles so its stream callback is
+    # answered instead of hanging.
+    merge_last_meta_keys = (
+        "reply_future",
+        "reply_loop",
+        "incoming_message",
+        "conversation_id",
+    )
+
     channel = "dingtalk"
 
     def __init__(
@@ -487,16 +501,21 @@ class DingTalkChannel(BaseChannel):
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._queue: Optional[asyncio.Queue[Incoming]] = None
         self._consumer_task: Optional[asyncio.Task[None]] = None
+        self._worker_pool: Optional[SessionWorkerPool] = None
         self._stream_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
 
         # Store sessionWebhook for proactive send (in-memory).
         # Key is a handle string, e.g. "dingtalk:sw:<sender>"
-        self._session_webhook_store: Dict[str, str] = {}
-        self._session_webhook_lock = asyncio.Lock()
+        # Persisted (write-behind) so cron can use it after a restart.
+        self._session_webhook_store: LRUCache[str] = LRUCache(
+            DINGTALK_SESSION_WEBHOOK_CACHE_MAX,
+            path=self._session_webhook_store_path(),
+            decode=lambda v: v if isinstance(v, str) and v else None,
+            name="dingtalk_session_webhooks",
+        )
 
-        self._debounced_queue: Optional[asyncio.Queue[Incoming]] = None
-        self._debounce_task: Optional[asyncio.Task[None]] = None
+        self._debouncer: Optional[MessageDebouncer] = None
 
     @classmethod
     def from_env(
@@ -583,43 +602,8 @@ class DingTalkChannel(BaseChannel):
         """Path to persist session webhook mapping (for cron after restart)."""
         return get_config_path().parent / "dingtalk_session_webhooks.json"
 
-    def _load_session_webhook_store_from_disk(self) -> None:
-        """Load session webhook mapping from disk into memory."""
-        path = self._session_webhook_store_path()
-        if not path.is_file():
-            return
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                for k, v in data.items():
-                    if isinstance(v, str) and v:
-                        self._session_webhook_store[k] = v
-        except Exception:
-            logger.debug(
-                "dingtalk load session_webhook store from %s failed",
-                path,
-                exc_info=True,
-            )
-
-    def _save_session_webhook_store_to_disk(self) -> None:
-        """Persist in-memory session webhook store to disk."""
-        path = self._session_webhook_store_path()
-        try:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(
-                    self._session_webhook_store,
-                    f,
-                    indent=2,
-                    ensure_ascii=False,
-                )
-        except Exception:
-            logger.debug(
-                "dingtalk save session_webhook store to %s failed",
-                path,
-                exc_info=True,
-            )
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {"session_webhooks": self._session_webhook_store.stats()}
 
     async def _save_session_webhook(
         self,
@@ -628,19 +612,12 @@ class DingTalkChannel(BaseChannel):
     ) -> None:
         if not webhook_key or not session_webhook:
             return
-        async with self._session_webhook_lock:
-            self._session_webhook_store[webhook_key] = session_webhook
-            self._save_session_webhook_store_to_disk()
+        self._session_webhook_store.set(webhook_key, session_webhook)
 
     async def _load_session_webhook(self, webhook_key: str) -> Optional[str]:
         if not webhook_key:
             return None
-        async with self._session_webhook_lock:
-            out = self._session_webhook_store.get(webhook_key)
-            if out is not None:
-                return out
-            self._load_session_webhook_store_from_disk()
-            return self._session_webhook_store.get(webhook_key)
+        return self._session_webhook_store.get(webhook_key)
 
     # ---------------------------
     # Reply via stream thread
@@ -728,7 +705,7 @@ class DingTalkChannel(BaseChannel):
         )
         logger.info(f"dingtalk sessionWebhook send: payload={payload}")
         try:
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.post(
                     session_webhook,
                     json=payload,
@@ -816,7 +793,7 @@ class DingTalkChannel(BaseChannel):
             or "application/octet-stream",
         )
         try:
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.post(url, data=form) as resp:
                     result = await resp.json(content_type=None)
                     if resp.status >= 400:
@@ -877,7 +854,7 @@ class DingTalkChannel(BaseChannel):
             url[:80] + "..." if len(url) > 80 else url,
         )
         try:
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(url) as resp:
                     if resp.status >= 400:
                         logger.warning(
@@ -1284,10 +1261,33 @@ class DingTalkChannel(BaseChannel):
             await self.send(to_handle, body.strip() or prefix, meta)
 
     async def _consume_loop(self) -> None:
-        assert self._debounced_queue is not None
+        assert self._queue is not None
+        assert self._worker_pool is not None
         while True:
-            msg = await self._debounced_queue.get()
-            await self._consume_one(msg)
+            msg = await self._queue.get()
+            if self._debouncer is None:
+                await self._submit(msg)
+                continue
+            key = self._debounce_key(msg)
+            # The previous pending msg of this key will be merged and won't
+            # get a real reply. Set its reply_future first so the stream
+            # callback doesn't wait until timeout.
+            prev = self._debouncer.last(key)
+            if prev is not None:
+                pm = prev.meta or {}
+                if (
+                    pm.get("reply_loop") is not None
+                    and pm.get("reply_future") is not None
+                ):
+                    self._reply_sync(pm, SENT_VIA_WEBHOOK)
+            self._debouncer.add(key, msg)
+
+    async def _submit(self, msg: Incoming) -> None:
+        assert self._worker_pool is not None
+        await self._worker_pool.submit(self._session_key(msg), msg)
+
+    def _session_key(self, incoming: Incoming) -> str:
+        return self._debounce_key(incoming)
 
     async def _consume_one(
         self,
@@ -1425,91 +1425,6 @@ class DingTalkChannel(BaseChannel):
         # fallback: at least avoid mixing different senders
         return f"{self.channel}:{msg.sender}"
 
-    def _merge_incoming(self, items: list[Incoming]) -> Incoming:
-        """Merge multiple Incoming messages into one."""
-        first = items[0]
-        merged_texts: list[str] = []
-        merged_content: list[IncomingContentItem] = []
-
-        for it in items:
-            t = (it.text or "").strip()
-            if t:
-                merged_texts.append(t)
-            if it.content:
-                merged_content.extend(it.content)
-
-        merged = Incoming(
-            channel=first.channel,
-            sender=first.sender,
-            text="\n".join(merged_texts).strip(),
-            content=merged_content,
-            meta=dict(first.meta or {}),
-        )
-
-        # Keep last item's reply_future/reply_loop/incoming_message to avoid
-        # hanging.
-        last_meta = items[-1].meta or {}
-        for k in (
-            "reply_future",
-            "reply_loop",
-            "incoming_message",
-            "conversation_id",
-        ):
-            if k in last_meta:
-                merged.meta[k] = last_meta[k]
-
-        # (Optional) Store batched count for debugging/tracing.
-        merged.meta["batched_count"] = len(items)
-        return merged
-
-    async def _debounce_loop(self) -> None:
-        assert self._queue is not None
-        assert self._debounced_queue is not None
-
-        pending: dict[str, list[Incoming]] = {}
-        timers: dict[str, asyncio.Task[None]] = {}
-
-        async def flush(key: str) -> None:
-            try:
-                await asyncio.sleep(DINGTALK_DEBOUNCE_SECONDS)
-                items = pending.pop(key, [])
-                timers.pop(key, None)
-                if not items:
-                    return
-                merged = self._merge_incoming(items)
-                await self._debounced_queue.put(merged)
-            except asyncio.CancelledError as e:
-                raise e
-            except Exception:
-                logger.exception("dingtalk debounce flush failed")
-
-        while True:
-            msg = await self._queue.get()
-            key = self._debounce_key(msg)
-
-            # If this key already has pending, the previous msg will be merged
-            # and won't get a real reply. Set reply_future first so stream
-            # callback doesn't wait until timeout.
-            if pending.get(key):
-                prev = pending[key][-1]  # previous message
-                pm = prev.meta or {}
-                if (
-                    pm.get("reply_loop") is not None
-                    and pm.get(
-                        "reply_future",
-                    )
-                    is not None
-                ):
-                    self._reply_sync(pm, SENT_VIA_WEBHOOK)
-
-            pending.setdefault(key, []).append(msg)
-
-            # Reset timer: 300ms window starts from when the last msg arrives.
-            old = timers.get(key)
-            if old and not old.done():
-                old.cancel()
-            timers[key] = asyncio.create_task(flush(key))
-
     def _run_stream_forever(self) -> None:
         logger.info(
             "dingtalk stream thread started (client_id=%s)",
@@ -1528,7 +1443,7 @@ class DingTalkChannel(BaseChannel):
         if not self.enabled:
             logger.info("disabled by env DINGTALK_CHANNEL_ENABLED=0")
             return
-        self._load_session_webhook_store_from_disk()
+        self._session_webhook_store.load()
         if not self.client_id or not self.client_secret:
             raise RuntimeError(
                 "DINGTALK_CLIENT_ID and DINGTALK_CLIENT_SECRET are required "
@@ -1537,15 +1452,16 @@ class DingTalkChannel(BaseChannel):
 
         self._loop = asyncio.get_running_loop()
         self._queue = asyncio.Queue(maxsize=1000)  # raw input
-        self._debounced_queue = asyncio.Queue(maxsize=1000)  # after merge
-
-        self._debounce_task = asyncio.create_task(
-            self._debounce_loop(),
-            name="dingtalk_channel_debounce",
+        self._debouncer = self._make_debouncer(self._submit)
+        self._worker_pool = SessionWorkerPool(
+            self._consume_one,
+            max_concurrency=CHANNEL_MAX_CONCURRENCY,
+            max_pending=CHANNEL_MAX_PENDING,
+            name="dingtalk",
         )
 
         self._consumer_task = asyncio.create_task(
-            self._consume_loop(),  # consume_loop reads from debounced_queue
+            self._consume_loop(),  # debounces, then feeds the worker pool
             name="dingtalk_channel_consumer",
         )
 
@@ -1586,15 +1502,14 @@ class DingTalkChannel(BaseChannel):
                 pass
             except Exception:
                 pass
+        if self._debouncer:
+            await self._debouncer.close(flush_pending=False)
+            self._debouncer = None
+        if self._worker_pool:
+            await self._worker_pool.close()
+            self._worker_pool = None
+        await self._session_webhook_store.close()
         self._client = None
-        if self._debounce_task:
-            self._debounce_task.cancel()
-            try:
-                await self._debounce_task
-            except asyncio.CancelledError:
-                pass
-            except Exception:
-                pass
 
     async def send(
         self,
@@ -1653,48 +1568,39 @@ class DingTalkChannel(BaseChannel):
         )
 
     async def _get_access_token(self) -> str:
-        """Get and cache DingTalk accessToken for 1 hour."""
-        global _DINGTALK_TOKEN_VALUE, _DINGTALK_TOKEN_EXPIRES_AT
-
+        """Get DingTalk accessToken (cached for 1 hour, refreshed early)."""
         if not self.client_id or not self.client_secret:
             raise RuntimeError("DingTalk client_id/client_secret missing")
+        return await get_token_cache().get(
+            ("dingtalk", self.client_id),
+            self._fetch_access_token,
+        )
 
-        now = asyncio.get_running_loop().time()
-        if _DINGTALK_TOKEN_VALUE and now < _DINGTALK_TOKEN_EXPIRES_AT:
-            return _DINGTALK_TOKEN_VALUE
-
-        async with _DINGTALK_TOKEN_LOCK:
-            now = asyncio.get_running_loop().time()
-            if _DINGTALK_TOKEN_VALUE and now < _DINGTALK_TOKEN_EXPIRES_AT:
-                return _DINGTALK_TOKEN_VALUE
-
-            url = "https://api.dingtalk.com/v1.0/oauth2/accessToken"
-            payload = {
-                "appKey": self.client_id,
-                "appSecret": self.client_secret,
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as resp:
-                    data = await resp.json(content_type=None)
-                    if resp.status >= 400:
-                        raise RuntimeError(
-                            f"get accessToken failed status={resp.status} "
-                            f"body={data}",
-                        )
+    async def _fetch_access_token(self) -> tuple[str, float]:
+        """Request a new accessToken; returns (token, ttl seconds)."""
+        url = "https://api.dingtalk.com/v1.0/oauth2/accessToken"
+        payload = {
+            "appKey": self.client_id,
+            "appSecret": self.client_secret,
+        }
 
-            token = data.get("accessToken") or data.get("access_token")
-            if not token:
-                raise RuntimeError(
-                    f"accessToken not found in response: {data}",
-                )
+        async with shared_session() as session:
+            async with session.post(url, json=payload) as resp:
+                data = await resp.json(content_type=None)
+                if resp.status >= 400:
+                    raise RuntimeError(
+                        f"get accessToken failed status={resp.status} "
+                        f"body={data}",
+                    )
 
-            # cache: 1 hour fixed as requested
-            _DINGTALK_TOKEN_VALUE = token
-            _DINGTALK_TOKEN_EXPIRES_AT = (
-                asyncio.get_running_loop().time() + DINGTALK_TOKEN_TTL_SECONDS
+        token = data.get("accessToken") or data.get("access_token")
+        if not token:
+            raise RuntimeError(
+                f"accessToken not found in response: {data}",
             )
-            return token
+
+        # cache: 1 hour fixed as requested
+        return token, DINGTALK_TOKEN_TTL_SECONDS
 
     async def _get_message_file_download_url(
         self,
@@ -1714,7 +1620,7 @@ class DingTalkChannel(BaseChannel):
             "x-acs-dingtalk-access-token": token,
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with shared_session() as session:
             async with session.post(
                 url,
                 json=payload,
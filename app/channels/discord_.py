@@ -5,7 +5,7 @@ from __future__ import annotations
 import os
 import logging
 import asyncio
-from typing import Optional
+from typing import Optional, Set
 
 import aiohttp
 from agentscope_runtime.engine.schemas.agent_schemas import RunStatus
@@ -14,6 +14,7 @@ from ...config.config import DiscordConfig as DiscordChannelConfig
 
 from .schema import Incoming, IncomingContentItem
 from .base import BaseChannel, OnReplySent, ProcessHandler
+from .debounce import MessageDebouncer
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,10 @@ logger = logging.getLogger(__name__)
 class DiscordChannel(BaseChannel):
     channel = "discord"
 
+    # Opt-in inbound debounce (seconds; 0 = off)
+    debounce_seconds = float(os.getenv("DISCORD_DEBOUNCE_SECONDS", "0"))
+    merge_last_meta_keys = ("message_id", "discord_message")
+
     def __init__(
         self,
         process: ProcessHandler,
@@ -54,6 +59,8 @@ class DiscordChannel(BaseChannel):
         
         self._task: Optional[asyncio.Task] = None
         self._client = None
+        self._debouncer: Optional[MessageDebouncer] = None
+        self._turn_tasks: Set[asyncio.Task] = set()
 
         if self.enabled:
             import discord  # type: ignore
@@ -145,6 +152,8 @@ class DiscordChannel(BaseChannel):
                         else None,
                         "message_id": str(message.id),
                         "is_dm": message.guild is None,
+                        # For error replies; dropped before sending
+                        "discord_message": message,
                     },
                 )
 
@@ -157,67 +166,90 @@ class DiscordChannel(BaseChannel):
                     logger.info(f"discord message filtered: user={message.author}")
                     return
                 
-                try:
-                    request = self.to_agent_request(msg)
-                    last_response = None
-                    send_meta = {
-                        **(msg.meta or {}),
-                        "bot_prefix": self.bot_prefix,
-                    }
-                    event_count = 0
-                    async for event in self._process(request):
-                        event_count += 1
-                        obj = getattr(event, "object", None)
-                        status = getattr(event, "status", None)
-                        ev_type = getattr(event, "type", None)
-                        logger.debug(
-                            "discord event #%s: object=%s status=%s type=%s",
-                            event_count,
-                            obj,
-                            status,
-                            ev_type,
-                        )
-                        if obj == "message" and status == RunStatus.Completed:
-                            logger.info(
-                                "discord sending completed message: type=%s "
-                                "to=%s",
-                                ev_type,
-                                msg.sender,
-                            )
-                            await self.send_message_content(
-                                msg.sender,
-                                event,
-                                send_meta,
-                            )
-                        elif obj == "response":
-                            last_response = event
+                if self._debouncer is not None:
+                    self._debouncer.add(self._debounce_key(msg), msg)
+                    return
+                await self._consume_one(msg)
+
+    def _debounce_key(self, incoming: Incoming) -> str:
+        meta = incoming.meta or {}
+        return f"discord:{meta.get('channel_id')}:{meta.get('user_id')}"
+
+    async def _start_turn(self, msg: Incoming) -> None:
+        """Debounce flush: run the merged message as its own task."""
+        task = asyncio.create_task(
+            self._consume_one(msg),
+            name="discord_turn",
+        )
+        self._turn_tasks.add(task)
+        task.add_done_callback(self._turn_tasks.discard)
+
+    async def _consume_one(self, msg: Incoming) -> None:
+        """Process one (possibly merged) Incoming and send the replies."""
+        try:
+            request = self.to_agent_request(msg)
+            last_response = None
+            meta = dict(msg.meta or {})
+            message = meta.pop("discord_message", None)
+            send_meta = {**meta, "bot_prefix": self.bot_prefix}
+            event_count = 0
+            async for event in self._process(request):
+                event_count += 1
+                obj = getattr(event, "object", None)
+                status = getattr(event, "status", None)
+                ev_type = getattr(event, "type", None)
+                logger.debug(
+                    "discord event #%s: object=%s status=%s type=%s",
+                    event_count,
+                    obj,
+                    status,
+                    ev_type,
+                )
+                if obj == "message" and status == RunStatus.Completed:
                     logger.info(
-                        "discord stream done: event_count=%s "
-                        "has_response=%s has_error=%s",
-                        event_count,
-                        last_response is not None,
-                        getattr(last_response, "error", None) is not None
-                        if last_response
-                        else False,
+                        "discord sending completed message: type=%s "
+                        "to=%s",
+                        ev_type,
+                        msg.sender,
                     )
-                    if last_response and getattr(last_response, "error", None):
-                        err = getattr(
-                            last_response.error,
-                            "message",
-                            str(last_response.error),
-                        )
-                        await message.channel.send(
-                            self.bot_prefix + f"Error: {err}",
-                        )
-                    if self._on_reply_sent:
-                        self._on_reply_sent(
-                            self.channel,
-                            request.user_id or msg.sender,
-                            request.session_id
-                            or f"{self.channel}:{msg.sender}",
-                        )
-                except Exception:
-                    logger.exception("process/send failed")
+                    await self.send_message_content(
+                        msg.sender,
+                        event,
+                        send_meta,
+                    )
+                elif obj == "response":
+                    last_response = event
+            logger.info(
+                "discord stream done: event_count=%s "
+                "has_response=%s has_error=%s",
+                event_count,
+                last_response is not None,
+                getattr(last_response, "error", None) is not None
+                if last_response
+                else False,
+            )
+            if (
+                message is not None
+                and last_response
+                and getattr(last_response, "error", None)
+            ):
+                err = getattr(
+                    last_response.error,
+                    "message",
+                    str(last_response.error),
+                )
+                await message.channel.send(
+                    self.bot_prefix + f"Error: {err}",
+                )
+            if self._on_reply_sent:
+                self._on_reply_sent(
+                    self.channel,
+                    request.user_id or msg.sender,
+                    request.session_id
+                    or f"{self.channel}:{msg.sender}",
+                )
+        except Exception:
+            logger.exception("process/send failed")
 
     @classmethod
     def from_env(
@@ -331,11 +363,17 @@ class DiscordChannel(BaseChannel):
     async def start(self) -> None:
         if not self.enabled:
             return
+        self._debouncer = self._make_debouncer(self._start_turn)
         self._task = asyncio.create_task(self._run(), name="discord_gateway")
 
     async def stop(self) -> None:
         if not self.enabled:
             return
+        if self._debouncer:
+            await self._debouncer.close(flush_pending=False)
+            self._debouncer = None
+        for task in list(self._turn_tasks):
+            task.cancel()
         if self._task:
             self._task.cancel()
             try:
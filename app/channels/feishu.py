@@ -17,9 +17,9 @@ import asyncio
 import json
 import logging
 import mimetypes
+import os
 import re
 import threading
-import time
 from collections import OrderedDict
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
@@ -41,26 +41,34 @@ from lark_oapi.api.im.v1 import (
 
 from ...config.config import FeishuConfig as FeishuChannelConfig
 from ...config.utils import get_config_path
+from ...constant import CHANNEL_MAX_CONCURRENCY, CHANNEL_MAX_PENDING
 from .schema import Incoming, IncomingContentItem
 from .base import BaseChannel, OnReplySent, OutgoingContentPart, ProcessHandler
+from .cache import LRUCache
+from .debounce import MessageDebouncer
 from .filter import create_filter_from_config
+from .worker_pool import SessionWorkerPool
+from .http_pool import get_token_cache, shared_session
 
 if TYPE_CHECKING:
     from agentscope_runtime.engine.schemas.agent_schemas import AgentRequest
 
 logger = logging.getLogger(__name__)
 
-# Token cache TTL (refresh 1 min before expire)
-FEISHU_TOKEN_REFRESH_BEFORE_SECONDS = 60
-
 # Max size for Feishu file upload (30MB)
 FEISHU_FILE_MAX_BYTES = 30 * 1024 * 1024
 
 # Dedup cache max size
 FEISHU_PROCESSED_IDS_MAX = 1000
 
-# Nickname cache max size (open_id -> name from Contact API)
+# Nickname cache (open_id -> name from Contact API): max size, how long a
+# name is trusted, and how long a failed lookup is not retried (seconds)
 FEISHU_NICKNAME_CACHE_MAX = 500
+FEISHU_NICKNAME_TTL = 24 * 3600
+FEISHU_NICKNAME_NEGATIVE_TTL = 600
+
+# Max receive_id mappings kept (and persisted) for proactive send
+FEISHU_RECEIVE_ID_CACHE_MAX = 10000
 
 # Short suffix length for session_id (from chat_id or open_id) so request and
 # to_handle stay short; cron/job can use same short session_id to look up.
@@ -113,6 +121,19 @@ def _normalize_feishu_md(text: str) -> str:
     return text
 
 
+def _decode_receive_id(value: Any) -> Optional[Tuple[str, str]]:
+    """Persisted [receive_id_type, receive_id] -> tuple.
+
+    Backward compat: old files stored [receive_id, receive_id_type].
+    """
+    if not isinstance(value, (list, tuple)) or len(value) < 2:
+        return None
+    a, b = str(value[0]), str(value[1])
+    if b in ("open_id", "chat_id"):
+        return (b, a)
+    return (a, b)
+
+
 class FeishuChannel(BaseChannel):
     """Feishu/Lark channel: WebSocket receive, Open API send.
 
@@ -124,6 +145,10 @@ class FeishuChannel(BaseChannel):
 
     channel = "feishu"
 
+    # Opt-in inbound debounce (seconds; 0 = off)
+    debounce_seconds = float(os.getenv("FEISHU_DEBOUNCE_SECONDS", "0"))
+    merge_last_meta_keys = ("feishu_message_id",)
+
     def __init__(
         self,
         process: ProcessHandler,
@@ -165,24 +190,32 @@ class FeishuChannel(BaseChannel):
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._queue: Optional[asyncio.Queue[Incoming]] = None
         self._consumer_task: Optional[asyncio.Task[None]] = None
+        self._worker_pool: Optional[SessionWorkerPool] = None
+        self._debouncer: Optional[MessageDebouncer] = None
         self._stop_event = threading.Event()
 
-        self._tenant_access_token: Optional[str] = None
-        self._tenant_access_token_expire_at: float = 0.0
-        self._token_lock = asyncio.Lock()
-
         # message_id dedup (ordered, trim when over limit)
         self._processed_message_ids: OrderedDict[str, None] = OrderedDict()
         
         # 文档管理
         from .feishu_document import FeishuDocument
         self._document = FeishuDocument(self)
-        # session_id -> (receive_id, receive_id_type) for send
-        self._receive_id_store: Dict[str, Tuple[str, str]] = {}
-        self._receive_id_lock = asyncio.Lock()
+        # session_id -> (receive_id_type, receive_id) for send, persisted
+        # (write-behind) so cron can resolve it after a restart
+        self._receive_id_store: LRUCache[Tuple[str, str]] = LRUCache(
+            FEISHU_RECEIVE_ID_CACHE_MAX,
+            path=self._receive_id_store_path(),
+            decode=_decode_receive_id,
+            encode=list,
+            name="feishu_receive_ids",
+        )
         # open_id -> nickname (from Contact API) for sender display
-        self._nickname_cache: Dict[str, str] = {}
-        self._nickname_cache_lock = asyncio.Lock()
+        self._nickname_cache: LRUCache[str] = LRUCache(
+            FEISHU_NICKNAME_CACHE_MAX,
+            ttl=FEISHU_NICKNAME_TTL,
+            negative_ttl=FEISHU_NICKNAME_NEGATIVE_TTL,
+            name="feishu_nicknames",
+        )
 
     @classmethod
     def from_env(
@@ -190,8 +223,6 @@ class FeishuChannel(BaseChannel):
         process: ProcessHandler,
         on_reply_sent: OnReplySent = None,
     ) -> "FeishuChannel":
-        import os
-
         return cls(
             process=process,
             enabled=os.getenv("FEISHU_CHANNEL_ENABLED", "0") == "1",
@@ -235,6 +266,22 @@ class FeishuChannel(BaseChannel):
             show_tool_details=show_tool_details,
         )
 
+    def _session_key(self, incoming: Incoming) -> str:
+        """session_id: short suffix of chat_id (group) or open_id (p2p)."""
+        meta = incoming.meta or {}
+        chat_id = (meta.get("feishu_chat_id") or "").strip()
+        chat_type = (meta.get("feishu_chat_type") or "p2p").strip()
+        sender_id = (
+            meta.get("feishu_sender_id") or incoming.sender or ""
+        ).strip()
+        if chat_type == "group" and chat_id:
+            return _short_session_id_from_full_id(chat_id)
+        if sender_id:
+            return _short_session_id_from_full_id(sender_id)
+        if chat_id:
+            return _short_session_id_from_full_id(chat_id)
+        return f"{self.channel}:{incoming.sender}"
+
     def to_agent_request(self, incoming: Incoming) -> "AgentRequest":
         """Build AgentRequest; session_id = short suffix of chat_id or open_id
         (like DingTalk) so request and to_handle stay short; put
@@ -261,15 +308,7 @@ class FeishuChannel(BaseChannel):
         sender_id = (
             meta.get("feishu_sender_id") or incoming.sender or ""
         ).strip()
-
-        if chat_type == "group" and chat_id:
-            session_id = _short_session_id_from_full_id(chat_id)
-        elif sender_id:
-            session_id = _short_session_id_from_full_id(sender_id)
-        elif chat_id:
-            session_id = _short_session_id_from_full_id(chat_id)
-        else:
-            session_id = f"{self.channel}:{incoming.sender}"
+        session_id = self._session_key(incoming)
 
         content_list = incoming.get_content_list()
         contents = []
@@ -364,69 +403,77 @@ class FeishuChannel(BaseChannel):
         return {"receive_id_type": "open_id", "receive_id": s}
 
     async def _get_tenant_access_token(self) -> str:
-        """Fetch and cache tenant_access_token."""
-        now = time.time()
-        if (
-            self._tenant_access_token
-            and now
-            < self._tenant_access_token_expire_at
-            - FEISHU_TOKEN_REFRESH_BEFORE_SECONDS
-        ):
-            return self._tenant_access_token
-
-        async with self._token_lock:
-            now = time.time()
-            if (
-                self._tenant_access_token
-                and now
-                < self._tenant_access_token_expire_at
-                - FEISHU_TOKEN_REFRESH_BEFORE_SECONDS
-            ):
-                return self._tenant_access_token
-
-            url = (
-                "https://open.feishu.cn/open-apis/auth/v3/"
-                "tenant_access_token/internal"
+        """Get tenant_access_token (shared cache, refreshed before expiry)."""
+        return await get_token_cache().get(
+            ("feishu", self.app_id),
+            self._fetch_tenant_access_token,
+        )
+
+    async def _fetch_tenant_access_token(self) -> tuple[str, float]:
+        """Request a new tenant_access_token; returns (token, ttl)."""
+        url = (
+            "https://open.feishu.cn/open-apis/auth/v3/"
+            "tenant_access_token/internal"
+        )
+        payload = {
+            "app_id": self.app_id,
+            "app_secret": self.app_secret,
+        }
+        async with shared_session() as session:
+            async with session.post(url, json=payload) as resp:
+                data = await resp.json(content_type=None)
+                if resp.status >= 400:
+                    raise RuntimeError(
+                        f"Feishu token failed status={resp.status} "
+                        f"body={data}",
+                    )
+        if data.get("code") != 0:
+            raise RuntimeError(
+                f"Feishu token error code={data.get('code')} msg"
+                f"={data.get('msg')}",
             )
-            payload = {
-                "app_id": self.app_id,
-                "app_secret": self.app_secret,
-            }
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as resp:
-                    data = await resp.json(content_type=None)
-                    if resp.status >= 400:
-                        raise RuntimeError(
-                            f"Feishu token failed status={resp.status} "
-                            f"body={data}",
-                        )
-            if data.get("code") != 0:
-                raise RuntimeError(
-                    f"Feishu token error code={data.get('code')} msg"
-                    f"={data.get('msg')}",
-                )
-            token = data.get("tenant_access_token")
-            if not token:
-                raise RuntimeError("Feishu token missing in response")
-            expire = int(data.get("expire", 3600))
-            self._tenant_access_token = token
-            self._tenant_access_token_expire_at = now + expire
-            return token
+        token = data.get("tenant_access_token")
+        if not token:
+            raise RuntimeError("Feishu token missing in response")
+        return token, int(data.get("expire", 3600))
 
     async def _get_user_name_by_open_id(self, open_id: str) -> Optional[str]:
+        """User name (nickname) by open_id, cached.
+
+        Names are kept for FEISHU_NICKNAME_TTL; a failed lookup (e.g.
+        missing contact permission) is not retried for
+        FEISHU_NICKNAME_NEGATIVE_TTL. Returns None on failure.
+        """
+        if not open_id or open_id.startswith("unknown_"):
+            return None
+        hit, name = self._nickname_cache.lookup(open_id)
+        if hit:
+            return name
+        name = await self._fetch_user_name_by_open_id(open_id)
+        if name:
+            self._nickname_cache.set(open_id, name)
+        else:
+            self._nickname_cache.set_negative(open_id)
+        return name
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "nicknames": self._nickname_cache.stats(),
+            "receive_ids": self._receive_id_store.stats(),
+        }
+
+    async def _fetch_user_name_by_open_id(
+        self,
+        open_id: str,
+    ) -> Optional[str]:
         """Fetch user name (nickname) from Feishu Contact API by open_id.
 
         Uses Contact v3 GET /open-apis/contact/v3/users/{user_id} with
         user_id_type=open_id (see Feishu user identity doc:
         https://open.feishu.cn/document/platform-overveiw/basic-concepts/
         user-identity-introduction/open-id).
-        Result is cached. Returns None on failure or missing permission.
+        Returns None on failure or missing permission.
         """
-        if not open_id or open_id.startswith("unknown_"):
-            return None
-        async with self._nickname_cache_lock:
-            if open_id in self._nickname_cache:
-                return self._nickname_cache[open_id]
         url = (
             "https://open.feishu.cn/open-apis/contact/v3/users/"
             f"{open_id}?user_id_type=open_id"
@@ -436,10 +483,11 @@ class FeishuChannel(BaseChannel):
             timeout = aiohttp.ClientTimeout(
                 total=FEISHU_USER_NAME_FETCH_TIMEOUT,
             )
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with shared_session() as session:
                 async with session.get(
                     url,
                     headers={"Authorization": f"Bearer {token}"},
+                    timeout=timeout,
                 ) as resp:
                     body = await resp.text()
                     if resp.status >= 400:
@@ -516,13 +564,6 @@ class FeishuChannel(BaseChannel):
                 )
 
             if name:
-                async with self._nickname_cache_lock:
-                    if len(self._nickname_cache) >= FEISHU_NICKNAME_CACHE_MAX:
-                        # Drop oldest: dict has no order, drop arbitrary
-                        self._nickname_cache.pop(
-                            next(iter(self._nickname_cache)),
-                        )
-                    self._nickname_cache[open_id] = name
                 return name
         except asyncio.TimeoutError:
             logger.debug(
@@ -764,7 +805,7 @@ class FeishuChannel(BaseChannel):
         )
         headers = {"Authorization": f"Bearer {token}"}
         try:
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(
                     url,
                     params={"type": "image"},
@@ -807,7 +848,7 @@ class FeishuChannel(BaseChannel):
         url = f"https://open.feishu.cn/open-apis/im/v1/files/{file_key}"
         headers = {"Authorization": f"Bearer {token}"}
         try:
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(url, headers=headers) as resp:
                     if resp.status >= 400:
                         logger.warning(
@@ -845,58 +886,6 @@ class FeishuChannel(BaseChannel):
         """
         return get_config_path().parent / "feishu_receive_ids.json"
 
-    def _load_receive_id_store_from_disk(self) -> None:
-        """
-        Load receive_id mapping from disk into memory
-        (call at start or on miss).
-        """
-        path = self._receive_id_store_path()
-        if not path.is_file():
-            return
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, dict):
-                for k, v in data.items():
-                    if isinstance(v, (list, tuple)) and len(v) >= 2:
-                        a, b = str(v[0]), str(v[1])
-                        # Store as (receive_id_type, receive_id).
-                        # Backward compat: old file has
-                        # [receive_id, receive_id_type]
-                        if b in ("open_id", "chat_id"):
-                            self._receive_id_store[k] = (b, a)
-                        else:
-                            self._receive_id_store[k] = (a, b)
-        except Exception:
-            logger.debug(
-                "feishu load receive_id store from %s failed",
-                path,
-                exc_info=True,
-            )
-
-    def _save_receive_id_store_to_disk(self) -> None:
-        """Persist in-memory receive_id store to disk."""
-        path = self._receive_id_store_path()
-        try:
-            path.parent.mkdir(parents=True, exist_ok=True)
-            # v is (receive_id_type, receive_id)
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        k: [v[0], v[1]]  # [receive_id_type, receive_id]
-                        for k, v in self._receive_id_store.items()
-                    },
-                    f,
-                    indent=2,
-                    ensure_ascii=False,
-                )
-        except Exception:
-            logger.debug(
-                "feishu save receive_id store to %s failed",
-                path,
-                exc_info=True,
-            )
-
     async def _save_receive_id(
         self,
         session_id: str,
@@ -905,21 +894,19 @@ class FeishuChannel(BaseChannel):
     ) -> None:
         if not session_id or not receive_id:
             return
-        async with self._receive_id_lock:
-            # Store (receive_id_type, receive_id) to match unpack elsewhere
-            self._receive_id_store[session_id] = (receive_id_type, receive_id)
-            # Also key by open_id so cron can resolve when session_id is full
-            # open_id or when lookup uses open_id as key
-            if (
-                receive_id_type == "open_id"
-                and receive_id
-                and receive_id != session_id
-            ):
-                self._receive_id_store[receive_id] = (
-                    receive_id_type,
-                    receive_id,
-                )
-            self._save_receive_id_store_to_disk()
+        # Store (receive_id_type, receive_id) to match unpack elsewhere
+        self._receive_id_store.set(session_id, (receive_id_type, receive_id))
+        # Also key by open_id so cron can resolve when session_id is full
+        # open_id or when lookup uses open_id as key
+        if (
+            receive_id_type == "open_id"
+            and receive_id
+            and receive_id != session_id
+        ):
+            self._receive_id_store.set(
+                receive_id,
+                (receive_id_type, receive_id),
+            )
 
     async def _load_receive_id(
         self,
@@ -927,12 +914,7 @@ class FeishuChannel(BaseChannel):
     ) -> Optional[Tuple[str, str]]:
         if not session_id:
             return None
-        async with self._receive_id_lock:
-            out = self._receive_id_store.get(session_id)
-            if out is not None:
-                return out
-            self._load_receive_id_store_from_disk()
-            return self._receive_id_store.get(session_id)
+        return self._receive_id_store.get(session_id)
 
     def _build_post_content(
         self,
@@ -1040,7 +1022,7 @@ class FeishuChannel(BaseChannel):
             content_type=mime,
         )
         try:
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.post(
                     url,
                     headers={"Authorization": f"Bearer {token}"},
@@ -1073,7 +1055,7 @@ class FeishuChannel(BaseChannel):
 
     async def _fetch_bytes_from_url(self, url: str) -> Optional[bytes]:
         try:
-            async with aiohttp.ClientSession() as session:
+            async with shared_session() as session:
                 async with session.get(url) as resp:
                     if resp.status >= 400:
                         return None
@@ -1363,15 +1345,14 @@ class FeishuChannel(BaseChannel):
             if "#" in session_key:
                 suffix = session_key.split("#", 1)[-1].strip()
                 if len(suffix) >= 4:
-                    async with self._receive_id_lock:
-                        for _, v in self._receive_id_store.items():
-                            if v[0] and str(v[0]).endswith(suffix):
-                                logger.info(
-                                    "feishu _get_receive_for_send: "
-                                    "fallback match by suffix %s",
-                                    suffix,
-                                )
-                                return v
+                    for _, v in self._receive_id_store.items():
+                        if v[0] and str(v[0]).endswith(suffix):
+                            logger.info(
+                                "feishu _get_receive_for_send: "
+                                "fallback match by suffix %s",
+                                suffix,
+                            )
+                            return v
             logger.warning(
                 "feishu _get_receive_for_send: no store entry for "
                 "session_key=%s (user must have chatted first or add "
@@ -1560,9 +1541,17 @@ class FeishuChannel(BaseChannel):
 
     async def _consume_loop(self) -> None:
         assert self._queue is not None
+        assert self._worker_pool is not None
         while True:
             msg = await self._queue.get()
-            await self._consume_one(msg)
+            if self._debouncer is not None:
+                self._debouncer.add(self._debounce_key(msg), msg)
+            else:
+                await self._submit(msg)
+
+    async def _submit(self, msg: Incoming) -> None:
+        assert self._worker_pool is not None
+        await self._worker_pool.submit(self._session_key(msg), msg)
 
     def _run_ws_forever(self) -> None:
         # lark-oapi ws.Client uses a module-level event loop; when start() runs
@@ -1588,7 +1577,7 @@ class FeishuChannel(BaseChannel):
         if not self.enabled:
             logger.info("feishu channel disabled")
             return
-        self._load_receive_id_store_from_disk()
+        self._receive_id_store.load()
         if not FEISHU_AVAILABLE:
             raise RuntimeError(
                 "Feishu channel enabled but lark-oapi not installed. "
@@ -1630,6 +1619,13 @@ class FeishuChannel(BaseChannel):
             daemon=True,
         )
         self._ws_thread.start()
+        self._worker_pool = SessionWorkerPool(
+            self._consume_one,
+            max_concurrency=CHANNEL_MAX_CONCURRENCY,
+            max_pending=CHANNEL_MAX_PENDING,
+            name="feishu",
+        )
+        self._debouncer = self._make_debouncer(self._submit)
         self._consumer_task = asyncio.create_task(
             self._consume_loop(),
             name="feishu_channel_consumer",
@@ -1653,6 +1649,13 @@ class FeishuChannel(BaseChannel):
                 await self._consumer_task
             except asyncio.CancelledError:
                 pass
+        if self._debouncer:
+            await self._debouncer.close(flush_pending=False)
+            self._debouncer = None
+        if self._worker_pool:
+            await self._worker_pool.close()
+            self._worker_pool = None
+        await self._receive_id_store.close()
         self._client = None
         self._ws_client = None
         logger.info("feishu channel stopped")
@@ -9,15 +9,13 @@ Feishu Document - 飞书文档管理
 - 知识库管理
 """
 
-import json
-import base64
-import hashlib
-import time
-import asyncio
 from typing import Optional, Dict, Any, List
 from pathlib import Path
 
+import aiohttp
+
 from .base import logger
+from .http_pool import shared_session
 
 
 class FeishuDocument:
@@ -36,6 +34,23 @@ class FeishuDocument:
         """获取 tenant_access_token"""
         return await self._channel._get_tenant_access_token()
     
+    async def _request_json(
+        self,
+        method: str,
+        url: str,
+        timeout: float = 30,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """通过共享 HTTP 连接池发送请求并解析 JSON 响应"""
+        async with shared_session() as session:
+            async with session.request(
+                method,
+                url,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                **kwargs,
+            ) as resp:
+                return await resp.json(content_type=None)
+    
     # ==================== 文件操作 ====================
     
     async def upload_file(self, file_path: str, file_type: str = "stream") -> Optional[str]:
@@ -66,17 +81,21 @@ class FeishuDocument:
             "Authorization": f"Bearer {token}",
         }
         
-        files = {
-            "file_name": (None, file_path.name),
-            "file_type": (None, file_type),
-            "file_size": (None, str(len(file_content))),
-            "file": (file_path.name, file_content, "application/octet-stream"),
-        }
+        form = aiohttp.FormData()
+        form.add_field("file_name", file_path.name)
+        form.add_field("file_type", file_type)
+        form.add_field("file_size", str(len(file_content)))
+        form.add_field(
+            "file",
+            file_content,
+            filename=file_path.name,
+            content_type="application/octet-stream",
+        )
         
         try:
-            import requests
-            response = requests.post(url, headers=headers, files=files, timeout=60)
-            data = response.json()
+            data = await self._request_json(
+                "POST", url, headers=headers, data=form, timeout=60
+            )
             
             if data.get("code") == 0:
                 return data["data"]["file_token"]
@@ -106,17 +125,21 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.get(url, headers=headers, timeout=60)
+            async with shared_session() as session:
+                async with session.get(
+                    url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=60),
+                ) as resp:
+                    if resp.status != 200:
+                        logger.error(f"[Feishu] 下载文件失败: {resp.status}")
+                        return False
+                    content = await resp.read()
             
-            if response.status_code == 200:
-                Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-                with open(save_path, "wb") as f:
-                    f.write(response.content)
-                return True
-            else:
-                logger.error(f"[Feishu] 下载文件失败: {response.status_code}")
-                return False
+            Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(save_path, "wb") as f:
+                f.write(content)
+            return True
         except Exception as e:
             logger.error(f"[Feishu] 下载文件异常: {e}")
             return False
@@ -166,9 +189,9 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "POST", url, headers=headers, json=data, timeout=30
+            )
             
             if result.get("code") == 0:
                 if doc_type == "doc":
@@ -202,9 +225,9 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.get(url, headers=headers, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "GET", url, headers=headers, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["document"]
@@ -247,9 +270,9 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "POST", url, headers=headers, json=data, timeout=30
+            )
             
             if result.get("code") == 0:
                 return True
@@ -287,9 +310,9 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "POST", url, headers=headers, json=data, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["app"]["app_token"]
@@ -318,9 +341,9 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.get(url, headers=headers, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "GET", url, headers=headers, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["items"]
@@ -361,9 +384,9 @@ class FeishuDocument:
             params["filter"] = filter
         
         try:
-            import requests
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "GET", url, headers=headers, params=params, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["items"]
@@ -402,9 +425,9 @@ class FeishuDocument:
         data = {"fields": fields}
         
         try:
-            import requests
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "POST", url, headers=headers, json=data, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["record"]["record_id"]
@@ -445,9 +468,9 @@ class FeishuDocument:
         data = {"fields": fields}
         
         try:
-            import requests
-            response = requests.put(url, headers=headers, json=data, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "PUT", url, headers=headers, json=data, timeout=30
+            )
             
             if result.get("code") == 0:
                 return True
@@ -475,9 +498,9 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.get(url, headers=headers, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "GET", url, headers=headers, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["items"]
@@ -514,9 +537,9 @@ class FeishuDocument:
         params = {"parent_node_token": parent_node_id} if parent_node_id else {}
         
         try:
-            import requests
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "GET", url, headers=headers, params=params, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["items"]
@@ -545,9 +568,9 @@ class FeishuDocument:
         }
         
         try:
-            import requests
-            response = requests.get(url, headers=headers, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "GET", url, headers=headers, timeout=30
+            )
             
             if result.get("code") == 0:
                 return result["data"]["document"]
@@ -599,10 +622,10 @@ class FeishuDocument:
             return None
         
         try:
-            import requests
             # 创建文档
-            response = requests.post(create_url, headers=headers, json=create_data, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "POST", create_url, headers=headers, json=create_data, timeout=30
+            )
             
             if result.get("code") != 0:
                 logger.error(f"[Feishu] 创建文档失败: {result}")
@@ -618,8 +641,9 @@ class FeishuDocument:
                 "parent_node_token": parent_node_id
             }
             
-            response = requests.post(add_url, headers=headers, json=add_data, timeout=30)
-            result = response.json()
+            result = await self._request_json(
+                "POST", add_url, headers=headers, json=add_data, timeout=30
+            )
             
             if result.get("code") == 0:
                 return document_id
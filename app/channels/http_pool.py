@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Process-wide HTTP client pool and access-token cache for channels.
+
+Channel adapters (DingTalk, Feishu, QQ, Feishu documents) used to open a
+new ``aiohttp.ClientSession`` per request, paying a TCP + TLS handshake
+(and a DNS lookup) on every outbound reply. They now borrow one shared
+session per event loop from ``HttpClientPool``:
+
+- keep-alive connections, capped globally and per host;
+- DNS results cached by the connector;
+- started/closed by ``ChannelManager.start_all``/``stop_all`` (and
+  recreated lazily if used after close).
+
+``TokenCache`` unifies the per-channel access-token caches. Tokens are
+refreshed in the background once they enter the ``refresh_before`` window,
+so callers only wait for a fetch when there is no valid token at all.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+)
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Connection limits for the shared connector
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = 20
+HTTP_KEEPALIVE_TIMEOUT = 30.0
+HTTP_DNS_CACHE_TTL = 300
+HTTP_DEFAULT_TIMEOUT = 60.0
+
+# Refresh tokens this many seconds before they expire
+TOKEN_REFRESH_BEFORE_SECONDS = 300
+
+
+class HttpClientPool:
+    """One shared ``aiohttp.ClientSession`` per event loop."""
+
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache: int = HTTP_DNS_CACHE_TTL,
+        timeout: float = HTTP_DEFAULT_TIMEOUT,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.timeout = timeout
+        self._sessions: Dict[
+            asyncio.AbstractEventLoop,
+            aiohttp.ClientSession,
+        ] = {}
+        self._lock = threading.Lock()
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            use_dns_cache=True,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Shared session for the running loop (created on first use).
+
+        Do not close it; pass per-request ``timeout=`` where needed.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                # Drop sessions of loops that have gone away.
+                for other in [lp for lp in self._sessions if lp.is_closed()]:
+                    del self._sessions[other]
+                session = self._create_session()
+                self._sessions[loop] = session
+            return session
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """``async with pool.session() as s:`` — borrow without closing."""
+        yield self.get_session()
+
+    async def start(self) -> None:
+        """Create the session for the running loop ahead of first use."""
+        self.get_session()
+
+    async def close(self) -> None:
+        """Close the running loop's session (others are closed on their
+        loop if it is still running, otherwise dropped)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sessions = dict(self._sessions)
+            self._sessions.clear()
+        for owner, session in sessions.items():
+            if session.closed:
+                continue
+            if owner is loop:
+                await session.close()
+            elif owner.is_running():
+                asyncio.run_coroutine_threadsafe(session.close(), owner)
+
+
+@dataclass
+class _Token:
+    value: str
+    expires_at: float  # wall clock (time.time())
+
+
+class TokenCache:
+    """Access tokens keyed by (provider, app id), shared across channels.
+
+    Storage is thread-safe so synchronous code (e.g. a WebSocket thread)
+    can use ``peek``/``put`` on the same entries as async callers.
+    """
+
+    def __init__(self, refresh_before: float = TOKEN_REFRESH_BEFORE_SECONDS):
+        self.refresh_before = refresh_before
+        self._tokens: Dict[Hashable, _Token] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[Hashable, asyncio.Lock] = {}
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+
+    def peek(self, key: Hashable, margin: float = 0.0) -> Optional[str]:
+        """Cached token valid for at least ``margin`` more seconds."""
+        with self._lock:
+            token = self._tokens.get(key)
+        if token is not None and time.time() < token.expires_at - margin:
+            return token.value
+        return None
+
+    def put(self, key: Hashable, value: str, expires_in: float) -> None:
+        """Store a token that expires in ``expires_in`` seconds."""
+        with self._lock:
+            self._tokens[key] = _Token(value, time.time() + expires_in)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget a token (e.g. after the API rejected it)."""
+        with self._lock:
+            self._tokens.pop(key, None)
+
+    async def get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Tuple[str, float]]],
+    ) -> str:
+        """Return a valid token, fetching it if needed.
+
+        ``fetch`` returns ``(token, expires_in_seconds)``. Concurrent
+        callers share one fetch. A token inside the refresh window is
+        returned immediately while a background task replaces it.
+        """
+        fresh = self.peek(key, margin=self.refresh_before)
+        if fresh is not None:
+            return fresh
+        usable = self.peek(key)
+        if usable is not None:
+            self._schedule_refresh(key, fetch)
+            return usable
+        async with self._fetch_lock(key):
+            usable = self.peek(key)
+            if usable is not None:
+                return usable
+            return await self._fetch(key, fetch)
+
+    def _fetch_lock(self, key: Hashable) -> asyncio.Lock:
+        lock = self._fetch_locks.get(key)
+        if lock is None:
+            lock = self._fetch_locks.setdefault(key, asyncio.Lock())
+        return lock
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Tuple[str, float]]],
+    ) -> str:
+        value, expires_in = await fetch()
+        self.put(key, value, expires_in)
+        return value
+
+    def _schedule_refresh(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Tuple[str, float]]],
+    ) -> None:
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return
+
+        async def _refresh() -> None:
+            try:
+                async with self._fetch_lock(key):
+                    if self.peek(key, margin=self.refresh_before) is None:
+                        await self._fetch(key, fetch)
+            except Exception:
+                logger.exception("token refresh failed: key=%s", key)
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh())
+
+
+_http_pool: Optional[HttpClientPool] = None
+_token_cache: Optional[TokenCache] = None
+
+
+def get_http_pool() -> HttpClientPool:
+    """Get the process-wide HTTP client pool."""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HttpClientPool()
+    return _http_pool
+
+
+def get_token_cache() -> TokenCache:
+    """Get the process-wide access-token cache."""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache()
+    return _token_cache
+
+
+def shared_session():
+    """``async with shared_session() as session:`` on the global pool."""
+    return get_http_pool().session()
+
+
+__all__ = [
+    "HttpClientPool",
+    "TokenCache",
+    "get_http_pool",
+    "get_token_cache",
+    "shared_session",
+]
@@ -14,6 +14,7 @@ from .dingtalk import DingTalkChannel
 from .feishu import FeishuChannel
 from .qq import QQChannel
 from .console import ConsoleChannel
+from .http_pool import get_http_pool
 from ...constant import get_available_channels
 
 if TYPE_CHECKING:
@@ -104,6 +105,8 @@ class ChannelManager:
         async with self._lock:
             snapshot = list(self.channels)
         logger.info(f"starting channels={[g.channel for g in snapshot]}")
+        # Shared keep-alive HTTP session used by all channel adapters
+        await get_http_pool().start()
         for g in snapshot:
             try:
                 await g.start()
@@ -123,6 +126,7 @@ class ChannelManager:
                 logger.exception(f"failed to stop channels={ch.channel}")
 
         await asyncio.gather(*[_stop(g) for g in reversed(snapshot)])
+        await get_http_pool().close()
 
     async def get_channel(self, channel: str) -> Optional[BaseChannel]:
         async with self._lock:
@@ -131,6 +135,16 @@ class ChannelManager:
                     return ch
             return None
 
+    async def cache_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Lookup cache counters of every channel that has caches."""
+        async with self._lock:
+            snapshot = list(self.channels)
+        return {
+            str(ch.channel): stats
+            for ch in snapshot
+            if (stats := ch.cache_stats())
+        }
+
     async def replace_channel(
         self,
         new_channel: BaseChannel,
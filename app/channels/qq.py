@@ -18,14 +18,20 @@ import threading
 import time
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-
 from agentscope_runtime.engine.schemas.agent_schemas import RunStatus
 
 from ...config.config import QQConfig as QQChannelConfig
+from ...constant import CHANNEL_MAX_CONCURRENCY, CHANNEL_MAX_PENDING
 
 from .schema import Incoming
 from .base import BaseChannel, OnReplySent, OutgoingContentPart, ProcessHandler
+from .debounce import MessageDebouncer
+from .worker_pool import SessionWorkerPool
+from .http_pool import (
+    TOKEN_REFRESH_BEFORE_SECONDS,
+    get_token_cache,
+    shared_session,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -60,18 +66,31 @@ def _get_api_base() -> str:
     return os.getenv("QQ_API_BASE", DEFAULT_API_BASE).rstrip("/")
 
 
-_token_cache: Optional[Dict[str, Any]] = None
-_token_lock = threading.Lock()
+def _token_key(app_id: str) -> tuple:
+    return ("qq", app_id)
+
+
+def _parse_token_response(data: Dict[str, Any]) -> tuple[str, float]:
+    token = data.get("access_token")
+    if not token:
+        raise RuntimeError(f"No access_token in response: {data}")
+    expires_in = data.get("expires_in", 7200)
+    if isinstance(expires_in, str):
+        expires_in = int(expires_in)
+    return token, expires_in
 
 
 def _get_access_token_sync(app_id: str, client_secret: str) -> str:
     """Sync get access_token for use in WebSocket thread.
-    Cached with 5min margin.
+    Shares the async callers' cache; refreshed with a 5min margin.
     """
-    global _token_cache
-    with _token_lock:
-        if _token_cache and time.time() < _token_cache["expires_at"] - 300:
-            return _token_cache["token"]
+    cache = get_token_cache()
+    token = cache.peek(
+        _token_key(app_id),
+        margin=TOKEN_REFRESH_BEFORE_SECONDS,
+    )
+    if token:
+        return token
     try:
         import urllib.request
 
@@ -87,24 +106,13 @@ def _get_access_token_sync(app_id: str, client_secret: str) -> str:
             data = json.loads(resp.read().decode())
     except Exception as e:
         raise RuntimeError(f"Failed to get access_token: {e}") from e
-    token = data.get("access_token")
-    if not token:
-        raise RuntimeError(f"No access_token in response: {data}")
-    expires_in = data.get("expires_in", 7200)
-    if isinstance(expires_in, str):
-        expires_in = int(expires_in)
-    with _token_lock:
-        _token_cache = {
-            "token": token,
-            "expires_at": time.time() + expires_in,
-        }
+    token, expires_in = _parse_token_response(data)
+    cache.put(_token_key(app_id), token, expires_in)
     return token
 
 
-def clear_token_cache() -> None:
-    global _token_cache
-    with _token_lock:
-        _token_cache = None
+def clear_token_cache(app_id: str) -> None:
+    get_token_cache().invalidate(_token_key(app_id))
 
 
 def _get_channel_url_sync(access_token: str) -> str:
@@ -181,35 +189,24 @@ def _get_next_msg_seq(msg_id: str) -> int:
 
 
 async def _get_access_token_async(app_id: str, client_secret: str) -> str:
-    """Async get token for send_content_parts. Uses aiohttp."""
-    global _token_cache
-    with _token_lock:
-        if _token_cache and time.time() < _token_cache["expires_at"] - 300:
-            return _token_cache["token"]
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            TOKEN_URL,
-            json={"appId": app_id, "clientSecret": client_secret},
-            headers={"Content-Type": "application/json"},
-        ) as resp:
-            if resp.status >= 400:
-                text = await resp.text()
-                raise RuntimeError(
-                    f"Token request failed {resp.status}: {text}",
-                )
-            data = await resp.json()
-    token = data.get("access_token")
-    if not token:
-        raise RuntimeError(f"No access_token: {data}")
-    expires_in = data.get("expires_in", 7200)
-    if isinstance(expires_in, str):
-        expires_in = int(expires_in)
-    with _token_lock:
-        _token_cache = {
-            "token": token,
-            "expires_at": time.time() + expires_in,
-        }
-    return token
+    """Async get token for send_content_parts. Uses the shared pool."""
+
+    async def _fetch() -> tuple[str, float]:
+        async with shared_session() as session:
+            async with session.post(
+                TOKEN_URL,
+                json={"appId": app_id, "clientSecret": client_secret},
+                headers={"Content-Type": "application/json"},
+            ) as resp:
+                if resp.status >= 400:
+                    text = await resp.text()
+                    raise RuntimeError(
+                        f"Token request failed {resp.status}: {text}",
+                    )
+                data = await resp.json()
+        return _parse_token_response(data)
+
+    return await get_token_cache().get(_token_key(app_id), _fetch)
 
 
 async def _api_request_async(
@@ -219,7 +216,7 @@ async def _api_request_async(
     body: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     url = f"{_get_api_base()}{path}"
-    async with aiohttp.ClientSession() as session:
+    async with shared_session() as session:
         kwargs = {
             "headers": {
                 "Authorization": f"QQBot {access_token}",
@@ -295,6 +292,10 @@ class QQChannel(BaseChannel):
 
     channel = "qq"
 
+    # Opt-in inbound debounce (seconds; 0 = off)
+    debounce_seconds = float(os.getenv("QQ_DEBOUNCE_SECONDS", "0"))
+    merge_last_meta_keys = ("message_id",)
+
     def __init__(
         self,
         process: ProcessHandler,
@@ -327,6 +328,8 @@ class QQChannel(BaseChannel):
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._queue: Optional[asyncio.Queue[Incoming]] = None
         self._consumer_task: Optional[asyncio.Task[None]] = None
+        self._worker_pool: Optional[SessionWorkerPool] = None
+        self._debouncer: Optional[MessageDebouncer] = None
         self._ws_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
         self._account_id = "default"
@@ -442,91 +445,103 @@ class QQChannel(BaseChannel):
 
     async def _consume_loop(self) -> None:
         assert self._queue is not None
+        assert self._worker_pool is not None
         while True:
             msg = await self._queue.get()
-            try:
-                request = self.to_agent_request(msg)
-                last_response = None
-                accumulated_parts: List[OutgoingContentPart] = []
-                event_count = 0
-                send_meta = {**(msg.meta or {}), "bot_prefix": self.bot_prefix}
-
-                async for event in self._process(request):
-                    event_count += 1
-                    obj = getattr(event, "object", None)
-                    status = getattr(event, "status", None)
-                    ev_type = getattr(event, "type", None)
-                    logger.debug(
-                        "qq event #%s: object=%s status=%s type=%s",
-                        event_count,
-                        obj,
-                        status,
+            if self._debouncer is not None:
+                self._debouncer.add(self._debounce_key(msg), msg)
+            else:
+                await self._submit(msg)
+
+    async def _submit(self, msg: Incoming) -> None:
+        assert self._worker_pool is not None
+        await self._worker_pool.submit(self._session_key(msg), msg)
+
+    async def _consume_one(self, msg: Incoming) -> None:
+        """Process one Incoming and send the accumulated reply."""
+        try:
+            request = self.to_agent_request(msg)
+            last_response = None
+            accumulated_parts: List[OutgoingContentPart] = []
+            event_count = 0
+            send_meta = {**(msg.meta or {}), "bot_prefix": self.bot_prefix}
+
+            async for event in self._process(request):
+                event_count += 1
+                obj = getattr(event, "object", None)
+                status = getattr(event, "status", None)
+                ev_type = getattr(event, "type", None)
+                logger.debug(
+                    "qq event #%s: object=%s status=%s type=%s",
+                    event_count,
+                    obj,
+                    status,
+                    ev_type,
+                )
+                if obj == "message" and status == RunStatus.Completed:
+                    parts = self._message_to_content_parts(event)
+                    logger.info(
+                        "qq completed message: type=%s parts_count=%s",
                         ev_type,
+                        len(parts),
                     )
-                    if obj == "message" and status == RunStatus.Completed:
-                        parts = self._message_to_content_parts(event)
-                        logger.info(
-                            "qq completed message: type=%s parts_count=%s",
-                            ev_type,
-                            len(parts),
-                        )
-                        accumulated_parts.extend(parts)
-                    elif obj == "response":
-                        last_response = event
-
-                if last_response and getattr(last_response, "error", None):
-                    err = getattr(
-                        last_response.error,
-                        "message",
-                        str(last_response.error),
-                    )
-                    err_text = self.bot_prefix + f"Error: {err}"
-                    await self.send_content_parts(
-                        msg.sender,
-                        [{"type": "text", "text": err_text}],
-                        send_meta,
-                    )
-                elif accumulated_parts:
-                    await self.send_content_parts(
-                        msg.sender,
-                        accumulated_parts,
-                        send_meta,
-                    )
-                elif last_response is None:
-                    await self.send_content_parts(
-                        msg.sender,
-                        [
-                            {
-                                "type": "text",
-                                "text": self.bot_prefix
-                                + "An error occurred while processing your "
-                                "request.",
-                            },
-                        ],
-                        send_meta,
-                    )
-                if self._on_reply_sent:
-                    self._on_reply_sent(
-                        self.channel,
-                        request.user_id or msg.sender,
-                        request.session_id or f"{self.channel}:{msg.sender}",
-                    )
+                    accumulated_parts.extend(parts)
+                elif obj == "response":
+                    last_response = event
+
+            if last_response and getattr(last_response, "error", None):
+                err = getattr(
+                    last_response.error,
+                    "message",
+                    str(last_response.error),
+                )
+                err_text = self.bot_prefix + f"Error: {err}"
+                await self.send_content_parts(
+                    msg.sender,
+                    [{"type": "text", "text": err_text}],
+                    send_meta,
+                )
+            elif accumulated_parts:
+                await self.send_content_parts(
+                    msg.sender,
+                    accumulated_parts,
+                    send_meta,
+                )
+            elif last_response is None:
+                await self.send_content_parts(
+                    msg.sender,
+                    [
+                        {
+                            "type": "text",
+                            "text": self.bot_prefix
+                            + "An error occurred while processing your "
+                            "request.",
+                        },
+                    ],
+                    send_meta,
+                )
+            if self._on_reply_sent:
+                self._on_reply_sent(
+                    self.channel,
+                    request.user_id or msg.sender,
+                    request.session_id or f"{self.channel}:{msg.sender}",
+                )
+        except Exception:
+            logger.exception("qq process/reply failed")
+            try:
+                await self.send_content_parts(
+                    msg.sender,
+                    [
+                        {
+                            "type": "text",
+                            "text": "An error occurred while processing "
+                            "your request.",
+                        },
+                    ],
+                    msg.meta or {},
+                )
             except Exception:
-                logger.exception("qq process/reply failed")
-                try:
-                    await self.send_content_parts(
-                        msg.sender,
-                        [
-                            {
-                                "type": "text",
-                                "text": "An error occurred while processing "
-                                "your request.",
-                            },
-                        ],
-                        msg.meta or {},
-                    )
-                except Exception:
-                    logger.exception("send error message failed")
+                logger.exception("send error message failed")
 
     def _run_ws_forever(self) -> None:
         try:
@@ -549,7 +564,7 @@ class QQChannel(BaseChannel):
             if self._stop_event.is_set():
                 return False
             if should_refresh_token:
-                clear_token_cache()
+                clear_token_cache(self.app_id)
                 should_refresh_token = False
             try:
                 token = _get_access_token_sync(self.app_id, self.client_secret)
@@ -927,6 +942,13 @@ class QQChannel(BaseChannel):
             )
         self._loop = asyncio.get_running_loop()
         self._queue = asyncio.Queue(maxsize=1000)
+        self._worker_pool = SessionWorkerPool(
+            self._consume_one,
+            max_concurrency=CHANNEL_MAX_CONCURRENCY,
+            max_pending=CHANNEL_MAX_PENDING,
+            name="qq",
+        )
+        self._debouncer = self._make_debouncer(self._submit)
         self._consumer_task = asyncio.create_task(
             self._consume_loop(),
             name="qq_channel_consumer",
@@ -952,3 +974,9 @@ class QQChannel(BaseChannel):
                 pass
             except Exception:
                 pass
+        if self._debouncer:
+            await self._debouncer.close(flush_pending=False)
+            self._debouncer = None
+        if self._worker_pool:
+            await self._worker_pool.close()
+            self._worker_pool = None
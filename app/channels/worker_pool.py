@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Per-session consumer pool for channels.
+
+Channels used to consume their inbound queue one message at a time, so a
+slow agent turn for one conversation blocked every other conversation on
+the same bot (head-of-line blocking). SessionWorkerPool runs different
+sessions concurrently (bounded by max_concurrency) while keeping messages
+of the same session strictly ordered.
+
+Backpressure: at most max_pending messages may be buffered in the pool;
+submit() waits for a free slot, so the channel's consume loop stops
+pulling from its inbound queue until workers catch up.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+# Handler invoked for each message: typically channel._consume_one
+MessageHandler = Callable[[Any], Awaitable[None]]
+
+
+class SessionWorkerPool:
+    """Bounded worker pool keyed by session.
+
+    - One drain task per active session; it processes that session's
+      messages in FIFO order and exits when the session queue is empty.
+    - A global semaphore caps how many handlers run at once.
+    - A pending-slot semaphore bounds buffered messages (backpressure).
+    """
+
+    def __init__(
+        self,
+        handler: MessageHandler,
+        *,
+        max_concurrency: int = 8,
+        max_pending: int = 1000,
+        name: str = "channel",
+    ):
+        self._handler = handler
+        self._name = name
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._max_pending = max(1, int(max_pending))
+        self._run_sem = asyncio.Semaphore(self._max_concurrency)
+        self._pending_sem = asyncio.Semaphore(self._max_pending)
+        self._sessions: Dict[str, Deque[Any]] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._pending = 0
+        self._running = 0
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        """Messages buffered in the pool (queued or running)."""
+        return self._pending
+
+    @property
+    def running(self) -> int:
+        """Handlers currently executing."""
+        return self._running
+
+    @property
+    def active_sessions(self) -> int:
+        """Sessions with queued or running messages."""
+        return len(self._sessions)
+
+    async def submit(self, key: str, item: Any) -> None:
+        """Enqueue item for session key; waits when the pool is full."""
+        if self._closed:
+            raise RuntimeError(f"{self._name} worker pool is closed")
+        await self._pending_sem.acquire()
+        self._pending += 1
+        queue = self._sessions.get(key)
+        if queue is not None:
+            # Session drain task is alive; it will pick this up in order.
+            queue.append(item)
+            return
+        self._sessions[key] = deque([item])
+        task = asyncio.create_task(
+            self._drain(key),
+            name=f"{self._name}_session_worker",
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _drain(self, key: str) -> None:
+        queue = self._sessions[key]
+        try:
+            while queue:
+                item = queue.popleft()
+                try:
+                    async with self._run_sem:
+                        self._running += 1
+                        try:
+                            await self._handler(item)
+                        finally:
+                            self._running -= 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception(
+                        "%s worker failed for session=%s",
+                        self._name,
+                        key,
+                    )
+                finally:
+                    self._release_slot()
+        finally:
+            # On cancel, drop leftovers and give their slots back.
+            for _ in range(len(queue)):
+                self._release_slot()
+            queue.clear()
+            if self._sessions.get(key) is queue:
+                del self._sessions[key]
+
+    def _release_slot(self) -> None:
+        self._pending -= 1
+        self._pending_sem.release()
+
+    async def close(self) -> None:
+        """Cancel all session workers and wait for them to finish."""
+        self._closed = True
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
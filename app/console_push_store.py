@@ -1,40 +1,96 @@
 # -*- coding: utf-8 -*-
 """In-memory store for console channel push messages (e.g. cron text).
 
-Bounded: at most _MAX_MESSAGES kept; messages older than _MAX_AGE_SECONDS
-are dropped when reading. Frontend dedupes by id and caps its seen set.
+Messages are kept in one ring buffer per session, so appending and taking
+a session's messages do not scan other sessions. A global queue in
+arrival order drives eviction: at most _MAX_MESSAGES are kept in total
+(and _MAX_MESSAGES_PER_SESSION per session), and messages older than
+_MAX_AGE_SECONDS are dropped. Frontend dedupes by id and caps its seen set.
+
+Readers can wait for new messages instead of polling: ``wait_take`` (long
+poll for one session) and ``wait_recent`` (cursor over all sessions, for
+SSE) return as soon as a message is appended.
 """
 from __future__ import annotations
 
 import asyncio
+import itertools
 import time
 import uuid
-from typing import Any, Dict, List
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
-# Single list: each item has id, text, ts, session_id.
-# Bounded by count and age.
-_list: List[Dict[str, Any]] = []
+# session_id -> messages (id, text, ts, session_id, seq), oldest first.
+_sessions: Dict[str, Deque[Dict[str, Any]]] = {}
+# Every appended message, oldest first. Messages already taken are
+# skipped lazily.
+_order: Deque[Dict[str, Any]] = deque()
+_count = 0
+_seq = itertools.count(1)
 _lock = asyncio.Lock()
+_cond = asyncio.Condition(_lock)
 _MAX_AGE_SECONDS = 60
 _MAX_MESSAGES = 500
+_MAX_MESSAGES_PER_SESSION = 100
+
+
+def _is_live(msg: Dict[str, Any]) -> bool:
+    # take() empties a whole session, so its remaining messages are
+    # exactly those from the session's oldest seq onwards.
+    msgs = _sessions.get(msg["session_id"])
+    return bool(msgs) and msg["seq"] >= msgs[0]["seq"]
+
+
+def _evict(now: float) -> None:
+    """Drop messages over the size/age bounds and compact stale entries."""
+    global _count, _order
+    cutoff = now - _MAX_AGE_SECONDS
+    while _order and (_count > _MAX_MESSAGES or _order[0]["ts"] < cutoff):
+        msg = _order.popleft()
+        if _is_live(msg):
+            msgs = _sessions[msg["session_id"]]
+            msgs.popleft()
+            _count -= 1
+            if not msgs:
+                del _sessions[msg["session_id"]]
+    if len(_order) > 2 * _MAX_MESSAGES:
+        _order = deque(m for m in _order if _is_live(m))
 
 
 async def append(session_id: str, text: str) -> None:
-    """Append a message (bounded: oldest dropped if over _MAX_MESSAGES)."""
+    """Append a message (bounded: oldest dropped if over the limits)."""
+    global _count
     if not session_id or not text:
         return
-    async with _lock:
-        _list.append(
-            {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "ts": time.time(),
-                "session_id": session_id,
-            },
-        )
-        if len(_list) > _MAX_MESSAGES:
-            _list.sort(key=lambda m: m["ts"])
-            del _list[: len(_list) - _MAX_MESSAGES]
+    async with _cond:
+        now = time.time()
+        msgs = _sessions.get(session_id)
+        if msgs is None:
+            msgs = _sessions[session_id] = deque()
+        msg = {
+            "id": str(uuid.uuid4()),
+            "text": text,
+            "ts": now,
+            "session_id": session_id,
+            "seq": next(_seq),
+        }
+        msgs.append(msg)
+        _order.append(msg)
+        _count += 1
+        if len(msgs) > _MAX_MESSAGES_PER_SESSION:
+            msgs.popleft()
+            _count -= 1
+        _evict(now)
+        _cond.notify_all()
+
+
+def _take_locked(session_id: str) -> List[Dict[str, Any]]:
+    global _count
+    msgs = _sessions.pop(session_id, None)
+    if not msgs:
+        return []
+    _count -= len(msgs)
+    return _strip_ts(msgs)
 
 
 async def take(session_id: str) -> List[Dict[str, Any]]:
@@ -42,33 +98,97 @@ async def take(session_id: str) -> List[Dict[str, Any]]:
     if not session_id:
         return []
     async with _lock:
-        out = [m for m in _list if m.get("session_id") == session_id]
-        _list[:] = [m for m in _list if m.get("session_id") != session_id]
-        return _strip_ts(out)
+        return _take_locked(session_id)
+
+
+async def wait_take(
+    session_id: str,
+    timeout: float,
+) -> List[Dict[str, Any]]:
+    """Like ``take``, but wait up to timeout seconds for a message."""
+    if not session_id:
+        return []
+    async with _cond:
+        if session_id not in _sessions and timeout > 0:
+            try:
+                await asyncio.wait_for(
+                    _cond.wait_for(lambda: session_id in _sessions),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                return []
+        return _take_locked(session_id)
 
 
 async def take_all() -> List[Dict[str, Any]]:
     """Return and remove all messages."""
+    global _count
     async with _lock:
-        out = list(_list)
-        _list.clear()
+        out = [m for m in _order if _is_live(m)]
+        _sessions.clear()
+        _order.clear()
+        _count = 0
         return _strip_ts(out)
 
 
-def _strip_ts(msgs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _strip_ts(msgs) -> List[Dict[str, Any]]:
     return [{"id": m["id"], "text": m["text"]} for m in msgs]
 
 
+def _recent_locked(
+    cutoff: float,
+    after_seq: int = 0,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Live messages newer than cutoff and after_seq; plus the last seq."""
+    out = []
+    for msg in reversed(_order):
+        if msg["ts"] < cutoff or msg["seq"] <= after_seq:
+            break
+        if _is_live(msg):
+            out.append(msg)
+    out.reverse()
+    last_seq = _order[-1]["seq"] if _order else after_seq
+    return out, max(last_seq, after_seq)
+
+
 async def get_recent(
     max_age_seconds: int = _MAX_AGE_SECONDS,
 ) -> List[Dict[str, Any]]:
     """
-    Return recent messages (not consumed). Drop older than max_age_seconds
-    from store to bound memory.
+    Return recent messages (not consumed). Drop older than the store's age
+    limit to bound memory.
     """
     now = time.time()
-    cutoff = now - max_age_seconds
     async with _lock:
-        out = [m for m in _list if m["ts"] >= cutoff]
-        _list[:] = out
+        _evict(now)
+        out, _ = _recent_locked(now - max_age_seconds)
         return _strip_ts(out)
+
+
+async def wait_recent(
+    after_seq: Optional[int],
+    timeout: float,
+    max_age_seconds: int = _MAX_AGE_SECONDS,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Recent messages (all sessions, not consumed) after a cursor.
+
+    Pass ``after_seq=None`` first to get everything recent; pass the
+    returned cursor on the next call to only get newer messages. Waits up
+    to timeout seconds when there is nothing new.
+    """
+    cursor = after_seq or 0
+    async with _cond:
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(
+                    _cond.wait_for(
+                        lambda: bool(_order) and _order[-1]["seq"] > cursor,
+                    ),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                pass
+        now = time.time()
+        _evict(now)
+        out, last_seq = _recent_locked(now - max_age_seconds, cursor)
+        return _strip_ts(out), last_seq
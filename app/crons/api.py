@@ -2,10 +2,10 @@
 from __future__ import annotations
 
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
 from .manager import CronManager
-from .models import CronJobSpec, CronJobView
+from .models import CronJobSpec, CronJobView, CronRunRecord, CronRunStats
 
 router = APIRouter(prefix="/cron", tags=["cron"])
 
@@ -109,3 +109,40 @@ async def get_job_state(
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
     return mgr.get_state(job_id).model_dump(mode="json")
+
+
+@router.get("/jobs/{job_id}/runs", response_model=list[CronRunRecord])
+async def list_job_runs(
+    job_id: str,
+    limit: int = Query(50, ge=1, le=1000),
+    mgr: CronManager = Depends(get_cron_manager),
+):
+    """Most recent runs of a job, newest first."""
+    job = await mgr.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return mgr.list_runs(job_id, limit)
+
+
+@router.get("/jobs/{job_id}/stats", response_model=CronRunStats)
+async def get_job_stats(
+    job_id: str,
+    mgr: CronManager = Depends(get_cron_manager),
+):
+    """Duration percentiles and timeout headroom of a job."""
+    stats = await mgr.get_run_stats(job_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return stats
+
+
+@router.get("/stats/slow", response_model=list[CronRunStats])
+async def list_slow_jobs(mgr: CronManager = Depends(get_cron_manager)):
+    """Jobs whose runs approach runtime.timeout_seconds."""
+    return await mgr.list_slow_jobs()
+
+
+@router.get("/stats/slots")
+async def get_slot_stats(mgr: CronManager = Depends(get_cron_manager)):
+    """Cron runs in flight / queued per channel and agent."""
+    return mgr.get_slot_stats()
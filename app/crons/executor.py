@@ -3,25 +3,74 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any, Dict
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 from .models import CronJobSpec
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class RunCounters:
+    """Per-run counters filled in by ``CronExecutor.execute``."""
+
+    started: float = field(default_factory=time.monotonic)
+    events_sent: int = 0
+    first_event_ms: Optional[float] = None
+    tokens: Optional[int] = None
+
+    def sent(self) -> None:
+        self.events_sent += 1
+        if self.first_event_ms is None:
+            self.first_event_ms = (time.monotonic() - self.started) * 1000.0
+
+
+def _event_tokens(event: Any) -> Optional[int]:
+    """total_tokens reported by an event's usage, if any."""
+    usage = (
+        event.get("usage")
+        if isinstance(event, dict)
+        else getattr(event, "usage", None)
+    )
+    if not usage:
+        return None
+    if hasattr(usage, "model_dump"):
+        usage = usage.model_dump()
+    elif not isinstance(usage, dict):
+        usage = vars(usage)
+    total = usage.get("total_tokens")
+    if total is None and (
+        "input_tokens" in usage or "output_tokens" in usage
+    ):
+        total = (usage.get("input_tokens") or 0) + (
+            usage.get("output_tokens") or 0
+        )
+    return total
+
+
 class CronExecutor:
     def __init__(self, *, runner: Any, channel_manager: Any):
         self._runner = runner
         self._channel_manager = channel_manager
 
-    async def execute(self, job: CronJobSpec) -> None:
+    async def execute(
+        self,
+        job: CronJobSpec,
+        counters: Optional[RunCounters] = None,
+    ) -> None:
         """Execute one job once.
 
         - task_type text: send fixed text to channel
         - task_type agent: ask agent with prompt, send reply to channel (
             stream_query + send_event)
+
+        counters (optional) receives the number of events sent, the
+        latency of the first one and the token usage reported by events.
         """
+        if counters is None:
+            counters = RunCounters()
         target_user_id = job.dispatch.target.user_id
         target_session_id = job.dispatch.target.session_id
         dispatch_meta: Dict[str, Any] = dict(job.dispatch.meta or {})
@@ -49,6 +98,7 @@ class CronExecutor:
                 text=job.text.strip(),
                 meta=dispatch_meta,
             )
+            counters.sent()
             return
 
         # agent: run request as the dispatch target user so context matches
@@ -64,6 +114,9 @@ class CronExecutor:
 
         async def _run() -> None:
             async for event in self._runner.stream_query(req):
+                tokens = _event_tokens(event)
+                if tokens is not None:
+                    counters.tokens = tokens
                 await self._channel_manager.send_event(
                     channel=job.dispatch.channel,
                     user_id=target_user_id,
@@ -71,5 +124,6 @@ class CronExecutor:
                     event=event,
                     meta=dispatch_meta,
                 )
+                counters.sent()
 
         await asyncio.wait_for(_run(), timeout=job.runtime.timeout_seconds)
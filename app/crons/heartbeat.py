@@ -2,7 +2,7 @@
 """
 Heartbeat: run agent with HEARTBEAT.md as query at interval.
 Uses config functions (get_heartbeat_config, get_heartbeat_query_path,
-load_config) for paths and settings.
+get_config_snapshot) for paths and settings.
 """
 from __future__ import annotations
 
@@ -13,9 +13,9 @@ from datetime import datetime, time
 from typing import Any, Dict
 
 from ...config import (
+    get_config_snapshot,
     get_heartbeat_config,
     get_heartbeat_query_path,
-    load_config,
 )
 from ...constant import HEARTBEAT_TARGET_LAST
 
@@ -82,7 +82,7 @@ async def run_heartbeat_once(
     Run one heartbeat: read HEARTBEAT.md via config path, run agent,
     optionally dispatch to last channel (target=last).
     """
-    config = load_config()
+    config = get_config_snapshot()
     hb = get_heartbeat_config()
     if not _in_active_hours(hb.active_hours):
         logger.debug("heartbeat skipped: outside active hours")
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Append-only cron run history with per-job latency stats.
+
+Every finished run is appended as one JSON line to cron_runs.jsonl and
+kept in a per-job deque of the last ``max_runs`` runs. Runs older than
+``max_age_days`` are dropped from the stats. The file is rewritten from
+memory (compacted) once it holds about twice the retained runs, so it
+stays bounded without rewriting on every run.
+
+Notes:
+- Single-machine, no cross-process lock (like jobs.json).
+- File IO runs in a worker thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+from .models import CronRunRecord, CronRunStats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RUNS_PER_JOB = 200
+DEFAULT_MAX_AGE_DAYS = 30
+# Flag jobs whose p90 duration reaches this share of timeout_seconds
+NEAR_TIMEOUT_RATIO = 0.8
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class CronRunHistory:
+    """Run records per job, backed by an append-only JSONL file."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_runs_per_job: int = DEFAULT_MAX_RUNS_PER_JOB,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+    ):
+        self._path = path.expanduser() if path else None
+        self.max_runs_per_job = max_runs_per_job
+        self.max_age = timedelta(days=max_age_days)
+        self._runs: Dict[str, Deque[CronRunRecord]] = {}
+        self._lines = 0
+        self._lock = asyncio.Lock()
+        self._loaded = False
+
+    @property
+    def path(self) -> Optional[Path]:
+        return self._path
+
+    async def load(self) -> None:
+        """Read the history file (once); bad lines are skipped."""
+        async with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if self._path is None or not self._path.exists():
+                return
+            records = await asyncio.to_thread(self._read_file)
+            for record in records:
+                self._remember(record)
+            self._lines = len(records)
+            self._prune()
+
+    def _read_file(self) -> List[CronRunRecord]:
+        records = []
+        with open(self._path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(CronRunRecord.model_validate_json(line))
+                except ValueError:
+                    logger.warning("cron history: skip bad line")
+        return records
+
+    def _remember(self, record: CronRunRecord) -> None:
+        runs = self._runs.get(record.job_id)
+        if runs is None:
+            runs = self._runs[record.job_id] = deque(
+                maxlen=self.max_runs_per_job,
+            )
+        runs.append(record)
+
+    def _prune(self) -> None:
+        """Drop runs past max_age."""
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        for job_id in list(self._runs):
+            runs = self._runs[job_id]
+            while runs and runs[0].ended_at < cutoff:
+                runs.popleft()
+            if not runs:
+                del self._runs[job_id]
+
+    def _retained(self) -> int:
+        return sum(len(runs) for runs in self._runs.values())
+
+    async def append(self, record: CronRunRecord) -> None:
+        """Record a finished run."""
+        async with self._lock:
+            self._remember(record)
+            if self._path is None:
+                return
+            self._lines += 1
+            if self._lines > 2 * self._retained() + 100:
+                self._prune()
+                await self._rewrite()
+            else:
+                line = record.model_dump_json() + "\n"
+                await asyncio.to_thread(self._append_line, line)
+
+    def _append_line(self, line: str) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    async def _rewrite(self) -> None:
+        records = sorted(
+            (r for runs in self._runs.values() for r in runs),
+            key=lambda r: r.ended_at,
+        )
+        payload = "".join(r.model_dump_json() + "\n" for r in records)
+        await asyncio.to_thread(self._write_file, payload)
+        self._lines = len(records)
+
+    def _write_file(self, payload: str) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+        tmp_path.write_text(payload, encoding="utf-8")
+        tmp_path.replace(self._path)
+
+    async def delete_job(self, job_id: str) -> None:
+        """Forget a deleted job's runs."""
+        async with self._lock:
+            if self._runs.pop(job_id, None) and self._path is not None:
+                await self._rewrite()
+
+    def list_runs(self, job_id: str, limit: int = 50) -> List[CronRunRecord]:
+        """Most recent runs of a job, newest first."""
+        runs = self._runs.get(job_id) or ()
+        out = list(runs)[-limit:] if limit > 0 else []
+        out.reverse()
+        return out
+
+    def stats(
+        self,
+        job_id: str,
+        timeout_seconds: Optional[int] = None,
+    ) -> CronRunStats:
+        """Duration percentiles and timeout headroom of a job."""
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        runs = [
+            r for r in self._runs.get(job_id) or () if r.ended_at >= cutoff
+        ]
+        # Cancelled runs were cut short; keep them out of the latencies
+        finished = [r for r in runs if r.status != "cancelled"]
+        durations = [r.duration_ms for r in finished]
+        first_events = [
+            r.first_event_ms
+            for r in finished
+            if r.first_event_ms is not None
+        ]
+        st = CronRunStats(
+            job_id=job_id,
+            runs=len(runs),
+            success=sum(1 for r in runs if r.status == "success"),
+            error=sum(1 for r in runs if r.status == "error"),
+            timeout=sum(1 for r in runs if r.status == "timeout"),
+            cancelled=sum(1 for r in runs if r.status == "cancelled"),
+            p50_ms=percentile(durations, 50),
+            p90_ms=percentile(durations, 90),
+            p99_ms=percentile(durations, 99),
+            max_ms=max(durations) if durations else None,
+            first_event_p50_ms=percentile(first_events, 50),
+            avg_events_sent=(
+                sum(r.events_sent for r in runs) / len(runs) if runs else None
+            ),
+            timeout_seconds=timeout_seconds,
+        )
+        if timeout_seconds and st.p90_ms is not None:
+            st.timeout_ratio = st.p90_ms / (timeout_seconds * 1000.0)
+            st.near_timeout = (
+                st.timeout_ratio >= NEAR_TIMEOUT_RATIO or st.timeout > 0
+            )
+        return st
@@ -3,20 +3,25 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+import uuid
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Tuple
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
 from ...config import get_heartbeat_config
+from ...constant import CRON_JITTER_SECONDS
 
 from ..console_push_store import append as push_store_append
-from .executor import CronExecutor
+from .executor import CronExecutor, RunCounters
 from .heartbeat import parse_heartbeat_every, run_heartbeat_once
-from .models import CronJobSpec, CronJobState
+from .history import CronRunHistory
+from .models import CronJobSpec, CronJobState, CronRunRecord, CronRunStats
+from .scheduler import CronSlotScheduler, SlotDeadlineExceeded
 from .repo.base import BaseJobRepository
 
 HEARTBEAT_JOB_ID = "_heartbeat"
@@ -37,8 +42,12 @@ class CronManager:
         runner: Any,
         channel_manager: Any,
         timezone: str = "UTC",
+        history: Optional[CronRunHistory] = None,
+        slots: Optional[CronSlotScheduler] = None,
     ):
         self._repo = repo
+        # In-memory only unless a history file is given
+        self._history = history if history is not None else CronRunHistory()
         self._runner = runner
         self._channel_manager = channel_manager
         self._scheduler = AsyncIOScheduler(timezone=timezone)
@@ -50,6 +59,11 @@ class CronManager:
         self._lock = asyncio.Lock()
         self._states: Dict[str, CronJobState] = {}
         self._rt: Dict[str, _Runtime] = {}
+        # Global execution budgets shared by all jobs
+        self._slots = slots if slots is not None else CronSlotScheduler()
+        # Registered specs, and job ids per (cron, timezone) for jitter
+        self._specs: Dict[str, CronJobSpec] = {}
+        self._schedule_groups: Dict[Tuple[str, str], Set[str]] = {}
         self._started = False
 
     async def start(self) -> None:
@@ -57,20 +71,14 @@ class CronManager:
             if self._started:
                 return
             jobs_file = await self._repo.load()
+            await self._history.load()
 
             self._scheduler.start()
             for job in jobs_file.jobs:
                 await self._register_or_update(job)
 
             # Default 30m heartbeat: one interval job using config
-            hb = get_heartbeat_config()
-            interval_seconds = parse_heartbeat_every(hb.every)
-            self._scheduler.add_job(
-                self._heartbeat_callback,
-                trigger=IntervalTrigger(seconds=interval_seconds),
-                id=HEARTBEAT_JOB_ID,
-                replace_existing=True,
-            )
+            self._schedule_heartbeat()
 
             self._started = True
 
@@ -92,6 +100,27 @@ class CronManager:
     def get_state(self, job_id: str) -> CronJobState:
         return self._states.get(job_id, CronJobState())
 
+    def get_slot_stats(self) -> Dict[str, Any]:
+        return self._slots.stats()
+
+    def list_runs(self, job_id: str, limit: int = 50) -> list[CronRunRecord]:
+        return self._history.list_runs(job_id, limit)
+
+    async def get_run_stats(self, job_id: str) -> Optional[CronRunStats]:
+        job = await self._repo.get_job(job_id)
+        if not job:
+            return None
+        return self._history.stats(job_id, job.runtime.timeout_seconds)
+
+    async def list_slow_jobs(self) -> list[CronRunStats]:
+        """Stats of jobs whose runs approach runtime.timeout_seconds."""
+        out = []
+        for job in await self._repo.list_jobs():
+            st = self._history.stats(job.id, job.runtime.timeout_seconds)
+            if st.near_timeout:
+                out.append(st)
+        return out
+
     # ----- write/control -----
 
     async def create_or_replace_job(self, spec: CronJobSpec) -> None:
@@ -106,6 +135,10 @@ class CronManager:
                 self._scheduler.remove_job(job_id)
             self._states.pop(job_id, None)
             self._rt.pop(job_id, None)
+            key = self._forget_schedule(job_id)
+            if key is not None:
+                self._reset_lone_jitter(key)
+            await self._history.delete_job(job_id)
             return await self._repo.delete_job(job_id)
 
     async def pause_job(self, job_id: str) -> None:
@@ -141,6 +174,12 @@ class CronManager:
         )
         task.add_done_callback(lambda t: self._task_done_cb(t, job))
 
+    async def reschedule_heartbeat(self) -> None:
+        """Re-read the heartbeat interval from config (on config change)."""
+        async with self._lock:
+            if self._started:
+                self._schedule_heartbeat()
+
     # ----- callbacks -----
 
     def _task_done_cb(self, task: asyncio.Task, job: CronJobSpec) -> None:
@@ -174,7 +213,12 @@ class CronManager:
             sem=asyncio.Semaphore(spec.runtime.max_concurrency),
         )
 
-        trigger = self._build_trigger(spec)
+        old_key = self._forget_schedule(spec.id)
+        key = self._schedule_key(spec)
+        group = self._schedule_groups.setdefault(key, set())
+        group.add(spec.id)
+        self._specs[spec.id] = spec
+        trigger = self._build_trigger(spec, self._jitter_for(spec))
 
         # replace existing
         if self._scheduler.get_job(spec.id):
@@ -192,13 +236,82 @@ class CronManager:
         if not spec.enabled:
             self._scheduler.pause_job(spec.id)
 
+        # A second job on this schedule: spread the others as well
+        if len(group) == 2:
+            self._update_group_jitter(key, skip=spec.id)
+        if old_key is not None and old_key != key:
+            self._reset_lone_jitter(old_key)
+
         # update next_run
         aps_job = self._scheduler.get_job(spec.id)
         st = self._states.get(spec.id, CronJobState())
         st.next_run_at = aps_job.next_run_time if aps_job else None
         self._states[spec.id] = st
 
-    def _build_trigger(self, spec: CronJobSpec) -> CronTrigger:
+    def _schedule_heartbeat(self) -> None:
+        hb = get_heartbeat_config()
+        interval_seconds = parse_heartbeat_every(hb.every)
+        self._scheduler.add_job(
+            self._heartbeat_callback,
+            trigger=IntervalTrigger(seconds=interval_seconds),
+            id=HEARTBEAT_JOB_ID,
+            replace_existing=True,
+        )
+
+    @staticmethod
+    def _schedule_key(spec: CronJobSpec) -> Tuple[str, str]:
+        return spec.schedule.cron, spec.schedule.timezone
+
+    def _jitter_for(self, spec: CronJobSpec) -> int:
+        """runtime.jitter_seconds, or the default if the cron is shared."""
+        if spec.runtime.jitter_seconds is not None:
+            return spec.runtime.jitter_seconds
+        group = self._schedule_groups.get(self._schedule_key(spec), ())
+        return CRON_JITTER_SECONDS if len(group) > 1 else 0
+
+    def _update_group_jitter(
+        self,
+        key: Tuple[str, str],
+        skip: Optional[str] = None,
+    ) -> None:
+        for job_id in self._schedule_groups.get(key, ()):
+            spec = self._specs.get(job_id)
+            if job_id == skip or spec is None:
+                continue
+            if spec.runtime.jitter_seconds is not None:
+                continue
+            if not self._scheduler.get_job(job_id):
+                continue
+            trigger = self._build_trigger(spec, self._jitter_for(spec))
+            if spec.enabled:
+                self._scheduler.reschedule_job(job_id, trigger=trigger)
+            else:
+                # modify_job keeps a paused job paused
+                self._scheduler.modify_job(job_id, trigger=trigger)
+
+    def _reset_lone_jitter(self, key: Tuple[str, str]) -> None:
+        """A job left the group at key: one left alone runs on time."""
+        if len(self._schedule_groups.get(key, ())) == 1:
+            self._update_group_jitter(key)
+
+    def _forget_schedule(self, job_id: str) -> Optional[Tuple[str, str]]:
+        """Drop job_id from its schedule group; returns the group key."""
+        spec = self._specs.pop(job_id, None)
+        if spec is None:
+            return None
+        key = self._schedule_key(spec)
+        group = self._schedule_groups.get(key)
+        if group is not None:
+            group.discard(job_id)
+            if not group:
+                del self._schedule_groups[key]
+        return key
+
+    def _build_trigger(
+        self,
+        spec: CronJobSpec,
+        jitter: int = 0,
+    ) -> CronTrigger:
         # enforce 5 fields (no seconds)
         parts = [p for p in spec.schedule.cron.split() if p]
         if len(parts) != 5:
@@ -215,6 +328,7 @@ class CronManager:
             month=month,
             day_of_week=day_of_week,
             timezone=spec.schedule.timezone,
+            jitter=jitter or None,
         )
 
     async def _scheduled_callback(self, job_id: str) -> None:
@@ -222,7 +336,10 @@ class CronManager:
         if not job:
             return
 
-        await self._execute_once(job)
+        # Queue for an execution slot at most misfire_grace_seconds
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + job.runtime.misfire_grace_seconds
+        await self._execute_once(job, deadline=deadline)
 
         # refresh next_run
         aps_job = self._scheduler.get_job(job_id)
@@ -240,34 +357,112 @@ class CronManager:
         except Exception:  # pylint: disable=broad-except
             logger.exception("heartbeat run failed")
 
-    async def _execute_once(self, job: CronJobSpec) -> None:
+    async def _execute_once(
+        self,
+        job: CronJobSpec,
+        deadline: Optional[float] = None,
+    ) -> None:
+        """Run job once, holding its own and a global execution slot.
+
+        deadline (loop time): give up if no global slot is free by then.
+        """
         rt = self._rt.get(job.id)
         if not rt:
             rt = _Runtime(sem=asyncio.Semaphore(job.runtime.max_concurrency))
             self._rt[job.id] = rt
 
         async with rt.sem:
-            st = self._states.get(job.id, CronJobState())
-            st.last_status = "running"
-            self._states[job.id] = st
-
             try:
-                await self._executor.execute(job)
-                st.last_status = "success"
-                st.last_error = None
-                logger.info(
-                    "cron _execute_once: job_id=%s status=success",
-                    job.id,
-                )
-            except Exception as e:  # pylint: disable=broad-except
-                st.last_status = "error"
-                st.last_error = repr(e)
+                async with self._slots.slot(job, deadline):
+                    await self._run_once(job)
+            except SlotDeadlineExceeded:
+                st = self._states.get(job.id, CronJobState())
+                st.last_status = "skipped"
+                self._states[job.id] = st
                 logger.warning(
-                    "cron _execute_once: job_id=%s status=error error=%s",
+                    "cron _execute_once: job_id=%s status=skipped "
+                    "(no execution slot within misfire_grace_seconds=%s)",
                     job.id,
-                    repr(e),
+                    job.runtime.misfire_grace_seconds,
                 )
-                raise
-            finally:
-                st.last_run_at = datetime.utcnow()
-                self._states[job.id] = st
+
+    async def _run_once(self, job: CronJobSpec) -> None:
+        st = self._states.get(job.id, CronJobState())
+        st.last_status = "running"
+        self._states[job.id] = st
+
+        started_at = datetime.now(timezone.utc)
+        counters = RunCounters()
+        status = "success"
+        error: Optional[str] = None
+        try:
+            await self._executor.execute(job, counters)
+            st.last_status = "success"
+            st.last_error = None
+            logger.info(
+                "cron _execute_once: job_id=%s status=success",
+                job.id,
+            )
+        except asyncio.CancelledError:
+            # Shutdown or job removal interrupted the run
+            status = "cancelled"
+            st.last_status = "cancelled"
+            logger.info(
+                "cron _execute_once: job_id=%s status=cancelled",
+                job.id,
+            )
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            if isinstance(e, asyncio.TimeoutError):
+                status = "timeout"
+            else:
+                status = "error"
+            error = repr(e)
+            st.last_status = "error"
+            st.last_error = repr(e)
+            logger.warning(
+                "cron _execute_once: job_id=%s status=error error=%s",
+                job.id,
+                repr(e),
+            )
+            raise
+        finally:
+            st.last_run_at = datetime.now(timezone.utc)
+            self._states[job.id] = st
+            await self._record_run(
+                job,
+                CronRunRecord(
+                    run_id=str(uuid.uuid4()),
+                    job_id=job.id,
+                    started_at=started_at,
+                    ended_at=st.last_run_at,
+                    status=status,
+                    duration_ms=(time.monotonic() - counters.started)
+                    * 1000.0,
+                    events_sent=counters.events_sent,
+                    first_event_ms=counters.first_event_ms,
+                    tokens=counters.tokens,
+                    error=error,
+                ),
+            )
+
+    async def _record_run(
+        self,
+        job: CronJobSpec,
+        record: CronRunRecord,
+    ) -> None:
+        try:
+            await self._history.append(record)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("cron history append failed: job_id=%s", job.id)
+            return
+        st = self._history.stats(job.id, job.runtime.timeout_seconds)
+        if st.near_timeout:
+            logger.warning(
+                "cron job near timeout: job_id=%s p90_ms=%.0f "
+                "timeout_seconds=%s timeouts=%s",
+                job.id,
+                st.p90_ms or 0.0,
+                job.runtime.timeout_seconds,
+                st.timeout,
+            )
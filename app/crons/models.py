@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, Literal, Optional
 
 from pydantic import (
@@ -60,7 +60,13 @@ class DispatchSpec(BaseModel):
 class JobRuntimeSpec(BaseModel):
     max_concurrency: int = Field(default=1, ge=1)
     timeout_seconds: int = Field(default=120, ge=1)
+    # Also the longest a due run may wait for an execution slot
     misfire_grace_seconds: int = Field(default=60, ge=0)
+    # Higher runs first when execution slots are contended
+    priority: int = Field(default=0)
+    # Random start delay; None = CRON_JITTER_SECONDS if other jobs share
+    # the same cron expression, else 0
+    jitter_seconds: Optional[int] = Field(default=None, ge=0)
 
 
 class CronJobRequest(BaseModel):
@@ -121,11 +127,57 @@ class CronJobState(BaseModel):
     next_run_at: Optional[datetime] = None
     last_run_at: Optional[datetime] = None
     last_status: Optional[
-        Literal["success", "error", "running", "skipped"]
+        Literal["success", "error", "running", "skipped", "cancelled"]
     ] = None
     last_error: Optional[str] = None
 
 
+class CronRunRecord(BaseModel):
+    """One finished run of a job (cron run history)."""
+
+    run_id: str
+    job_id: str
+    started_at: datetime
+    ended_at: datetime
+    status: Literal["success", "error", "timeout", "cancelled"]
+    duration_ms: float
+    # Events (or texts) sent to the dispatch channel
+    events_sent: int = 0
+    # Time from start until the first event was sent
+    first_event_ms: Optional[float] = None
+    tokens: Optional[int] = None
+    error: Optional[str] = None
+
+    @field_validator("started_at", "ended_at")
+    @classmethod
+    def assume_utc(cls, v: datetime) -> datetime:
+        # Older history lines were written with naive UTC timestamps
+        if v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+        return v
+
+
+class CronRunStats(BaseModel):
+    """Latency summary over a job's retained runs."""
+
+    job_id: str
+    runs: int = 0
+    success: int = 0
+    error: int = 0
+    timeout: int = 0
+    cancelled: int = 0
+    p50_ms: Optional[float] = None
+    p90_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+    first_event_p50_ms: Optional[float] = None
+    avg_events_sent: Optional[float] = None
+    timeout_seconds: Optional[int] = None
+    # p90 duration / timeout; near_timeout when over the warning ratio
+    timeout_ratio: Optional[float] = None
+    near_timeout: bool = False
+
+
 class CronJobView(BaseModel):
     spec: CronJobSpec
     state: CronJobState = Field(default_factory=CronJobState)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from .base import BaseJobRepository
 from .json_repo import JsonJobRepository
+from .sqlite_repo import SqliteJobRepository
 
-__all__ = ["BaseJobRepository", "JsonJobRepository"]
+__all__ = ["BaseJobRepository", "JsonJobRepository", "SqliteJobRepository"]
@@ -20,6 +20,13 @@ class BaseJobRepository(ABC):
         """Persist all jobs to storage (should be atomic if possible)."""
         raise NotImplementedError
 
+    async def flush(self) -> None:
+        """Persist buffered writes (no-op for write-through storage)."""
+
+    async def close(self) -> None:
+        """Flush pending writes and release storage resources."""
+        await self.flush()
+
     # ---- Optional but commonly needed convenience ops ----
 
     async def list_jobs(self) -> list[CronJobSpec]:
@@ -1,43 +1,179 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from .base import BaseJobRepository
-from ..models import JobsFile
+from ..models import CronJobSpec, JobsFile
+
+logger = logging.getLogger(__name__)
 
 
 class JsonJobRepository(BaseJobRepository):
     """jobs.json repository (single-file storage).
 
+    The file is parsed once into an in-memory index by job id; the index
+    is reloaded only when the file's (mtime, size) changes on disk and
+    nothing is pending. Writes are write-behind: upsert/delete update the
+    index and schedule a flush after ``flush_delay`` seconds, or flush
+    right away once ``max_dirty`` changes are pending. Call close() on
+    shutdown.
+
     Notes:
     - Single-machine, no cross-process lock.
-    - Atomic write: write tmp then replace.
+    - Atomic write: write tmp then replace (in a worker thread).
+    - Pending in-memory changes win over concurrent external edits.
     """
 
-    def __init__(self, path: Path):
+    def __init__(
+        self,
+        path: Path,
+        *,
+        flush_delay: float = 0.5,
+        max_dirty: int = 50,
+    ):
         self._path = path.expanduser()
+        self._flush_delay = flush_delay
+        self._max_dirty = max_dirty
+
+        self._version = 1
+        self._jobs: Optional[Dict[str, CronJobSpec]] = None
+        self._file_sig: Optional[Tuple[int, int]] = None
+        self._dirty = 0
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._io_lock = asyncio.Lock()
 
     @property
     def path(self) -> Path:
         return self._path
 
-    async def load(self) -> JobsFile:
+    # ---- Index ----
+
+    def _stat_sig(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_file(self) -> JobsFile:
         if not self._path.exists():
             return JobsFile(version=1, jobs=[])
-
         data = json.loads(self._path.read_text(encoding="utf-8"))
         return JobsFile.model_validate(data)
 
+    def _set_index(self, jobs_file: JobsFile) -> None:
+        self._version = jobs_file.version
+        self._jobs = {j.id: j for j in jobs_file.jobs}
+
+    async def _ensure_index(self) -> Dict[str, CronJobSpec]:
+        sig = self._stat_sig()
+        if self._jobs is not None and (self._dirty or sig == self._file_sig):
+            return self._jobs
+        jobs_file = await asyncio.to_thread(self._read_file)
+        self._set_index(jobs_file)
+        self._file_sig = sig
+        return self._jobs
+
+    # ---- Storage ----
+
+    async def load(self) -> JobsFile:
+        jobs = await self._ensure_index()
+        return JobsFile(version=self._version, jobs=list(jobs.values()))
+
     async def save(self, jobs_file: JobsFile) -> None:
+        self._set_index(jobs_file)
+        self._dirty += 1
+        await self.flush()
+
+    def _write_file(self, payload: dict) -> Optional[Tuple[int, int]]:
         self._path.parent.mkdir(parents=True, exist_ok=True)
 
         tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
-        payload = jobs_file.model_dump(mode="json")
-
         tmp_path.write_text(
             json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True),
             encoding="utf-8",
         )
         tmp_path.replace(self._path)
+        return self._stat_sig()
+
+    async def flush(self) -> None:
+        """Write pending changes to disk (no-op when nothing is dirty)."""
+        async with self._io_lock:
+            if not self._dirty or self._jobs is None:
+                return
+            payload = JobsFile(
+                version=self._version,
+                jobs=list(self._jobs.values()),
+            ).model_dump(mode="json")
+            dirty = self._dirty
+            self._dirty = 0
+            try:
+                self._file_sig = await asyncio.to_thread(
+                    self._write_file,
+                    payload,
+                )
+            except Exception:
+                self._dirty += dirty
+                raise
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self._flush_delay)
+            await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("jobs.json write-behind flush failed")
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+
+    async def _mark_dirty(self) -> None:
+        self._dirty += 1
+        if self._dirty >= self._max_dirty:
+            await self.flush()
+            return
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(
+                self._delayed_flush(),
+                name="jobs_json_flush",
+            )
+
+    async def close(self) -> None:
+        """Cancel the pending timer and flush outstanding changes."""
+        task = self._flush_task
+        self._flush_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    # ---- Indexed convenience operations ----
+
+    async def list_jobs(self) -> list[CronJobSpec]:
+        jobs = await self._ensure_index()
+        return list(jobs.values())
+
+    async def get_job(self, job_id: str) -> Optional[CronJobSpec]:
+        jobs = await self._ensure_index()
+        return jobs.get(job_id)
+
+    async def upsert_job(self, spec: CronJobSpec) -> None:
+        jobs = await self._ensure_index()
+        jobs[spec.id] = spec
+        await self._mark_dirty()
+
+    async def delete_job(self, job_id: str) -> bool:
+        jobs = await self._ensure_index()
+        if jobs.pop(job_id, None) is None:
+            return False
+        await self._mark_dirty()
+        return True
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, List, Optional
+
+from .base import BaseJobRepository
+from ..models import CronJobSpec, JobsFile
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    enabled INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_seq ON jobs (seq);
+"""
+
+
+class SqliteJobRepository(BaseJobRepository):
+    """jobs.db repository (SQLite, one row per job).
+
+    For deployments with many jobs: get/upsert/delete touch a single row
+    instead of parsing and rewriting the whole jobs.json. Rows keep
+    insertion order (seq) so list_jobs() matches the JSON repository.
+    Queries run on a worker thread via asyncio.to_thread.
+
+    Notes:
+    - WAL journal mode; single process (one connection guarded by a lock).
+    - If ``import_from`` points at an existing jobs.json and the database
+      is empty, its jobs are imported on first use.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        import_from: Path | str | None = None,
+    ):
+        if isinstance(path, str):
+            path = Path(path)
+        if isinstance(import_from, str):
+            import_from = Path(import_from)
+        self._path = path.expanduser()
+        self._import_from = import_from
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ---- Connection ----
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self._path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        self._maybe_import(conn)
+        return conn
+
+    def _maybe_import(self, conn: sqlite3.Connection) -> None:
+        src = self._import_from
+        if src is None or not src.expanduser().exists():
+            return
+        (count,) = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()
+        if count:
+            return
+        data = json.loads(src.expanduser().read_text(encoding="utf-8"))
+        jobs_file = JobsFile.model_validate(data)
+        with conn:
+            self._insert_many(conn, jobs_file.jobs)
+
+    def _run(self, fn, *args: Any) -> Any:
+        with self._lock:
+            return fn(self._connect(), *args)
+
+    async def _call(self, fn, *args: Any) -> Any:
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    # ---- Row helpers ----
+
+    @classmethod
+    def _insert_many(
+        cls,
+        conn: sqlite3.Connection,
+        specs: List[CronJobSpec],
+    ) -> None:
+        conn.executemany(
+            "INSERT INTO jobs (id, enabled, seq, data) "
+            "VALUES (?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM jobs), ?)",
+            [(s.id, int(s.enabled), s.model_dump_json()) for s in specs],
+        )
+
+    @staticmethod
+    def _to_specs(rows: List[tuple]) -> list[CronJobSpec]:
+        return [CronJobSpec.model_validate_json(row[0]) for row in rows]
+
+    # ---- Storage ----
+
+    async def load(self) -> JobsFile:
+        return JobsFile(version=1, jobs=await self.list_jobs())
+
+    async def save(self, jobs_file: JobsFile) -> None:
+        def _save(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.execute("DELETE FROM jobs")
+                self._insert_many(conn, jobs_file.jobs)
+
+        await self._call(_save)
+
+    async def close(self) -> None:
+        """Close the database connection."""
+
+        def _close() -> None:
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+        await asyncio.to_thread(_close)
+
+    # ---- Indexed convenience operations ----
+
+    async def _select(self, where: str = "", params: tuple = ()) -> list:
+        sql = "SELECT data FROM jobs"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY seq"
+
+        def _query(conn: sqlite3.Connection) -> list:
+            return conn.execute(sql, params).fetchall()
+
+        return self._to_specs(await self._call(_query))
+
+    async def list_jobs(self) -> list[CronJobSpec]:
+        return await self._select()
+
+    async def get_job(self, job_id: str) -> Optional[CronJobSpec]:
+        jobs = await self._select("id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    async def upsert_job(self, spec: CronJobSpec) -> None:
+        def _upsert(conn: sqlite3.Connection) -> None:
+            with conn:
+                cur = conn.execute(
+                    "UPDATE jobs SET enabled = ?, data = ? WHERE id = ?",
+                    (int(spec.enabled), spec.model_dump_json(), spec.id),
+                )
+                if cur.rowcount == 0:
+                    self._insert_many(conn, [spec])
+
+        await self._call(_upsert)
+
+    async def delete_job(self, job_id: str) -> bool:
+        def _delete(conn: sqlite3.Connection) -> int:
+            with conn:
+                cur = conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            return cur.rowcount
+
+        return await self._call(_delete) > 0
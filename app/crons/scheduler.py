@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""Global execution slots for cron runs.
+
+Each job still has its own ``max_concurrency`` semaphore; on top of that
+every run must hold a slot from ``CronSlotScheduler``, which bounds:
+
+- the total number of runs in flight;
+- runs per dispatch channel;
+- runs per agent (job ``meta["agent_id"]``; jobs without one only count
+  towards the total and channel budgets).
+
+Waiting runs are granted in priority order (``runtime.priority``, higher
+first; FIFO within a priority). A run blocked only by its channel or agent
+budget does not hold up runs behind it that fit. A run that is still
+queued at its deadline is dropped with ``SlotDeadlineExceeded``.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from ...constant import (
+    CRON_AGENT_MAX_CONCURRENCY,
+    CRON_CHANNEL_MAX_CONCURRENCY,
+    CRON_MAX_CONCURRENCY,
+)
+from .models import CronJobSpec
+
+logger = logging.getLogger(__name__)
+
+
+class SlotDeadlineExceeded(Exception):
+    """A run could not get an execution slot before its deadline."""
+
+
+@dataclass
+class _Waiter:
+    priority: int
+    seq: int
+    channel: str
+    agent: Optional[str]
+    future: asyncio.Future = field(compare=False)
+
+
+def job_agent(job: CronJobSpec) -> Optional[str]:
+    """Agent a job runs as (meta agent_id), if any."""
+    agent = (job.meta or {}).get("agent_id")
+    return str(agent) if agent else None
+
+
+class CronSlotScheduler:
+    """Total / per-channel / per-agent concurrency budgets for cron runs."""
+
+    def __init__(
+        self,
+        max_concurrency: int = CRON_MAX_CONCURRENCY,
+        channel_limit: int = CRON_CHANNEL_MAX_CONCURRENCY,
+        agent_limit: int = CRON_AGENT_MAX_CONCURRENCY,
+        channel_limits: Optional[Dict[str, int]] = None,
+        agent_limits: Optional[Dict[str, int]] = None,
+    ):
+        """Limits of 0 mean unlimited; *_limits override per key."""
+        self.max_concurrency = max_concurrency
+        self.channel_limit = channel_limit
+        self.agent_limit = agent_limit
+        self.channel_limits = dict(channel_limits or {})
+        self.agent_limits = dict(agent_limits or {})
+        self._running = 0
+        self._by_channel: Dict[str, int] = {}
+        self._by_agent: Dict[str, int] = {}
+        # Sorted by (-priority, seq)
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self._running,
+            "queued": len(self._waiters),
+            "by_channel": dict(self._by_channel),
+            "by_agent": dict(self._by_agent),
+        }
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        job: CronJobSpec,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[None]:
+        """Hold an execution slot for one run of job.
+
+        deadline is a ``loop.time()`` value; SlotDeadlineExceeded is
+        raised if no slot was granted by then.
+        """
+        channel = job.dispatch.channel
+        agent = job_agent(job)
+        await self._acquire(job, channel, agent, deadline)
+        try:
+            yield
+        finally:
+            self._release(channel, agent)
+
+    # ------------------------------------------------------------------
+
+    def _fits(self, channel: str, agent: Optional[str]) -> bool:
+        if self.max_concurrency and self._running >= self.max_concurrency:
+            return False
+        limit = self.channel_limits.get(channel, self.channel_limit)
+        if limit and self._by_channel.get(channel, 0) >= limit:
+            return False
+        if agent is not None:
+            limit = self.agent_limits.get(agent, self.agent_limit)
+            if limit and self._by_agent.get(agent, 0) >= limit:
+                return False
+        return True
+
+    def _take(self, channel: str, agent: Optional[str]) -> None:
+        self._running += 1
+        self._by_channel[channel] = self._by_channel.get(channel, 0) + 1
+        if agent is not None:
+            self._by_agent[agent] = self._by_agent.get(agent, 0) + 1
+
+    def _release(self, channel: str, agent: Optional[str]) -> None:
+        self._running -= 1
+        self._by_channel[channel] -= 1
+        if not self._by_channel[channel]:
+            del self._by_channel[channel]
+        if agent is not None:
+            self._by_agent[agent] -= 1
+            if not self._by_agent[agent]:
+                del self._by_agent[agent]
+        self._grant()
+
+    def _grant(self) -> None:
+        """Hand free slots to waiters, highest priority first."""
+        remaining = []
+        for waiter in self._waiters:
+            if waiter.future.done():
+                continue
+            if self._fits(waiter.channel, waiter.agent):
+                self._take(waiter.channel, waiter.agent)
+                waiter.future.set_result(None)
+            else:
+                remaining.append(waiter)
+        self._waiters = remaining
+
+    async def _acquire(
+        self,
+        job: CronJobSpec,
+        channel: str,
+        agent: Optional[str],
+        deadline: Optional[float],
+    ) -> None:
+        if not self._waiters and self._fits(channel, agent):
+            self._take(channel, agent)
+            return
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            priority=job.runtime.priority,
+            seq=next(self._seq),
+            channel=channel,
+            agent=agent,
+            future=loop.create_future(),
+        )
+        self._waiters.append(waiter)
+        self._waiters.sort(key=lambda w: (-w.priority, w.seq))
+        self._grant()
+        if waiter.future.done():
+            return
+
+        timeout = None if deadline is None else deadline - loop.time()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted while timing out: give the slot back.
+                self._release(channel, agent)
+            else:
+                waiter.future.cancel()
+                self._waiters = [w for w in self._waiters if w is not waiter]
+            if isinstance(e, asyncio.TimeoutError):
+                raise SlotDeadlineExceeded(
+                    f"cron job {job.id} waited past its deadline",
+                ) from e
+            raise
@@ -11,6 +11,7 @@ Gateway 模块 - 消息入口
 模块结构：
 ├── __init__.py       # 模块导出
 ├── auth.py           # 身份认证
+├── ratelimit.py      # 限流与每日额度
 ├── filter.py         # 事件过滤
 ├── dispatcher.py     # 消息分发
 └── gateway.py        # 统一入口
@@ -24,6 +25,16 @@ from .auth import (
     get_gateway_auth,
     init_gateway_auth,
 )
+from .ratelimit import (
+    RateDecision,
+    RateLimitBackend,
+    InMemoryBackend,
+    RateLimiter,
+    TokenBucketLimiter,
+    SlidingWindowLimiter,
+    CreditQuota,
+    create_rate_limiter,
+)
 from .filter import (
     GatewayFilter,
     get_gateway_filter,
@@ -52,6 +63,15 @@ __all__ = [
     "UserPermission",
     "get_gateway_auth",
     "init_gateway_auth",
+    # Rate limit
+    "RateDecision",
+    "RateLimitBackend",
+    "InMemoryBackend",
+    "RateLimiter",
+    "TokenBucketLimiter",
+    "SlidingWindowLimiter",
+    "CreditQuota",
+    "create_rate_limiter",
     # Filter
     "GatewayFilter",
     "get_gateway_filter",
@@ -10,11 +10,17 @@ Gateway Auth - 身份认证
 
 import hashlib
 import hmac
-import time
+import os
 from typing import Dict, Any, Optional, Set, List
 from dataclasses import dataclass, field
 from enum import Enum
 
+from .ratelimit import (
+    CreditQuota,
+    RateLimitBackend,
+    create_rate_limiter,
+)
+
 
 class AuthResult(Enum):
     """认证结果"""
@@ -50,6 +56,11 @@ class GatewayAuth:
         enable_rate_limit: bool = True,
         rate_limit_count: int = 60,
         rate_limit_window: int = 60,
+        rate_limit_algorithm: str = "sliding_window",
+        rate_limit_backend: RateLimitBackend = None,
+        channel_credit_limits: Dict[str, float] = None,
+        agent_credit_limits: Dict[str, float] = None,
+        credit_per_request: float = 0.0,
     ):
         """
         初始化认证器。
@@ -60,18 +71,36 @@ class GatewayAuth:
             enable_rate_limit: 是否启用限流
             rate_limit_count: 时间窗口内最大请求数
             rate_limit_window: 时间窗口(秒)
+            rate_limit_algorithm: 限流算法 sliding_window / token_bucket
+            rate_limit_backend: 共享计数后端（多进程共用限额），None 为进程内
+            channel_credit_limits: 渠道每日 Credit 总额 {channel: limit}
+            agent_credit_limits: Agent 每日 Credit 总额 {agent_id: limit}
+            credit_per_request: 每次认证通过扣减的 Credit，0 不扣减
         """
         self.allow_from = set(allow_from or [])
         self.api_keys = api_keys or {}
         self.enable_rate_limit = enable_rate_limit
         self.rate_limit_count = rate_limit_count
         self.rate_limit_window = rate_limit_window
+        self.credit_per_request = credit_per_request
         
         # 用户权限缓存
         self._user_permissions: Dict[str, UserPermission] = {}
         
-        # 限流计数器: {user_id: [timestamp1, timestamp2, ...]}
-        self._rate_limit_cache: Dict[str, List[float]] = {}
+        # 限流器（O(1) 更新，定期清理空闲用户）
+        self.rate_limiter = create_rate_limiter(
+            rate_limit_algorithm,
+            limit=rate_limit_count,
+            window=rate_limit_window,
+            backend=rate_limit_backend,
+        )
+        
+        # 每日 Credit 额度（用户额度来自 UserPermission.daily_credit_limit）
+        self.credit_quota = CreditQuota(
+            backend=rate_limit_backend,
+            channel_limits=channel_credit_limits,
+            agent_limits=agent_credit_limits,
+        )
     
     def authenticate(self, user_id: str, channel: str = "unknown") -> AuthResponse:
         """
@@ -97,7 +126,17 @@ class GatewayAuth:
             if rate_result:
                 return rate_result
         
-        # 3. 获取用户权限
+        # 3. 每日 Credit 额度
+        if self.credit_per_request > 0:
+            credit_result = self.consume_credit(
+                user_id,
+                self.credit_per_request,
+                channel=channel,
+            )
+            if credit_result.result != AuthResult.PASS:
+                return credit_result
+        
+        # 4. 获取用户权限
         permission = self._get_user_permission(user_id)
         
         return AuthResponse(
@@ -127,31 +166,55 @@ class GatewayAuth:
     
     def _check_rate_limit(self, user_id: str) -> Optional[AuthResponse]:
         """检查限流"""
-        now = time.time()
-        window_start = now - self.rate_limit_window
+        decision = self.rate_limiter.acquire(user_id)
+        if decision.allowed:
+            return None
         
-        # 获取或初始化用户的时间戳列表
-        if user_id not in self._rate_limit_cache:
-            self._rate_limit_cache[user_id] = []
+        retry_after = max(1, int(decision.retry_after + 0.999))
+        return AuthResponse(
+            result=AuthResult.RATE_LIMIT,
+            message=f"请求过于频繁，请在 {retry_after} 秒后重试"
+        )
+    
+    def consume_credit(
+        self,
+        user_id: str,
+        amount: float,
+        channel: str = None,
+        agent_id: str = None,
+    ) -> AuthResponse:
+        """
+        扣减每日 Credit 额度。
         
-        # 清理过期时间戳
-        timestamps = [
-            ts for ts in self._rate_limit_cache[user_id]
-            if ts > window_start
-        ]
+        Args:
+            user_id: 用户 ID
+            amount: 本次消耗的 Credit
+            channel: 渠道名称（配置了渠道额度时计入）
+            agent_id: Agent ID（配置了 Agent 额度时计入）
         
-        # 检查是否超限
-        if len(timestamps) >= self.rate_limit_count:
+        Returns:
+            AuthResponse（超额时为 RATE_LIMIT）
+        """
+        permission = self._get_user_permission(user_id)
+        decision = self.credit_quota.consume(
+            user_id,
+            amount,
+            user_limit=permission.daily_credit_limit,
+            channel=channel,
+            agent_id=agent_id,
+        )
+        if not decision.allowed:
             return AuthResponse(
                 result=AuthResult.RATE_LIMIT,
-                message=f"请求过于频繁，请在 {self.rate_limit_window} 秒后重试"
+                message="今日 Credit 额度已用完",
+                user_permission=permission
             )
-        
-        # 记录新请求
-        timestamps.append(now)
-        self._rate_limit_cache[user_id] = timestamps
-        
-        return None
+        _log_credit(amount, channel, agent_id)
+        return AuthResponse(
+            result=AuthResult.PASS,
+            message=f"剩余 Credit: {decision.remaining:.2f}",
+            user_permission=permission
+        )
     
     def _get_user_permission(self, user_id: str) -> UserPermission:
         """获取用户权限"""
@@ -185,6 +248,20 @@ class GatewayAuth:
         return user_id in self.allow_from
 
 
+def _log_credit(amount: float, channel: str, agent_id: str) -> None:
+    """配置了数据库时，经批量写入器记录 credit_logs（不阻塞请求）"""
+    if not os.environ.get("COPAW_DATABASE_URL"):
+        return
+    # 延迟导入：未配置数据库时不加载 db 层
+    from ...db.writer import get_writer
+
+    get_writer().record_credit(
+        agent_id=agent_id,
+        operation=f"gateway:{channel or 'unknown'}",
+        cost=int(round(amount)),
+    )
+
+
 # 全局认证器
 _auth: Optional[GatewayAuth] = None
 
@@ -206,6 +283,11 @@ def init_gateway_auth(config: Dict[str, Any]) -> GatewayAuth:
         enable_rate_limit=config.get("enable_rate_limit", True),
         rate_limit_count=config.get("rate_limit_count", 60),
         rate_limit_window=config.get("rate_limit_window", 60),
+        rate_limit_algorithm=config.get("rate_limit_algorithm", "sliding_window"),
+        rate_limit_backend=config.get("rate_limit_backend"),
+        channel_credit_limits=config.get("channel_credit_limits"),
+        agent_credit_limits=config.get("agent_credit_limits"),
+        credit_per_request=config.get("credit_per_request", 0.0),
     )
     return _auth
 
@@ -40,6 +40,10 @@ class GatewayConfig:
     enable_rate_limit: bool = True
     rate_limit_count: int = 60
     rate_limit_window: int = 60
+    rate_limit_algorithm: str = "sliding_window"
+    channel_credit_limits: dict = None
+    agent_credit_limits: dict = None
+    credit_per_request: float = 0.0
     
     # 过滤配置
     ignore_event_types: list = None
@@ -77,6 +81,10 @@ class Gateway:
             "enable_rate_limit": self.config.enable_rate_limit,
             "rate_limit_count": self.config.rate_limit_count,
             "rate_limit_window": self.config.rate_limit_window,
+            "rate_limit_algorithm": self.config.rate_limit_algorithm,
+            "channel_credit_limits": self.config.channel_credit_limits,
+            "agent_credit_limits": self.config.agent_credit_limits,
+            "credit_per_request": self.config.credit_per_request,
         })
         
         self.filter = init_gateway_filter({
@@ -218,6 +226,10 @@ def init_gateway(config: Dict[str, Any]) -> Gateway:
         enable_rate_limit=config.get("enable_rate_limit", True),
         rate_limit_count=config.get("rate_limit_count", 60),
         rate_limit_window=config.get("rate_limit_window", 60),
+        rate_limit_algorithm=config.get("rate_limit_algorithm", "sliding_window"),
+        channel_credit_limits=config.get("channel_credit_limits"),
+        agent_credit_limits=config.get("agent_credit_limits"),
+        credit_per_request=config.get("credit_per_request", 0.0),
         ignore_event_types=config.get("ignore_event_types", []),
         ignore_user_ids=config.get("ignore_user_ids", []),
         ignore_keywords=config.get("ignore_keywords", []),
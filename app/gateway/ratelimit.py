@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Gateway Rate Limit - 限流与额度
+
+提供：
+- TokenBucketLimiter: 令牌桶，O(1) 更新，允许突发
+- SlidingWindowLimiter: 滑动窗口计数（前后两个固定窗口加权），O(1) 更新
+- CreditQuota: 按用户/渠道/Agent 的每日 Credit 额度
+- RateLimitBackend: 计数后端接口，默认进程内实现；多个 Gateway 进程
+  可实现共享后端（如 Redis INCRBYFLOAT + EXPIRE）共同执行同一额度
+
+所有进程内状态都会定期清理空闲 key，内存不随历史用户数增长。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class RateDecision:
+    """限流判定结果"""
+    allowed: bool
+    remaining: float = 0.0      # 剩余可用量
+    retry_after: float = 0.0    # 被拒绝时建议的重试等待(秒)
+
+
+class RateLimitBackend:
+    """计数后端接口（带过期时间的浮点计数器）"""
+
+    def incr(self, key: str, amount: float, ttl: float) -> float:
+        """原子增加计数并返回新值；key 不存在时从 0 开始，ttl 秒后过期"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> float:
+        """读取计数（不存在或已过期返回 0）"""
+        raise NotImplementedError
+
+
+class InMemoryBackend(RateLimitBackend):
+    """进程内计数后端（定期清理过期 key）"""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self._counters: Dict[str, Tuple[float, float]] = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+
+    def incr(self, key: str, amount: float, ttl: float) -> float:
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            value, expires_at = self._counters.get(key, (0.0, 0.0))
+            if expires_at <= now:
+                value, expires_at = 0.0, now + ttl
+            value += amount
+            self._counters[key] = (value, expires_at)
+            return value
+
+    def get(self, key: str) -> float:
+        value, expires_at = self._counters.get(key, (0.0, 0.0))
+        return value if expires_at > time.time() else 0.0
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self._sweep_interval
+        expired = [k for k, (_, exp) in self._counters.items() if exp <= now]
+        for k in expired:
+            del self._counters[k]
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+
+class RateLimiter:
+    """限流器接口"""
+
+    def acquire(self, key: str, cost: float = 1.0, now: float = None) -> RateDecision:
+        """尝试为 key 消耗 cost，返回判定结果"""
+        raise NotImplementedError
+
+
+class TokenBucketLimiter(RateLimiter):
+    """
+    令牌桶：每秒补充 rate 个令牌，桶容量 capacity。
+
+    空闲超过填满时间的 key 会被清理（此时桶已满，清理不改变语义）。
+    """
+
+    def __init__(self, rate: float, capacity: float, sweep_interval: float = 60.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+        self._sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def acquire(self, key: str, cost: float = 1.0, now: float = None) -> RateDecision:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._maybe_sweep(now)
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            if tokens >= cost:
+                tokens -= cost
+                self._buckets[key] = (tokens, now)
+                return RateDecision(True, remaining=tokens)
+            self._buckets[key] = (tokens, now)
+            retry_after = (cost - tokens) / self.rate if self.rate > 0 else float("inf")
+            return RateDecision(False, remaining=tokens, retry_after=retry_after)
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self._sweep_interval
+        full_after = self.capacity / self.rate if self.rate > 0 else float("inf")
+        idle = [
+            k for k, (tokens, updated_at) in self._buckets.items()
+            if now - updated_at >= full_after
+        ]
+        for k in idle:
+            del self._buckets[k]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SlidingWindowLimiter(RateLimiter):
+    """
+    滑动窗口计数：估计值 = 上一窗口计数 × 剩余重叠比例 + 当前窗口计数。
+
+    每个 key 只保存两个计数器（由后端按 2 个窗口的 ttl 自动过期），
+    使用共享后端时多个进程共同执行同一限额。
+    """
+
+    def __init__(
+        self,
+        limit: float,
+        window: float,
+        backend: RateLimitBackend = None,
+        prefix: str = "rl",
+    ):
+        self.limit = limit
+        self.window = window
+        if backend is None:
+            backend = InMemoryBackend(sweep_interval=window)
+        self.backend = backend
+        self.prefix = prefix
+
+    def acquire(self, key: str, cost: float = 1.0, now: float = None) -> RateDecision:
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        elapsed = (now - index * self.window) / self.window
+        cur_key = f"{self.prefix}:{key}:{index}"
+        prev = self.backend.get(f"{self.prefix}:{key}:{index - 1}")
+        weighted_prev = prev * (1.0 - elapsed)
+
+        current = self.backend.incr(cur_key, cost, ttl=2 * self.window)
+        estimate = weighted_prev + current
+        if estimate <= self.limit:
+            return RateDecision(True, remaining=self.limit - estimate)
+
+        # 超限：回滚本次计数
+        self.backend.incr(cur_key, -cost, ttl=2 * self.window)
+        retry_after = (1.0 - elapsed) * self.window
+        return RateDecision(False, remaining=0.0, retry_after=retry_after)
+
+
+class CreditQuota:
+    """
+    每日 Credit 额度（按自然日，UTC）。
+
+    - 用户额度: UserPermission.daily_credit_limit
+    - 渠道/Agent 额度: 所有用户在该渠道/Agent 上的每日总额
+    """
+
+    DAY = 86400
+
+    def __init__(
+        self,
+        backend: RateLimitBackend = None,
+        channel_limits: Dict[str, float] = None,
+        agent_limits: Dict[str, float] = None,
+    ):
+        if backend is None:
+            backend = InMemoryBackend(sweep_interval=3600)
+        self.backend = backend
+        self.channel_limits = dict(channel_limits or {})
+        self.agent_limits = dict(agent_limits or {})
+
+    def _scopes(
+        self,
+        user_id: str,
+        user_limit: float,
+        channel: Optional[str],
+        agent_id: Optional[str],
+        day: int,
+    ):
+        yield f"quota:user:{user_id}:{day}", user_limit
+        if channel is not None and channel in self.channel_limits:
+            yield f"quota:channel:{channel}:{day}", self.channel_limits[channel]
+        if agent_id is not None and agent_id in self.agent_limits:
+            yield f"quota:agent:{agent_id}:{day}", self.agent_limits[agent_id]
+
+    def consume(
+        self,
+        user_id: str,
+        amount: float,
+        user_limit: float,
+        channel: str = None,
+        agent_id: str = None,
+        now: float = None,
+    ) -> RateDecision:
+        """扣减额度；任一范围超限则整体回滚并拒绝"""
+        now = time.time() if now is None else now
+        day = int(now // self.DAY)
+        ttl = (day + 1) * self.DAY - now + 60
+        charged = []
+        remaining = float("inf")
+        for key, limit in self._scopes(user_id, user_limit, channel, agent_id, day):
+            used = self.backend.incr(key, amount, ttl=ttl)
+            charged.append(key)
+            if used > limit:
+                for k in charged:
+                    self.backend.incr(k, -amount, ttl=ttl)
+                return RateDecision(
+                    False,
+                    remaining=max(0.0, limit - used + amount),
+                    retry_after=(day + 1) * self.DAY - now,
+                )
+            remaining = min(remaining, limit - used)
+        return RateDecision(True, remaining=remaining)
+
+    def used(self, user_id: str, now: float = None) -> float:
+        """用户今日已用额度"""
+        now = time.time() if now is None else now
+        return self.backend.get(f"quota:user:{user_id}:{int(now // self.DAY)}")
+
+
+def create_rate_limiter(
+    algorithm: str,
+    limit: float,
+    window: float,
+    backend: RateLimitBackend = None,
+) -> RateLimiter:
+    """
+    按算法名创建限流器。
+
+    Args:
+        algorithm: "sliding_window" 或 "token_bucket"
+        limit: 窗口内最大请求数（令牌桶容量）
+        window: 窗口(秒)（令牌桶按 limit/window 速率补充）
+        backend: 共享计数后端（仅 sliding_window 使用）
+    """
+    if algorithm == "token_bucket":
+        return TokenBucketLimiter(rate=limit / window, capacity=limit)
+    if algorithm == "sliding_window":
+        return SlidingWindowLimiter(limit=limit, window=window, backend=backend)
+    raise ValueError(f"未知的限流算法: {algorithm}")
+
+
+__all__ = [
+    "RateDecision",
+    "RateLimitBackend",
+    "InMemoryBackend",
+    "RateLimiter",
+    "TokenBucketLimiter",
+    "SlidingWindowLimiter",
+    "CreditQuota",
+    "create_rate_limiter",
+]
@@ -5,8 +5,10 @@ Agent Router - Agent 路由选择
 根据消息内容选择合适的 Agent 处理。
 """
 
+import json
+import os
 import sys
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 # 添加项目根目录到路径
 if '/home/ace09/bots' not in sys.path:
@@ -14,6 +16,8 @@ if '/home/ace09/bots' not in sys.path:
 
 from cp9.agents.registry import get_registry
 
+from ..utils.keyword_matcher import KeywordMatch, KeywordMatcher
+
 
 class AgentRouter:
     """Agent 路由器"""
@@ -29,6 +33,9 @@ class AgentRouter:
     
     def __init__(self):
         self.registry = get_registry()
+        self._matcher = KeywordMatcher(self.KEYWORD_MAP)
+        self._custom_agents: set = set()
+        self._custom_sig = None
     
     def route(self, message: str, user_id: str = None) -> str:
         """
@@ -44,23 +51,75 @@ class AgentRouter:
         if not message:
             return "00"
         
-        message_lower = message.lower()
-        scores = {agent_id: 0 for agent_id in self.KEYWORD_MAP}
+        self.reload_custom_keywords()
         
-        # 关键词匹配计分
-        for agent_id, keywords in self.KEYWORD_MAP.items():
-            for keyword in keywords:
-                if keyword.lower() in message_lower:
-                    scores[agent_id] += 1
+        # 关键词匹配计分（单次线性扫描）
+        best_agent, _ = self._matcher.best(message, default="00")
+        return best_agent
+    
+    def match(self, message: str) -> List[KeywordMatch]:
+        """返回消息中命中的关键词及位置"""
+        self.reload_custom_keywords()
+        return self._matcher.find_all(message)
+    
+    def set_agent_keywords(self, agent_id: str, keywords: List[str]) -> None:
+        """设置（热更新）某个 Agent 的路由关键词"""
+        self._matcher.set_keywords(agent_id, keywords)
+    
+    def _custom_meta_signature(self) -> Optional[tuple]:
+        """
+        各自定义 Agent 的 .meta.json 签名：(目录名, mtime_ns, size)。
+
+        agents 目录不存在时返回 None。原地编辑 .meta.json、在已有子目录
+        中新写入 .meta.json 都会改变签名。
+        """
+        agents_dir = self.registry.agents_dir
+        try:
+            agent_dirs = sorted(
+                entry.name for entry in os.scandir(agents_dir)
+                if entry.is_dir()
+            )
+        except OSError:
+            return None
+        sig = []
+        for name in agent_dirs:
+            try:
+                st = (agents_dir / name / ".meta.json").stat()
+            except OSError:
+                continue
+            sig.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+    
+    def reload_custom_keywords(self, force: bool = False) -> None:
+        """
+        从自定义 Agent 的 .meta.json 加载 keywords 字段。
         
-        # 找出最高分
-        best_agent = max(scores, key=scores.get)
+        仅在 .meta.json 签名变化（新建/删除 Agent、编辑 keywords）或
+        force 时重新读取。
+        """
+        sig = self._custom_meta_signature()
+        if not force and sig == self._custom_sig:
+            return
+        self._custom_sig = sig
         
-        # 如果没有匹配，返回默认 Agent 00
-        if scores[best_agent] == 0:
-            return "00"
+        agents_dir = self.registry.agents_dir
+        found: Dict[str, List[str]] = {}
+        for name, _, _ in sig or ():
+            meta_file = agents_dir / name / ".meta.json"
+            try:
+                meta = json.loads(meta_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            agent_id = meta.get("id")
+            keywords = meta.get("keywords") or []
+            if agent_id and keywords and agent_id not in self.KEYWORD_MAP:
+                found[agent_id] = keywords
         
-        return best_agent
+        for agent_id in self._custom_agents - set(found):
+            self._matcher.remove(agent_id)
+        for agent_id, keywords in found.items():
+            self._matcher.set_keywords(agent_id, keywords)
+        self._custom_agents = set(found)
     
     def get_agent_config(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """获取 Agent 配置"""
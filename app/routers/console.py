@@ -1,24 +1,73 @@
 # -*- coding: utf-8 -*-
 """Console API: push messages for cron text bubbles on the frontend."""
 
-from fastapi import APIRouter, Query
+import json
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
 
 
 router = APIRouter(prefix="/console", tags=["console"])
 
+# Seconds between SSE keep-alive comments when no message arrives
+_SSE_KEEPALIVE_SECONDS = 15.0
+
 
 @router.get("/push-messages")
 async def get_push_messages(
     session_id: str | None = Query(None, description="Optional session id"),
+    wait: float = Query(
+        0,
+        ge=0,
+        le=60,
+        description="Long-poll: wait up to this many seconds for a message",
+    ),
 ):
     """
     Return pending push messages. Without session_id: recent messages
     (all sessions, last 60s), not consumed so every tab sees them.
+    With wait > 0 and session_id, the request is held until a message
+    arrives or the wait expires.
     """
-    from ..console_push_store import get_recent, take
+    from ..console_push_store import get_recent, wait_take
 
     if session_id:
-        messages = await take(session_id)
+        messages = await wait_take(session_id, wait)
     else:
         messages = await get_recent()
     return {"messages": messages}
+
+
+@router.get("/push-messages/stream")
+async def stream_push_messages(
+    request: Request,
+    session_id: str | None = Query(None, description="Optional session id"),
+):
+    """
+    Server-sent events: one ``data:`` event per batch of push messages.
+    With session_id, messages are consumed (as GET /push-messages);
+    without it, recent messages of all sessions are streamed unconsumed.
+    """
+    from ..console_push_store import wait_recent, wait_take
+
+    async def events():
+        cursor = None
+        while not await request.is_disconnected():
+            if session_id:
+                messages = await wait_take(session_id, _SSE_KEEPALIVE_SECONDS)
+            else:
+                messages, cursor = await wait_recent(
+                    cursor,
+                    _SSE_KEEPALIVE_SECONDS,
+                )
+            if messages:
+                payload = json.dumps({"messages": messages})
+                yield f"data: {payload}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
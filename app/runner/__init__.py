@@ -11,6 +11,7 @@ from .models import (
 from .repo import (
     BaseChatRepository,
     JsonChatRepository,
+    SqliteChatRepository,
 )
 
 
@@ -27,4 +28,5 @@ __all__ = [
     # Chat Repository
     "BaseChatRepository",
     "JsonChatRepository",
+    "SqliteChatRepository",
 ]
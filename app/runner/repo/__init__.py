@@ -2,5 +2,10 @@
 """Chat repository implementations."""
 from .base import BaseChatRepository
 from .json_repo import JsonChatRepository
+from .sqlite_repo import SqliteChatRepository
 
-__all__ = ["BaseChatRepository", "JsonChatRepository"]
+__all__ = [
+    "BaseChatRepository",
+    "JsonChatRepository",
+    "SqliteChatRepository",
+]
@@ -22,6 +22,13 @@ class BaseChatRepository(ABC):
         """Persist all chat specs to storage (should be atomic if possible)."""
         raise NotImplementedError
 
+    async def flush(self) -> None:
+        """Persist buffered writes (no-op for write-through storage)."""
+
+    async def close(self) -> None:
+        """Flush pending writes and release storage resources."""
+        await self.flush()
+
     # ---- Convenience operations ----
 
     async def list_chats(self) -> list[ChatSpec]:
@@ -2,11 +2,24 @@
 """JSON-based chat repository."""
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from .base import BaseChatRepository
-from ..models import ChatsFile
+from ..models import ChatSpec, ChatsFile
+from ...channels.schema import DEFAULT_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# (session_id, user_id, channel)
+ChatKey = Tuple[str, str, str]
+
+
+def _chat_key(spec: ChatSpec) -> ChatKey:
+    return (spec.session_id, spec.user_id, spec.channel)
 
 
 class JsonChatRepository(BaseChatRepository):
@@ -15,51 +28,125 @@ class JsonChatRepository(BaseChatRepository):
     Stores chat_id (UUID) -> session_id mappings in a JSON file.
     Similar to JsonJobRepository pattern from crons.
 
+    The file is parsed once into an in-memory index (by chat id and by
+    (session_id, user_id, channel)); the index is reloaded only when the
+    file's (mtime, size) changes on disk and nothing is pending. Writes
+    are write-behind: upsert/delete update the index and schedule a
+    flush after ``flush_delay`` seconds, or flush right away once
+    ``max_dirty`` changes are pending. Call close() on shutdown.
+
     Notes:
     - Single-machine, no cross-process lock.
-    - Atomic write: write tmp then replace.
+    - Atomic write: write tmp then replace (in a worker thread).
+    - Pending in-memory changes win over concurrent external edits.
     """
 
-    def __init__(self, path: Path | str):
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        flush_delay: float = 1.0,
+        max_dirty: int = 100,
+    ):
         """Initialize JSON chat repository.
 
         Args:
             path: Path to chats.json file
+            flush_delay: Seconds to coalesce writes before flushing
+            max_dirty: Flush immediately once this many changes are pending
         """
         if isinstance(path, str):
             path = Path(path)
         self._path = path.expanduser()
+        self._flush_delay = flush_delay
+        self._max_dirty = max_dirty
+
+        self._version = 1
+        self._chats: Optional[Dict[str, ChatSpec]] = None
+        self._by_key: Dict[ChatKey, str] = {}
+        self._file_sig: Optional[Tuple[int, int]] = None
+        self._dirty = 0
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._io_lock = asyncio.Lock()
 
     @property
     def path(self) -> Path:
         """Get the repository file path."""
         return self._path
 
-    async def load(self) -> ChatsFile:
-        """Load chat specs from JSON file.
+    # ---- Index ----
 
-        Returns:
-            ChatsFile with all chat specs
-        """
+    def _stat_sig(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_file(self) -> ChatsFile:
         if not self._path.exists():
             return ChatsFile(version=1, chats=[])
-
         data = json.loads(self._path.read_text(encoding="utf-8"))
         return ChatsFile.model_validate(data)
 
+    def _set_index(self, chats_file: ChatsFile) -> None:
+        self._version = chats_file.version
+        self._chats = {c.id: c for c in chats_file.chats}
+        self._by_key = {_chat_key(c): c.id for c in chats_file.chats}
+
+    async def _ensure_index(self) -> Dict[str, ChatSpec]:
+        sig = self._stat_sig()
+        if self._chats is not None and (self._dirty or sig == self._file_sig):
+            return self._chats
+        chats_file = await asyncio.to_thread(self._read_file)
+        self._set_index(chats_file)
+        self._file_sig = sig
+        return self._chats
+
+    def _index_put(self, spec: ChatSpec) -> None:
+        assert self._chats is not None
+        old = self._chats.get(spec.id)
+        if old is not None and self._by_key.get(_chat_key(old)) == old.id:
+            del self._by_key[_chat_key(old)]
+        self._chats[spec.id] = spec
+        self._by_key[_chat_key(spec)] = spec.id
+
+    def _index_remove(self, chat_id: str) -> bool:
+        assert self._chats is not None
+        old = self._chats.pop(chat_id, None)
+        if old is None:
+            return False
+        if self._by_key.get(_chat_key(old)) == chat_id:
+            del self._by_key[_chat_key(old)]
+        return True
+
+    # ---- Storage ----
+
+    async def load(self) -> ChatsFile:
+        """Load chat specs (served from the in-memory index).
+
+        Returns:
+            ChatsFile with all chat specs
+        """
+        chats = await self._ensure_index()
+        return ChatsFile(version=self._version, chats=list(chats.values()))
+
     async def save(self, chats_file: ChatsFile) -> None:
-        """Save chat specs to JSON file atomically.
+        """Replace all chat specs and write the JSON file atomically.
 
         Args:
             chats_file: ChatsFile to persist
         """
+        self._set_index(chats_file)
+        self._dirty += 1
+        await self.flush()
+
+    def _write_file(self, payload: dict) -> Optional[Tuple[int, int]]:
         # Create parent directory if needed
         self._path.parent.mkdir(parents=True, exist_ok=True)
 
         # Write to temp file first (atomic write)
         tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
-        payload = chats_file.model_dump(mode="json")
-
         tmp_path.write_text(
             json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True),
             encoding="utf-8",
@@ -67,3 +154,103 @@ class JsonChatRepository(BaseChatRepository):
 
         # Atomic replace
         tmp_path.replace(self._path)
+        return self._stat_sig()
+
+    async def flush(self) -> None:
+        """Write pending changes to disk (no-op when nothing is dirty)."""
+        async with self._io_lock:
+            if not self._dirty or self._chats is None:
+                return
+            payload = ChatsFile(
+                version=self._version,
+                chats=list(self._chats.values()),
+            ).model_dump(mode="json")
+            dirty = self._dirty
+            self._dirty = 0
+            try:
+                self._file_sig = await asyncio.to_thread(
+                    self._write_file,
+                    payload,
+                )
+            except Exception:
+                self._dirty += dirty
+                raise
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self._flush_delay)
+            await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("chats.json write-behind flush failed")
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+
+    async def _mark_dirty(self) -> None:
+        self._dirty += 1
+        if self._dirty >= self._max_dirty:
+            await self.flush()
+            return
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(
+                self._delayed_flush(),
+                name="chats_json_flush",
+            )
+
+    async def close(self) -> None:
+        """Cancel the pending timer and flush outstanding changes."""
+        task = self._flush_task
+        self._flush_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    # ---- Indexed convenience operations ----
+
+    async def get_chat(self, chat_id: str) -> Optional[ChatSpec]:
+        chats = await self._ensure_index()
+        return chats.get(chat_id)
+
+    async def get_chat_by_id(
+        self,
+        session_id: str,
+        user_id: str,
+        channel: str = DEFAULT_CHANNEL,
+    ) -> Optional[ChatSpec]:
+        chats = await self._ensure_index()
+        chat_id = self._by_key.get((session_id, user_id, channel))
+        return chats.get(chat_id) if chat_id is not None else None
+
+    async def upsert_chat(self, spec: ChatSpec) -> None:
+        await self._ensure_index()
+        self._index_put(spec)
+        await self._mark_dirty()
+
+    async def delete_chats(self, chat_ids: list[str]) -> bool:
+        if not chat_ids:
+            return False
+        await self._ensure_index()
+        removed = [cid for cid in set(chat_ids) if self._index_remove(cid)]
+        if not removed:
+            return False
+        await self._mark_dirty()
+        return True
+
+    async def filter_chats(
+        self,
+        user_id: Optional[str] = None,
+        channel: Optional[str] = None,
+    ) -> list[ChatSpec]:
+        chats = await self._ensure_index()
+        return [
+            c
+            for c in chats.values()
+            if (user_id is None or c.user_id == user_id)
+            and (channel is None or c.channel == channel)
+        ]
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""SQLite-based chat repository."""
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, List, Optional
+
+from .base import BaseChatRepository
+from ..models import ChatSpec, ChatsFile
+from ...channels.schema import DEFAULT_CHANNEL
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chats_session
+    ON chats (session_id, user_id, channel);
+CREATE INDEX IF NOT EXISTS idx_chats_user_channel
+    ON chats (user_id, channel);
+"""
+
+
+class SqliteChatRepository(BaseChatRepository):
+    """chats.db repository (SQLite, one row per chat).
+
+    Upsert/delete touch only the affected rows and lookups go through
+    indexes, so the cost per message no longer grows with the number of
+    chats. Rows keep insertion order (seq) so list_chats() matches the
+    JSON repository. Queries run on a worker thread via asyncio.to_thread.
+
+    Notes:
+    - WAL journal mode; single process (one connection guarded by a lock).
+    - If ``import_from`` points at an existing chats.json and the database
+      is empty, its chats are imported on first use.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        import_from: Path | str | None = None,
+    ):
+        """Initialize SQLite chat repository.
+
+        Args:
+            path: Path to the SQLite database file
+            import_from: Optional chats.json to import into an empty database
+        """
+        if isinstance(path, str):
+            path = Path(path)
+        if isinstance(import_from, str):
+            import_from = Path(import_from)
+        self._path = path.expanduser()
+        self._import_from = import_from
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        """Get the database file path."""
+        return self._path
+
+    # ---- Connection ----
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self._path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        self._maybe_import(conn)
+        return conn
+
+    def _maybe_import(self, conn: sqlite3.Connection) -> None:
+        src = self._import_from
+        if src is None or not src.expanduser().exists():
+            return
+        (count,) = conn.execute("SELECT COUNT(*) FROM chats").fetchone()
+        if count:
+            return
+        data = json.loads(src.expanduser().read_text(encoding="utf-8"))
+        chats_file = ChatsFile.model_validate(data)
+        with conn:
+            self._insert_many(conn, chats_file.chats)
+
+    def _run(self, fn, *args: Any) -> Any:
+        with self._lock:
+            return fn(self._connect(), *args)
+
+    async def _call(self, fn, *args: Any) -> Any:
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    # ---- Row helpers ----
+
+    @staticmethod
+    def _row_values(spec: ChatSpec) -> tuple:
+        return (
+            spec.id,
+            spec.session_id,
+            spec.user_id,
+            spec.channel,
+            spec.model_dump_json(),
+        )
+
+    @classmethod
+    def _insert_many(
+        cls,
+        conn: sqlite3.Connection,
+        specs: List[ChatSpec],
+    ) -> None:
+        conn.executemany(
+            "INSERT INTO chats (id, session_id, user_id, channel, seq, data) "
+            "VALUES (?, ?, ?, ?, "
+            "(SELECT COALESCE(MAX(seq), 0) + 1 FROM chats), ?)",
+            [cls._row_values(s) for s in specs],
+        )
+
+    @staticmethod
+    def _to_specs(rows: List[tuple]) -> list[ChatSpec]:
+        return [ChatSpec.model_validate_json(row[0]) for row in rows]
+
+    # ---- Storage ----
+
+    async def load(self) -> ChatsFile:
+        """Load all chat specs from the database.
+
+        Returns:
+            ChatsFile with all chat specs
+        """
+        return ChatsFile(version=1, chats=await self.list_chats())
+
+    async def save(self, chats_file: ChatsFile) -> None:
+        """Replace all chat specs in one transaction.
+
+        Args:
+            chats_file: ChatsFile to persist
+        """
+
+        def _save(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.execute("DELETE FROM chats")
+                self._insert_many(conn, chats_file.chats)
+
+        await self._call(_save)
+
+    async def close(self) -> None:
+        """Close the database connection."""
+
+        def _close() -> None:
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+        await asyncio.to_thread(_close)
+
+    # ---- Indexed convenience operations ----
+
+    async def _select(self, where: str = "", params: tuple = ()) -> list:
+        sql = "SELECT data FROM chats"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY seq"
+
+        def _query(conn: sqlite3.Connection) -> list:
+            return conn.execute(sql, params).fetchall()
+
+        return self._to_specs(await self._call(_query))
+
+    async def list_chats(self) -> list[ChatSpec]:
+        return await self._select()
+
+    async def get_chat(self, chat_id: str) -> Optional[ChatSpec]:
+        chats = await self._select("id = ?", (chat_id,))
+        return chats[0] if chats else None
+
+    async def get_chat_by_id(
+        self,
+        session_id: str,
+        user_id: str,
+        channel: str = DEFAULT_CHANNEL,
+    ) -> Optional[ChatSpec]:
+        chats = await self._select(
+            "session_id = ? AND user_id = ? AND channel = ?",
+            (session_id, user_id, channel),
+        )
+        return chats[0] if chats else None
+
+    async def upsert_chat(self, spec: ChatSpec) -> None:
+        def _upsert(conn: sqlite3.Connection) -> None:
+            with conn:
+                cur = conn.execute(
+                    "UPDATE chats SET session_id = ?, user_id = ?, "
+                    "channel = ?, data = ? WHERE id = ?",
+                    (
+                        spec.session_id,
+                        spec.user_id,
+                        spec.channel,
+                        spec.model_dump_json(),
+                        spec.id,
+                    ),
+                )
+                if cur.rowcount == 0:
+                    self._insert_many(conn, [spec])
+
+        await self._call(_upsert)
+
+    async def delete_chats(self, chat_ids: list[str]) -> bool:
+        if not chat_ids:
+            return False
+
+        def _delete(conn: sqlite3.Connection) -> int:
+            placeholders = ",".join("?" * len(chat_ids))
+            with conn:
+                cur = conn.execute(
+                    f"DELETE FROM chats WHERE id IN ({placeholders})",
+                    tuple(chat_ids),
+                )
+            return cur.rowcount
+
+        return await self._call(_delete) > 0
+
+    async def filter_chats(
+        self,
+        user_id: Optional[str] = None,
+        channel: Optional[str] = None,
+    ) -> list[ChatSpec]:
+        clauses = []
+        params: list = []
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if channel is not None:
+            clauses.append("channel = ?")
+            params.append(channel)
+        return await self._select(" AND ".join(clauses), tuple(params))
@@ -15,8 +15,14 @@ from dotenv import load_dotenv
 from .session import SafeJSONSession
 from .utils import build_env_context
 from ..channels.schema import DEFAULT_CHANNEL
+from ...agents.agent_pool import get_agent_pool
 from ...agents.memory import MemoryManager
 from ...agents.react_agent import CoPawAgent
+from ...agents.tools.browser_control import (
+    get_browser_pool,
+    reset_browser_session,
+    set_browser_session,
+)
 from ...constant import WORKING_DIR
 from ...app.router import get_router
 
@@ -174,16 +180,20 @@ class AgentRunner(Runner):
         
         logger.info(f"Route to agent: {agent_id}")
         
-        # TODO: 根据agent_id加载不同的Agent配置
-        # 目前使用默认CoPawAgent
+        # 复用预热的 Agent 模板（工具、技能、提示词、模型客户端），
+        # 仅为本次会话构建轻量的 CoPawAgent 外壳
+        template = get_agent_pool().get(agent_id)
         agent = CoPawAgent(
             env_context=env_context,
             mcp_clients=mcp_clients,
             memory_manager=self.memory_manager,
             agent_id=agent_id,  # 传递agent_id
+            template=template,
         )
         await agent.register_mcp_clients()
         agent.set_console_output_enabled(enabled=False)
+        # browser_use calls of this query get the session's own context
+        browser_token = set_browser_session(session_id)
 
         try:
             logger.debug(
@@ -234,6 +244,8 @@ class AgentRunner(Runner):
         except Exception as e:
             logger.exception("Error in query handler: %s", e)
             raise
+        finally:
+            reset_browser_session(browser_token)
 
     async def init_handler(self, *args, **kwargs):
         """
@@ -282,3 +294,8 @@ class AgentRunner(Runner):
             await self.memory_manager.close()
         except Exception as e:
             logger.warning(f"MemoryManager stop failed: {e}")
+
+        try:
+            await get_browser_pool().shutdown()
+        except Exception as e:
+            logger.warning(f"Browser pool shutdown failed: {e}")
@@ -4,13 +4,19 @@ compatibility.
 
 Windows filenames cannot contain: \\ / : * ? " < > |
 This module wraps agentscope's JSONSession so that session_id and user_id
-are sanitized before being used as filenames.
+are sanitized before being used as filenames, and so that each save only
+appends what changed (see :mod:`utils.session_log`).
 """
+import asyncio
 import os
 import re
+from typing import Any, Dict, Optional
 
+from agentscope.module import StateModule
 from agentscope.session import JSONSession
 
+from ...utils.session_log import SessionLog
+
 
 # Characters forbidden in Windows filenames
 _UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|]')
@@ -31,10 +37,17 @@ class SafeJSONSession(JSONSession):
     """JSONSession subclass that sanitizes session_id / user_id before
     building file paths.
 
-    All other behaviour (save / load / state management) is inherited
-    unchanged from :class:`JSONSession`.
+    State is persisted through :class:`SessionLog`: the ``.json`` file is
+    a periodic snapshot in the JSONSession format and each save appends
+    only the changed messages to ``.json.log``. Recently used sessions are
+    kept in memory, so loading one does not re-parse the file. File I/O
+    runs in a worker thread.
     """
 
+    def __init__(self, save_dir: str = "./", **kwargs: Any) -> None:
+        super().__init__(save_dir=save_dir, **kwargs)
+        self._log = SessionLog()
+
     def _get_save_path(self, session_id: str, user_id: str) -> str:
         """Return a filesystem-safe save path.
 
@@ -49,3 +62,51 @@ class SafeJSONSession(JSONSession):
         else:
             file_path = f"{safe_sid}.json"
         return os.path.join(self.save_dir, file_path)
+
+    async def save_session_state(
+        self,
+        session_id: str,
+        user_id: str = "",
+        **state_modules_mapping: StateModule,
+    ) -> None:
+        """Save the state of the given modules (incrementally)."""
+        state = {
+            name: module.state_dict()
+            for name, module in state_modules_mapping.items()
+        }
+        await asyncio.to_thread(
+            self._log.save,
+            self._get_save_path(session_id, user_id),
+            state,
+        )
+
+    async def load_session_state(
+        self,
+        session_id: str,
+        user_id: str = "",
+        allow_not_exist: bool = True,
+        **state_modules_mapping: StateModule,
+    ) -> None:
+        """Load the saved state into the given modules."""
+        states = await self.read_session_state(session_id, user_id)
+        if states is None:
+            if allow_not_exist:
+                return
+            raise ValueError(
+                f"Failed to load session state for session {session_id} "
+                f"because it does not exist.",
+            )
+        for name, module in state_modules_mapping.items():
+            if name in states:
+                module.load_state_dict(states[name])
+
+    async def read_session_state(
+        self,
+        session_id: str,
+        user_id: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        """Saved state as ``{module_name: state_dict}``, or None."""
+        return await asyncio.to_thread(
+            self._log.load,
+            self._get_save_path(session_id, user_id),
+        )
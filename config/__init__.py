@@ -2,9 +2,11 @@
 from .config import Config, ChannelConfig, ChannelConfigUnion
 from .utils import (
     get_config_path,
+    get_config_snapshot,
     get_heartbeat_config,
     get_heartbeat_query_path,
     load_config,
+    on_config_change,
     save_config,
     update_last_dispatch,
 )
@@ -17,9 +19,11 @@ __all__ = [
     "ChannelConfigUnion",
     "ConfigWatcher",
     "get_config_path",
+    "get_config_snapshot",
     "get_heartbeat_config",
     "get_heartbeat_query_path",
     "load_config",
+    "on_config_change",
     "save_config",
     "update_last_dispatch",
 ]
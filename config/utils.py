@@ -3,9 +3,18 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Optional, Tuple
-
-from ..constant import HEARTBEAT_FILE, JOBS_FILE, CHATS_FILE, WORKING_DIR
+from typing import Callable, Optional, Tuple
+
+from ..constant import (
+    CRON_RUNS_FILE,
+    HEARTBEAT_FILE,
+    JOBS_DB_FILE,
+    JOBS_FILE,
+    CHATS_FILE,
+    CHATS_DB_FILE,
+    WORKING_DIR,
+)
+from ..utils.file_snapshot import get_snapshot_cache
 from .config import Config, HeartbeatConfig, LastApiConfig, LastDispatchConfig
 
 
@@ -19,12 +28,15 @@ def get_heartbeat_query_path() -> Path:
     return get_config_path().parent.joinpath(HEARTBEAT_FILE)
 
 
-def load_config(config_path: Optional[Path] = None) -> Config:
-    """Load config from file. Returns default Config if file is missing."""
-    if config_path is None:
-        config_path = get_config_path()
+def _read_config(config_path: Path) -> Tuple[Config, str]:
+    """Parse and validate config.json. Returns default Config if missing.
+
+    Also returns the normalized JSON so copies can be re-validated
+    without touching the disk (faster than a deep copy).
+    """
     if not config_path.is_file():
-        return Config()
+        config = Config()
+        return config, config.model_dump_json(by_alias=True)
     with open(config_path, "r", encoding="utf-8") as file:
         data = json.load(file)
     # Backward compat: top-level last_api_host / last_api_port -> last_api
@@ -34,7 +46,54 @@ def load_config(config_path: Optional[Path] = None) -> Config:
             la["host"] = data.get("last_api_host")
         if "port" not in la and "last_api_port" in data:
             la["port"] = data.get("last_api_port")
-    return Config.model_validate(data)
+    return Config.model_validate(data), json.dumps(data, ensure_ascii=False)
+
+
+def _config_key(config_path: Path) -> tuple:
+    return ("config", str(config_path))
+
+
+def _get_cached_config(config_path: Optional[Path]) -> Tuple[Config, str]:
+    if config_path is None:
+        config_path = get_config_path()
+    return get_snapshot_cache().get(
+        _config_key(config_path),
+        [config_path],
+        lambda: _read_config(config_path),
+    )
+
+
+def get_config_snapshot(config_path: Optional[Path] = None) -> Config:
+    """Return the shared parsed config; do not mutate it.
+
+    Parsed once and reloaded only when the file's (mtime, size, inode)
+    changes. Use load_config() for a copy that can be modified and saved.
+    """
+    return _get_cached_config(config_path)[0]
+
+
+def load_config(config_path: Optional[Path] = None) -> Config:
+    """Load config from file. Returns default Config if file is missing.
+
+    The result is a private copy of the cached snapshot.
+    """
+    return Config.model_validate_json(_get_cached_config(config_path)[1])
+
+
+def on_config_change(
+    callback: Callable[[Config, Config], None],
+    config_path: Optional[Path] = None,
+) -> Callable[[], None]:
+    """Call callback(old, new) when a changed config.json is reloaded.
+
+    Returns an unsubscribe function.
+    """
+    if config_path is None:
+        config_path = get_config_path()
+    return get_snapshot_cache().on_change(
+        _config_key(config_path),
+        lambda old, new: callback(old[0], new[0]),
+    )
 
 
 def save_config(config: Config, config_path: Optional[Path] = None) -> None:
@@ -49,11 +108,12 @@ def save_config(config: Config, config_path: Optional[Path] = None) -> None:
             indent=2,
             ensure_ascii=False,
         )
+    get_snapshot_cache().invalidate(_config_key(config_path))
 
 
 def get_heartbeat_config() -> HeartbeatConfig:
     """Return effective heartbeat config (from file or default 30m/main)."""
-    config = load_config()
+    config = get_config_snapshot()
     hb = config.agents.defaults.heartbeat
     return hb if hb is not None else HeartbeatConfig()
 
@@ -71,7 +131,7 @@ def update_last_dispatch(channel: str, user_id: str, session_id: str) -> None:
 
 def read_last_api() -> Optional[Tuple[str, int]]:
     """Read last API host/port from config (via config load/save)."""
-    config = load_config()
+    config = get_config_snapshot()
     host = config.last_api.host
     port = config.last_api.port
     if not host or port is None:
@@ -92,6 +152,21 @@ def get_jobs_path() -> Path:
     return (WORKING_DIR / JOBS_FILE).expanduser()
 
 
+def get_jobs_db_path() -> Path:
+    """Return jobs.db (SQLite cron job repository) path."""
+    return (WORKING_DIR / JOBS_DB_FILE).expanduser()
+
+
+def get_cron_runs_path() -> Path:
+    """Return cron run history (cron_runs.jsonl) path."""
+    return (WORKING_DIR / CRON_RUNS_FILE).expanduser()
+
+
 def get_chats_path() -> Path:
     """Return chats.json path."""
     return (WORKING_DIR / CHATS_FILE).expanduser()
+
+
+def get_chats_db_path() -> Path:
+    """Return chats.db (SQLite chat repository) path."""
+    return (WORKING_DIR / CHATS_DB_FILE).expanduser()
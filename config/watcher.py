@@ -1,134 +1,256 @@
 # -*- coding: utf-8 -*-
-"""Watch config.json for changes and auto-reload channels."""
+"""Watch config files and dispatch typed change events.
+
+``ConfigWatcher`` watches config.json, providers.json and the active
+skills directory (inotify where available, stat polling otherwise; see
+``utils.file_watcher``). After a debounced burst of writes each changed
+source is re-read once and diffed field by field against the last
+applied version. The changed fields are grouped into sections and every
+``ConfigChange`` is handed to the subscribers of its section:
+
+- ``channels``: ``channels.*`` (changed channels are reloaded here);
+- ``heartbeat``: ``agents.defaults.heartbeat.*``;
+- ``agents``: other ``agents.*`` fields;
+- ``providers``: providers.json (or the ``providers`` section of
+  config.json);
+- ``skills``: skills added to / removed from the active skills dir;
+- any other top-level config.json key under its own name
+  (``last_dispatch``, ``show_tool_details``, ...).
+
+Subscribe to ``"*"`` to receive every event.
+"""
 
 from __future__ import annotations
 
-import asyncio
+import inspect
 import logging
+import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
-from .utils import load_config, get_config_path
-from .config import ChannelConfig
+from .utils import get_config_path, get_config_snapshot
 from ..app.channels import ChannelManager  # pylint: disable=no-name-in-module
-from ..constant import get_available_channels
+from ..constant import ACTIVE_SKILLS_DIR, get_available_channels
+from ..providers import get_providers_json_path, get_providers_snapshot
+from ..utils.file_snapshot import diff_fields, file_signature
+from ..utils.file_watcher import DEFAULT_DEBOUNCE, FileWatcher
 
 logger = logging.getLogger(__name__)
 
-# How often to poll (seconds)
+# How often to poll (seconds) when file events are unavailable
 DEFAULT_POLL_INTERVAL = 2.0
 
+ALL_SECTIONS = "*"
+
+# Sections nested below a top-level key: section -> path prefix
+_NESTED_SECTIONS = {
+    "heartbeat": ("agents", "defaults", "heartbeat"),
+}
+
+ChangeCallback = Callable[["ConfigChange"], Any]
+
+
+@dataclass(frozen=True)
+class ConfigChange:
+    """Changes to one section of the configuration."""
+
+    section: str
+    # dotted field path -> (old, new)
+    changes: Dict[str, Tuple[Any, Any]]
+    # Section value (JSON-like) before / after the change
+    old: Any
+    new: Any
+    # Parsed source after the change (Config, ProvidersData or the skill
+    # listing)
+    source: Any = None
+
+    @property
+    def names(self) -> List[str]:
+        """Changed entries directly below the section (e.g. channel names)."""
+        depth = len(_NESTED_SECTIONS.get(self.section, (self.section,)))
+        names: Dict[str, None] = {}
+        for path in self.changes:
+            parts = path.split(".")
+            if len(parts) > depth:
+                names[parts[depth]] = None
+        return list(names)
+
+
+def _section_of(path: str) -> str:
+    parts = path.split(".")
+    for section, prefix in _NESTED_SECTIONS.items():
+        if tuple(parts[: len(prefix)]) == prefix:
+            return section
+    return parts[0]
+
+
+def _section_value(dump: Any, section: str) -> Any:
+    for key in _NESTED_SECTIONS.get(section, (section,)):
+        if not isinstance(dump, dict):
+            return None
+        dump = dump.get(key)
+    return dump
+
 
 class ConfigWatcher:
-    """Poll config.json mtime; reload only changed channels automatically."""
+    """Watch config sources; reload changed channels automatically."""
 
     def __init__(
         self,
         channel_manager: ChannelManager,
         poll_interval: float = DEFAULT_POLL_INTERVAL,
         config_path: Optional[Path] = None,
+        providers_path: Optional[Path] = None,
+        skills_dir: Optional[Path] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
     ):
         self._channel_manager = channel_manager
         self._poll_interval = poll_interval
         self._config_path = config_path or get_config_path()
-        self._task: Optional[asyncio.Task] = None
+        self._providers_path = providers_path or get_providers_json_path()
+        self._skills_dir = skills_dir or ACTIVE_SKILLS_DIR
+        self._debounce = debounce
+        self._file_watcher: Optional[FileWatcher] = None
+
+        # source name -> paths whose change requires re-reading it
+        self._sources: Dict[str, Tuple[Path, ...]] = {
+            "config": (self._config_path,),
+            "providers": (self._providers_path, self._config_path),
+            "skills": (self._skills_dir,),
+        }
+        # source name -> last applied JSON dump (None if never loaded)
+        self._dumps: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._subscribers: Dict[str, List[ChangeCallback]] = {}
+        self.subscribe("channels", self._reload_channels)
+
+    @property
+    def backend(self) -> str:
+        """``"inotify"`` or ``"poll"``."""
+        return self._file_watcher.backend if self._file_watcher else "poll"
+
+    def subscribe(
+        self,
+        section: str,
+        callback: ChangeCallback,
+    ) -> Callable[[], None]:
+        """Call callback(change) for changes in section (``"*"``: all).
+
+        The callback may be a coroutine function. Returns an unsubscribe
+        function.
+        """
+        self._subscribers.setdefault(section, []).append(callback)
 
-        # Snapshot of the last known channel config (for diffing)
-        self._last_channels: Optional[ChannelConfig] = None
-        self._last_channels_hash: Optional[int] = None
-        # mtime of config.json at last check
-        self._last_mtime: float = 0.0
+        def _unsubscribe() -> None:
+            callbacks = self._subscribers.get(section, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+        return _unsubscribe
 
     async def start(self) -> None:
-        """Take initial snapshot and start the polling task."""
-        self._snapshot()
-        self._task = asyncio.create_task(
-            self._poll_loop(),
-            name="config_watcher",
+        """Take initial snapshots and start watching."""
+        for source in self._sources:
+            try:
+                self._dumps[source] = self._load(source)[1]
+            except Exception:
+                logger.exception(
+                    "ConfigWatcher: failed to load initial %s",
+                    source,
+                )
+                self._dumps[source] = None
+        paths = {p for paths in self._sources.values() for p in paths}
+        self._file_watcher = FileWatcher(
+            sorted(paths),
+            self._on_files_changed,
+            debounce=self._debounce,
+            poll_interval=self._poll_interval,
         )
+        await self._file_watcher.start()
         logger.info(
-            "ConfigWatcher started (poll=%.1fs, path=%s)",
-            self._poll_interval,
+            "ConfigWatcher started (backend=%s, path=%s)",
+            self._file_watcher.backend,
             self._config_path,
         )
 
     async def stop(self) -> None:
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
-            self._task = None
+        if self._file_watcher is not None:
+            await self._file_watcher.stop()
+            self._file_watcher = None
         logger.info("ConfigWatcher stopped")
 
     # ------------------------------------------------------------------
 
-    def _snapshot(self) -> None:
-        """Load current config and record mtime + channels hash."""
+    def _load(self, source: str) -> Tuple[Any, Dict[str, Any]]:
+        """Parse one source; returns (value, JSON dump for diffing)."""
+        if source == "config":
+            config = get_config_snapshot(self._config_path)
+            return config, config.model_dump(mode="json")
+        if source == "providers":
+            data = get_providers_snapshot(self._providers_path)
+            return data, {"providers": data.model_dump(mode="json")}
+        skills: Dict[str, Any] = {}
         try:
-            self._last_mtime = self._config_path.stat().st_mtime
+            with os.scandir(self._skills_dir) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        sig = file_signature(Path(entry.path) / "SKILL.md")
+                        skills[entry.name] = list(sig) if sig else None
         except FileNotFoundError:
-            self._last_mtime = 0.0
-        try:
-            config = load_config(self._config_path)
-            self._last_channels = config.channels.model_copy(deep=True)
-            self._last_channels_hash = self._channels_hash(config.channels)
-        except Exception:
-            logger.exception("ConfigWatcher: failed to load initial config")
-            self._last_channels = None
-            self._last_channels_hash = None
-
-    @staticmethod
-    def _channels_hash(channels: ChannelConfig) -> int:
-        """Fast hash of channels section for quick change detection."""
-        return hash(str(channels.model_dump(mode="json")))
-
-    async def _poll_loop(self) -> None:
-        while True:
+            pass
+        return skills, {"skills": skills}
+
+    async def _on_files_changed(self, paths: Set[Path]) -> None:
+        for source, source_paths in self._sources.items():
+            if not paths.intersection(source_paths):
+                continue
             try:
-                await asyncio.sleep(self._poll_interval)
-                await self._check()
+                value, dump = self._load(source)
             except Exception:
-                logger.exception("ConfigWatcher: poll iteration failed")
-
-    async def _check(self) -> None:
-        # 1) Check mtime
-        try:
-            mtime = self._config_path.stat().st_mtime
-        except FileNotFoundError:
-            return
-        if mtime == self._last_mtime:
-            return
-        self._last_mtime = mtime
-
-        # 2) Load new config; quick-reject if channels section unchanged
-        try:
-            config = load_config(self._config_path)
-        except Exception:
-            logger.exception("ConfigWatcher: failed to parse config.json")
-            return
-
-        new_hash = self._channels_hash(config.channels)
-        if new_hash == self._last_channels_hash:
-            return  # Only non-channel fields changed (e.g. last_dispatch)
+                logger.exception("ConfigWatcher: failed to load %s", source)
+                continue
+            old_dump = self._dumps.get(source) or {}
+            changes = diff_fields(old_dump, dump)
+            self._dumps[source] = dump
+            if not changes:
+                continue
 
-        # 3) Diff per-channel and reload changed ones
-        new_channels = config.channels
-        old_channels = self._last_channels
+            by_section: Dict[str, Dict[str, Tuple[Any, Any]]] = {}
+            for path, change in changes.items():
+                by_section.setdefault(_section_of(path), {})[path] = change
+            for section, section_changes in by_section.items():
+                await self._dispatch(
+                    ConfigChange(
+                        section=section,
+                        changes=section_changes,
+                        old=_section_value(old_dump, section),
+                        new=_section_value(dump, section),
+                        source=value,
+                    ),
+                )
 
-        for name in get_available_channels():
-            new_ch = getattr(new_channels, name, None)
-            old_ch = (
-                getattr(old_channels, name, None) if old_channels else None
-            )
+    async def _dispatch(self, change: ConfigChange) -> None:
+        callbacks = list(self._subscribers.get(change.section, ()))
+        callbacks += self._subscribers.get(ALL_SECTIONS, ())
+        for callback in callbacks:
+            try:
+                result = callback(change)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception(
+                    "ConfigWatcher: %s subscriber failed",
+                    change.section,
+                )
 
-            if new_ch is None:
+    async def _reload_channels(self, change: ConfigChange) -> None:
+        """Reload the channels whose config changed."""
+        available = get_available_channels()
+        for name in change.names:
+            if name not in available:
                 continue
-
-            new_dump = new_ch.model_dump(mode="json")
-            old_dump = old_ch.model_dump(mode="json") if old_ch else None
-            if new_dump == old_dump:
+            new_ch = getattr(change.source.channels, name, None)
+            if new_ch is None:
                 continue
 
             logger.info(
@@ -145,13 +267,21 @@ class ConfigWatcher:
                 await self._channel_manager.replace_channel(new_channel)
                 logger.info(f"ConfigWatcher: channel '{name}' reloaded")
             except Exception:
-                # Reload failed — keep old snapshot for this channel so
-                # the next config change will retry the reload.
+                # Reload failed — keep the old version of this channel as
+                # the baseline so the next config change retries it.
                 logger.exception(
                     f"ConfigWatcher: failed to reload channel '{name}'",
                 )
-                setattr(new_channels, name, old_ch if old_ch else new_ch)
+                self._restore_channel_baseline(name, change.old)
 
-        # 4) Update snapshot
-        self._last_channels = new_channels.model_copy(deep=True)
-        self._last_channels_hash = self._channels_hash(new_channels)
+    def _restore_channel_baseline(
+        self,
+        name: str,
+        old_channels: Optional[Dict[str, Any]],
+    ) -> None:
+        dump = self._dumps.get("config")
+        if not dump:
+            return
+        channels = dict(dump.get("channels") or {})
+        channels[name] = (old_channels or {}).get(name)
+        self._dumps["config"] = {**dump, "channels": channels}
@@ -10,8 +10,23 @@ WORKING_DIR = (
 
 JOBS_FILE = os.environ.get("COPAW_JOBS_FILE", "jobs.json")
 
+# Cron job repository backend: "json" (jobs.json, write-behind) or "sqlite"
+# (jobs.db; imports an existing jobs.json on first start).
+JOB_REPO_BACKEND = os.environ.get("COPAW_JOB_REPO", "json").lower()
+
+JOBS_DB_FILE = os.environ.get("COPAW_JOBS_DB_FILE", "jobs.db")
+
+# Append-only cron run history (JSON lines)
+CRON_RUNS_FILE = os.environ.get("COPAW_CRON_RUNS_FILE", "cron_runs.jsonl")
+
 CHATS_FILE = os.environ.get("COPAW_CHATS_FILE", "chats.json")
 
+# Chat repository backend: "json" (chats.json, write-behind) or "sqlite"
+# (chats.db; imports an existing chats.json on first start).
+CHAT_REPO_BACKEND = os.environ.get("COPAW_CHAT_REPO", "json").lower()
+
+CHATS_DB_FILE = os.environ.get("COPAW_CHATS_DB_FILE", "chats.db")
+
 CONFIG_FILE = os.environ.get("COPAW_CONFIG_FILE", "config.json")
 
 HEARTBEAT_FILE = os.environ.get("COPAW_HEARTBEAT_FILE", "HEARTBEAT.md")
@@ -39,6 +54,71 @@ CUSTOMIZED_SKILLS_DIR = WORKING_DIR / "customized_skills"
 # Memory directory
 MEMORY_DIR = WORKING_DIR / "memory"
 
+# Thalamus memory index (vectors.npy + items.json, memory-mapped)
+THALAMUS_MEMORY_DIR = WORKING_DIR / "thalamus_memory"
+
+# execute_shell_command: stdout/stderr bytes returned to the model (head +
+# tail of each stream); longer output is saved in full under
+# SHELL_OUTPUT_DIR (last SHELL_OUTPUT_KEEP_FILES files kept). Partial
+# output is streamed every SHELL_PROGRESS_INTERVAL seconds.
+SHELL_OUTPUT_HEAD_BYTES = int(
+    os.environ.get("COPAW_SHELL_OUTPUT_HEAD_BYTES", "8192"),
+)
+
+SHELL_OUTPUT_TAIL_BYTES = int(
+    os.environ.get("COPAW_SHELL_OUTPUT_TAIL_BYTES", "24576"),
+)
+
+SHELL_OUTPUT_DIR = WORKING_DIR / "shell_output"
+
+SHELL_OUTPUT_KEEP_FILES = 50
+
+SHELL_PROGRESS_INTERVAL = 2.0
+
+# Attachment downloads (file/media blocks): content-addressed cache under
+# DOWNLOAD_CACHE_DIR, bodies larger than DOWNLOAD_MAX_BYTES are refused
+# and at most DOWNLOAD_MAX_CONCURRENCY fetches run at once.
+DOWNLOAD_CACHE_DIR = WORKING_DIR / "download_cache"
+
+DOWNLOAD_MAX_BYTES = int(
+    os.environ.get("COPAW_DOWNLOAD_MAX_BYTES", str(200 * 1024 * 1024)),
+)
+
+DOWNLOAD_CACHE_MAX_BYTES = int(
+    os.environ.get(
+        "COPAW_DOWNLOAD_CACHE_MAX_BYTES",
+        str(2 * 1024 * 1024 * 1024),
+    ),
+)
+
+DOWNLOAD_MAX_CONCURRENCY = int(
+    os.environ.get("COPAW_DOWNLOAD_MAX_CONCURRENCY", "4"),
+)
+
+# browser_use: one shared browser, one context per session. Contexts idle
+# for BROWSER_IDLE_TIMEOUT seconds are closed; at most BROWSER_MAX_CONTEXTS
+# contexts and BROWSER_MAX_PAGES pages (all sessions) are open at once.
+BROWSER_MAX_CONTEXTS = int(
+    os.environ.get("COPAW_BROWSER_MAX_CONTEXTS", "8"),
+)
+
+BROWSER_MAX_PAGES = int(
+    os.environ.get("COPAW_BROWSER_MAX_PAGES", "32"),
+)
+
+BROWSER_IDLE_TIMEOUT = float(
+    os.environ.get("COPAW_BROWSER_IDLE_TIMEOUT", "600"),
+)
+
+# Console messages / network requests kept per page (oldest dropped)
+BROWSER_CONSOLE_BUFFER_SIZE = int(
+    os.environ.get("COPAW_BROWSER_CONSOLE_BUFFER_SIZE", "500"),
+)
+
+BROWSER_NETWORK_BUFFER_SIZE = int(
+    os.environ.get("COPAW_BROWSER_NETWORK_BUFFER_SIZE", "500"),
+)
+
 # Memory compaction configuration
 MEMORY_COMPACT_THRESHOLD = int(
     os.environ.get("COPAW_MEMORY_COMPACT_THRESHOLD", "100000"),
@@ -48,6 +128,48 @@ MEMORY_COMPACT_KEEP_RECENT = int(
     os.environ.get("COPAW_MEMORY_COMPACT_KEEP_RECENT", "5"),
 )
 
+# Channel consumer pool (DingTalk / Feishu / QQ): max sessions processed
+# concurrently per channel, and max messages buffered in the pool before the
+# consumer stops pulling from the inbound queue (backpressure).
+CHANNEL_MAX_CONCURRENCY = int(
+    os.environ.get("COPAW_CHANNEL_MAX_CONCURRENCY", "8"),
+)
+
+CHANNEL_MAX_PENDING = int(
+    os.environ.get("COPAW_CHANNEL_MAX_PENDING", "1000"),
+)
+
+# Inbound message debounce (DingTalk; opt-in for Feishu / QQ / Discord via
+# <CHANNEL>_DEBOUNCE_SECONDS): a batch of one sender's messages is handed to
+# the agent after at most this many messages or seconds, even if the sender
+# keeps typing.
+CHANNEL_DEBOUNCE_MAX_BATCH = int(
+    os.environ.get("COPAW_CHANNEL_DEBOUNCE_MAX_BATCH", "20"),
+)
+
+CHANNEL_DEBOUNCE_MAX_LATENCY = float(
+    os.environ.get("COPAW_CHANNEL_DEBOUNCE_MAX_LATENCY", "3"),
+)
+
+# Cron execution: max job runs in flight overall, per dispatch channel and
+# per agent (job meta "agent_id"); 0 = no limit. Jobs sharing a cron
+# expression get up to CRON_JITTER_SECONDS of random start delay.
+CRON_MAX_CONCURRENCY = int(
+    os.environ.get("COPAW_CRON_MAX_CONCURRENCY", "4"),
+)
+
+CRON_CHANNEL_MAX_CONCURRENCY = int(
+    os.environ.get("COPAW_CRON_CHANNEL_MAX_CONCURRENCY", "0"),
+)
+
+CRON_AGENT_MAX_CONCURRENCY = int(
+    os.environ.get("COPAW_CRON_AGENT_MAX_CONCURRENCY", "1"),
+)
+
+CRON_JITTER_SECONDS = int(
+    os.environ.get("COPAW_CRON_JITTER_SECONDS", "30"),
+)
+
 DASHSCOPE_BASE_URL = os.environ.get(
     "DASHSCOPE_BASE_URL",
     "https://dashscope.aliyuncs.com/compatible-mode/v1",
@@ -11,6 +11,9 @@ Tables:
 - cost_stats: 成本统计
 - conversations: 对话历史
 - configs: 系统配置
+
+Append-only tables (trace/credit/cost/conversations) should be written
+through the batched pipeline in ``db.writer`` instead of session_scope().
 """
 
 import os
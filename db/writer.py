@@ -0,0 +1,567 @@
+# -*- coding: utf-8 -*-
+"""
+Batched write-behind pipeline for append-only tables.
+
+trace_logs, credit_logs, cost_stats and conversations only ever receive
+inserts, but going through ``session_scope()`` costs one transaction (and
+one DB round-trip) per row on the calling thread. ``BatchWriter`` takes
+rows through a bounded in-process queue and a background thread flushes
+them in batches, either when ``batch_size`` rows are pending or
+``flush_interval`` seconds after the first pending row.
+
+- ``record()`` never blocks and never touches the database, so a span per
+  tool call adds no round-trip to the agent's critical path.
+- Each flush is one transaction with one executemany INSERT per table
+  (multi-row VALUES on PostgreSQL drivers that support it).
+- If the database is unavailable, or the queue is full, rows are appended
+  to a JSONL spill file. The spill file is replayed after the next
+  successful flush, or every ``retry_interval`` seconds when idle.
+- ``metrics()`` reports queue depth, flush latency and counters.
+
+The global writer (``get_writer()``) is closed, i.e. flushed, by the
+app's lifespan shutdown, with an atexit hook as a fallback. Call sites on
+hot paths use ``get_configured_writer()``, which is None unless
+COPAW_DATABASE_URL is set, so deployments without a database neither
+connect nor spill.
+
+Usage:
+    writer = get_writer()
+    writer.record_credit(agent_id="01", operation="chat", tokens=812, cost=3)
+
+    with writer.span("tool:web_search", agent_id="01", trace_id=tid):
+        ...
+"""
+
+import atexit
+import importlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import DateTime, insert
+
+from . import (
+    CostStat,
+    CreditLog,
+    Conversation,
+    TraceLog,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_FILE = "~/.cp9/db_spill.jsonl"
+
+# Tables that may be written through the pipeline (append-only).
+WRITABLE_TABLES = {
+    model.__tablename__: model.__table__
+    for model in (TraceLog, CreditLog, CostStat, Conversation)
+}
+
+_Row = Tuple[str, Dict[str, Any]]
+_STOP = object()
+
+
+def _dump_rows(rows: List[_Row]) -> str:
+    """Serialize rows as spill-file JSONL."""
+    return "".join(
+        json.dumps(
+            {
+                "table": table,
+                "row": {
+                    k: v.isoformat() if isinstance(v, datetime) else v
+                    for k, v in values.items()
+                },
+            },
+            ensure_ascii=False,
+        ) + "\n"
+        for table, values in rows
+    )
+
+
+class BatchWriter:
+    """Bounded queue + background flusher for append-only tables."""
+
+    def __init__(
+        self,
+        engine=None,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue: int = 10000,
+        spill_path: Optional[str] = None,
+        retry_interval: float = 30.0,
+    ):
+        """
+        Args:
+            engine: SQLAlchemy engine (defaults to ``db.engine``,
+                initializing it on first flush).
+            batch_size: Flush as soon as this many rows are pending.
+            flush_interval: Max seconds a row waits before being flushed.
+            max_queue: Queue bound; overflow goes to the spill file.
+            spill_path: JSONL spill file (None disables spilling, in which
+                case rows that cannot be written are dropped).
+            retry_interval: Seconds between spill replays while idle.
+        """
+        self._engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.spill_path = Path(spill_path).expanduser() if spill_path else None
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    # ---- Producer side ----
+
+    def record(self, table: str, **values: Any) -> None:
+        """Queue one row for ``table`` (non-blocking)."""
+        columns = WRITABLE_TABLES.get(table)
+        if columns is None:
+            raise ValueError(f"Table not writable through BatchWriter: {table}")
+        # Stamp rows now rather than at flush time.
+        if "created_at" in columns.c and values.get("created_at") is None:
+            values["created_at"] = datetime.now(timezone.utc)
+
+        if self._closed:
+            self._spill([(table, values)])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((table, values))
+        except queue.Full:
+            self._spill([(table, values)])
+            return
+        self._bump("enqueued")
+
+    def record_trace(
+        self,
+        trace_id: str,
+        span_id: str,
+        agent_id: str,
+        action: str,
+        status: str,
+        duration_ms: int,
+        parent_id: Optional[str] = None,
+        tokens: int = 0,
+        credit_used: int = 0,
+        error_message: Optional[str] = None,
+    ) -> None:
+        """Queue a trace_logs row."""
+        self.record(
+            TraceLog.__tablename__,
+            trace_id=trace_id,
+            span_id=span_id,
+            parent_id=parent_id,
+            agent_id=agent_id,
+            action=action,
+            status=status,
+            duration_ms=duration_ms,
+            tokens=tokens,
+            credit_used=credit_used,
+            error_message=error_message,
+        )
+
+    def record_credit(
+        self,
+        agent_id: str,
+        operation: str,
+        tokens: int = 0,
+        cost: int = 0,
+    ) -> None:
+        """Queue a credit_logs row."""
+        self.record(
+            CreditLog.__tablename__,
+            agent_id=agent_id,
+            operation=operation,
+            tokens=tokens,
+            cost=cost,
+        )
+
+    def record_cost(
+        self,
+        agent_id: str,
+        model: str,
+        usage_amount: int = 0,
+        cost: int = 0,
+        period: Optional[datetime] = None,
+    ) -> None:
+        """Queue a cost_stats row."""
+        self.record(
+            CostStat.__tablename__,
+            agent_id=agent_id,
+            model=model,
+            usage_amount=usage_amount,
+            cost=cost,
+            period=period,
+        )
+
+    def record_conversation(
+        self,
+        user_id: str,
+        agent_id: str,
+        channel: str,
+        user_message: str,
+        agent_message: str,
+    ) -> None:
+        """Queue a conversations row."""
+        self.record(
+            Conversation.__tablename__,
+            user_id=user_id,
+            agent_id=agent_id,
+            channel=channel,
+            user_message=user_message,
+            agent_message=agent_message,
+        )
+
+    @contextmanager
+    def span(
+        self,
+        action: str,
+        agent_id: str,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block and queue it as a trace span.
+
+        Yields a dict whose ``tokens``/``credit_used`` entries may be set
+        by the block; ``span_id``/``trace_id`` can be read for child spans.
+        Exceptions are recorded with status "error" and re-raised.
+        """
+        info: Dict[str, Any] = {
+            "trace_id": trace_id or uuid.uuid4().hex,
+            "span_id": uuid.uuid4().hex[:16],
+            "tokens": 0,
+            "credit_used": 0,
+        }
+        start = time.perf_counter()
+        status, error = "ok", None
+        try:
+            yield info
+        except BaseException as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record_trace(
+                trace_id=info["trace_id"],
+                span_id=info["span_id"],
+                parent_id=parent_id,
+                agent_id=agent_id,
+                action=action,
+                status=status,
+                duration_ms=int((time.perf_counter() - start) * 1000),
+                tokens=info["tokens"],
+                credit_used=info["credit_used"],
+                error_message=error,
+            )
+
+    # ---- Consumer side ----
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="db-batch-writer",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.retry_interval)
+            except queue.Empty:
+                # Idle: retry whatever was spilled while the DB was down.
+                if self._has_spill():
+                    self._flush_rows([])
+                continue
+
+            batch: List[_Row] = []
+            barriers: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    self._flush_rows(batch)
+                    for event in barriers:
+                        event.set()
+                    return
+                if isinstance(item, threading.Event):
+                    barriers.append(item)
+                    break
+                batch.append(item)
+                timeout = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+            self._flush_rows(batch)
+            for event in barriers:
+                event.set()
+
+    def _get_engine(self):
+        if self._engine is None:
+            # The parent package, whether imported as ``db`` or ``cp9.db``;
+            # its ``engine`` global is only set by init_db().
+            db = importlib.import_module(__package__)
+            if db.engine is None:
+                db.init_db()
+            self._engine = db.engine
+        return self._engine
+
+    def _insert(self, rows: List[_Row]) -> None:
+        """Write rows in one transaction, one executemany per table/shape."""
+        grouped: Dict[Tuple[str, Tuple[str, ...]], List[Dict[str, Any]]]
+        grouped = defaultdict(list)
+        for table, values in rows:
+            grouped[(table, tuple(sorted(values)))].append(values)
+        with self._get_engine().begin() as conn:
+            for (table, _), values in grouped.items():
+                conn.execute(insert(WRITABLE_TABLES[table]), values)
+
+    def _flush_rows(self, batch: List[_Row]) -> bool:
+        """Flush batch (and pending spill on success); spill on failure."""
+        with self._flush_lock:
+            if batch:
+                start = time.perf_counter()
+                try:
+                    self._insert(batch)
+                except Exception as e:
+                    logger.warning(
+                        "Batch insert of %d rows failed, spilling: %s",
+                        len(batch), e,
+                    )
+                    self._bump("flush_errors")
+                    self._spill(batch)
+                    return False
+                elapsed = (time.perf_counter() - start) * 1000
+                with self._stats_lock:
+                    self._stats["written"] += len(batch)
+                    self._stats["flushes"] += 1
+                    self._stats["last_flush_ms"] = elapsed
+                    self._stats["total_flush_ms"] += elapsed
+                    self._stats["max_flush_ms"] = max(
+                        self._stats["max_flush_ms"], elapsed
+                    )
+            return self._replay_spill()
+
+    def flush(self, timeout: float = None) -> None:
+        """Block until every row queued so far has been flushed or spilled."""
+        if self._thread is None:
+            self._flush_rows([])
+            return
+        done = threading.Event()
+        # Rows queued before the marker are flushed before it is set.
+        self._queue.put(done, timeout=timeout)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush pending rows and stop the background thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+        # Anything still queued (join timed out) goes to the spill file.
+        leftover: List[_Row] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._spill(leftover)
+
+    # ---- Spill file ----
+
+    def _has_spill(self) -> bool:
+        if self.spill_path is None:
+            return False
+        # A leftover .replay file means a replay was interrupted.
+        return any(
+            path.exists() and path.stat().st_size > 0
+            for path in (self.spill_path, self.spill_path.with_suffix(".replay"))
+        )
+
+    def _spill(self, rows: List[_Row]) -> None:
+        if self.spill_path is None:
+            self._bump("dropped", len(rows))
+            logger.error("Dropped %d rows (no spill file configured)", len(rows))
+            return
+        lines = _dump_rows(rows)
+        with self._spill_lock:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        self._bump("spilled", len(rows))
+
+    def _load_spill_line(self, line: str) -> Optional[_Row]:
+        try:
+            data = json.loads(line)
+            table = WRITABLE_TABLES[data["table"]]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Skipping malformed spill line: %r", line[:200])
+            return None
+        row = data["row"]
+        for name, value in row.items():
+            column = table.c.get(name)
+            if (
+                column is not None
+                and isinstance(column.type, DateTime)
+                and isinstance(value, str)
+            ):
+                row[name] = datetime.fromisoformat(value)
+        return data["table"], row
+
+    def _replay_spill(self) -> bool:
+        """Insert spilled rows; rows that still fail are kept on disk."""
+        if not self._has_spill():
+            return True
+        with self._spill_lock:
+            replay_path = self.spill_path.with_suffix(".replay")
+            if not replay_path.exists():
+                os.replace(self.spill_path, replay_path)
+            # else: finish the interrupted replay first; the newer spill
+            # file is picked up on the next round.
+
+        rows: List[_Row] = []
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = self._load_spill_line(line)
+                    if row is not None:
+                        rows.append(row)
+
+        for i in range(0, len(rows), self.batch_size):
+            chunk = rows[i:i + self.batch_size]
+            try:
+                self._insert(chunk)
+            except Exception as e:
+                logger.warning("Spill replay failed, will retry: %s", e)
+                self._bump("flush_errors")
+                remaining = rows[i:]
+                with self._spill_lock:
+                    # Keep spill order: remaining replay rows first.
+                    tail = ""
+                    if self.spill_path.exists():
+                        tail = self.spill_path.read_text(encoding="utf-8")
+                    replay_path.write_text(
+                        _dump_rows(remaining) + tail, encoding="utf-8"
+                    )
+                    os.replace(replay_path, self.spill_path)
+                return False
+            self._bump("replayed", len(chunk))
+            self._bump("written", len(chunk))
+        replay_path.unlink()
+        return True
+
+    # ---- Metrics ----
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, flush latency and counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        flushes = stats.pop("flushes")
+        total = stats.pop("total_flush_ms")
+        stats.update(
+            queue_depth=self._queue.qsize(),
+            queue_capacity=self._queue.maxsize,
+            flushes=flushes,
+            avg_flush_ms=total / flushes if flushes else 0.0,
+            spill_bytes=sum(
+                path.stat().st_size
+                for path in (self.spill_path, self.spill_path.with_suffix(".replay"))
+                if path.exists()
+            ) if self.spill_path is not None else 0,
+        )
+        return stats
+
+
+# Global writer
+_writer: Optional[BatchWriter] = None
+
+
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> BatchWriter:
+    """Get the global batch writer (spill file from COPAW_DB_SPILL_FILE)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BatchWriter(
+                    spill_path=os.environ.get(
+                        "COPAW_DB_SPILL_FILE", DEFAULT_SPILL_FILE
+                    ),
+                )
+                # Fallback for exits that skip close_writer()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def get_configured_writer() -> Optional[BatchWriter]:
+    """The global writer if COPAW_DATABASE_URL is set, else None."""
+    if not os.environ.get("COPAW_DATABASE_URL"):
+        return None
+    return get_writer()
+
+
+def close_writer() -> None:
+    """Flush and stop the global writer, if one was created."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+        atexit.unregister(writer.close)
+
+
+__all__ = [
+    "BatchWriter",
+    "WRITABLE_TABLES",
+    "get_writer",
+    "get_configured_writer",
+    "close_writer",
+]
@@ -18,8 +18,11 @@ from .registry import (
 )
 from .store import (
     get_active_llm_config,
+    get_providers_json_path,
+    get_providers_snapshot,
     load_providers_json,
     mask_api_key,
+    on_providers_change,
     save_providers_json,
     set_active_llm,
     update_provider_settings,
@@ -41,8 +44,11 @@ __all__ = [
     "list_providers",
     # store
     "get_active_llm_config",
+    "get_providers_json_path",
+    "get_providers_snapshot",
     "load_providers_json",
     "mask_api_key",
+    "on_providers_change",
     "save_providers_json",
     "set_active_llm",
     "update_provider_settings",
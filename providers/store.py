@@ -7,7 +7,7 @@ import json
 import os
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from .models import (
     ModelSlotConfig,
@@ -17,6 +17,11 @@ from .models import (
 )
 from .registry import PROVIDERS
 
+try:
+    from ..utils.file_snapshot import get_snapshot_cache
+except ImportError:  # imported as the top-level ``providers`` package
+    from utils.file_snapshot import get_snapshot_cache
+
 # ---------------------------------------------------------------------------
 # JSON file path
 # ---------------------------------------------------------------------------
@@ -148,20 +153,22 @@ def _ensure_all_providers(
             _ensure_base_url(providers[pid], defn)
 
 
+def _config_json_candidates() -> list[Path]:
+    """config.json locations that may hold a ``providers`` section."""
+    return [
+        (Path(os.environ.get("COPAW_WORKING_DIR", "~/.cp9")) / "config.json").expanduser(),
+        Path.home() / ".cp9" / "config.json",
+        Path("/opt/ai_works/cp9/config.json"),
+    ]
+
+
 def _load_from_config_json() -> tuple[dict, ModelSlotConfig]:
     """Load providers configuration from config.json if present.
     
     Returns (providers dict, active_llm).
     """
     # Try to find config.json in various locations
-    possible_paths = [
-        Path(os.environ.get("COPAW_WORKING_DIR", "~/.cp9")) / "config.json",
-        Path.home() / ".cp9" / "config.json",
-        Path("/opt/ai_works/cp9/config.json"),
-    ]
-    
-    for config_path in possible_paths:
-        config_path = config_path.expanduser()
+    for config_path in _config_json_candidates():
         if config_path.exists():
             try:
                 with open(config_path, "r", encoding="utf-8") as f:
@@ -181,18 +188,15 @@ def _load_from_config_json() -> tuple[dict, ModelSlotConfig]:
 # ---------------------------------------------------------------------------
 
 
-def load_providers_json(
-    path: Optional[Path] = None,
-) -> ProvidersData:
-    """Load providers.json, creating/repairing as needed.
-    
-    Also checks config.json for providers configuration.
-    """
-    if path is None:
-        path = get_providers_json_path()
+def _read_providers(path: Path) -> ProvidersData:
+    """Parse providers (config.json first, then providers.json).
 
+    providers.json is only rewritten when repairing it changed its
+    content, so reading does not bump its mtime.
+    """
     providers: dict[str, ProviderSettings] = {}
     active_llm = ModelSlotConfig()
+    raw_text: Optional[str] = None
 
     # First, try to load from config.json
     config_providers, config_active_llm = _load_from_config_json()
@@ -205,7 +209,8 @@ def load_providers_json(
         # Fallback to providers.json
         try:
             with open(path, "r", encoding="utf-8") as fh:
-                raw: dict = json.load(fh)
+                raw_text = fh.read()
+            raw: dict = json.loads(raw_text)
             if "providers" in raw and isinstance(
                 raw["providers"],
                 dict,
@@ -225,21 +230,59 @@ def load_providers_json(
     )
     
     # Only save to providers.json if not loaded from config.json
-    if not config_providers:
+    if not config_providers and _dump_providers(data) != raw_text:
         save_providers_json(data, path)
     
     return data
 
 
-def save_providers_json(
-    data: ProvidersData,
+def _providers_key(path: Path) -> tuple:
+    return ("providers", str(path))
+
+
+def get_providers_snapshot(
     path: Optional[Path] = None,
-) -> None:
-    """Write provider settings to providers.json."""
+) -> ProvidersData:
+    """Return the shared parsed provider state; do not mutate it.
+
+    Parsed once and reloaded only when providers.json or one of the
+    config.json candidates changes (mtime, size, inode). Environment
+    variables referenced as ``${VAR}`` are expanded at load time.
+    """
     if path is None:
         path = get_providers_json_path()
-    path.parent.mkdir(parents=True, exist_ok=True)
+    return get_snapshot_cache().get(
+        _providers_key(path),
+        [path, *_config_json_candidates()],
+        lambda: _read_providers(path),
+    )
+
+
+def load_providers_json(
+    path: Optional[Path] = None,
+) -> ProvidersData:
+    """Load providers.json, creating/repairing as needed.
+    
+    Also checks config.json for providers configuration. Returns a copy
+    of the cached snapshot that callers may modify and save.
+    """
+    return get_providers_snapshot(path).model_copy(deep=True)
+
+
+def on_providers_change(
+    callback: Callable[[ProvidersData, ProvidersData], None],
+    path: Optional[Path] = None,
+) -> Callable[[], None]:
+    """Call callback(old, new) when changed provider config is reloaded.
+
+    Returns an unsubscribe function.
+    """
+    if path is None:
+        path = get_providers_json_path()
+    return get_snapshot_cache().on_change(_providers_key(path), callback)
 
+
+def _dump_providers(data: ProvidersData) -> str:
     out: dict = {
         "providers": {
             pid: settings.model_dump(mode="json")
@@ -247,9 +290,21 @@ def save_providers_json(
         },
         "active_llm": data.active_llm.model_dump(mode="json"),
     }
+    return json.dumps(out, indent=2, ensure_ascii=False)
+
+
+def save_providers_json(
+    data: ProvidersData,
+    path: Optional[Path] = None,
+) -> None:
+    """Write provider settings to providers.json."""
+    if path is None:
+        path = get_providers_json_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
 
     with open(path, "w", encoding="utf-8") as fh:
-        json.dump(out, fh, indent=2, ensure_ascii=False)
+        fh.write(_dump_providers(data))
+    get_snapshot_cache().invalidate(_providers_key(path))
 
 
 # ---------------------------------------------------------------------------
@@ -322,7 +377,7 @@ def _resolve_slot(
 
 def get_active_llm_config() -> Optional[ResolvedModelConfig]:
     """Return resolved config for the active LLM slot, or ``None``."""
-    data = load_providers_json()
+    data = get_providers_snapshot()
     return _resolve_slot(data.active_llm, data)
 
 
@@ -14,6 +14,8 @@ import os
 import requests
 from pathlib import Path
 
+from ..utils.keyword_matcher import KeywordMatcher
+
 # ==================== Print (Image Generation) ====================
 
 class PrintSensor:
@@ -82,6 +84,15 @@ class PrintSensor:
 class DispatchSensor:
     """Intent distribution using local Qwen model"""
     
+    # Keyword mapping
+    KEYWORDS = {
+        "00": ["创建", "新建", "agent", "管理", "系统"],
+        "01": ["搜索", "论文", "学术", "调研", "研究"],
+        "02": ["代码", "编程", "开发", "bug", "报错"],
+        "03": ["创意", "写作", "文案", "画", "视频"],
+        "04": ["统计", "报表", "成本", "复盘", "总结"]
+    }
+    
     def __init__(self, model_path: str = None):
         # 使用本地 Qwen3-0.6B 模型
         self.model_path = model_path or os.environ.get(
@@ -89,6 +100,8 @@ class DispatchSensor:
             "Qwen/Qwen3-0.6B-FP8"
         )
         self.model = None
+        # Compiled once; scores all agents in one pass over the message
+        self.matcher = KeywordMatcher(self.KEYWORDS)
     
     def load_model(self):
         """Load the dispatch model."""
@@ -114,28 +127,14 @@ class DispatchSensor:
         # Simple keyword-based routing
         # TODO: Use local model for better classification
         
-        message_lower = message.lower()
         agents = agents or ["00", "01", "02", "03", "04"]
         
-        # Keyword mapping
-        keywords = {
-            "00": ["创建", "新建", "agent", "管理", "系统"],
-            "01": ["搜索", "论文", "学术", "调研", "研究"],
-            "02": ["代码", "编程", "开发", "bug", "报错"],
-            "03": ["创意", "写作", "文案", "画", "视频"],
-            "04": ["统计", "报表", "成本", "复盘", "总结"]
-        }
-        
-        scores = {agent: 0 for agent in agents}
-        
-        for agent, words in keywords.items():
-            for word in words:
-                if word in message_lower:
-                    scores[agent] += 1
+        all_scores = self.matcher.score(message)
+        scores = {agent: all_scores.get(agent, 0) for agent in agents}
         
         # Find best match
         best_agent = max(scores, key=scores.get)
-        confidence = scores[best_agent] / max(len(keywords.get(best_agent, [])), 1)
+        confidence = scores[best_agent] / max(len(self.matcher.keywords(best_agent)), 1)
         
         return {
             "agent_id": best_agent if scores[best_agent] > 0 else "00",
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for warm agent templates (AgentPool) and agent prompt loading
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("agentscope")
+agent_pool = pytest.importorskip("cp9.agents.agent_pool")
+prompt = pytest.importorskip("cp9.agents.prompt")
+skills_manager = pytest.importorskip("cp9.agents.skills_manager")
+constant = pytest.importorskip("cp9.constant")
+
+
+def _bump_mtime(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def _write_skill(skills_dir, name, description="demo"):
+    skill_dir = skills_dir / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\ndescription: {description}\n---\n\nUse it.\n",
+        encoding="utf-8",
+    )
+    return skill_dir / "SKILL.md"
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """Working dir, skills dir, agent prompt and LLM slot under tmp_path."""
+    work = tmp_path / "work"
+    skills = work / "active_skills"
+    skills.mkdir(parents=True)
+    (work / "AGENTS.md").write_text("agents rules", encoding="utf-8")
+    (work / "SOUL.md").write_text("soul", encoding="utf-8")
+    agent_prompt = tmp_path / "agent_01_" / "system_prompt.md"
+    agent_prompt.parent.mkdir()
+    llm = SimpleNamespace(api_key="sk-a", model="model-a", base_url="http://a")
+
+    monkeypatch.setattr(constant, "WORKING_DIR", work)
+    monkeypatch.setattr(agent_pool, "WORKING_DIR", work)
+    monkeypatch.setattr(skills_manager, "ACTIVE_SKILLS_DIR", skills)
+    monkeypatch.setattr(
+        prompt,
+        "get_agent_prompt_paths",
+        lambda agent_id: [
+            tmp_path / f"agent_{agent_id}_" / "system_prompt.md",
+        ],
+    )
+    monkeypatch.setattr(
+        agent_pool,
+        "get_agent_prompt_paths",
+        prompt.get_agent_prompt_paths,
+    )
+    monkeypatch.setattr(agent_pool, "get_active_llm_config", lambda: llm)
+    agent_pool._prompt_paths.cache_clear()
+    yield SimpleNamespace(
+        work=work,
+        skills=skills,
+        agent_prompt=agent_prompt,
+        llm=llm,
+    )
+    agent_pool._prompt_paths.cache_clear()
+
+
+class TestLoadAgentPrompt:
+    """Test load_agent_prompt"""
+
+    def test_agent_prompt_and_fallback(self, env):
+        assert prompt.load_agent_prompt("01") == ""
+        assert "agents rules" in prompt.build_agent_sys_prompt("01")
+        env.agent_prompt.write_text("I am 01", encoding="utf-8")
+        assert prompt.load_agent_prompt("01") == "I am 01"
+        assert prompt.build_agent_sys_prompt("01") == "I am 01"
+
+
+class TestAgentPool:
+    """Test AgentPool"""
+
+    def test_template_reused_across_queries(self, env, monkeypatch):
+        pool = agent_pool.AgentPool(revalidate_interval=0)
+        first = pool.get("01")
+        assert pool.get("01") is first
+        assert first.base_sys_prompt.startswith("# AGENTS.md")
+        # Within the interval the fingerprint is not even recomputed
+        pool = agent_pool.AgentPool(revalidate_interval=60)
+        warm = pool.get("01")
+        calls = []
+        monkeypatch.setattr(
+            agent_pool,
+            "compute_fingerprint",
+            lambda *args: calls.append(args),
+        )
+        assert pool.get("01") is warm and not calls
+
+    @pytest.mark.parametrize(
+        "change",
+        ["skill_added", "skill_edited", "soul", "profile", "agent_prompt"],
+    )
+    def test_file_changes_rebuild_template(self, env, change):
+        skill_md = _write_skill(env.skills, "demo")
+        pool = agent_pool.AgentPool(revalidate_interval=0)
+        first = pool.get("01")
+        assert "demo" in first.toolkit.skills
+
+        if change == "skill_added":
+            _write_skill(env.skills, "other")
+        elif change == "skill_edited":
+            _write_skill(env.skills, "demo", description="changed")
+            _bump_mtime(skill_md)
+        elif change == "soul":
+            (env.work / "SOUL.md").write_text("new soul", encoding="utf-8")
+            _bump_mtime(env.work / "SOUL.md")
+        elif change == "profile":
+            (env.work / "PROFILE.md").write_text("me", encoding="utf-8")
+        else:
+            env.agent_prompt.write_text("I am 01", encoding="utf-8")
+
+        second = pool.get("01")
+        assert second is not first
+        assert pool.get("01") is second
+        if change == "skill_added":
+            assert "other" in second.toolkit.skills
+        if change == "agent_prompt":
+            assert second.base_sys_prompt == "I am 01"
+
+    def test_llm_slot_change_rebuilds_template(self, env):
+        pool = agent_pool.AgentPool(revalidate_interval=0)
+        first = pool.get("01")
+        env.llm.model = "model-b"
+        second = pool.get("01")
+        assert second is not first
+        assert second.model.model_name == "model-b"
+
+    def test_invalidate(self, env):
+        pool = agent_pool.AgentPool(revalidate_interval=60)
+        first = pool.get("01")
+        pool.invalidate("01")
+        assert pool.get("01") is not first
+
+
+class FakeMCPClient:
+    """Just enough of an MCP client for Toolkit.register_mcp_client."""
+
+    name = "fake_mcp"
+
+    async def list_tools(self):
+        return [SimpleNamespace(name="mcp_echo")]
+
+    async def get_callable_function(self, func_name, **kwargs):
+        async def mcp_echo(text: str):
+            """Echo text.
+
+            Args:
+                text (`str`): The text.
+            """
+            return text
+
+        return mcp_echo
+
+
+class TestPerQueryIsolation:
+    """Per-query agents built from one template"""
+
+    def test_toolkit_groups_are_not_shared(self, env):
+        template = agent_pool.AgentPool().get("01")
+        template.toolkit.create_tool_group("extra", "extra tools")
+        a, b = template.new_toolkit(), template.new_toolkit()
+        a.update_tool_groups(["extra"], active=True)
+        assert a.groups["extra"].active
+        assert not b.groups["extra"].active
+        assert not template.toolkit.groups["extra"].active
+        a.set_extended_model("read_file", None)
+        assert a.tools["read_file"] is not template.toolkit.tools["read_file"]
+
+    def test_memory_hooks_and_tools_stay_per_agent(self, env):
+        react_agent = pytest.importorskip("cp9.agents.react_agent")
+        template = agent_pool.AgentPool().get("01")
+        shared_tools = set(template.toolkit.tools)
+
+        with_memory = react_agent.CoPawAgent(
+            template=template,
+            memory_manager=SimpleNamespace(),
+            mcp_clients=[FakeMCPClient()],
+        )
+        plain = react_agent.CoPawAgent(template=template)
+        asyncio.run(with_memory.register_mcp_clients())
+
+        assert {"memory_search", "mcp_echo"} <= set(with_memory.toolkit.tools)
+        assert "memory_search" not in plain.toolkit.tools
+        assert "mcp_echo" not in plain.toolkit.tools
+        assert set(template.toolkit.tools) == shared_tools
+        assert with_memory.memory is not plain.memory
+        assert with_memory.toolkit is not plain.toolkit
+
+        hooks = with_memory._instance_pre_reasoning_hooks
+        assert "memory_compact_hook" in hooks
+        assert "memory_compact_hook" not in plain._instance_pre_reasoning_hooks
@@ -4,12 +4,20 @@ Tests for cp9 Agent modules
 """
 
 import pytest
-from agents.agent_00_管理高手 import AgentCreator, AgentManager, RequirementClarifier
-from agents.agent_01_学霸 import Agent01Config
-from agents.agent_02_编程高手 import Agent02Config
-from agents.agent_03_创意青年 import Agent03Config
-from agents.agent_04_统计学长 import Agent04Config
-from agents.registry import AgentRegistry, get_registry
+
+agent_00 = pytest.importorskip("cp9.agents.agent_00_管理高手")
+registry_module = pytest.importorskip("cp9.agents.registry")
+
+from cp9.agents.agent_01_学霸 import Agent01Config
+from cp9.agents.agent_02_编程高手 import Agent02Config
+from cp9.agents.agent_03_创意青年 import Agent03Config
+from cp9.agents.agent_04_统计学长 import Agent04Config
+
+AgentCreator = agent_00.AgentCreator
+AgentManager = agent_00.AgentManager
+RequirementClarifier = agent_00.RequirementClarifier
+AgentRegistry = registry_module.AgentRegistry
+get_registry = registry_module.get_registry
 
 
 class TestAgentConfigs:
@@ -159,6 +159,119 @@ class TestThalamusMemory:
         assert isinstance(results, list)
 
 
+class TestMemoryIndex:
+    """记忆向量索引测试"""
+    
+    @staticmethod
+    def _item(content, session_id="u1", timestamp=None):
+        import time
+        from cp9.app.brain.thalamus import MemoryItem
+        return MemoryItem(
+            content=content,
+            timestamp=timestamp or time.time(),
+            agent_id="00",
+            session_id=session_id,
+        )
+    
+    def test_top_k_relevance(self):
+        """测试余弦 top-k 排序与 relevance"""
+        pytest.importorskip("numpy")
+        from cp9.app.brain.thalamus import Thalamus
+        
+        thalamus = Thalamus()
+        for text in ["今天天气很好", "python 代码报错", "论文检索方法"]:
+            thalamus.add_memory(self._item(text))
+        
+        results = thalamus.retrieve_memory("代码报错了", user_id="u1", limit=2)
+        assert len(results) == 2
+        assert results[0].content == "python 代码报错"
+        assert results[0].relevance >= results[1].relevance > -1
+    
+    def test_user_partition(self):
+        """测试按用户分区检索"""
+        pytest.importorskip("numpy")
+        from cp9.app.brain.thalamus import Thalamus
+        
+        thalamus = Thalamus()
+        thalamus.add_memory(self._item("共享内容", session_id="u1"))
+        thalamus.add_memory(self._item("共享内容", session_id="u2"))
+        
+        results = thalamus.retrieve_memory("共享", user_id="u2")
+        assert [m.session_id for m in results] == ["u2"]
+        # 未指定用户时不跨分区检索
+        assert thalamus.retrieve_memory("共享") == []
+    
+    def test_lru_and_ttl_eviction(self):
+        """测试 LRU 淘汰与 TTL 过期"""
+        pytest.importorskip("numpy")
+        import time
+        from cp9.app.brain.memory_index import MemoryIndex
+        
+        index = MemoryIndex(max_items_per_partition=2)
+        index.add(self._item("alpha"))
+        index.add(self._item("beta"))
+        index.search("alpha", partition="u1", k=1)  # alpha 最近被访问
+        index.add(self._item("gamma"))
+        contents = {it.content for it, _ in index.search("x", "u1", k=5)}
+        assert contents == {"alpha", "gamma"}
+        
+        index = MemoryIndex(ttl=60)
+        index.add(self._item("old", timestamp=time.time() - 120))
+        index.add(self._item("new"))
+        assert [it.content for it, _ in index.search("o", "u1")] == ["new"]
+    
+    def test_persistence(self, tmp_path):
+        """测试内存映射文件持久化"""
+        pytest.importorskip("numpy")
+        from cp9.app.brain.memory_index import MemoryIndex
+        
+        index = MemoryIndex(path=str(tmp_path))
+        index.add(self._item("持久化的记忆"))
+        index.save()
+        
+        restored = MemoryIndex(path=str(tmp_path))
+        assert len(restored) == 1
+        item, score = restored.search("持久化", "u1")[0]
+        assert item.content == "持久化的记忆"
+        assert score > 0
+        
+        # 每次保存切换到新一代文件，旧文件被清理
+        restored.add(self._item("第二条"))
+        restored.flush()
+        names = sorted(p.name for p in tmp_path.iterdir())
+        assert names == ["items-2.json", "manifest.json", "vectors-2.npy"]
+        assert len(MemoryIndex(path=str(tmp_path))) == 2
+    
+    def test_corrupt_persistence_falls_back_to_empty(self, tmp_path):
+        """测试持久化数据形状不符时回退为空索引"""
+        np = pytest.importorskip("numpy")
+        from cp9.app.brain.memory_index import MemoryIndex
+        
+        index = MemoryIndex(path=str(tmp_path))
+        index.add_many([self._item("a"), self._item("b")])
+        index.save()
+        np.save(tmp_path / "vectors-1.npy", np.zeros((1, 8), np.float32))
+        
+        restored = MemoryIndex(path=str(tmp_path))
+        assert len(restored) == 0
+        restored.add(self._item("c"))
+        assert len(restored) == 1
+    
+    def test_close_thalamus_flushes_memory(self, tmp_path, monkeypatch):
+        """测试关闭时保存未持久化的记忆"""
+        pytest.importorskip("numpy")
+        from cp9.app.brain import thalamus as module
+        
+        thalamus = module.Thalamus(memory_path=str(tmp_path))
+        monkeypatch.setattr(module, "_thalamus", thalamus)
+        thalamus.add_memory(self._item("关闭前写入"))
+        assert not (tmp_path / "manifest.json").exists()
+        
+        module.close_thalamus()
+        restored = module.Thalamus(memory_path=str(tmp_path))
+        assert len(restored._memory_store) == 1
+
+
 class TestPrefrontalModelConfig:
     """前额叶模型配置测试"""
     
@@ -253,6 +366,129 @@ class TestPrefrontalDataClasses:
         assert result.tokens_used == 100
 
 
+class _StubChatHandler:
+    """本地桩服务：模拟 OpenAI 兼容 chat/completions（含 SSE 流式）"""
+
+    @staticmethod
+    def build():
+        import json
+        from http.server import BaseHTTPRequestHandler
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.startswith("/bad"):
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for piece in ["你", "好"]:
+                        event = {"choices": [{"delta": {"content": piece}}]}
+                        self.wfile.write(
+                            f"data: {json.dumps(event)}\n\n".encode()
+                        )
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    return
+                payload = json.dumps({
+                    "choices": [{
+                        "message": {"content": f"echo:{body['model']}"},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"total_tokens": 7},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+@pytest.fixture
+def stub_llm_server():
+    """启动本地桩 LLM 服务"""
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubChatHandler.build())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+class TestPrefrontalHTTP:
+    """前额叶异步 HTTP 调用测试"""
+
+    def _make(self, base, monkeypatch, primary_base=None):
+        pytest.importorskip("httpx")
+        import asyncio
+        from cp9.app.brain import http_client
+        from cp9.app.brain.prefrontal import Prefrontal
+
+        monkeypatch.setattr(http_client, "_http_client_pool", None)
+        config = {
+            "glm-5": {**Prefrontal.MODEL_CONFIG["glm-5"], "api_base": primary_base or base},
+            "MiniMax-M2.5": {**Prefrontal.MODEL_CONFIG["MiniMax-M2.5"], "api_base": base},
+        }
+        monkeypatch.setattr(Prefrontal, "MODEL_CONFIG", config)
+        return asyncio, Prefrontal(primary_model="glm-5", api_key="k")
+
+    def test_think_uses_pooled_client(self, stub_llm_server, monkeypatch):
+        """测试非流式调用"""
+        asyncio, prefrontal = self._make(stub_llm_server, monkeypatch)
+
+        async def run():
+            from cp9.app.brain.http_client import close_http_client_pool
+            try:
+                return await prefrontal.think("hi")
+            finally:
+                await close_http_client_pool()
+
+        result = asyncio.run(run())
+        assert result.text == "echo:glm-5"
+        assert result.tokens_used == 7
+
+    def test_stream_think(self, stub_llm_server, monkeypatch):
+        """测试流式输出"""
+        asyncio, prefrontal = self._make(stub_llm_server, monkeypatch)
+
+        async def run():
+            from cp9.app.brain.http_client import close_http_client_pool
+            try:
+                return [t async for t in prefrontal.stream_think("hi")]
+            finally:
+                await close_http_client_pool()
+
+        assert asyncio.run(run()) == ["你", "好"]
+
+    def test_fallback_model(self, stub_llm_server, monkeypatch):
+        """测试主模型失败时降级"""
+        asyncio, prefrontal = self._make(
+            stub_llm_server,
+            monkeypatch,
+            primary_base=stub_llm_server + "/bad",
+        )
+
+        async def run():
+            from cp9.app.brain.http_client import close_http_client_pool
+            try:
+                return await prefrontal.think("hi")
+            finally:
+                await close_http_client_pool()
+
+        result = asyncio.run(run())
+        assert result.model == "MiniMax-M2.5"
+
+
 class TestBrainIntegration:
     """脑部模块集成测试"""
     
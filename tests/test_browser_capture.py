@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for bounded browser console / network capture
+"""
+
+import pytest
+
+from utils.browser_capture import (
+    CaptureFilter,
+    ConsoleRecord,
+    PageCapture,
+    RingBuffer,
+)
+
+
+class TestRingBuffer:
+    """Test RingBuffer"""
+
+    def test_bounded_with_cursor_deltas(self):
+        buf = RingBuffer(3)
+        for i in range(2):
+            buf.append(ConsoleRecord("info", f"m{i}"))
+        records, cursor, missed = buf.since(-1)
+        assert [r.text for r in records] == ["m0", "m1"]
+        assert (cursor, missed) == (2, 0)
+        for i in range(2, 7):
+            buf.append(ConsoleRecord("info", f"m{i}"))
+        assert len(buf) == 3 and buf.dropped == 4
+        records, cursor, missed = buf.since(cursor)
+        # m2, m3 were dropped before this read
+        assert [r.seq for r in records] == [5, 6, 7]
+        assert (cursor, missed) == (7, 2)
+        assert buf.since(cursor) == ([], 7, 0)
+
+    def test_records_are_slotted(self):
+        record = ConsoleRecord("log", "x" * 5000)
+        assert not hasattr(record, "__dict__")
+        assert len(record.text) < 2100
+
+
+class TestPageCapture:
+    """Test PageCapture"""
+
+    def test_status_filter_applied_on_response(self):
+        capture = PageCapture(
+            capture_filter=CaptureFilter.from_dict(
+                {"resource_types": ["fetch"], "min_status": 400},
+            ),
+        )
+        capture.on_request("r1", "https://a/api/1", "GET", "fetch")
+        capture.on_request("r2", "https://a/api/2", "GET", "fetch")
+        capture.on_request("r3", "https://a/img.png", "GET", "image")
+        capture.on_request("r4", "https://a/api/4", "POST", "fetch")
+        capture.on_response("r1", 200)
+        capture.on_response("r2", 503)
+        capture.on_response("r3", 500)
+        capture.on_request_failed("r4", "net::ERR_ABORTED")
+        records, _, _ = capture.network.since(0)
+        assert [r.to_dict() for r in records] == [
+            {
+                "seq": 1,
+                "url": "https://a/api/2",
+                "method": "GET",
+                "resourceType": "fetch",
+                "status": 503,
+            },
+            {
+                "seq": 2,
+                "url": "https://a/api/4",
+                "method": "POST",
+                "resourceType": "fetch",
+                "failure": "net::ERR_ABORTED",
+            },
+        ]
+
+    def test_unfiltered_requests_get_status_later(self):
+        capture = PageCapture(network_capacity=2)
+        capture.on_request("r1", "https://a/", "GET", "document")
+        capture.on_response("r1", 200)
+        capture.on_request("r2", "https://a/x.js", "GET", "script")
+        records, _, _ = capture.network.since(0)
+        assert [r.status for r in records] == [200, None]
+
+    def test_url_pattern_and_console_level(self):
+        capture = PageCapture(
+            capture_filter=CaptureFilter.from_dict(
+                {"url_pattern": r"/api/", "console_level": "warning"},
+            ),
+        )
+        capture.on_request("a", "https://a/api/v1", "GET", "xhr")
+        capture.on_request("b", "https://a/static/app.js", "GET", "script")
+        for level in ("log", "debug", "warning", "error"):
+            capture.on_console(level, level)
+        assert [r.url for r in capture.network] == ["https://a/api/v1"]
+        assert [r.level for r in capture.console] == ["warning", "error"]
+
+    def test_invalid_filter(self):
+        with pytest.raises(ValueError):
+            CaptureFilter.from_dict({"url_pattern": "("})
+        with pytest.raises(ValueError):
+            CaptureFilter.from_dict({"status": 404})
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the shared browser pool with per-session contexts
+"""
+
+import asyncio
+import functools
+import http.server
+import threading
+
+import pytest
+
+from utils.browser_pool import BrowserPool, PoolExhausted
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, headless):
+        self.headless = headless
+        self.contexts = []
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    async def new_context(self):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+    async def close(self):
+        self.closed = True
+
+
+def make_pool(launched, **kwargs):
+    async def launcher(headless):
+        await asyncio.sleep(0.01)
+        launched.append(FakeBrowser(headless))
+        return None, launched[-1]
+
+    return BrowserPool(launcher=launcher, **kwargs)
+
+
+class TestBrowserPool:
+    """Test BrowserPool"""
+
+    def test_sessions_share_one_warm_browser(self):
+        launched = []
+        pool = make_pool(launched)
+
+        async def main():
+            a, b = await asyncio.gather(pool.lease("a"), pool.lease("b"))
+            assert a.context is not b.context
+            assert await pool.lease("a") is a
+            assert await pool.release("a")
+            # A new start reuses the running browser
+            again = await pool.lease("a")
+            assert again is not a and a.context.closed
+            metrics = pool.metrics()
+            await pool.shutdown()
+            return metrics
+
+        metrics = asyncio.run(main())
+        assert len(launched) == 1 and launched[0].closed
+        assert metrics["launches"] == 1 and metrics["contexts"] == 2
+        assert metrics["warm_leases"] == 2
+
+    def test_headed_session_gets_own_browser(self):
+        launched = []
+        pool = make_pool(launched)
+
+        async def main():
+            a = await pool.lease("a")
+            b = await pool.lease("b")
+            headed = await pool.lease("a", headless=False)
+            assert not headed.headless and a.context.closed
+            assert not b.context.closed
+            await pool.shutdown()
+
+        asyncio.run(main())
+        assert [b.headless for b in launched] == [True, False]
+
+    def test_page_cap_and_context_limit(self):
+        pool = make_pool([], max_pages=2, max_contexts=2)
+
+        async def main():
+            a = await pool.lease("a")
+            b = await pool.lease("b")
+            for session in (a, b):
+                pool.reserve_page(session)
+                session.add_page("p", await session.new_page())
+            assert pool.metrics()["page_utilization"] == 1.0
+            with pytest.raises(PoolExhausted):
+                pool.reserve_page(a)
+            b.remove_page("p")
+            pool.reserve_page(a)
+            # A third session evicts the least recently used one
+            a.touch()
+            await pool.lease("c")
+            assert pool.get("b") is None and b.context.closed
+            await pool.shutdown()
+
+        asyncio.run(main())
+
+    def test_idle_contexts_are_reaped(self):
+        pool = make_pool([], idle_timeout=0.05, reap_interval=0.02)
+
+        async def main():
+            session = await pool.lease("a")
+            await asyncio.sleep(0.15)
+            assert pool.get("a") is None and session.context.closed
+            assert pool.running
+            await pool.shutdown()
+            return pool.metrics()
+
+        assert asyncio.run(main())["contexts_reaped"] == 1
+
+    def test_disconnected_browser_owner_is_stopped(self):
+        launched, stopped = [], []
+
+        class FakeOwner:
+            async def stop(self):
+                stopped.append(self)
+
+        async def launcher(headless):
+            launched.append((FakeOwner(), FakeBrowser(headless)))
+            return launched[-1]
+
+        pool = BrowserPool(launcher=launcher)
+
+        async def main():
+            await pool.lease("a")
+            owner, browser = launched[0]
+            # The browser process died; its driver is still running
+            browser.is_connected = lambda: False
+            await pool.lease("b")
+            assert browser.closed and stopped == [owner]
+            await pool.shutdown()
+
+        asyncio.run(main())
+        assert len(launched) == 2
+        assert stopped == [launched[0][0], launched[1][0]]
+
+
+@pytest.fixture
+def static_site(tmp_path):
+    (tmp_path / "index.html").write_text(
+        "<html><body><h1>pool</h1></body></html>",
+    )
+    handler = functools.partial(
+        http.server.SimpleHTTPRequestHandler,
+        directory=str(tmp_path),
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/index.html"
+    server.shutdown()
+
+
+def test_playwright_contexts_are_isolated(static_site):
+    pytest.importorskip("playwright.async_api")
+
+    async def main():
+        pool = BrowserPool()
+        try:
+            a = await pool.lease("a")
+        except Exception as e:  # browsers not installed
+            pytest.skip(f"chromium unavailable: {e}")
+        b = await pool.lease("b")
+        page_a = await a.new_page()
+        page_b = await b.new_page()
+        await page_a.goto(static_site)
+        await page_a.evaluate("localStorage.setItem('k', 'a')")
+        await page_b.goto(static_site)
+        assert await page_b.evaluate("localStorage.getItem('k')") is None
+        assert await page_a.text_content("h1") == "pool"
+        assert pool.metrics()["launches"] == 1
+        await pool.shutdown()
+
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Channel LRUCache 单元测试
+"""
+
+import asyncio
+import json
+import time
+
+from app.channels.cache import LRUCache
+
+
+class TestLRUCache:
+    """LRUCache 测试类"""
+
+    def test_lru_eviction_and_counters(self):
+        """测试按最近使用淘汰并统计命中"""
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # a is now most recent
+        cache.set("c", 3)
+        assert cache.lookup("b") == (False, None)
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (
+            3,
+            1,
+            1,
+        )
+
+    def test_ttl_and_negative_entries(self):
+        """测试过期与负缓存"""
+        cache = LRUCache(10, ttl=0.02, negative_ttl=0.02)
+        cache.set("name", "Alice")
+        cache.set_negative("nobody")
+        assert cache.lookup("name") == (True, "Alice")
+        assert cache.lookup("nobody") == (True, None)
+        assert cache.get("nobody", "x") == "x"
+        time.sleep(0.03)
+        assert cache.lookup("name") == (False, None)
+        assert cache.lookup("nobody") == (False, None)
+        assert cache.stats()["expired"] == 2 and len(cache) == 0
+
+    def test_write_behind_persistence(self, tmp_path):
+        """测试批量延迟落盘与重新加载"""
+        path = tmp_path / "store.json"
+        path.write_text(json.dumps({"old": ["x", "open_id"]}))
+
+        def decode(v):
+            return tuple(v) if isinstance(v, list) else None
+
+        async def main():
+            cache = LRUCache(
+                100,
+                path=path,
+                flush_delay=0.05,
+                decode=decode,
+                encode=list,
+            )
+            cache.load()
+            assert cache.get("old") == ("x", "open_id")
+            for i in range(20):
+                cache.set(f"k{i}", ("open_id", f"ou_{i}"))
+            cache.set_negative("missing")
+            # Nothing written until the delay has passed
+            assert "k0" not in json.loads(path.read_text())
+            await asyncio.sleep(0.1)
+            assert len(json.loads(path.read_text())) == 21
+            cache.delete("k0")
+            await cache.close()
+
+        asyncio.run(main())
+        data = json.loads(path.read_text())
+        assert "k0" not in data and "missing" not in data
+        assert data["k1"] == ["open_id", "ou_1"]
+        assert not path.with_suffix(".json.tmp").exists()
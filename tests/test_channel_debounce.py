@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Channel MessageDebouncer 单元测试
+"""
+
+import asyncio
+
+from app.channels.debounce import MessageDebouncer
+
+
+def _collector():
+    batches = []
+
+    async def flush(key, items):
+        batches.append((key, list(items)))
+
+    return batches, flush
+
+
+class TestMessageDebouncer:
+    """MessageDebouncer 测试类"""
+
+    def test_burst_is_merged_per_key(self):
+        """测试同一 key 的连续消息合并为一批，不同 key 互不影响"""
+        batches, flush = _collector()
+
+        async def main():
+            deb = MessageDebouncer(flush, window=0.05)
+            for i in range(200):
+                deb.add("a" if i % 2 else "b", i)
+            # One flush task, not one task per message
+            assert len(asyncio.all_tasks()) <= 2
+            await asyncio.sleep(0.02)
+            assert not batches
+            await asyncio.sleep(0.1)
+            await deb.close()
+            return deb.stats()
+
+        stats = asyncio.run(main())
+        assert sorted(k for k, _ in batches) == ["a", "b"]
+        assert dict(batches)["a"] == list(range(1, 200, 2))
+        assert stats["batches"] == 2 and stats["avg_batch"] == 100
+        assert stats["open_batches"] == 0
+
+    def test_max_batch_and_max_latency(self):
+        """测试批大小上限与最大延迟上限"""
+        batches, flush = _collector()
+
+        async def main():
+            deb = MessageDebouncer(
+                flush,
+                window=0.05,
+                max_batch=3,
+                max_latency=0.1,
+            )
+            for i in range(3):
+                deb.add("size", i)
+            await asyncio.sleep(0.01)
+            assert batches == [("size", [0, 1, 2])]
+
+            # A key that never goes quiet is flushed every max_latency
+            for i in range(10):
+                deb.add("busy", i)
+                await asyncio.sleep(0.03)
+            await deb.close()
+            return deb.stats()
+
+        stats = asyncio.run(main())
+        busy = [items for key, items in batches if key == "busy"]
+        assert len(busy) >= 3
+        assert [i for items in busy for i in items] == list(range(10))
+        assert stats["capped"] >= 2
+
+    def test_flush_error_does_not_leak(self):
+        """测试 flush 异常后状态被清理，后续批次仍正常"""
+        seen = []
+
+        async def flush(key, items):
+            seen.append(items)
+            if len(seen) == 1:
+                raise RuntimeError("boom")
+
+        async def main():
+            deb = MessageDebouncer(flush, window=0.01)
+            deb.add("k", 1)
+            await asyncio.sleep(0.05)
+            assert deb.pending == 0 and deb.last("k") is None
+            deb.add("k", 2)
+            assert deb.last("k") == 2
+            await asyncio.sleep(0.05)
+            await deb.close()
+
+        asyncio.run(main())
+        assert seen == [[1], [2]]
+
+    def test_close_flushes_pending(self):
+        """测试 close 时提交未到期的批次"""
+        batches, flush = _collector()
+
+        async def main():
+            deb = MessageDebouncer(flush, window=10)
+            deb.add("k", "x")
+            await deb.close()
+
+        asyncio.run(main())
+        assert batches == [("k", ["x"])]
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Channel SessionWorkerPool 单元测试
+"""
+
+import asyncio
+
+from app.channels.worker_pool import SessionWorkerPool
+
+
+class TestSessionWorkerPool:
+    """SessionWorkerPool 测试类"""
+
+    def test_same_session_keeps_order(self):
+        """测试同一会话内消息严格有序"""
+        seen = []
+
+        async def handler(item):
+            await asyncio.sleep(0.01 if item == 0 else 0)
+            seen.append(item)
+
+        async def main():
+            pool = SessionWorkerPool(handler, max_concurrency=4)
+            for i in range(5):
+                await pool.submit("s1", i)
+            while pool.pending:
+                await asyncio.sleep(0.005)
+            await pool.close()
+
+        asyncio.run(main())
+        assert seen == [0, 1, 2, 3, 4]
+
+    def test_slow_session_does_not_block_others(self):
+        """测试慢会话不阻塞其他会话"""
+        seen = []
+
+        async def handler(item):
+            if item == "slow":
+                await asyncio.sleep(0.1)
+            seen.append(item)
+
+        async def main():
+            pool = SessionWorkerPool(handler, max_concurrency=2)
+            await pool.submit("a", "slow")
+            await pool.submit("b", "fast")
+            await asyncio.sleep(0.05)
+            assert seen == ["fast"]
+            while pool.pending:
+                await asyncio.sleep(0.01)
+            await pool.close()
+
+        asyncio.run(main())
+        assert seen == ["fast", "slow"]
+
+    def test_concurrency_cap(self):
+        """测试并发上限"""
+        peak = 0
+        running = 0
+
+        async def handler(item):
+            nonlocal peak, running
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        async def main():
+            pool = SessionWorkerPool(handler, max_concurrency=3)
+            for i in range(10):
+                await pool.submit(f"s{i}", i)
+            while pool.pending:
+                await asyncio.sleep(0.005)
+            assert pool.active_sessions == 0
+            await pool.close()
+
+        asyncio.run(main())
+        assert peak == 3
+
+    def test_backpressure_when_full(self):
+        """测试缓冲区满时 submit 阻塞"""
+        release = None
+
+        async def handler(item):
+            await release.wait()
+
+        async def main():
+            nonlocal release
+            release = asyncio.Event()
+            pool = SessionWorkerPool(handler, max_concurrency=1, max_pending=2)
+            await pool.submit("a", 1)
+            await pool.submit("b", 2)
+            blocked = asyncio.create_task(pool.submit("c", 3))
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+            release.set()
+            await asyncio.wait_for(blocked, timeout=1)
+            await pool.close()
+            assert pool.pending == 0
+
+        asyncio.run(main())
+
+    def test_handler_error_does_not_stop_session(self):
+        """测试处理异常不影响后续消息"""
+        seen = []
+
+        async def handler(item):
+            if item == 1:
+                raise ValueError("boom")
+            seen.append(item)
+
+        async def main():
+            pool = SessionWorkerPool(handler)
+            for i in range(3):
+                await pool.submit("s", i)
+            while pool.pending:
+                await asyncio.sleep(0.005)
+            await pool.close()
+
+        asyncio.run(main())
+        assert seen == [0, 2]
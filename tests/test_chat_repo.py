@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Chat Repository 单元测试
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("agentscope_runtime")
+models = pytest.importorskip("cp9.app.runner.models")
+runner_repo = pytest.importorskip("cp9.app.runner.repo")
+
+ChatSpec = models.ChatSpec
+JsonChatRepository = runner_repo.JsonChatRepository
+SqliteChatRepository = runner_repo.SqliteChatRepository
+
+
+def _spec(i, user="u1", channel="console"):
+    return ChatSpec(
+        id=f"c{i}",
+        session_id=f"s{i}",
+        user_id=user,
+        channel=channel,
+    )
+
+
+class TestJsonChatRepository:
+    """JsonChatRepository 测试类"""
+
+    def test_write_behind_flush(self, tmp_path):
+        """测试写入延迟合并，close 时落盘"""
+        path = tmp_path / "chats.json"
+
+        async def main():
+            repo = JsonChatRepository(path, flush_delay=60)
+            for i in range(3):
+                await repo.upsert_chat(_spec(i))
+            assert not path.exists()
+            assert (await repo.get_chat_by_id("s1", "u1", "console")).id == "c1"
+            await repo.close()
+
+        asyncio.run(main())
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert [c["id"] for c in data["chats"]] == ["c0", "c1", "c2"]
+
+    def test_max_dirty_flushes_immediately(self, tmp_path):
+        """测试待写数量达到上限时立即落盘"""
+        path = tmp_path / "chats.json"
+
+        async def main():
+            repo = JsonChatRepository(path, flush_delay=60, max_dirty=2)
+            await repo.upsert_chat(_spec(0))
+            await repo.upsert_chat(_spec(1))
+            assert path.exists()
+            await repo.close()
+
+        asyncio.run(main())
+
+    def test_reload_on_external_change(self, tmp_path):
+        """测试文件被外部修改后重新加载索引"""
+        path = tmp_path / "chats.json"
+
+        async def main():
+            repo = JsonChatRepository(path)
+            await repo.upsert_chat(_spec(0))
+            await repo.flush()
+            other = JsonChatRepository(path)
+            await other.upsert_chat(_spec(1, user="u2"))
+            await other.close()
+            chats = await repo.filter_chats(user_id="u2")
+            assert [c.id for c in chats] == ["c1"]
+            await repo.close()
+
+        asyncio.run(main())
+
+
+class TestSqliteChatRepository:
+    """SqliteChatRepository 测试类"""
+
+    def test_crud(self, tmp_path):
+        """测试增删改查与插入顺序"""
+
+        async def main():
+            repo = SqliteChatRepository(tmp_path / "chats.db")
+            for i in range(3):
+                await repo.upsert_chat(_spec(i, user=f"u{i % 2}"))
+            updated = _spec(1, user="u1")
+            updated.name = "renamed"
+            await repo.upsert_chat(updated)
+            assert (await repo.get_chat("c1")).name == "renamed"
+            assert [c.id for c in await repo.list_chats()] == ["c0", "c1", "c2"]
+            assert [c.id for c in await repo.filter_chats(user_id="u0")] == [
+                "c0",
+                "c2",
+            ]
+            assert await repo.delete_chats(["c0", "missing"])
+            assert not await repo.delete_chats(["missing"])
+            assert await repo.get_chat_by_id("s0", "u0", "console") is None
+            await repo.close()
+
+        asyncio.run(main())
+
+    def test_import_from_json(self, tmp_path):
+        """测试空库首次启动时导入 chats.json"""
+        json_path = tmp_path / "chats.json"
+
+        async def main():
+            src = JsonChatRepository(json_path)
+            await src.upsert_chat(_spec(0))
+            await src.close()
+            repo = SqliteChatRepository(
+                tmp_path / "chats.db",
+                import_from=json_path,
+            )
+            assert (await repo.get_chat("c0")).session_id == "s0"
+            await repo.close()
+
+        asyncio.run(main())
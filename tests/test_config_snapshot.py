@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for mtime-validated config snapshots
+"""
+
+import json
+import os
+
+import pytest
+
+from utils.file_snapshot import FileSnapshotCache
+
+
+class TestFileSnapshotCache:
+    """Test FileSnapshotCache"""
+
+    def test_parses_once_until_file_changes(self, tmp_path):
+        path = tmp_path / "conf.json"
+        path.write_text('{"a": 1}')
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return json.loads(path.read_text())
+
+        cache = FileSnapshotCache()
+        changes = []
+        cache.on_change("conf", lambda old, new: changes.append((old, new)))
+
+        assert cache.get("conf", [path], loader) == {"a": 1}
+        assert cache.get("conf", [path], loader) == {"a": 1}
+        assert len(loads) == 1
+
+        path.write_text('{"a": 22}')
+        assert cache.get("conf", [path], loader) == {"a": 22}
+        assert len(loads) == 2
+        assert changes == [({"a": 1}, {"a": 22})]
+
+    def test_missing_file_and_invalidate(self, tmp_path):
+        path = tmp_path / "conf.json"
+        cache = FileSnapshotCache()
+        loader = lambda: path.read_text() if path.exists() else None
+        assert cache.get("k", [path], loader) is None
+
+        path.write_text("x")
+        assert cache.get("k", [path], loader) == "x"
+
+        # Same size, mtime forced back: only invalidate() picks it up.
+        st = path.stat()
+        path.write_text("y")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert cache.get("k", [path], loader) == "x"
+        cache.invalidate("k")
+        assert cache.get("k", [path], loader) == "y"
+
+
+class TestProvidersSnapshot:
+    """Test providers.json snapshot"""
+
+    def test_load_is_cached_and_copied(self, tmp_path, monkeypatch):
+        pytest.importorskip("pydantic")
+        from providers import store
+
+        monkeypatch.setattr(store, "_config_json_candidates", lambda: [])
+        path = tmp_path / "providers.json"
+
+        data = store.load_providers_json(path)
+        assert path.is_file()
+        mtime = path.stat().st_mtime_ns
+
+        # Reading again neither rewrites the file nor shares state.
+        data.active_llm.model = "mutated"
+        again = store.load_providers_json(path)
+        assert path.stat().st_mtime_ns == mtime
+        assert again.active_llm.model != "mutated"
+        assert store.get_providers_snapshot(path) is store.get_providers_snapshot(path)
+
+        # save → next read sees the change
+        pid = next(iter(again.providers))
+        again.providers[pid].api_key = "sk-test"
+        store.save_providers_json(again, path)
+        assert store.get_providers_snapshot(path).providers[pid].api_key == "sk-test"
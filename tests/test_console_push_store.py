@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the console push message store
+"""
+
+import asyncio
+from collections import deque
+
+import pytest
+
+from app import console_push_store as store
+
+
+@pytest.fixture(autouse=True)
+def fresh_store(monkeypatch):
+    """Isolate module state (and bind the lock to each test's loop)."""
+    lock = asyncio.Lock()
+    monkeypatch.setattr(store, "_sessions", {})
+    monkeypatch.setattr(store, "_order", deque())
+    monkeypatch.setattr(store, "_count", 0)
+    monkeypatch.setattr(store, "_lock", lock)
+    monkeypatch.setattr(store, "_cond", asyncio.Condition(lock))
+
+
+class TestConsolePushStore:
+    """Test console push store"""
+
+    def test_take_is_per_session(self):
+        async def main():
+            await store.append("a", "a1")
+            await store.append("b", "b1")
+            await store.append("a", "a2")
+            assert [m["text"] for m in await store.take("a")] == ["a1", "a2"]
+            assert await store.take("a") == []
+            assert [m["text"] for m in await store.get_recent()] == ["b1"]
+            assert [m["text"] for m in await store.take_all()] == ["b1"]
+
+        asyncio.run(main())
+
+    def test_bounds(self, monkeypatch):
+        monkeypatch.setattr(store, "_MAX_MESSAGES", 5)
+        monkeypatch.setattr(store, "_MAX_MESSAGES_PER_SESSION", 3)
+
+        async def main():
+            for i in range(4):
+                await store.append("a", f"a{i}")
+            for i in range(4):
+                await store.append("b", f"b{i}")
+            a = [m["text"] for m in await store.take("a")]
+            b = [m["text"] for m in await store.take("b")]
+            return a, b
+
+        a, b = asyncio.run(main())
+        assert b == ["b1", "b2", "b3"]
+        assert a == ["a2", "a3"]
+        assert store._count == 0
+
+    def test_wait_take_wakes_on_append(self):
+        async def main():
+            waiter = asyncio.create_task(store.wait_take("a", timeout=5))
+            await asyncio.sleep(0.01)
+            await store.append("b", "other")
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+            await store.append("a", "hello")
+            messages = await asyncio.wait_for(waiter, 1)
+            assert [m["text"] for m in messages] == ["hello"]
+            assert await store.wait_take("a", timeout=0.01) == []
+
+        asyncio.run(main())
+
+    def test_wait_recent_cursor(self):
+        async def main():
+            await store.append("a", "one")
+            messages, cursor = await store.wait_recent(None, timeout=1)
+            assert [m["text"] for m in messages] == ["one"]
+
+            waiter = asyncio.create_task(store.wait_recent(cursor, timeout=5))
+            await asyncio.sleep(0.01)
+            await store.append("b", "two")
+            messages, _ = await asyncio.wait_for(waiter, 1)
+            assert [m["text"] for m in messages] == ["two"]
+
+        asyncio.run(main())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for cron run history and run metrics
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from app.crons.executor import RunCounters, _event_tokens
+from app.crons.history import CronRunHistory, percentile
+from app.crons.models import CronRunRecord
+
+
+def _record(job_id, duration_ms, status="success", age_days=0.0):
+    ended = datetime.now(timezone.utc) - timedelta(days=age_days)
+    return CronRunRecord(
+        run_id=f"{job_id}-{duration_ms}-{age_days}",
+        job_id=job_id,
+        started_at=ended - timedelta(milliseconds=duration_ms),
+        ended_at=ended,
+        status=status,
+        duration_ms=duration_ms,
+        events_sent=2,
+    )
+
+
+class TestCronRunHistory:
+    """Test CronRunHistory"""
+
+    def test_percentiles_and_near_timeout(self):
+        history = CronRunHistory()
+
+        async def main():
+            for ms in range(1000, 11000, 1000):
+                await history.append(_record("fast", ms))
+            for ms in (90_000, 100_000, 110_000):
+                await history.append(_record("slow", ms))
+
+        asyncio.run(main())
+        fast = history.stats("fast", timeout_seconds=120)
+        assert (fast.runs, fast.p50_ms, fast.p90_ms) == (10, 5000, 9000)
+        assert fast.avg_events_sent == 2
+        assert not fast.near_timeout
+        slow = history.stats("slow", timeout_seconds=120)
+        assert slow.near_timeout and slow.timeout_ratio > 0.8
+        assert [r.duration_ms for r in history.list_runs("slow", 2)] == [
+            110_000,
+            100_000,
+        ]
+
+    def test_cancelled_runs_are_counted_not_timed(self):
+        history = CronRunHistory()
+
+        async def main():
+            await history.append(_record("job", 4000))
+            await history.append(_record("job", 10, status="cancelled"))
+
+        asyncio.run(main())
+        stats = history.stats("job")
+        assert (stats.runs, stats.success, stats.cancelled) == (2, 1, 1)
+        assert stats.p50_ms == stats.max_ms == 4000
+
+    def test_persisted_retention_and_compaction(self, tmp_path):
+        path = tmp_path / "cron_runs.jsonl"
+        history = CronRunHistory(path, max_runs_per_job=3, max_age_days=1)
+
+        async def main():
+            await history.append(_record("old", 1, age_days=2))
+            for ms in range(1, 200):
+                await history.append(_record("job", ms))
+            await history.delete_job("gone")
+
+        asyncio.run(main())
+        # Compaction keeps the file near the retained size
+        assert len(path.read_text().splitlines()) < 110
+
+        reloaded = CronRunHistory(path, max_runs_per_job=3, max_age_days=1)
+        asyncio.run(reloaded.load())
+        assert [r.duration_ms for r in reloaded.list_runs("job")] == [
+            199,
+            198,
+            197,
+        ]
+        assert reloaded.list_runs("old") == []
+
+    def test_naive_timestamps_load_as_utc(self, tmp_path):
+        path = tmp_path / "cron_runs.jsonl"
+        legacy = _record("job", 5).model_dump(mode="json")
+        legacy["ended_at"] = datetime.utcnow().isoformat()
+        path.write_text(json.dumps(legacy) + "\n", encoding="utf-8")
+
+        history = CronRunHistory(path)
+        asyncio.run(history.load())
+        (run,) = history.list_runs("job")
+        assert run.ended_at.tzinfo is timezone.utc
+        assert history.stats("job").runs == 1
+
+    def test_percentile(self):
+        assert percentile([], 50) is None
+        assert percentile([3, 1, 2], 50) == 2
+        assert percentile([3, 1, 2], 100) == 3
+
+
+class TestRunCounters:
+    """Test executor run counters"""
+
+    def test_counts_and_tokens(self):
+        counters = RunCounters()
+        counters.sent()
+        counters.sent()
+        assert counters.events_sent == 2
+        assert counters.first_event_ms is not None
+        assert _event_tokens({"usage": {"total_tokens": 7}}) == 7
+        usage = {"input_tokens": 3, "output_tokens": 4}
+        assert _event_tokens({"usage": usage}) == 7
+        assert _event_tokens({"text": "x"}) is None
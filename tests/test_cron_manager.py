@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for cron run bookkeeping and schedule jitter in CronManager
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+manager_module = pytest.importorskip("cp9.app.crons.manager")
+models = pytest.importorskip("cp9.app.crons.models")
+
+
+def _job(job_id, cron="0 18 * * *"):
+    return models.CronJobSpec(
+        id=job_id,
+        name=job_id,
+        schedule=models.ScheduleSpec(cron=cron),
+        task_type="text",
+        text="hi",
+        dispatch=models.DispatchSpec(
+            channel="console",
+            target=models.DispatchTarget(user_id="u", session_id="s"),
+        ),
+    )
+
+
+class FakeScheduler:
+    """Keeps the latest trigger per job id."""
+
+    def __init__(self):
+        self.triggers = {}
+
+    def add_job(self, func, trigger, id, **kwargs):
+        self.triggers[id] = trigger
+
+    def get_job(self, job_id):
+        if job_id in self.triggers:
+            return SimpleNamespace(next_run_time=None)
+        return None
+
+    def remove_job(self, job_id):
+        del self.triggers[job_id]
+
+    def reschedule_job(self, job_id, trigger):
+        self.triggers[job_id] = trigger
+
+    modify_job = reschedule_job
+
+
+class FakeRepo:
+    async def delete_job(self, job_id):
+        return True
+
+
+class HangingExecutor:
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def execute(self, job, counters):
+        self.started.set()
+        await asyncio.sleep(3600)
+
+
+def _manager():
+    manager = manager_module.CronManager(
+        repo=FakeRepo(),
+        runner=None,
+        channel_manager=None,
+    )
+    manager._scheduler = FakeScheduler()
+    return manager
+
+
+def test_cancelled_run_is_recorded_as_cancelled():
+    async def main():
+        manager = _manager()
+        executor = manager._executor = HangingExecutor()
+        task = asyncio.create_task(manager._run_once(_job("j1")))
+        await executor.started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return manager
+
+    manager = asyncio.run(main())
+    (record,) = manager._history.list_runs("j1")
+    assert record.status == "cancelled"
+    assert manager._states["j1"].last_status == "cancelled"
+
+
+def test_job_left_alone_on_its_schedule_loses_jitter():
+    async def main():
+        manager = _manager()
+        triggers = manager._scheduler.triggers
+        for job_id in ("a", "b", "c"):
+            await manager._register_or_update(_job(job_id))
+        assert triggers["a"].jitter == manager_module.CRON_JITTER_SECONDS
+        # b moves to another schedule, c is deleted: a is alone again
+        await manager._register_or_update(_job("b", cron="0 9 * * *"))
+        assert triggers["a"].jitter and triggers["b"].jitter is None
+        await manager.delete_job("c")
+        assert triggers["a"].jitter is None
+
+    asyncio.run(main())
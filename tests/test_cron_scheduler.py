@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for global cron execution slots
+"""
+
+import asyncio
+
+import pytest
+
+scheduler = pytest.importorskip("cp9.app.crons.scheduler")
+models = pytest.importorskip("cp9.app.crons.models")
+
+
+def _job(job_id, channel="console", agent=None, priority=0):
+    return models.CronJobSpec(
+        id=job_id,
+        name=job_id,
+        schedule=models.ScheduleSpec(cron="0 18 * * *"),
+        task_type="text",
+        text="hi",
+        dispatch=models.DispatchSpec(
+            channel=channel,
+            target=models.DispatchTarget(user_id="u", session_id="s"),
+        ),
+        runtime=models.JobRuntimeSpec(priority=priority),
+        meta={"agent_id": agent} if agent else {},
+    )
+
+
+async def _run(slots, job, order, hold=0.01, deadline=None):
+    async with slots.slot(job, deadline):
+        order.append(job.id)
+        await asyncio.sleep(hold)
+
+
+class TestCronSlotScheduler:
+    """Test CronSlotScheduler"""
+
+    def test_total_limit_and_priority(self):
+        async def main():
+            slots = scheduler.CronSlotScheduler(
+                max_concurrency=1,
+                agent_limit=0,
+            )
+            order = []
+            first = asyncio.create_task(_run(slots, _job("first"), order))
+            await asyncio.sleep(0)
+            tasks = [
+                asyncio.create_task(_run(slots, _job(name, priority=p), order))
+                for name, p in (("low", 0), ("high", 5), ("mid", 1))
+            ]
+            await asyncio.sleep(0)
+            assert slots.stats()["queued"] == 3
+            await asyncio.gather(first, *tasks)
+            assert order == ["first", "high", "mid", "low"]
+            assert slots.stats()["running"] == 0
+
+        asyncio.run(main())
+
+    def test_agent_budget_does_not_block_others(self):
+        async def main():
+            slots = scheduler.CronSlotScheduler(max_concurrency=4)
+            order = []
+            a1 = asyncio.create_task(
+                _run(slots, _job("a1", agent="04"), order, hold=0.05),
+            )
+            await asyncio.sleep(0)
+            a2 = asyncio.create_task(
+                _run(slots, _job("a2", agent="04"), order),
+            )
+            b = asyncio.create_task(_run(slots, _job("b", agent="01"), order))
+            await asyncio.sleep(0.02)
+            assert order == ["a1", "b"]
+            await asyncio.gather(a1, a2, b)
+            assert order == ["a1", "b", "a2"]
+
+        asyncio.run(main())
+
+    def test_deadline(self):
+        async def main():
+            slots = scheduler.CronSlotScheduler(max_concurrency=1)
+            order = []
+            busy = asyncio.create_task(
+                _run(slots, _job("busy"), order, hold=0.1),
+            )
+            await asyncio.sleep(0)
+            deadline = asyncio.get_running_loop().time() + 0.02
+            with pytest.raises(scheduler.SlotDeadlineExceeded):
+                await _run(slots, _job("late"), order, deadline=deadline)
+            await busy
+            assert order == ["busy"]
+            assert slots.stats() == {
+                "running": 0,
+                "queued": 0,
+                "by_channel": {},
+                "by_agent": {},
+            }
+
+        asyncio.run(main())
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the batched DB writer (SQLite)
+"""
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, func, select
+
+from db import Base, CreditLog, TraceLog
+from db.writer import BatchWriter
+
+
+def _count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+class TestBatchWriter:
+    """Test BatchWriter against SQLite"""
+
+    def setup_method(self):
+        self.engine = create_engine("sqlite://", poolclass=sqlalchemy.pool.StaticPool,
+                                    connect_args={"check_same_thread": False})
+        Base.metadata.create_all(self.engine)
+
+    def test_batched_flush(self, tmp_path):
+        writer = BatchWriter(self.engine, batch_size=50, flush_interval=0.05,
+                             spill_path=tmp_path / "spill.jsonl")
+        for i in range(120):
+            writer.record_credit(agent_id="01", operation="chat", tokens=i, cost=1)
+        writer.record_trace("t1", "s1", "01", "tool:x", "ok", duration_ms=5)
+        writer.flush()
+
+        assert _count(self.engine, CreditLog) == 120
+        assert _count(self.engine, TraceLog) == 1
+        metrics = writer.metrics()
+        assert metrics["written"] == 121
+        assert metrics["queue_depth"] == 0
+        assert metrics["flushes"] <= 4
+        writer.close()
+
+    def test_span_records_error(self, tmp_path):
+        writer = BatchWriter(self.engine, flush_interval=0.05,
+                             spill_path=tmp_path / "spill.jsonl")
+        with pytest.raises(RuntimeError):
+            with writer.span("tool:boom", agent_id="02") as span:
+                span["tokens"] = 7
+                raise RuntimeError("bad")
+        writer.close()
+
+        with self.engine.connect() as conn:
+            row = conn.execute(select(TraceLog.__table__)).one()
+        assert row.status == "error"
+        assert row.tokens == 7
+        assert "RuntimeError" in row.error_message
+
+    def test_spill_and_replay(self, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}")
+        writer = BatchWriter(broken, flush_interval=0.01, spill_path=spill)
+        for _ in range(3):
+            writer.record_credit(agent_id="01", operation="chat", cost=2)
+        writer.flush()
+        assert spill.stat().st_size > 0
+        assert writer.metrics()["spilled"] == 3
+        writer.close()
+
+        # DB back: the next flush replays the spill file first.
+        writer = BatchWriter(self.engine, flush_interval=0.01, spill_path=spill)
+        writer.record_credit(agent_id="01", operation="chat", cost=2)
+        writer.flush()
+        assert _count(self.engine, CreditLog) == 4
+        assert writer.metrics()["replayed"] == 3
+        assert writer.metrics()["spill_bytes"] == 0
+        with self.engine.connect() as conn:
+            created = conn.execute(select(CreditLog.created_at)).scalars().all()
+        assert all(c is not None for c in created)
+        writer.close()
+
+
+@pytest.mark.parametrize("package", ["db", "cp9.db"])
+def test_flush_through_default_engine(package, tmp_path, monkeypatch):
+    """Without an explicit engine the writer initializes the package's."""
+    db = pytest.importorskip(package)
+    writer_module = pytest.importorskip(f"{package}.writer")
+    monkeypatch.setattr(db, "engine", None)
+    monkeypatch.setattr(db, "SessionLocal", None)
+    monkeypatch.setenv(
+        "COPAW_DATABASE_URL",
+        f"sqlite:///{tmp_path / 'cp9.db'}",
+    )
+    writer = writer_module.BatchWriter(
+        flush_interval=0.01,
+        spill_path=tmp_path / "spill.jsonl",
+    )
+    writer.record_credit(agent_id="01", operation="chat", tokens=3, cost=1)
+    writer.flush()
+    writer.close()
+
+    assert writer.metrics()["written"] == 1
+    assert writer.metrics()["spilled"] == 0
+    assert _count(db.engine, db.CreditLog) == 1
+
+
+class TestGlobalWriter:
+    """Test the global writer and its call sites"""
+
+    @pytest.fixture
+    def global_writer(self, monkeypatch, tmp_path):
+        # The cp9 package, so relative imports of db.writer resolve to it
+        writer_module = pytest.importorskip("cp9.db.writer")
+        db = pytest.importorskip("cp9.db")
+        engine = create_engine(
+            "sqlite://",
+            poolclass=sqlalchemy.pool.StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+        db.Base.metadata.create_all(engine)
+        writer = writer_module.BatchWriter(
+            engine,
+            flush_interval=60,
+            spill_path=tmp_path / "spill.jsonl",
+        )
+        monkeypatch.setattr(writer_module, "_writer", writer)
+        monkeypatch.setenv("COPAW_DATABASE_URL", "sqlite://")
+        return writer_module, engine
+
+    def test_unconfigured_database_has_no_writer(self, monkeypatch):
+        writer_module = pytest.importorskip("cp9.db.writer")
+        monkeypatch.delenv("COPAW_DATABASE_URL", raising=False)
+        assert writer_module.get_configured_writer() is None
+
+    def test_close_writer_flushes_queued_rows(self, global_writer):
+        db = pytest.importorskip("cp9.db")
+        writer_module, engine = global_writer
+        writer = writer_module.get_configured_writer()
+        writer.record_credit(agent_id="01", operation="chat", cost=2)
+        assert writer.metrics()["written"] == 0
+
+        writer_module.close_writer()
+        assert writer_module._writer is None
+        assert _count(engine, db.CreditLog) == 1
+
+    def test_gateway_credit_goes_through_writer(self, global_writer):
+        db = pytest.importorskip("cp9.db")
+        writer_module, engine = global_writer
+        auth_module = pytest.importorskip("cp9.app.gateway.auth")
+        auth = auth_module.GatewayAuth(
+            enable_rate_limit=False,
+            credit_per_request=2.0,
+        )
+        assert auth.authenticate("u1", "feishu").result.value == "pass"
+        writer_module.close_writer()
+
+        with engine.connect() as conn:
+            row = conn.execute(select(db.CreditLog.__table__)).one()
+        assert (row.operation, row.cost) == ("gateway:feishu", 2)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the async content-addressed download cache
+"""
+
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+
+import pytest
+
+from utils.download_cache import (
+    DownloadCache,
+    DownloadTooLarge,
+    Response,
+)
+
+
+class FakeCache(DownloadCache):
+    """DownloadCache served from an in-memory {url: body} table."""
+
+    def __init__(self, root, files, **kwargs):
+        super().__init__(root, **kwargs)
+        self.files = files
+        self.requests = []
+        self.fail_after = None  # break the next body after N bytes
+
+    @asynccontextmanager
+    async def _open(self, url, headers):
+        self.requests.append(dict(headers))
+        await asyncio.sleep(0.01)
+        body = self.files[url]
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        resp_headers = {"etag": etag}
+        status, start = 200, 0
+        if headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        elif "Range" in headers and headers.get("If-Range") == etag:
+            start = int(headers["Range"][6:-1])
+            status = 206
+            resp_headers["content-range"] = (
+                f"bytes {start}-{len(body) - 1}/{len(body)}"
+            )
+        payload = body[start:]
+        resp_headers["content-length"] = str(len(payload))
+        fail_after, self.fail_after = self.fail_after, None
+
+        async def chunks():
+            for i in range(0, len(payload), 4):
+                if fail_after is not None and i >= fail_after:
+                    raise ConnectionError("connection reset")
+                yield payload[i : i + 4]
+
+        yield Response(status, resp_headers, chunks())
+
+
+class TestDownloadCache:
+    """Test DownloadCache"""
+
+    def test_single_flight_and_cache_hit(self, tmp_path):
+        cache = FakeCache(tmp_path / "c", {"u": b"hello world"})
+
+        async def main():
+            paths = await asyncio.gather(
+                *[cache.fetch("u") for _ in range(5)]
+            )
+            assert len(set(paths)) == 1 and len(cache.requests) == 1
+            dest = await cache.download("u", tmp_path / "out" / "a.txt")
+            assert dest.read_bytes() == b"hello world"
+            assert len(cache.requests) == 1
+
+        asyncio.run(main())
+        stats = cache.stats()
+        assert stats["shared"] == 4 and stats["hits"] == 1
+
+    def test_same_content_is_stored_once(self, tmp_path):
+        files = {"a": b"same body", "b": b"same body"}
+        cache = FakeCache(tmp_path, files)
+
+        async def main():
+            return await cache.fetch("a"), await cache.fetch("b")
+
+        first, second = asyncio.run(main())
+        stats = cache.stats()
+        assert first == second
+        assert (stats["urls"], stats["objects"]) == (2, 1)
+
+    def test_revalidates_with_etag(self, tmp_path):
+        cache = FakeCache(tmp_path, {"u": b"data"}, fresh_for=0)
+
+        async def main():
+            first = await cache.fetch("u")
+            second = await cache.fetch("u")
+            return first, second
+
+        first, second = asyncio.run(main())
+        assert first == second
+        assert "If-None-Match" in cache.requests[1]
+        assert cache.stats()["revalidated"] == 1
+        # The index survives a restart
+        restarted = FakeCache(tmp_path, {"u": b"data"})
+        assert asyncio.run(restarted.fetch("u")) == first
+        assert not restarted.requests
+
+    def test_resumes_partial_download(self, tmp_path):
+        body = bytes(range(64))
+        cache = FakeCache(tmp_path, {"u": body})
+        cache.fail_after = 20
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(cache.fetch("u"))
+        path = asyncio.run(cache.fetch("u"))
+        assert cache.requests[1]["Range"] == "bytes=20-"
+        assert path.read_bytes() == body
+        assert path.name == hashlib.sha256(body).hexdigest()
+        assert cache.stats()["resumed"] == 1
+
+    def test_size_cap(self, tmp_path):
+        cache = FakeCache(tmp_path, {"u": b"x" * 100}, max_bytes=50)
+        with pytest.raises(DownloadTooLarge):
+            asyncio.run(cache.fetch("u"))
+        assert not list((tmp_path / "partial").glob("*"))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for indexed line windows and streaming file edits
+"""
+
+import os
+
+import pytest
+
+from utils import file_lines
+from utils.file_lines import line_index, read_line_window, replace_in_file
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Force many index blocks on small test files
+    monkeypatch.setattr(file_lines, "CHUNK_BYTES", 16)
+
+
+class TestReadLineWindow:
+    """Test read_line_window"""
+
+    def test_matches_readlines(self, tmp_path, small_chunks):
+        path = tmp_path / "log.txt"
+        lines = [f"line {i} " + "x" * (i % 7) + "\n" for i in range(1, 201)]
+        path.write_text("".join(lines) + "tail")
+        lines.append("tail")
+        for s, e in ((1, 1), (1, 5), (37, 52), (150, 201), (199, 500)):
+            window = read_line_window(str(path), s, e)
+            assert window.total == 201
+            assert window.text == "".join(lines[s - 1 : e])
+        assert read_line_window(str(path), 300, None).text == ""
+
+    def test_index_is_cached_until_file_changes(self, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_text("a\nb\n")
+        index = line_index(str(path))
+        assert index.total_lines == 2 and line_index(str(path)) is index
+        path.write_text("a\nb\nc\n")
+        os.utime(path, ns=(0, index.sig[0] + 1))
+        assert line_index(str(path)).total_lines == 3
+
+    def test_crlf_and_empty_file(self, tmp_path):
+        path = tmp_path / "crlf.txt"
+        path.write_bytes(b"a\r\nb\r\nc")
+        assert read_line_window(str(path), 2, 3).text == "b\nc"
+        empty = tmp_path / "empty.txt"
+        empty.write_text("")
+        assert read_line_window(str(empty), 1, 1).total == 0
+
+
+class TestReplaceInFile:
+    """Test replace_in_file"""
+
+    @pytest.mark.parametrize("chunk", [1, 3, 5, 64])
+    def test_same_result_as_str_replace(self, tmp_path, chunk):
+        text = "abcabcab\r\nca" * 5 + "aaaa"
+        path = tmp_path / "f.txt"
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        for old, new in (("cab", "<>"), ("aa", "b"), ("\r\nc", "")):
+            count = replace_in_file(str(path), old, new, chunk_chars=chunk)
+            assert count == text.count(old)
+            text = text.replace(old, new)
+            assert path.read_bytes().decode() == text
+
+    @pytest.mark.parametrize("chunk", [2, 64])
+    def test_crlf_file_matches_lf_text(self, tmp_path, chunk):
+        path = tmp_path / "f.txt"
+        path.write_bytes(b"alpha\r\nbeta\r\ngamma\r\n")
+        assert replace_in_file(
+            str(path), "alpha\nbeta", "X\nY", chunk_chars=chunk
+        ) == 1
+        assert path.read_bytes() == b"X\r\nY\r\ngamma\r\n"
+        # Text already using CRLF matches as well
+        assert replace_in_file(str(path), "Y\r\ngamma", "Z") == 1
+        assert path.read_bytes() == b"X\r\nZ\r\n"
+
+    def test_no_match_leaves_file_untouched(self, tmp_path):
+        path = tmp_path / "f.txt"
+        path.write_text("hello")
+        os.chmod(path, 0o640)
+        mtime = path.stat().st_mtime_ns
+        assert replace_in_file(str(path), "bye", "x") == 0
+        assert path.stat().st_mtime_ns == mtime
+        assert replace_in_file(str(path), "ell", "ipp") == 1
+        assert path.read_text() == "hippo"
+        assert path.stat().st_mode & 0o777 == 0o640
+        assert os.listdir(tmp_path) == ["f.txt"]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+file_walker 单元测试（grep_search / glob_search 的底层实现）
+"""
+
+import re
+
+from utils.file_walker import grep, iter_glob, literal_prefilter, scan_file, walk
+
+
+def _make_tree(root):
+    files = {
+        "a.py": "import os\nprint('hello')\n",
+        "b/c.py": "x = 1\nhello = 2\ny = 3\n",
+        "b/d.txt": "Hello world\n",
+        "b/e/f.py": "def hello():\n    pass\n",
+        "b.txt": "nothing\n",
+        "build/out.py": "hello\n",
+        "logs/keep.log": "hello\n",
+        "logs/drop.log": "hello\n",
+        ".git/config": "hello\n",
+    }
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    (root / "bin.dat").write_bytes(b"hello\0\1\2")
+    return files
+
+
+class TestWalk:
+    """目录遍历测试"""
+
+    def test_order_matches_sorted_rglob(self, tmp_path):
+        _make_tree(tmp_path)
+        expected = [
+            p.relative_to(tmp_path).as_posix()
+            for p in sorted(tmp_path.rglob("*"))
+            if ".git" not in p.parts
+        ]
+        got = [rel for _, rel, _ in walk(tmp_path, include_dirs=True)]
+        assert got == expected
+
+    def test_gitignore(self, tmp_path):
+        _make_tree(tmp_path)
+        (tmp_path / ".gitignore").write_text("build/\n*.log\n!keep.log\n")
+        (tmp_path / "b" / ".gitignore").write_text("/e\n")
+        rels = {rel for _, rel, _ in walk(tmp_path)}
+        assert "logs/keep.log" in rels
+        assert "logs/drop.log" not in rels
+        assert "build/out.py" not in rels
+        assert "b/e/f.py" not in rels
+        assert ".git/config" not in rels
+
+    def test_glob_matches_pathlib(self, tmp_path):
+        _make_tree(tmp_path)
+        for pattern in ["*.py", "**/*.py", "b/*", "b/**/*.py", "*/*.txt", "**"]:
+            expected = [
+                p.relative_to(tmp_path).as_posix()
+                for p in sorted(tmp_path.glob(pattern))
+                if ".git" not in p.parts and p != tmp_path
+            ]
+            got = [rel for _, rel, _ in iter_glob(tmp_path, pattern)]
+            assert got == expected, pattern
+
+
+class TestGrep:
+    """内容搜索测试"""
+
+    def test_matches_and_binary_skip(self, tmp_path):
+        _make_tree(tmp_path)
+        regex = re.compile("hello", re.IGNORECASE)
+        files = ((p, rel) for p, rel, _ in walk(tmp_path))
+        lines, truncated = grep(
+            files, regex, 100,
+            prefilter=literal_prefilter("hello", False, False),
+        )
+        assert not truncated
+        assert "a.py:2:> print('hello')" in lines
+        assert "b/d.txt:1:> Hello world" in lines
+        assert not any(line.startswith("bin.dat") for line in lines)
+
+    def test_context_lines(self, tmp_path):
+        path = tmp_path / "f.txt"
+        path.write_text("a\nhit\nb\nhit\nc\n")
+        result = scan_file(path, "f.txt", re.compile("hit"), context_lines=1)
+        assert result.blocks == [
+            ["f.txt:1:  a", "f.txt:2:> hit", "f.txt:3:  b"],
+            ["f.txt:3:  b", "f.txt:4:> hit", "f.txt:5:  c"],
+        ]
+
+    def test_stops_at_max_matches(self, tmp_path):
+        for i in range(50):
+            (tmp_path / f"f{i:02d}.txt").write_text("hit\n" * 10)
+        files = ((p, rel) for p, rel, _ in walk(tmp_path))
+        lines, truncated = grep(files, re.compile("hit"), 25)
+        assert truncated
+        assert len(lines) == 25
+        assert lines[0] == "f00.txt:1:> hit"
+        assert lines[-1] == "f02.txt:5:> hit"
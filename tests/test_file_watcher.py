@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for event-driven file watching and snapshot diffing
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from utils.file_snapshot import diff_fields
+from utils.file_watcher import FileWatcher
+
+
+def _run_watcher(path, writes, use_inotify, poll_interval=0.02):
+    """Apply writes while watching path; return the reported batches."""
+    batches = []
+
+    async def on_change(paths):
+        batches.append(paths)
+
+    async def main():
+        watcher = FileWatcher(
+            [path],
+            on_change,
+            debounce=0.05,
+            poll_interval=poll_interval,
+            use_inotify=use_inotify,
+        )
+        await watcher.start()
+        try:
+            for write in writes:
+                write()
+                await asyncio.sleep(0.005)
+            for _ in range(100):
+                if batches:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            return watcher.backend
+        finally:
+            await watcher.stop()
+
+    return asyncio.run(main()), batches
+
+
+class TestFileWatcher:
+    """Test FileWatcher"""
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_burst_is_debounced(self, tmp_path, use_inotify):
+        path = tmp_path / "config.json"
+        path.write_text("{}")
+        writes = [
+            (lambda i=i: path.write_text('{"n": %d}' % i)) for i in range(5)
+        ]
+        backend, batches = _run_watcher(path, writes, use_inotify)
+        if use_inotify:
+            assert backend in ("inotify", "poll")
+        else:
+            assert backend == "poll"
+        assert batches == [{path}]
+
+    def test_atomic_replace_and_unrelated_files(self, tmp_path):
+        path = tmp_path / "config.json"
+        path.write_text("{}")
+
+        def replace():
+            tmp = tmp_path / "config.json.tmp"
+            tmp.write_text('{"a": 1}')
+            os.replace(tmp, path)
+
+        def unrelated():
+            (tmp_path / "other.json").write_text("x")
+
+        _, batches = _run_watcher(path, [unrelated, replace], True)
+        assert batches == [{path}]
+
+        _, batches = _run_watcher(path, [unrelated], True, poll_interval=0.02)
+        assert batches == []
+
+
+class TestDiffFields:
+    """Test diff_fields"""
+
+    def test_leaf_paths(self):
+        old = {"channels": {"qq": {"enabled": False, "ids": [1]}}, "x": 1}
+        new = {"channels": {"qq": {"enabled": True, "ids": [1, 2]}}, "y": 2}
+        assert diff_fields(old, new) == {
+            "channels.qq.enabled": (False, True),
+            "channels.qq.ids": ([1], [1, 2]),
+            "x": (1, None),
+            "y": (None, 2),
+        }
+        assert diff_fields(new, new) == {}
@@ -3,6 +3,8 @@
 Gateway Auth 单元测试
 """
 
+import time
+
 import pytest
 from app.gateway.auth import (
     GatewayAuth,
@@ -10,6 +12,11 @@ from app.gateway.auth import (
     AuthResponse,
     UserPermission,
 )
+from app.gateway.ratelimit import (
+    InMemoryBackend,
+    SlidingWindowLimiter,
+    TokenBucketLimiter,
+)
 
 
 class TestGatewayAuth:
@@ -124,5 +131,78 @@ class TestGatewayAuth:
         assert result.user_permission.agent_whitelist == {"01", "02"}
 
 
+
+class TestRateLimiters:
+    """限流器与额度测试类"""
+    
+    def test_token_bucket_refill(self):
+        """测试令牌桶突发与补充"""
+        limiter = TokenBucketLimiter(rate=1.0, capacity=2)
+        assert limiter.acquire("u", now=100.0).allowed
+        assert limiter.acquire("u", now=100.0).allowed
+        denied = limiter.acquire("u", now=100.0)
+        assert not denied.allowed
+        assert denied.retry_after == pytest.approx(1.0)
+        assert limiter.acquire("u", now=101.0).allowed
+    
+    def test_token_bucket_evicts_idle_keys(self):
+        """测试空闲 key 被清理"""
+        limiter = TokenBucketLimiter(rate=1.0, capacity=2, sweep_interval=10)
+        for i in range(100):
+            limiter.acquire(f"user{i}", now=100.0)
+        limiter.acquire("active", now=200.0)
+        assert len(limiter) == 1
+    
+    def test_sliding_window_weights_previous_window(self):
+        """测试滑动窗口按重叠比例计入上一窗口"""
+        limiter = SlidingWindowLimiter(limit=4, window=60)
+        base = (int(time.time() // 60) - 1) * 60
+        for _ in range(4):
+            assert limiter.acquire("u", now=base + 30).allowed
+        # 下一窗口过半：上一窗口计 4 * 0.5 = 2
+        assert limiter.acquire("u", now=base + 90).allowed
+        assert limiter.acquire("u", now=base + 90).allowed
+        assert not limiter.acquire("u", now=base + 90).allowed
+    
+    def test_shared_backend_enforces_one_budget(self):
+        """测试共享后端下多个认证器共用限额"""
+        backend = InMemoryBackend()
+        auth1 = GatewayAuth(rate_limit_count=2, rate_limit_backend=backend)
+        auth2 = GatewayAuth(rate_limit_count=2, rate_limit_backend=backend)
+        assert auth1.authenticate("u").result == AuthResult.PASS
+        assert auth2.authenticate("u").result == AuthResult.PASS
+        assert auth1.authenticate("u").result == AuthResult.RATE_LIMIT
+    
+    def test_daily_credit_quota(self):
+        """测试每日 Credit 额度（用户与渠道）"""
+        auth = GatewayAuth(channel_credit_limits={"feishu": 15.0})
+        auth.set_user_permission(UserPermission(user_id="u1", daily_credit_limit=10.0))
+        
+        assert auth.consume_credit("u1", 6.0).result == AuthResult.PASS
+        assert auth.consume_credit("u1", 6.0).result == AuthResult.RATE_LIMIT
+        assert auth.credit_quota.used("u1") == 6.0
+        
+        assert auth.consume_credit("u2", 10.0, channel="feishu").result == AuthResult.PASS
+        assert auth.consume_credit("u3", 10.0, channel="feishu").result == AuthResult.RATE_LIMIT
+        assert auth.credit_quota.used("u3") == 0.0
+    
+    def test_authenticate_charges_credit(self):
+        """测试认证时按请求扣减 Credit"""
+        auth = GatewayAuth(
+            enable_rate_limit=False,
+            channel_credit_limits={"feishu": 3.0},
+            credit_per_request=2.0,
+        )
+        auth.set_user_permission(UserPermission(user_id="u1", daily_credit_limit=5.0))
+        
+        assert auth.authenticate("u1").result == AuthResult.PASS
+        assert auth.authenticate("u1").result == AuthResult.PASS
+        denied = auth.authenticate("u1")
+        assert denied.result == AuthResult.RATE_LIMIT
+        assert auth.credit_quota.used("u1") == 4.0
+        
+        assert auth.authenticate("u2", "feishu").result == AuthResult.PASS
+        assert auth.authenticate("u3", "feishu").result == AuthResult.RATE_LIMIT
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Channel HttpClientPool / TokenCache 单元测试
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app.channels.http_pool import HttpClientPool, TokenCache
+
+
+class TestTokenCache:
+    """TokenCache 测试类"""
+
+    def test_concurrent_callers_share_one_fetch(self):
+        """测试并发获取只请求一次"""
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "tok", 7200
+
+        async def main():
+            cache = TokenCache()
+            tokens = await asyncio.gather(
+                *[cache.get(("x", "app"), fetch) for _ in range(10)]
+            )
+            assert tokens == ["tok"] * 10
+            assert await cache.get(("x", "app"), fetch) == "tok"
+
+        asyncio.run(main())
+        assert len(calls) == 1
+
+    def test_refresh_before_expiry(self):
+        """测试临近过期时返回旧 token 并后台刷新"""
+        values = iter(["new"])
+
+        async def fetch():
+            return next(values), 7200
+
+        async def main():
+            cache = TokenCache(refresh_before=300)
+            cache.put("k", "old", expires_in=100)
+            assert await cache.get("k", fetch) == "old"
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            assert cache.peek("k") == "new"
+
+        asyncio.run(main())
+
+    def test_invalidate(self):
+        """测试失效后重新获取"""
+        cache = TokenCache()
+        cache.put("k", "a", expires_in=7200)
+        cache.invalidate("k")
+        assert cache.peek("k") is None
+
+
+class TestHttpClientPool:
+    """HttpClientPool 测试类"""
+
+    def test_session_reused_until_close(self):
+        """测试同一事件循环复用同一 session"""
+
+        async def main():
+            pool = HttpClientPool()
+            async with pool.session() as s1:
+                pass
+            async with pool.session() as s2:
+                pass
+            assert s1 is s2 and not s1.closed
+            await pool.close()
+            assert s1.closed
+            async with pool.session() as s3:
+                assert s3 is not s1
+            await pool.close()
+
+        asyncio.run(main())
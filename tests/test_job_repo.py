@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Cron Job Repository 单元测试
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from app.crons.models import (
+    CronJobSpec,
+    DispatchSpec,
+    DispatchTarget,
+    ScheduleSpec,
+)
+from app.crons.repo import JsonJobRepository, SqliteJobRepository
+
+
+def _spec(i, name=None):
+    return CronJobSpec(
+        id=f"j{i}",
+        name=name or f"job {i}",
+        schedule=ScheduleSpec(cron="0 18 * * *"),
+        task_type="text",
+        text="hello",
+        dispatch=DispatchSpec(
+            target=DispatchTarget(user_id="u", session_id="s"),
+        ),
+    )
+
+
+class TestJsonJobRepository:
+    """JsonJobRepository 测试类"""
+
+    def test_write_behind_flush(self, tmp_path):
+        """测试写入延迟合并，close 时落盘"""
+        path = tmp_path / "jobs.json"
+
+        async def main():
+            repo = JsonJobRepository(path, flush_delay=60)
+            for i in range(3):
+                await repo.upsert_job(_spec(i))
+            assert not path.exists()
+            assert (await repo.get_job("j1")).name == "job 1"
+            assert await repo.delete_job("j2")
+            assert not await repo.delete_job("missing")
+            await repo.close()
+
+        asyncio.run(main())
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert [j["id"] for j in data["jobs"]] == ["j0", "j1"]
+
+    def test_reload_on_external_change(self, tmp_path):
+        """测试文件被外部修改后重新加载索引"""
+        path = tmp_path / "jobs.json"
+
+        async def main():
+            repo = JsonJobRepository(path, max_dirty=1)
+            await repo.upsert_job(_spec(0))
+            assert path.exists()
+            other = JsonJobRepository(path)
+            await other.upsert_job(_spec(1))
+            await other.close()
+            assert [j.id for j in await repo.list_jobs()] == ["j0", "j1"]
+            await repo.close()
+
+        asyncio.run(main())
+
+
+class TestSqliteJobRepository:
+    """SqliteJobRepository 测试类"""
+
+    def test_crud_and_import(self, tmp_path):
+        """测试增删改查与首次导入 jobs.json"""
+        json_path = tmp_path / "jobs.json"
+
+        async def main():
+            src = JsonJobRepository(json_path)
+            await src.upsert_job(_spec(0))
+            await src.close()
+            repo = SqliteJobRepository(
+                tmp_path / "jobs.db",
+                import_from=json_path,
+            )
+            assert (await repo.get_job("j0")).name == "job 0"
+            await repo.upsert_job(_spec(1))
+            await repo.upsert_job(_spec(0, name="renamed"))
+            assert [j.name for j in await repo.list_jobs()] == [
+                "renamed",
+                "job 1",
+            ]
+            assert await repo.delete_job("j0")
+            assert not await repo.delete_job("j0")
+            assert (await repo.load()).jobs[0].id == "j1"
+            await repo.close()
+
+        asyncio.run(main())
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+KeywordMatcher 单元测试
+"""
+
+import json
+import os
+import random
+
+import pytest
+
+from utils.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher:
+    """KeywordMatcher 测试类"""
+
+    def test_spans_and_overlaps(self):
+        """测试命中位置与重叠匹配"""
+        matcher = KeywordMatcher({"a": ["he", "she", "hers"], "b": ["his"]})
+        spans = [(m.keyword, m.start, m.end) for m in matcher.find_all("ushers")]
+        assert sorted(spans) == [("he", 2, 4), ("hers", 2, 6), ("she", 1, 4)]
+
+    def test_score_matches_naive(self):
+        """测试计分与逐个 in 判断一致"""
+        rng = random.Random(0)
+        alphabet = "abc代码"
+        table = {
+            i: ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+                for _ in range(5)]
+            for i in range(6)
+        }
+        matcher = KeywordMatcher(table)
+        for _ in range(200):
+            text = "".join(rng.choice(alphabet + "X") for _ in range(20))
+            expected = {
+                label: len({kw for kw in kws if kw in text})
+                for label, kws in table.items()
+            }
+            assert matcher.score(text) == expected
+
+    def test_case_insensitive(self):
+        """测试默认忽略大小写"""
+        matcher = KeywordMatcher({"02": ["GitHub", "bug"]})
+        assert matcher.score("Fix BUG on github") == {"02": 2}
+        assert matcher.matched_keywords("Fix BUG on github") == ["GitHub", "bug"]
+
+    def test_hot_reload(self):
+        """测试运行时增删关键词"""
+        matcher = KeywordMatcher({"00": ["管理"]})
+        assert matcher.best("翻译一下", default="00") == ("00", 0)
+        matcher.set_keywords("05", ["翻译"])
+        assert matcher.best("翻译一下", default="00") == ("05", 1)
+        assert matcher.remove("05")
+        assert matcher.best("翻译一下") == (None, 0)
+
+
+class TestRouterCustomKeywords:
+    """AgentRouter 自定义 Agent 关键词热加载测试"""
+
+    @staticmethod
+    def _router(tmp_path, monkeypatch):
+        router_module = pytest.importorskip("cp9.app.router")
+        router = router_module.AgentRouter()
+        monkeypatch.setattr(router.registry, "agents_dir", tmp_path)
+        return router
+
+    @staticmethod
+    def _write_meta(agent_dir, keywords):
+        meta_file = agent_dir / ".meta.json"
+        meta_file.write_text(
+            json.dumps({"id": "05", "keywords": keywords}),
+            encoding="utf-8",
+        )
+        # 保证同一秒内的两次写入也能被签名区分
+        st = meta_file.stat()
+        os.utime(meta_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_reload_from_meta(self, tmp_path, monkeypatch):
+        """测试新建 Agent 后自动加载其关键词"""
+        router = self._router(tmp_path, monkeypatch)
+        assert router.route("帮我翻译这段话") == "00"
+
+        agent_dir = tmp_path / "agent_05_翻译助手"
+        agent_dir.mkdir()
+        self._write_meta(agent_dir, ["翻译"])
+        assert router.route("帮我翻译这段话") == "05"
+
+    def test_meta_written_into_existing_dir(self, tmp_path, monkeypatch):
+        """测试在已存在的 Agent 目录中后写入 .meta.json"""
+        agent_dir = tmp_path / "agent_05_翻译助手"
+        agent_dir.mkdir()
+        router = self._router(tmp_path, monkeypatch)
+        assert router.route("帮我翻译这段话") == "00"
+
+        self._write_meta(agent_dir, ["翻译"])
+        assert router.route("帮我翻译这段话") == "05"
+
+    def test_edit_keywords_in_place(self, tmp_path, monkeypatch):
+        """测试原地编辑 .meta.json 的 keywords 后重新加载"""
+        agent_dir = tmp_path / "agent_05_翻译助手"
+        agent_dir.mkdir()
+        self._write_meta(agent_dir, ["翻译"])
+        router = self._router(tmp_path, monkeypatch)
+        assert router.route("帮我翻译这段话") == "05"
+
+        self._write_meta(agent_dir, ["润色"])
+        assert router.route("帮我翻译这段话") == "00"
+        assert router.route("帮我润色这段话") == "05"
@@ -4,7 +4,11 @@ Agent Router 单元测试
 """
 
 import pytest
-from app.router import AgentRouter, get_router
+
+router_module = pytest.importorskip("cp9.app.router")
+
+AgentRouter = router_module.AgentRouter
+get_router = router_module.get_router
 
 
 class TestAgentRouter:
@@ -4,7 +4,13 @@ Tests for cp9 sensors module
 """
 
 import pytest
-from sensors import PrintSensor, DispatchSensor, RecorderSensor, SensorFactory
+
+sensors = pytest.importorskip("cp9.sensors")
+
+PrintSensor = sensors.PrintSensor
+DispatchSensor = sensors.DispatchSensor
+RecorderSensor = sensors.RecorderSensor
+SensorFactory = sensors.SensorFactory
 
 
 class TestDispatchSensor:
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for incremental session state persistence
+"""
+
+import json
+import os
+
+from utils.session_log import SessionLog
+
+
+def _msg(i, text=None):
+    return {"id": f"m{i}", "role": "user", "content": text or f"hello {i}"}
+
+
+def _state(n, summary="", marks=None):
+    content = [[_msg(i), list((marks or {}).get(i, []))] for i in range(n)]
+    return {
+        "agent": {
+            "name": "Friday",
+            "memory": {
+                "content": content,
+                "_compressed_summary": summary,
+                "_token_counts": {"total": n},
+            },
+        },
+    }
+
+
+class TestSessionLog:
+    """Test SessionLog"""
+
+    def test_appends_only_new_messages(self, tmp_path):
+        path = str(tmp_path / "u_s.json")
+        log = SessionLog(compact_records=1000)
+        log.save(path, _state(3))
+        snapshot = os.path.getsize(path)
+
+        for n in range(4, 30):
+            log.save(path, _state(n))
+        # Snapshot untouched; each turn added one put and one patch
+        assert os.path.getsize(path) == snapshot
+        with open(log.log_path(path), encoding="utf-8") as f:
+            ops = [json.loads(line)["op"] for line in f]
+        assert ops.count("put") == 26
+        assert set(ops) == {"put", "patch"}
+
+        assert log.load(path) == _state(29)
+        assert SessionLog().load(path) == _state(29)
+
+    def test_unchanged_state_writes_nothing(self, tmp_path):
+        path = str(tmp_path / "s.json")
+        log = SessionLog()
+        log.save(path, _state(5))
+        log.save(path, _state(5))
+        assert not os.path.exists(log.log_path(path))
+
+    def test_compaction_rewrites_snapshot(self, tmp_path):
+        path = str(tmp_path / "s.json")
+        log = SessionLog(compact_records=10)
+        for n in range(1, 20):
+            log.save(path, _state(n))
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        assert len(snapshot["agent"]["memory"]["content"]) > 1
+        assert SessionLog().load(path) == _state(19)
+
+    def test_marks_deletes_and_patches(self, tmp_path):
+        path = str(tmp_path / "s.json")
+        log = SessionLog()
+        log.save(path, _state(6))
+
+        state = _state(6, summary="short", marks={1: ["hint"]})
+        content = state["agent"]["memory"]["content"]
+        del content[0:2]
+        content.append([_msg(6), []])
+        log.save(path, state)
+        with open(log.log_path(path), encoding="utf-8") as f:
+            ops = sorted(json.loads(line)["op"] for line in f)
+        assert ops == ["del", "patch", "put"]
+        assert SessionLog().load(path) == state
+
+        # Editing a recent message replaces it
+        content[-1][0]["content"] = "edited"
+        content[-1][1] = ["hint"]
+        log.save(path, state)
+        assert SessionLog().load(path) == state
+
+        # Reordering falls back to a snapshot
+        content.reverse()
+        log.save(path, state)
+        assert not os.path.exists(log.log_path(path))
+        assert SessionLog().load(path) == state
+
+    def test_reads_legacy_snapshot(self, tmp_path):
+        path = str(tmp_path / "s.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_state(4), f)
+        log = SessionLog()
+        assert log.load(path) == _state(4)
+        log.save(path, _state(5))
+        assert SessionLog().load(path) == _state(5)
+        assert log.load(str(tmp_path / "missing.json")) is None
+
+    def test_picks_up_other_writer_tail(self, tmp_path):
+        path = str(tmp_path / "s.json")
+        reader, writer = SessionLog(), SessionLog()
+        writer.save(path, _state(2))
+        assert reader.load(path) == _state(2)
+        writer.save(path, _state(3))
+        assert reader.load(path) == _state(3)
+
+        # Torn last line is ignored until it is complete
+        with open(reader.log_path(path), "a", encoding="utf-8") as f:
+            f.write('{"op": "put"')
+        assert reader.load(path) == _state(3)
+        writer.save(path, _state(4))
+        assert SessionLog().load(path) == _state(4)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for bounded, streamed shell command execution
+"""
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+from utils.shell_exec import OutputCapture, run_shell
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="uses POSIX shell commands",
+)
+
+PY = sys.executable
+
+
+class TestOutputCapture:
+    """Test OutputCapture"""
+
+    def test_head_tail_and_spill(self, tmp_path):
+        capture = OutputCapture("stdout", 4, 4, tmp_path, "run.")
+        for chunk in (b"abc", b"defgh", b"ijklmnop"):
+            capture.feed(chunk)
+        capture.close()
+        assert capture.truncated and capture.total_bytes == 16
+        assert capture.spill_path.read_bytes() == b"abcdefghijklmnop"
+        text = capture.render()
+        assert text.startswith("abcd\n") and text.endswith("\nmnop")
+        assert "8 bytes omitted" in text and str(capture.spill_path) in text
+
+    def test_small_output_is_not_spilled(self, tmp_path):
+        capture = OutputCapture("stderr", 4, 4, tmp_path)
+        capture.feed(b"12345678")
+        assert capture.render() == "12345678"
+        assert capture.spill_path is None and not list(tmp_path.iterdir())
+
+
+class TestRunShell:
+    """Test run_shell"""
+
+    def test_large_output_does_not_deadlock(self, tmp_path):
+        # ~8 MB on stdout and some stderr, well past the pipe buffer
+        cmd = (
+            f"{PY} -c \"import sys; sys.stdout.write('x' * 8000000); "
+            f"sys.stderr.write('warn'); sys.exit(3)\""
+        )
+        result = asyncio.run(
+            run_shell(cmd, cwd=tmp_path, timeout=30, spill_dir=tmp_path),
+        )
+        assert result.returncode == 3 and not result.timed_out
+        assert result.stdout.total_bytes == 8_000_000
+        assert result.stdout.spill_path.stat().st_size == 8_000_000
+        assert len(result.stdout.render()) < 40_000
+        assert result.stderr.render() == "warn"
+
+    def test_streams_output_while_running(self):
+        seen = []
+
+        def on_output(name, chunk):
+            seen.append((time.monotonic(), name, chunk))
+
+        cmd = (
+            f"{PY} -u -c \"import time; print('a'); time.sleep(0.3); "
+            f"print('b')\""
+        )
+        started = time.monotonic()
+        result = asyncio.run(run_shell(cmd, timeout=10, on_output=on_output))
+        assert result.returncode == 0
+        assert seen[0][1] == "stdout" and seen[0][2].strip() == b"a"
+        assert seen[0][0] - started < result.duration - 0.2
+
+    def test_timeout_kills_process_group(self):
+        cmd = f"{PY} -c \"import time; time.sleep(30)\" & echo started; wait"
+        started = time.monotonic()
+        result = asyncio.run(run_shell(cmd, timeout=0.5))
+        assert result.timed_out and result.returncode == -1
+        assert result.stdout.render().strip() == "started"
+        assert time.monotonic() - started < 5
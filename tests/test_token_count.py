@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Token 计数单元测试
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("tokenizers")
+
+from agents import utils as agent_utils
+from agents.utils import count_text_tokens, get_message_digest
+
+
+class TestCountTextTokens:
+    """count_text_tokens 测试类"""
+
+    def test_batch_matches_single(self):
+        """测试批量计数与逐条计数一致"""
+        texts = ["Hello 世界!", "", "def foo():\n    return 42\n"]
+        batch = count_text_tokens(texts)
+        assert batch == [count_text_tokens([t])[0] for t in texts]
+        assert batch[1] == 0
+
+    def test_known_qwen_ids(self):
+        """测试本地词表与 Qwen2 分词结果一致"""
+        tokenizer = agent_utils._get_fast_tokenizer()
+        assert tokenizer is not None
+        ids = tokenizer.encode(
+            "Hello 世界!  foo\n\nbar <|im_start|>",
+            add_special_tokens=False,
+        ).ids
+        assert ids == [9707, 220, 99489, 0, 220, 15229, 271, 2257, 220, 151644]
+
+
+class TestMessageDigest:
+    """get_message_digest 测试类"""
+
+    def test_digest_tracks_content(self):
+        """测试内容变化时摘要变化"""
+        msg = SimpleNamespace(role="user", name="u", content="hi")
+        digest = get_message_digest(msg)
+        assert digest == get_message_digest(msg)
+        msg.content = [{"type": "text", "text": "hi"}]
+        assert digest != get_message_digest(msg)
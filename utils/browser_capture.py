@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""Bounded capture of browser console messages and network requests.
+
+Pages used to append every console message and request to plain lists
+that were never trimmed, and ``network_requests`` returned the whole list
+each time. ``PageCapture`` keeps them in fixed-size ring buffers instead:
+
+- records are small ``__slots__`` objects with a per-buffer sequence
+  number; once a buffer is full the oldest records are dropped;
+- ``RingBuffer.since(cursor)`` returns only records newer than a cursor
+  (the ``next_cursor`` of the previous read) plus how many were missed
+  because they were dropped in between;
+- a ``CaptureFilter`` (resource types, URL pattern, status range, console
+  level) is applied as events arrive, so filtered-out traffic costs no
+  memory. With a status filter, a request is kept once its response
+  status is known; failed requests are always kept.
+"""
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    FrozenSet,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+    TypeVar,
+)
+
+DEFAULT_CONSOLE_CAPACITY = 500
+DEFAULT_NETWORK_CAPACITY = 500
+# Longer console texts / URLs are cut to this many characters
+MAX_FIELD_CHARS = 2000
+
+# Console levels by severity; Playwright's "log" counts as info
+LEVEL_RANK = {"error": 0, "warning": 1, "info": 2, "log": 2, "debug": 3}
+_DEFAULT_RANK = LEVEL_RANK["info"]
+
+
+def _clip(text: str) -> str:
+    if len(text) <= MAX_FIELD_CHARS:
+        return text
+    return text[:MAX_FIELD_CHARS] + f"...[{len(text)} chars]"
+
+
+def level_rank(level: str) -> int:
+    return LEVEL_RANK.get(level, _DEFAULT_RANK)
+
+
+class ConsoleRecord:
+    __slots__ = ("seq", "level", "text", "time")
+
+    def __init__(self, level: str, text: str):
+        self.seq = 0
+        self.level = level
+        self.text = _clip(text)
+        self.time = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "level": self.level, "text": self.text}
+
+
+class RequestRecord:
+    __slots__ = (
+        "seq",
+        "url",
+        "method",
+        "resource_type",
+        "status",
+        "failure",
+        "time",
+    )
+
+    def __init__(
+        self,
+        url: str,
+        method: str,
+        resource_type: Optional[str],
+    ):
+        self.seq = 0
+        self.url = _clip(url)
+        self.method = method
+        self.resource_type = resource_type
+        self.status: Optional[int] = None
+        self.failure: Optional[str] = None
+        self.time = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "seq": self.seq,
+            "url": self.url,
+            "method": self.method,
+            "resourceType": self.resource_type,
+        }
+        if self.status is not None:
+            out["status"] = self.status
+        if self.failure is not None:
+            out["failure"] = self.failure
+        return out
+
+
+R = TypeVar("R", ConsoleRecord, RequestRecord)
+
+
+class RingBuffer(Generic[R]):
+    """The last ``capacity`` records, numbered 1, 2, ... as appended."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._items: Deque[R] = deque(maxlen=self.capacity)
+        self._last_seq = 0
+
+    def append(self, record: R) -> None:
+        self._last_seq += 1
+        record.seq = self._last_seq
+        self._items.append(record)
+
+    @property
+    def total(self) -> int:
+        """Records appended so far (including dropped ones)."""
+        return self._last_seq
+
+    @property
+    def dropped(self) -> int:
+        return self._last_seq - len(self._items)
+
+    def since(self, cursor: int = 0) -> Tuple[List[R], int, int]:
+        """(records with seq > cursor, next cursor, records missed).
+
+        Records missed were newer than cursor but already dropped.
+        """
+        first = self._last_seq - len(self._items) + 1
+        cursor = max(0, cursor)
+        missed = max(0, first - 1 - cursor)
+        skip = max(0, cursor - first + 1)
+        records = list(self._items)[skip:]
+        return records, self._last_seq, missed
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[R]:
+        return iter(list(self._items))
+
+
+@dataclass(frozen=True)
+class CaptureFilter:
+    """What a page records; the default records everything."""
+
+    resource_types: Optional[FrozenSet[str]] = None
+    exclude_resource_types: FrozenSet[str] = frozenset()
+    url_pattern: Optional[Pattern[str]] = None
+    min_status: Optional[int] = None
+    max_status: Optional[int] = None
+    console_level: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CaptureFilter":
+        """Build from JSON-style keys; raises ValueError on bad input."""
+        unknown = set(data) - {
+            "resource_types",
+            "exclude_resource_types",
+            "url_pattern",
+            "min_status",
+            "max_status",
+            "console_level",
+        }
+        if unknown:
+            raise ValueError(f"Unknown filter keys: {sorted(unknown)}")
+
+        def types(key: str) -> Optional[FrozenSet[str]]:
+            value = data.get(key)
+            if value is None:
+                return None
+            if isinstance(value, str):
+                value = [value]
+            return frozenset(str(v).strip().lower() for v in value)
+
+        pattern = data.get("url_pattern")
+        level = data.get("console_level")
+        if level is not None and level not in LEVEL_RANK:
+            raise ValueError(f"Unknown console level: {level}")
+        try:
+            compiled = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise ValueError(f"Invalid url_pattern: {e}") from e
+        return cls(
+            resource_types=types("resource_types"),
+            exclude_resource_types=types("exclude_resource_types")
+            or frozenset(),
+            url_pattern=compiled,
+            min_status=_opt_int(data.get("min_status")),
+            max_status=_opt_int(data.get("max_status")),
+            console_level=level,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "resource_types": (
+                sorted(self.resource_types)
+                if self.resource_types is not None
+                else None
+            ),
+            "exclude_resource_types": sorted(self.exclude_resource_types),
+            "url_pattern": (
+                self.url_pattern.pattern if self.url_pattern else None
+            ),
+            "min_status": self.min_status,
+            "max_status": self.max_status,
+            "console_level": self.console_level,
+        }
+
+    @property
+    def filters_status(self) -> bool:
+        return self.min_status is not None or self.max_status is not None
+
+    def accepts_console(self, level: str) -> bool:
+        if self.console_level is None:
+            return True
+        return level_rank(level) <= level_rank(self.console_level)
+
+    def accepts_request(self, url: str, resource_type: Optional[str]) -> bool:
+        rtype = (resource_type or "").lower()
+        if self.resource_types is not None and rtype not in (
+            self.resource_types
+        ):
+            return False
+        if rtype in self.exclude_resource_types:
+            return False
+        if self.url_pattern is not None and not self.url_pattern.search(url):
+            return False
+        return True
+
+    def accepts_status(self, status: int) -> bool:
+        if self.min_status is not None and status < self.min_status:
+            return False
+        if self.max_status is not None and status > self.max_status:
+            return False
+        return True
+
+
+def _opt_int(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Expected an integer status, got {value!r}") from e
+
+
+class PageCapture:
+    """Console and network ring buffers of one page."""
+
+    def __init__(
+        self,
+        console_capacity: int = DEFAULT_CONSOLE_CAPACITY,
+        network_capacity: int = DEFAULT_NETWORK_CAPACITY,
+        capture_filter: Optional[CaptureFilter] = None,
+    ):
+        self.console: RingBuffer[ConsoleRecord] = RingBuffer(
+            console_capacity,
+        )
+        self.network: RingBuffer[RequestRecord] = RingBuffer(
+            network_capacity,
+        )
+        self.filter = capture_filter or CaptureFilter()
+        # request key -> record awaiting its response (bounded)
+        self._pending: "OrderedDict[Any, RequestRecord]" = OrderedDict()
+        self._pending_limit = max(1, network_capacity)
+
+    def set_filter(self, capture_filter: CaptureFilter) -> None:
+        """Apply capture_filter to events from now on."""
+        self.filter = capture_filter
+        self._pending.clear()
+
+    def on_console(self, level: str, text: str) -> None:
+        if self.filter.accepts_console(level):
+            self.console.append(ConsoleRecord(level, text))
+
+    def on_request(
+        self,
+        key: Any,
+        url: str,
+        method: str,
+        resource_type: Optional[str],
+    ) -> None:
+        if not self.filter.accepts_request(url, resource_type):
+            return
+        record = RequestRecord(url, method, resource_type)
+        if not self.filter.filters_status:
+            self.network.append(record)
+        self._pending[key] = record
+        while len(self._pending) > self._pending_limit:
+            self._pending.popitem(last=False)
+
+    def on_response(self, key: Any, status: int) -> None:
+        record = self._pending.pop(key, None)
+        if record is None:
+            return
+        record.status = status
+        if self.filter.filters_status and self.filter.accepts_status(status):
+            self.network.append(record)
+
+    def on_request_failed(self, key: Any, failure: str) -> None:
+        record = self._pending.pop(key, None)
+        if record is None:
+            return
+        record.failure = failure or "failed"
+        if self.filter.filters_status:
+            self.network.append(record)
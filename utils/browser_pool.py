@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""Shared browser process with one isolated context per agent session.
+
+``browser_use`` used to keep a single module-global browser, context and
+``current_page_id``: concurrent sessions switched each other's tabs, and
+every ``start`` after a ``stop`` launched Chromium from cold.
+``BrowserPool`` instead
+
+- keeps one warm browser per mode (headless / headed), launched on first
+  use and kept until ``shutdown()``;
+- leases each session key its own ``BrowserContext`` (cookies, storage
+  and tabs are isolated) holding that session's pages, snapshot refs and
+  per-page dialog state and console / network capture
+  (``BrowserSession``, ``utils.browser_capture``);
+- closes contexts idle for ``idle_timeout`` seconds (background reaper)
+  and evicts the least recently used one when ``max_contexts`` is hit;
+- caps the number of open pages across all sessions (``reserve_page``);
+- reports launch times and utilization via ``metrics()``.
+
+The pool is driven from one event loop. Playwright is imported on first
+launch; pass ``launcher`` to supply browsers some other way.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .browser_capture import (
+    DEFAULT_CONSOLE_CAPACITY,
+    DEFAULT_NETWORK_CAPACITY,
+    CaptureFilter,
+    PageCapture,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONTEXTS = 8
+DEFAULT_MAX_PAGES = 32
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+# launcher(headless) -> (owner to stop() or None, browser)
+Launcher = Callable[[bool], Awaitable[Tuple[Any, Any]]]
+
+
+class PoolExhausted(RuntimeError):
+    """No page (or context) can be opened right now."""
+
+
+@dataclass
+class BrowserSession:
+    """Browser state of one session: a context and its pages."""
+
+    key: str
+    context: Any
+    headless: bool
+    pages: Dict[str, Any] = field(default_factory=dict)
+    refs: Dict[str, dict] = field(default_factory=dict)
+    refs_frame: Dict[str, str] = field(default_factory=dict)
+    captures: Dict[str, PageCapture] = field(default_factory=dict)
+    pending_dialogs: Dict[str, list] = field(default_factory=dict)
+    pending_file_choosers: Dict[str, list] = field(default_factory=dict)
+    current_page_id: Optional[str] = None
+    # Monotonic counter for page_N ids, avoids reuse after close
+    page_counter: int = 0
+    # new_page() calls in progress (their "page" events are not popups)
+    opening: int = 0
+    capture_filter: CaptureFilter = field(default_factory=CaptureFilter)
+    console_capacity: int = DEFAULT_CONSOLE_CAPACITY
+    network_capacity: int = DEFAULT_NETWORK_CAPACITY
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+    async def new_page(self) -> Any:
+        """Open a page in this context (not registered yet)."""
+        self.opening += 1
+        try:
+            return await self.context.new_page()
+        finally:
+            self.opening -= 1
+
+    def page_id_of(self, page: Any) -> Optional[str]:
+        for page_id, known in self.pages.items():
+            if known is page:
+                return page_id
+        return None
+
+    def next_page_id(self) -> str:
+        self.page_counter += 1
+        return f"page_{self.page_counter}"
+
+    def add_page(self, page_id: str, page: Any) -> None:
+        """Register page under page_id with empty per-page state."""
+        self.refs[page_id] = {}
+        self.refs_frame.pop(page_id, None)
+        self.captures[page_id] = PageCapture(
+            self.console_capacity,
+            self.network_capacity,
+            self.capture_filter,
+        )
+        self.pending_dialogs[page_id] = []
+        self.pending_file_choosers[page_id] = []
+        self.pages[page_id] = page
+
+    def set_capture_filter(self, capture_filter: CaptureFilter) -> None:
+        """Use capture_filter for this session's current and new pages."""
+        self.capture_filter = capture_filter
+        for capture in self.captures.values():
+            capture.set_filter(capture_filter)
+
+    def remove_page(self, page_id: str) -> None:
+        """Forget page_id; the current page moves to a remaining one."""
+        self.pages.pop(page_id, None)
+        for states in (
+            self.refs,
+            self.refs_frame,
+            self.captures,
+            self.pending_dialogs,
+            self.pending_file_choosers,
+        ):
+            states.pop(page_id, None)
+        if self.current_page_id == page_id:
+            remaining = list(self.pages)
+            self.current_page_id = remaining[0] if remaining else None
+
+
+async def _playwright_launcher(headless: bool) -> Tuple[Any, Any]:
+    from playwright.async_api import async_playwright
+
+    pw = await async_playwright().start()
+    try:
+        browser = await pw.chromium.launch(headless=headless)
+    except BaseException:
+        await pw.stop()
+        raise
+    return pw, browser
+
+
+class BrowserPool:
+    """Warm browsers shared by per-session contexts; see module docstring."""
+
+    def __init__(
+        self,
+        *,
+        max_contexts: int = DEFAULT_MAX_CONTEXTS,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        reap_interval: Optional[float] = None,
+        console_capacity: int = DEFAULT_CONSOLE_CAPACITY,
+        network_capacity: int = DEFAULT_NETWORK_CAPACITY,
+        launcher: Optional[Launcher] = None,
+        on_new_context: Optional[Callable[[BrowserSession], None]] = None,
+    ):
+        """console/network_capacity bound each page's capture buffers;
+        on_new_context is called for every context created (e.g. to attach
+        popup listeners)."""
+        self.max_contexts = max(1, max_contexts)
+        self.max_pages = max(1, max_pages)
+        self.idle_timeout = idle_timeout
+        self.reap_interval = (
+            reap_interval
+            if reap_interval is not None
+            else max(1.0, min(60.0, idle_timeout / 4))
+        )
+        self.console_capacity = console_capacity
+        self.network_capacity = network_capacity
+        self._launcher = launcher or _playwright_launcher
+        self.on_new_context = on_new_context
+        # headless flag -> (owner, browser)
+        self._browsers: Dict[bool, Tuple[Any, Any]] = {}
+        self._sessions: Dict[str, BrowserSession] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._reaper: Optional[asyncio.Task[None]] = None
+        self._launches = 0
+        self._launch_seconds: List[float] = []
+        self._contexts_created = 0
+        self._contexts_reaped = 0
+        self._contexts_evicted = 0
+        self._leases = 0
+        self._warm_leases = 0
+        self._pages_refused = 0
+
+    # ---- sessions ----
+
+    def get(self, key: str) -> Optional[BrowserSession]:
+        """The session's state if it holds a context (marks it used)."""
+        session = self._sessions.get(key)
+        if session is not None:
+            session.touch()
+        return session
+
+    def sessions(self) -> List[BrowserSession]:
+        return list(self._sessions.values())
+
+    async def lease(
+        self,
+        key: str,
+        headless: Optional[bool] = None,
+    ) -> BrowserSession:
+        """Context for key, created on first use.
+
+        headless=None keeps an existing session's mode (default headless);
+        a different mode replaces the session's context.
+        """
+        async with self._get_lock():
+            self._leases += 1
+            session = self._sessions.get(key)
+            if session is not None:
+                if headless is None or session.headless == headless:
+                    session.touch()
+                    return session
+                await self._close_session(session)
+            headless = True if headless is None else headless
+            if len(self._sessions) >= self.max_contexts:
+                await self._evict_lru()
+            if headless in self._browsers:
+                self._warm_leases += 1
+            browser = await self._browser(headless)
+            context = await browser.new_context()
+            session = BrowserSession(
+                key,
+                context,
+                headless,
+                console_capacity=self.console_capacity,
+                network_capacity=self.network_capacity,
+            )
+            self._sessions[key] = session
+            self._contexts_created += 1
+            if self.on_new_context is not None:
+                self.on_new_context(session)
+            self._ensure_reaper()
+            return session
+
+    async def release(self, key: str) -> bool:
+        """Close key's context; False if it had none. Browsers stay warm."""
+        async with self._get_lock():
+            session = self._sessions.get(key)
+            if session is None:
+                return False
+            await self._close_session(session)
+            return True
+
+    def reserve_page(self, session: BrowserSession) -> None:
+        """Raise PoolExhausted if no further page may be opened."""
+        session.touch()
+        if self.total_pages >= self.max_pages:
+            self._pages_refused += 1
+            raise PoolExhausted(
+                f"Page limit reached ({self.max_pages} open pages across "
+                "sessions); close some pages first",
+            )
+
+    @property
+    def total_pages(self) -> int:
+        return sum(len(s.pages) for s in self._sessions.values())
+
+    # ---- lifecycle ----
+
+    async def reap_idle(self) -> int:
+        """Close contexts idle longer than idle_timeout; returns count."""
+        cutoff = time.monotonic() - self.idle_timeout
+        async with self._get_lock():
+            idle = [s for s in self._sessions.values() if s.last_used < cutoff]
+            for session in idle:
+                logger.debug("Closing idle browser context %s", session.key)
+                await self._close_session(session)
+            self._contexts_reaped += len(idle)
+        return len(idle)
+
+    async def shutdown(self) -> None:
+        """Close every context and browser."""
+        reaper, self._reaper = self._reaper, None
+        if reaper is not None and reaper is not asyncio.current_task():
+            reaper.cancel()
+            try:
+                await reaper
+            except asyncio.CancelledError:
+                pass
+        async with self._get_lock():
+            for session in list(self._sessions.values()):
+                await self._close_session(session)
+            browsers = list(self._browsers.values())
+            self._browsers.clear()
+        for owner, browser in browsers:
+            await _close_browser(owner, browser)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._browsers)
+
+    def metrics(self) -> Dict[str, Any]:
+        launches = self._launch_seconds
+        return {
+            "browsers": len(self._browsers),
+            "launches": self._launches,
+            "launch_seconds_last": round(launches[-1], 3) if launches else 0,
+            "launch_seconds_avg": (
+                round(sum(launches) / len(launches), 3) if launches else 0
+            ),
+            "contexts": len(self._sessions),
+            "max_contexts": self.max_contexts,
+            "contexts_created": self._contexts_created,
+            "contexts_reaped": self._contexts_reaped,
+            "contexts_evicted": self._contexts_evicted,
+            "pages": self.total_pages,
+            "max_pages": self.max_pages,
+            "page_utilization": round(self.total_pages / self.max_pages, 4),
+            "pages_refused": self._pages_refused,
+            "leases": self._leases,
+            "warm_leases": self._warm_leases,
+        }
+
+    # ---- internals ----
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _browser(self, headless: bool) -> Any:
+        entry = self._browsers.get(headless)
+        if entry is not None:
+            if _is_connected(entry[1]):
+                return entry[1]
+            # Crashed or closed: stop its playwright driver before relaunch
+            del self._browsers[headless]
+            await _close_browser(*entry)
+        started = time.monotonic()
+        owner, browser = await self._launcher(headless)
+        elapsed = time.monotonic() - started
+        self._launches += 1
+        self._launch_seconds = (self._launch_seconds + [elapsed])[-100:]
+        logger.info(
+            "Browser launched (%s) in %.2fs",
+            "headless" if headless else "headed",
+            elapsed,
+        )
+        self._browsers[headless] = (owner, browser)
+        return browser
+
+    async def _close_session(self, session: BrowserSession) -> None:
+        self._sessions.pop(session.key, None)
+        try:
+            await session.context.close()
+        except Exception:
+            logger.debug("Context close failed", exc_info=True)
+        session.pages.clear()
+
+    async def _evict_lru(self) -> None:
+        oldest = min(self._sessions.values(), key=lambda s: s.last_used)
+        logger.info(
+            "Browser context limit (%d) reached, closing %s",
+            self.max_contexts,
+            oldest.key,
+        )
+        self._contexts_evicted += 1
+        await self._close_session(oldest)
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None and not self._reaper.done():
+            return
+        self._reaper = asyncio.get_running_loop().create_task(
+            self._reap_loop(),
+            name="browser_pool_reaper",
+        )
+
+    async def _reap_loop(self) -> None:
+        while self._sessions:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.reap_idle()
+            except Exception:
+                logger.warning("Browser reaper failed", exc_info=True)
+
+
+async def _close_browser(owner: Any, browser: Any) -> None:
+    """Close browser and stop its owner, logging failures."""
+    try:
+        await browser.close()
+    except Exception:
+        logger.debug("Browser close failed", exc_info=True)
+    if owner is not None:
+        try:
+            await owner.stop()
+        except Exception:
+            logger.debug("Browser owner stop failed", exc_info=True)
+
+
+def _is_connected(browser: Any) -> bool:
+    is_connected = getattr(browser, "is_connected", None)
+    return is_connected() if callable(is_connected) else True
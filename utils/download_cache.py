@@ -0,0 +1,485 @@
+# -*- coding: utf-8 -*-
+"""Async, content-addressed cache for files downloaded from URLs.
+
+Attachments in channel messages (files, images, audio, video) arrive as
+URLs and used to be fetched with a blocking ``wget``/``curl`` call per
+block. ``DownloadCache`` fetches them on the event loop instead:
+
+- bodies are streamed to disk (written in a worker thread), never held
+  in memory, and capped at ``max_bytes``;
+- finished files are stored once under ``objects/`` by SHA-256, and an
+  index maps each URL to its object plus the ETag / Last-Modified seen;
+  a URL fetched within ``fresh_for`` seconds is served without a
+  request, an older one is revalidated with a conditional GET;
+- concurrent requests for the same URL share one fetch (single-flight),
+  and at most ``max_concurrency`` fetches run at once;
+- an interrupted transfer keeps its partial file and resumes with a
+  ``Range`` request when the server gave a validator for it;
+- the cache is trimmed to ``max_cache_bytes`` (oldest URLs first).
+
+The default transport is ``httpx`` (imported on first use); a subclass
+can override ``_open`` to fetch through something else.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_FRESH_FOR = 24 * 3600.0
+DEFAULT_TIMEOUT = 60.0
+# Bytes buffered before each (threaded) disk write
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+class DownloadError(RuntimeError):
+    """The URL could not be downloaded."""
+
+
+class DownloadTooLarge(DownloadError):
+    """The body exceeds the configured size cap."""
+
+
+@dataclass
+class Response:
+    """What ``_open`` yields: status, lower-cased headers and the body."""
+
+    status: int
+    headers: Mapping[str, str]
+    body: AsyncIterator[bytes]
+
+
+@dataclass
+class _Entry:
+    sha256: str
+    size: int
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class _LoopState:
+    semaphore: asyncio.Semaphore
+    inflight: Dict[str, "asyncio.Future[Path]"] = field(default_factory=dict)
+    client: Any = None
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+class DownloadCache:
+    """URL -> local file cache; see module docstring."""
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        fresh_for: float = DEFAULT_FRESH_FOR,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_cache_bytes = max_cache_bytes
+        self.max_concurrency = max(1, max_concurrency)
+        self.fresh_for = fresh_for
+        self.timeout = timeout
+        self._index: Optional[Dict[str, _Entry]] = None
+        self._index_lock = threading.Lock()
+        # Semaphores, in-flight futures and clients belong to one loop
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+        self._loops_lock = threading.Lock()
+        self._hits = 0
+        self._revalidated = 0
+        self._downloads = 0
+        self._resumed = 0
+        self._shared = 0
+
+    # ---- public API ----
+
+    async def fetch(self, url: str) -> Path:
+        """Path of the cached object for url (downloaded if needed).
+
+        The returned file is shared; copy it before modifying it.
+        """
+        state = self._loop_state()
+        future = state.inflight.get(url)
+        if future is not None:
+            self._shared += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._fetch(url, state))
+        state.inflight[url] = future
+
+        def _done(fut: "asyncio.Future[Path]") -> None:
+            state.inflight.pop(url, None)
+            if not fut.cancelled():
+                # Mark as retrieved even if every waiter was cancelled
+                fut.exception()
+
+        future.add_done_callback(_done)
+        return await asyncio.shield(future)
+
+    async def download(self, url: str, dest: Path) -> Path:
+        """Fetch url and copy it to dest (overwritten if present)."""
+        obj = await self.fetch(url)
+        dest = Path(dest)
+        await asyncio.to_thread(self._copy, obj, dest)
+        return dest
+
+    def stats(self) -> Dict[str, int]:
+        index = self._index or {}
+        return {
+            "urls": len(index),
+            "objects": len({e.sha256 for e in index.values()}),
+            "hits": self._hits,
+            "revalidated": self._revalidated,
+            "downloads": self._downloads,
+            "resumed": self._resumed,
+            "shared": self._shared,
+        }
+
+    async def close(self) -> None:
+        """Close the running loop's HTTP client."""
+        loop = asyncio.get_running_loop()
+        with self._loops_lock:
+            state = self._loops.pop(loop, None)
+        if state is not None and state.client is not None:
+            await state.client.aclose()
+
+    # ---- transport ----
+
+    @asynccontextmanager
+    async def _open(
+        self,
+        url: str,
+        headers: Dict[str, str],
+    ) -> AsyncIterator[Response]:
+        import httpx
+
+        state = self._loop_state()
+        if state.client is None:
+            state.client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout),
+            )
+        async with state.client.stream("GET", url, headers=headers) as resp:
+            yield Response(
+                status=resp.status_code,
+                headers={k.lower(): v for k, v in resp.headers.items()},
+                body=resp.aiter_bytes(),
+            )
+
+    # ---- internals ----
+
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        with self._loops_lock:
+            state = self._loops.get(loop)
+            if state is None:
+                for other in [lp for lp in self._loops if lp.is_closed()]:
+                    del self._loops[other]
+                state = _LoopState(asyncio.Semaphore(self.max_concurrency))
+                self._loops[loop] = state
+            return state
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / sha256
+
+    def _partial_paths(self, url: str) -> Tuple[Path, Path]:
+        base = self.root / "partial" / _url_key(url)
+        return base.with_suffix(".part"), base.with_suffix(".json")
+
+    async def _fetch(self, url: str, state: _LoopState) -> Path:
+        await asyncio.to_thread(self._load_index)
+        entry = self._lookup(url)
+        if entry is not None and time.time() - entry.fetched_at < (
+            self.fresh_for
+        ):
+            self._hits += 1
+            return self._object_path(entry.sha256)
+        async with state.semaphore:
+            return await self._transfer(url, entry)
+
+    def _lookup(self, url: str) -> Optional[_Entry]:
+        with self._index_lock:
+            entry = (self._index or {}).get(url)
+        if entry is None or not self._object_path(entry.sha256).is_file():
+            return None
+        return entry
+
+    async def _transfer(self, url: str, entry: Optional[_Entry]) -> Path:
+        part, meta_path = self._partial_paths(url)
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            elif entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        offset, validator = await asyncio.to_thread(
+            self._partial_state,
+            part,
+            meta_path,
+        )
+        if offset and not headers:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        async with self._open(url, headers) as resp:
+            if resp.status == 304 and entry is not None:
+                self._revalidated += 1
+                entry.fetched_at = time.time()
+                await asyncio.to_thread(self._save_index)
+                return self._object_path(entry.sha256)
+            if resp.status not in (200, 206):
+                raise DownloadError(f"HTTP {resp.status} for {url}")
+            resume = resp.status == 206 and _range_start(resp) == offset
+            if resp.status == 206 and not resume:
+                await asyncio.to_thread(_remove, part, meta_path)
+                raise DownloadError(f"Unexpected range response for {url}")
+            if not resume:
+                offset = 0
+            length = resp.headers.get("content-length")
+            if length and length.isdigit():
+                if offset + int(length) > self.max_bytes:
+                    await asyncio.to_thread(_remove, part, meta_path)
+                    raise DownloadTooLarge(
+                        f"{url} is {offset + int(length)} bytes "
+                        f"(limit {self.max_bytes})",
+                    )
+            validators = {
+                "etag": resp.headers.get("etag"),
+                "last_modified": resp.headers.get("last-modified"),
+            }
+            await asyncio.to_thread(
+                _write_meta,
+                meta_path,
+                validators,
+            )
+            if resume:
+                self._resumed += 1
+            digest, size = await self._stream_body(
+                url,
+                resp,
+                part,
+                meta_path,
+                offset,
+            )
+        if size == 0:
+            await asyncio.to_thread(_remove, part, meta_path)
+            raise DownloadError(f"Downloaded file is empty: {url}")
+        self._downloads += 1
+        new_entry = _Entry(
+            sha256=digest,
+            size=size,
+            fetched_at=time.time(),
+            etag=validators["etag"],
+            last_modified=validators["last_modified"],
+        )
+        return await asyncio.to_thread(
+            self._commit,
+            url,
+            new_entry,
+            part,
+            meta_path,
+        )
+
+    async def _stream_body(
+        self,
+        url: str,
+        resp: Response,
+        part: Path,
+        meta_path: Path,
+        offset: int,
+    ) -> Tuple[str, int]:
+        """Write the body to part (appending at offset); (sha256, size)."""
+        part.parent.mkdir(parents=True, exist_ok=True)
+        hasher = await asyncio.to_thread(_hash_prefix, part, offset)
+        size = offset
+        buf = bytearray()
+        f = await asyncio.to_thread(open, part, "ab" if offset else "wb")
+        try:
+            async for chunk in resp.body:
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise DownloadTooLarge(
+                        f"{url} exceeds {self.max_bytes} bytes",
+                    )
+                hasher.update(chunk)
+                buf += chunk
+                if len(buf) >= WRITE_BUFFER_BYTES:
+                    await asyncio.to_thread(f.write, bytes(buf))
+                    buf.clear()
+            if buf:
+                await asyncio.to_thread(f.write, bytes(buf))
+        except DownloadTooLarge:
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(_remove, part, meta_path)
+            raise
+        except BaseException:
+            # Keep what arrived so the next attempt can resume
+            if buf:
+                await asyncio.to_thread(f.write, bytes(buf))
+            raise
+        finally:
+            if not f.closed:
+                await asyncio.to_thread(f.close)
+        return hasher.hexdigest(), size
+
+    def _partial_state(self, part: Path, meta_path: Path) -> Tuple[int, str]:
+        """(bytes already downloaded, validator) of a resumable partial."""
+        try:
+            size = part.stat().st_size
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _remove(part, meta_path)
+            return 0, ""
+        validator = meta.get("etag") or meta.get("last_modified") or ""
+        if not size or not validator or str(validator).startswith("W/"):
+            # Weak ETags cannot be used with If-Range
+            _remove(part, meta_path)
+            return 0, ""
+        return size, str(validator)
+
+    def _commit(
+        self,
+        url: str,
+        entry: _Entry,
+        part: Path,
+        meta_path: Path,
+    ) -> Path:
+        obj = self._object_path(entry.sha256)
+        if obj.is_file():
+            # Same content already stored (e.g. under another URL)
+            _remove(part)
+        else:
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part, obj)
+        _remove(meta_path)
+        with self._index_lock:
+            assert self._index is not None
+            self._index[url] = entry
+        self._prune()
+        self._save_index()
+        return obj
+
+    def _prune(self) -> None:
+        with self._index_lock:
+            assert self._index is not None
+            sizes = {e.sha256: e.size for e in self._index.values()}
+            total = sum(sizes.values())
+            oldest = sorted(
+                self._index.items(),
+                key=lambda item: item[1].fetched_at,
+            )
+            # Never drop the newest URL, even if it alone is too big
+            for url, entry in oldest[:-1]:
+                if total <= self.max_cache_bytes:
+                    break
+                del self._index[url]
+                shared = any(
+                    e.sha256 == entry.sha256 for e in self._index.values()
+                )
+                if not shared:
+                    total -= sizes[entry.sha256]
+                    _remove(self._object_path(entry.sha256))
+
+    @property
+    def _index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _load_index(self) -> None:
+        with self._index_lock:
+            if self._index is not None:
+                return
+            index: Dict[str, _Entry] = {}
+            try:
+                raw = json.loads(self._index_path.read_text(encoding="utf-8"))
+                for url, value in raw.items():
+                    index[url] = _Entry(**value)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError):
+                logger.warning(
+                    "download cache index %s unreadable, starting empty",
+                    self._index_path,
+                    exc_info=True,
+                )
+            self._index = index
+
+    def _save_index(self) -> None:
+        with self._index_lock:
+            index = self._index or {}
+            payload = {url: asdict(entry) for url, entry in index.items()}
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._index_path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path)
+
+    @staticmethod
+    def _copy(src: Path, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.tmp")
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+
+
+def _range_start(resp: Response) -> Optional[int]:
+    # Content-Range: bytes 100-199/200
+    value = resp.headers.get("content-range", "")
+    try:
+        return int(value.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def _hash_prefix(path: Path, size: int) -> "hashlib._Hash":
+    hasher = hashlib.sha256()
+    if size:
+        with open(path, "rb") as f:
+            remaining = size
+            while remaining:
+                chunk = f.read(min(WRITE_BUFFER_BYTES, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+    return hasher
+
+
+def _write_meta(path: Path, validators: Dict[str, Optional[str]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(validators), encoding="utf-8")
+
+
+def _remove(*paths: Path) -> None:
+    for path in paths:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
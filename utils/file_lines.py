@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Windowed line reads and streaming edits for large text files.
+
+Backs the ``read_file`` / ``edit_file`` agent tools, which used to load
+the whole file with ``readlines()`` for every page and rewrite it in
+full for every edit.
+
+- ``LineIndex`` records, for every ``CHUNK_BYTES`` block of a file, how
+  many newlines precede it. It is built in one pass (``bytes.count`` at C
+  speed) and cached per path, keyed by (mtime, size). Reading lines
+  ``s..e`` then maps the file, jumps to the block holding line ``s`` and
+  scans at most one block plus the requested lines.
+- ``replace_in_file`` streams the file as decoded text chunks,
+  replacing ``old`` with ``new`` exactly like ``str.replace`` (matches may
+  straddle chunk boundaries), into a temp file that is renamed over the
+  original.
+
+All functions block; call them via ``asyncio.to_thread`` from async code.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+CHUNK_BYTES = 1 << 20
+MAX_CACHED_INDEXES = 32
+
+_Sig = Tuple[int, int]
+
+
+def _signature(path: str) -> _Sig:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+@dataclass
+class LineIndex:
+    """Newline counts per block of one version of a file."""
+
+    sig: _Sig
+    block_bytes: int
+    # newlines_before[i]: newlines in bytes [0, i * block_bytes)
+    newlines_before: array
+    total_lines: int
+
+    @classmethod
+    def build(cls, path: str) -> "LineIndex":
+        sig = _signature(path)
+        block = CHUNK_BYTES
+        counts = array("Q", [0])
+        newlines = 0
+        last = b""
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(block)
+                if not chunk:
+                    break
+                newlines += chunk.count(b"\n")
+                counts.append(newlines)
+                last = chunk[-1:]
+        # readlines() semantics: a trailing partial line counts as a line
+        total = newlines + (1 if last and last != b"\n" else 0)
+        return cls(sig, block, counts, total)
+
+    def line_offset(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where 1-based line starts (file size if past end)."""
+        if line <= 1:
+            return 0
+        target = line - 1  # newlines to skip
+        counts = self.newlines_before
+        # Last block starting with fewer than target newlines before it
+        lo, hi = 0, len(counts) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if counts[mid] < target:
+                lo = mid
+            else:
+                hi = mid - 1
+        pos = lo * self.block_bytes
+        for _ in range(target - counts[lo]):
+            pos = mm.find(b"\n", pos)
+            if pos < 0:
+                return len(mm)
+            pos += 1
+        return pos
+
+
+_cache: "OrderedDict[str, LineIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def line_index(path: str) -> LineIndex:
+    """Cached index for path, rebuilt when its mtime or size changes."""
+    key = os.path.realpath(path)
+    sig = _signature(key)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None and index.sig == sig:
+            _cache.move_to_end(key)
+            return index
+    index = LineIndex.build(key)
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_INDEXES:
+            _cache.popitem(last=False)
+    return index
+
+
+@dataclass
+class LineWindow:
+    text: str
+    start: int
+    end: int
+    total: int
+
+
+def read_line_window(
+    path: str,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    encoding: str = "utf-8",
+) -> LineWindow:
+    """Lines start_line..end_line (1-based, inclusive, clamped to the file).
+
+    ``text`` is empty when the clamped range is empty (start > total or
+    start > end). Line endings are normalized to ``\\n`` as in text mode.
+    """
+    index = line_index(path)
+    total = index.total_lines
+    s = max(1, start_line if start_line is not None else 1)
+    e = min(total, end_line if end_line is not None else total)
+    if s > total or s > e:
+        return LineWindow("", s, e, total)
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(),
+        0,
+        access=mmap.ACCESS_READ,
+    ) as mm:
+        begin = index.line_offset(mm, s)
+        pos = begin
+        for _ in range(e - s + 1):
+            pos = mm.find(b"\n", pos)
+            if pos < 0:
+                pos = len(mm)
+                break
+            pos += 1
+        data = mm[begin:pos]
+    text = data.decode(encoding).replace("\r\n", "\n")
+    return LineWindow(text, s, e, total)
+
+
+def _to_crlf(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\n", "\r\n")
+
+
+def replace_in_file(
+    path: str,
+    old: str,
+    new: str,
+    encoding: str = "utf-8",
+    chunk_chars: int = CHUNK_BYTES,
+) -> int:
+    """Replace every occurrence of old with new; returns the count.
+
+    The file is rewritten atomically (temp file + rename, permissions
+    kept) and left untouched when old does not occur. Like
+    read_line_window, old and new use "\n" line endings; in a file whose
+    first line ends in "\r\n" they are matched and written with "\r\n".
+    """
+    if not old:
+        raise ValueError("old text must not be empty")
+    target = os.path.realpath(path)
+    directory = os.path.dirname(target)
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(target)}.",
+        suffix=".tmp",
+        dir=directory,
+    )
+    try:
+        with open(target, "r", encoding=encoding, newline="") as src, open(
+            fd,
+            "w",
+            encoding=encoding,
+            newline="",
+        ) as dst:
+            # Read up to the first newline to learn the line ending
+            head = src.read(chunk_chars)
+            while "\n" not in head:
+                more = src.read(chunk_chars)
+                if not more:
+                    break
+                head += more
+            eol = head.find("\n")
+            if eol > 0 and head[eol - 1] == "\r":
+                old, new = _to_crlf(old), _to_crlf(new)
+            keep = len(old) - 1
+            carry, chunk = "", head
+            while True:
+                buf = carry + chunk
+                pos = 0
+                while True:
+                    idx = buf.find(old, pos)
+                    if idx < 0:
+                        break
+                    dst.write(buf[pos:idx])
+                    dst.write(new)
+                    pos = idx + len(old)
+                    count += 1
+                if not chunk:
+                    dst.write(buf[pos:])
+                    break
+                # Keep a tail that could be the start of a match
+                safe = max(pos, len(buf) - keep)
+                dst.write(buf[pos:safe])
+                carry = buf[safe:]
+                chunk = src.read(chunk_chars)
+        if count:
+            shutil.copymode(target, tmp_path)
+            os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
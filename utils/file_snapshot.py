@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Parse-once snapshots of config files, revalidated by stat signature.
+
+``load_config()`` and ``load_providers_json()`` are called on every agent
+construction, memory compaction and heartbeat; each call used to re-read,
+re-parse and re-validate the file (and providers.json probed three
+config.json locations first). ``FileSnapshotCache`` keeps the parsed value
+per key and only reloads when the ``(mtime_ns, size, inode)`` signature of
+one of its source files changes (a missing file is part of the signature,
+so creating or deleting a file also triggers a reload).
+
+Cached values are shared: treat them as read-only and hand out copies to
+callers that mutate. Change callbacks fire after a reload produced a new
+value (not on the first load).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+logger = logging.getLogger(__name__)
+
+_Signature = Tuple[Optional[Tuple[int, int, int]], ...]
+ChangeCallback = Callable[[Any, Any], None]
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """(mtime_ns, size, inode) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+@dataclass(frozen=True)
+class _Entry:
+    signature: _Signature
+    value: Any
+
+
+class FileSnapshotCache:
+    """Keyed cache of values derived from files."""
+
+    def __init__(self):
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._callbacks: Dict[Hashable, List[ChangeCallback]] = {}
+        self._lock = threading.RLock()
+
+    def get(
+        self,
+        key: Hashable,
+        paths: Sequence[Path],
+        loader: Callable[[], Any],
+    ) -> Any:
+        """Return the cached value for key, reloading if any path changed.
+
+        The signature is taken before calling loader, so a write racing
+        with the load is picked up by the next call.
+        """
+        signature = tuple(file_signature(p) for p in paths)
+        entry = self._entries.get(key)
+        if entry is not None and entry.signature == signature:
+            return entry.value
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                return entry.value
+            value = loader()
+            self._entries[key] = _Entry(signature, value)
+            callbacks = list(self._callbacks.get(key, ()))
+        if entry is not None:
+            for callback in callbacks:
+                try:
+                    callback(entry.value, value)
+                except Exception:
+                    logger.exception("Snapshot change callback failed: %r", key)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Force a reload of key (or of every key) on next access.
+
+        Change callbacks still fire for the reload.
+        """
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for k in keys:
+                entry = self._entries.get(k)
+                if entry is not None:
+                    # Keep the old value for callbacks; drop the signature.
+                    self._entries[k] = _Entry((), entry.value)
+
+    def on_change(
+        self,
+        key: Hashable,
+        callback: ChangeCallback,
+    ) -> Callable[[], None]:
+        """Register callback(old, new) for key; returns an unsubscribe fn."""
+        with self._lock:
+            self._callbacks.setdefault(key, []).append(callback)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                callbacks = self._callbacks.get(key, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+        return _unsubscribe
+
+
+def diff_fields(
+    old: Any,
+    new: Any,
+    prefix: str = "",
+) -> Dict[str, Tuple[Any, Any]]:
+    """Leaf-level diff of two JSON-like values.
+
+    Returns ``{dotted.path: (old, new)}`` for every changed leaf. Dicts are
+    compared key by key (a missing key is ``None``); anything else,
+    including lists, is compared as a whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes: Dict[str, Tuple[Any, Any]] = {}
+        for k in list(old) + [k for k in new if k not in old]:
+            path = f"{prefix}.{k}" if prefix else str(k)
+            changes.update(diff_fields(old.get(k), new.get(k), path))
+        return changes
+    if old == new:
+        return {}
+    return {prefix: (old, new)}
+
+
+# Shared cache for config.json / providers.json snapshots
+_snapshots = FileSnapshotCache()
+
+
+def get_snapshot_cache() -> FileSnapshotCache:
+    """Get the process-wide snapshot cache."""
+    return _snapshots
+
+
+__all__ = [
+    "FileSnapshotCache",
+    "diff_fields",
+    "file_signature",
+    "get_snapshot_cache",
+]
@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+"""Lazy, bounded-memory directory walking and content scanning.
+
+Backs the ``grep_search`` / ``glob_search`` agent tools. The old
+implementation materialized ``rglob("*")`` into a sorted list and read each
+file whole with ``read_text().splitlines()``. Here:
+
+- ``walk()`` descends lazily with ``os.scandir``, sorting one directory at a
+  time (the output order equals ``sorted(root.rglob("*"))``), pruning
+  ``.git`` and anything excluded by ``.gitignore`` files along the way.
+- ``grep()`` scans files in a thread pool with a bounded number of files in
+  flight. Results are consumed in walk order and scanning stops as soon as
+  ``max_matches`` is exceeded.
+- Each file is checked in a single pass over an mmap (literal patterns are
+  rejected at C speed without decoding) and matching files are streamed
+  line by line, keeping only ``context_lines`` lines of history.
+"""
+from __future__ import annotations
+
+import fnmatch
+import mmap
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import (
+    Collection,
+    Deque,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+)
+
+
+_SNIFF_BYTES = 8192
+_ALWAYS_SKIP_DIRS = frozenset({".git"})
+
+
+# ---- .gitignore ----
+
+
+def _translate_gitignore(pattern: str) -> str:
+    """Translate a gitignore glob body into a regex (no anchors)."""
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif ch == "*":
+            out.append("[^/]*")
+            i += 1
+        elif ch == "?":
+            out.append("[^/]")
+            i += 1
+        elif ch == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(ch))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        elif ch == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(ch))
+            i += 1
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class _IgnoreRule:
+    base: str  # directory of the .gitignore, relative to the walk root
+    regex: Pattern[str]
+    negate: bool
+    dir_only: bool
+
+
+def _parse_gitignore(text: str, base: str) -> List[_IgnoreRule]:
+    rules: List[_IgnoreRule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        line = line.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        regex = re.compile(f"^{prefix}{_translate_gitignore(line)}$")
+        rules.append(_IgnoreRule(base, regex, negate, dir_only))
+    return rules
+
+
+class IgnoreRules:
+    """Accumulated .gitignore rules for one directory (immutable)."""
+
+    __slots__ = ("_rules",)
+
+    def __init__(self, rules: Tuple[_IgnoreRule, ...] = ()):
+        self._rules = rules
+
+    def child(self, directory: str, rel_dir: str) -> "IgnoreRules":
+        """Rules for entries of directory (adds its .gitignore, if any)."""
+        try:
+            with open(
+                os.path.join(directory, ".gitignore"),
+                encoding="utf-8",
+                errors="ignore",
+            ) as f:
+                text = f.read()
+        except OSError:
+            return self
+        added = _parse_gitignore(text, rel_dir)
+        return IgnoreRules(self._rules + tuple(added)) if added else self
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Whether rel_path (relative to the walk root) is excluded."""
+        result = False
+        for rule in self._rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.base:
+                if not rel_path.startswith(rule.base + "/"):
+                    continue
+                path = rel_path[len(rule.base) + 1:]
+            else:
+                path = rel_path
+            if rule.regex.match(path):
+                result = not rule.negate
+        return result
+
+
+# ---- Walking ----
+
+
+def walk(
+    root: Path,
+    include_dirs: bool = False,
+    use_gitignore: bool = True,
+    max_depth: Optional[int] = None,
+    skip_suffixes: Collection[str] = (),
+    max_file_size: Optional[int] = None,
+) -> Iterator[Tuple[Path, str, bool]]:
+    """Lazily yield ``(path, rel_path, is_dir)`` under root in sorted order.
+
+    Symlinked directories are not followed. ``max_depth`` counts path
+    components below root (1 = direct children only).
+    """
+    root_str = str(root)
+
+    def _walk(
+        directory: str,
+        rel_dir: str,
+        rules: IgnoreRules,
+        depth: int,
+    ) -> Iterator[Tuple[Path, str, bool]]:
+        if use_gitignore:
+            rules = rules.child(directory, rel_dir)
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir and entry.name in _ALWAYS_SKIP_DIRS:
+                continue
+            if use_gitignore and rules.ignored(rel, is_dir):
+                continue
+            if is_dir:
+                if include_dirs:
+                    yield Path(entry.path), rel, True
+                if entry.is_symlink():
+                    continue
+                if max_depth is None or depth < max_depth:
+                    yield from _walk(entry.path, rel, rules, depth + 1)
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                if skip_suffixes and (
+                    os.path.splitext(entry.name)[1].lower() in skip_suffixes
+                ):
+                    continue
+                if (
+                    max_file_size is not None
+                    and entry.stat().st_size > max_file_size
+                ):
+                    continue
+            except OSError:
+                continue
+            yield Path(entry.path), rel, False
+
+    yield from _walk(root_str, "", IgnoreRules(), 1)
+
+
+# ---- Glob ----
+
+
+@lru_cache(maxsize=256)
+def _split_glob(pattern: str) -> Tuple[str, ...]:
+    parts = [p for p in pattern.replace(os.sep, "/").split("/") if p not in ("", ".")]
+    # Collapse consecutive "**" components.
+    collapsed: List[str] = []
+    for part in parts:
+        if part == "**" and collapsed and collapsed[-1] == "**":
+            continue
+        collapsed.append(part)
+    return tuple(collapsed)
+
+
+def _match_parts(pattern: Tuple[str, ...], parts: Tuple[str, ...]) -> bool:
+    if not pattern:
+        return not parts
+    head = pattern[0]
+    if head == "**":
+        # "**" matches zero or more directory components.
+        return any(
+            _match_parts(pattern[1:], parts[i:])
+            for i in range(len(parts) + 1)
+        )
+    return bool(parts) and fnmatch.fnmatchcase(parts[0], head) and (
+        _match_parts(pattern[1:], parts[1:])
+    )
+
+
+def iter_glob(
+    root: Path,
+    pattern: str,
+    use_gitignore: bool = True,
+) -> Iterator[Tuple[Path, str, bool]]:
+    """Lazily yield ``(path, rel_path, is_dir)`` matching a pathlib-style glob.
+
+    Same semantics and order as ``sorted(root.glob(pattern))`` (a trailing
+    ``**`` matches directories only), without materializing the tree; the
+    walk is depth-limited when the pattern has no ``**``.
+    """
+    parts = _split_glob(pattern)
+    if not parts:
+        return
+    recursive = "**" in parts
+    max_depth = None if recursive else len(parts)
+    dirs_only = parts[-1] == "**"
+    for path, rel, is_dir in walk(
+        root,
+        include_dirs=True,
+        use_gitignore=use_gitignore,
+        max_depth=max_depth,
+    ):
+        if dirs_only and not is_dir:
+            continue
+        if _match_parts(parts, tuple(rel.split("/"))):
+            yield path, rel, is_dir
+
+
+# ---- Content scan ----
+
+
+@dataclass
+class FileMatches:
+    """Matches in one file; each block is the output lines of one match."""
+
+    rel: str
+    blocks: List[List[str]] = field(default_factory=list)
+
+
+def looks_binary(head: bytes) -> bool:
+    """Heuristic: a NUL byte in the first block means binary."""
+    return b"\0" in head
+
+
+def scan_file(
+    path: Path,
+    rel: str,
+    regex: Pattern[str],
+    context_lines: int = 0,
+    limit: Optional[int] = None,
+    prefilter: Optional[Pattern[bytes]] = None,
+    sniff: bool = True,
+    stop: Optional[threading.Event] = None,
+) -> FileMatches:
+    """Scan one file, returning at most ``limit`` matches.
+
+    Output lines use ``rel:line_no:> text`` for matches and
+    ``rel:line_no:  text`` for context, one block per match.
+    """
+    result = FileMatches(rel)
+    try:
+        with open(path, "rb") as fb:
+            size = os.fstat(fb.fileno()).st_size
+            if size == 0:
+                return result
+            with mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if sniff and looks_binary(mm[:_SNIFF_BYTES]):
+                    return result
+                if prefilter is not None and not prefilter.search(mm):
+                    return result
+    except (OSError, ValueError):
+        return result
+
+    before: Deque[Tuple[int, str]] = deque(maxlen=context_lines or 1)
+    open_blocks: List[List] = []  # [lines, remaining after-context]
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.rstrip("\r\n")
+                if open_blocks:
+                    for block in open_blocks:
+                        block[0].append(f"{rel}:{line_no}:  {line}")
+                        block[1] -= 1
+                    open_blocks = [b for b in open_blocks if b[1] > 0]
+                if regex.search(line):
+                    if limit is not None and len(result.blocks) >= limit:
+                        break
+                    lines = [f"{rel}:{n}:  {text}" for n, text in before] if (
+                        context_lines
+                    ) else []
+                    lines.append(f"{rel}:{line_no}:> {line}")
+                    result.blocks.append(lines)
+                    if context_lines:
+                        open_blocks.append([lines, context_lines])
+                if context_lines:
+                    before.append((line_no, line))
+                if stop is not None and stop.is_set():
+                    break
+    except OSError:
+        pass
+    return result
+
+
+def literal_prefilter(
+    pattern: str,
+    is_regex: bool,
+    case_sensitive: bool,
+) -> Optional[Pattern[bytes]]:
+    """Bytes regex that must match a file for the pattern to match it.
+
+    Only built for literal patterns: str regex classes (``\\w``, ``\\d``)
+    and non-ASCII case folding differ in bytes mode.
+    """
+    if is_regex:
+        return None
+    if not case_sensitive and not pattern.isascii():
+        return None
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(re.escape(pattern.encode("utf-8")), flags)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=min(8, (os.cpu_count() or 1) + 2),
+                    thread_name_prefix="file-scan",
+                )
+    return _executor
+
+
+def grep(
+    files: Iterator[Tuple[Path, str]],
+    regex: Pattern[str],
+    max_matches: int,
+    context_lines: int = 0,
+    prefilter: Optional[Pattern[bytes]] = None,
+    sniff: bool = True,
+    window: int = 32,
+) -> Tuple[List[str], bool]:
+    """Scan ``(path, rel)`` pairs in parallel, in order; stop at max_matches.
+
+    Returns (output lines, truncated). Blocks are separated by ``---`` when
+    context_lines > 0. At most ``window`` files are in flight, so memory is
+    bounded regardless of tree size.
+    """
+    executor = _get_executor()
+    stop = threading.Event()
+    pending: Deque[Future] = deque()
+    output: List[str] = []
+    count = 0
+    truncated = False
+    files = iter(files)
+    exhausted = False
+
+    def _submit() -> None:
+        nonlocal exhausted
+        while not exhausted and len(pending) < window:
+            try:
+                path, rel = next(files)
+            except StopIteration:
+                exhausted = True
+                return
+            pending.append(executor.submit(
+                scan_file,
+                path,
+                rel,
+                regex,
+                context_lines,
+                max_matches + 1,
+                prefilter,
+                sniff,
+                stop,
+            ))
+
+    try:
+        _submit()
+        while pending:
+            result = pending.popleft().result()
+            for block in result.blocks:
+                if count >= max_matches:
+                    truncated = True
+                    break
+                count += 1
+                output.extend(block)
+                if context_lines > 0:
+                    output.append("---")
+            if truncated:
+                break
+            _submit()
+    finally:
+        stop.set()
+        for future in pending:
+            future.cancel()
+    return output, truncated
+
+
+__all__ = [
+    "FileMatches",
+    "IgnoreRules",
+    "grep",
+    "iter_glob",
+    "literal_prefilter",
+    "looks_binary",
+    "scan_file",
+    "walk",
+]
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""Event-driven file watching with a stat-polling fallback.
+
+``FileWatcher`` reports which of a fixed set of paths changed. On Linux it
+uses inotify (through ctypes, no extra dependency) on the parent
+directories of the watched paths, so atomic "write temp file + rename"
+saves are seen as well; the process sleeps until the kernel reports an
+event. Elsewhere, or when a watch cannot be added, it falls back to
+polling the ``(mtime_ns, size, inode)`` signature of every path.
+
+Events are debounced: a burst of writes (an editor save, ``save_config``
+rewriting the file) results in one callback once the paths have been
+quiet for ``debounce`` seconds. Paths whose signature did not actually
+change by then are not reported.
+
+A watched directory reports entries being created, deleted or renamed in
+it, not modifications of files further down.
+"""
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from .file_snapshot import file_signature
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE = 0.05
+DEFAULT_POLL_INTERVAL = 2.0
+
+ChangeHandler = Callable[[Set[Path]], Awaitable[None]]
+
+# inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify wrapper: one fd, watches on directories."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify is not available")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self._add_watch.restype = ctypes.c_int
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: Path) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(path))
+        return wd
+
+    def read(self) -> List[Tuple[int, int, str]]:
+        """Pending (wd, mask, name) events; empty if none."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Call ``on_change(changed_paths)`` when watched paths change."""
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        on_change: ChangeHandler,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True,
+    ):
+        self.paths = list(dict.fromkeys(Path(p) for p in paths))
+        self._on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._use_inotify = use_inotify
+
+        self._signatures: Dict[Path, object] = {}
+        self._inotify: Optional[_Inotify] = None
+        # wd -> [(entry name or None for "anything", watched path)]
+        self._watches: Dict[int, List[Tuple[Optional[str], Path]]] = {}
+        self._pending: Set[Path] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def backend(self) -> str:
+        """``"inotify"`` or ``"poll"`` (only meaningful once started)."""
+        return "inotify" if self._inotify is not None else "poll"
+
+    async def start(self) -> None:
+        """Record current signatures and start watching."""
+        self._loop = asyncio.get_running_loop()
+        self._signatures = {p: file_signature(p) for p in self.paths}
+        if self._use_inotify:
+            try:
+                self._start_inotify()
+            except OSError as e:
+                logger.info(
+                    "FileWatcher: inotify unavailable (%s), polling",
+                    e,
+                )
+                self._close_inotify()
+        if self._inotify is None:
+            self._poll_task = asyncio.create_task(
+                self._poll_loop(),
+                name="file_watcher_poll",
+            )
+
+    async def stop(self) -> None:
+        """Stop watching; a pending debounced callback is dropped."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._close_inotify()
+        for task in (self._poll_task, self._flush_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._poll_task = None
+        self._flush_task = None
+        self._pending.clear()
+
+    # ---- inotify ----
+
+    def _start_inotify(self) -> None:
+        self._inotify = _Inotify()
+        by_dir: Dict[Path, int] = {}
+
+        def _watch(directory: Path, name: Optional[str], path: Path) -> None:
+            wd = by_dir.get(directory)
+            if wd is None:
+                wd = by_dir[directory] = self._inotify.add_watch(directory)
+            self._watches.setdefault(wd, []).append((name, path))
+
+        for path in self.paths:
+            _watch(path.parent, path.name, path)
+            if path.is_dir():
+                _watch(path, None, path)
+        self._loop.add_reader(self._inotify.fd, self._on_inotify_readable)
+
+    def _close_inotify(self) -> None:
+        if self._inotify is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._inotify.fd)
+        self._inotify.close()
+        self._inotify = None
+        self._watches.clear()
+
+    def _on_inotify_readable(self) -> None:
+        dirty: Set[Path] = set()
+        for wd, mask, name in self._inotify.read():
+            if mask & _IN_Q_OVERFLOW:
+                dirty.update(self.paths)
+                continue
+            for wanted, path in self._watches.get(wd, ()):
+                if wanted is None or wanted == name:
+                    dirty.add(path)
+        if dirty:
+            self._pending |= dirty
+            self._schedule_flush()
+
+    # ---- polling ----
+
+    async def _poll_loop(self) -> None:
+        # Compare with the previous poll, not the last reported state,
+        # so a steady file lets the debounce timer expire.
+        seen = dict(self._signatures)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            changed = set()
+            for path in self.paths:
+                signature = file_signature(path)
+                if signature != seen.get(path):
+                    seen[path] = signature
+                    changed.add(path)
+            if changed:
+                self._pending |= changed
+                self._schedule_flush()
+
+    # ---- debounce ----
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._loop.call_later(self.debounce, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        if self._flush_task is not None and not self._flush_task.done():
+            # A callback is still running; retry after it.
+            self._schedule_flush()
+            return
+        self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, set()
+        changed: Set[Path] = set()
+        for path in pending:
+            signature = file_signature(path)
+            if signature != self._signatures.get(path):
+                self._signatures[path] = signature
+                changed.add(path)
+        if not changed:
+            return
+        try:
+            await self._on_change(changed)
+        except Exception:
+            logger.exception("FileWatcher: change handler failed")
+
+
+__all__ = [
+    "DEFAULT_DEBOUNCE",
+    "FileWatcher",
+]
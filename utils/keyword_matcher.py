@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""Compiled multi-keyword matcher (Aho–Corasick).
+
+Keyword routing (AgentRouter, Thalamus, DispatchSensor, TaskCollaborator)
+used to test every keyword with ``keyword.lower() in message_lower``,
+i.e. O(keywords x message) per inbound message. KeywordMatcher compiles a
+``{label: [keywords]}`` table into one automaton and scores every label in
+a single linear pass over the message.
+
+Labels can be replaced or removed at runtime (e.g. custom agents created
+by AgentCreator); the automaton is rebuilt lazily on the next match and
+swapped in atomically, so concurrent readers never see a partial build.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+
+_Entry = Tuple[Hashable, str, int]
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """One keyword occurrence in a message."""
+
+    label: Hashable
+    keyword: str
+    start: int
+    end: int
+
+
+class _Automaton:
+    """Immutable Aho–Corasick automaton over normalized keywords."""
+
+    __slots__ = ("goto", "fail", "out")
+
+    def __init__(self, patterns: List[str]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for pid, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(pid)
+
+        # BFS: fail links, and merge outputs along them so search never
+        # has to walk the fail chain to report matches.
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt].extend(out[fail[nxt]])
+
+        self.goto = goto
+        self.fail = fail
+        self.out = [tuple(o) for o in out]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (pattern_id, end_index) for every occurrence."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                yield pid, i + 1
+
+
+class KeywordMatcher:
+    """Multi-pattern keyword matcher keyed by label (agent id, intent...).
+
+    Scoring keeps the semantics of the old loops: a label scores one point
+    per distinct keyword of its list found in the message, and labels keep
+    their registration order (so ``max(scores, key=scores.get)`` breaks
+    ties the same way).
+
+    Matching is case-insensitive by default (message and keywords are
+    lowercased); spans index into the lowercased message.
+    """
+
+    def __init__(
+        self,
+        table: Optional[Mapping[Hashable, Iterable[str]]] = None,
+        *,
+        case_sensitive: bool = False,
+    ):
+        self._case_sensitive = case_sensitive
+        self._table: Dict[Hashable, List[str]] = {}
+        self._lock = threading.Lock()
+        # (automaton, [(label, keyword, normalized length)]); None if stale
+        self._compiled: Optional[Tuple[_Automaton, List[_Entry]]] = None
+        for label, keywords in (table or {}).items():
+            self.set_keywords(label, keywords)
+
+    def _normalize(self, text: str) -> str:
+        return text if self._case_sensitive else text.lower()
+
+    # ---- Table management (hot reload) ----
+
+    @property
+    def labels(self) -> List[Hashable]:
+        """Registered labels, in registration order."""
+        return list(self._table)
+
+    def keywords(self, label: Hashable) -> List[str]:
+        """Keywords registered for label."""
+        return list(self._table.get(label, []))
+
+    def set_keywords(self, label: Hashable, keywords: Iterable[str]) -> None:
+        """Register or replace the keyword list of label."""
+        cleaned: List[str] = []
+        seen = set()
+        for kw in keywords:
+            norm = self._normalize(kw) if kw else ""
+            if norm and norm not in seen:
+                seen.add(norm)
+                cleaned.append(kw)
+        with self._lock:
+            self._table[label] = cleaned
+            self._compiled = None
+
+    def add_keywords(self, label: Hashable, keywords: Iterable[str]) -> None:
+        """Append keywords to label (creating it if needed)."""
+        self.set_keywords(label, [*self._table.get(label, []), *keywords])
+
+    def remove(self, label: Hashable) -> bool:
+        """Drop label; returns False if it was not registered."""
+        with self._lock:
+            if label not in self._table:
+                return False
+            del self._table[label]
+            self._compiled = None
+            return True
+
+    def _compile(self) -> Tuple[_Automaton, List[_Entry]]:
+        compiled = self._compiled
+        if compiled is not None:
+            return compiled
+        with self._lock:
+            if self._compiled is None:
+                entries: List[_Entry] = []
+                patterns: List[str] = []
+                for label, keywords in self._table.items():
+                    for kw in keywords:
+                        norm = self._normalize(kw)
+                        entries.append((label, kw, len(norm)))
+                        patterns.append(norm)
+                self._compiled = (_Automaton(patterns), entries)
+            return self._compiled
+
+    # ---- Matching ----
+
+    def finditer(self, text: str) -> Iterator[KeywordMatch]:
+        """Yield every (possibly overlapping) keyword occurrence."""
+        if not text:
+            return
+        automaton, entries = self._compile()
+        for pid, end in automaton.iter_matches(self._normalize(text)):
+            label, kw, length = entries[pid]
+            yield KeywordMatch(label, kw, end - length, end)
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """All keyword occurrences, ordered by end position."""
+        return list(self.finditer(text))
+
+    def _distinct(self, text: str) -> List[_Entry]:
+        if not text:
+            return []
+        automaton, entries = self._compile()
+        pids = {
+            pid
+            for pid, _ in automaton.iter_matches(self._normalize(text))
+        }
+        return [entries[pid] for pid in sorted(pids)]
+
+    def scan(self, text: str) -> Tuple[Dict[Hashable, int], List[str]]:
+        """One pass: (score per label, distinct matched keywords)."""
+        scores = {label: 0 for label in self._table}
+        keywords = []
+        for label, kw, _ in self._distinct(text):
+            scores[label] = scores.get(label, 0) + 1
+            keywords.append(kw)
+        return scores, keywords
+
+    def score(self, text: str) -> Dict[Hashable, int]:
+        """Distinct matched keywords per label (all labels, 0 if none)."""
+        return self.scan(text)[0]
+
+    def matched_keywords(self, text: str) -> List[str]:
+        """Distinct matched keywords, in table order."""
+        return self.scan(text)[1]
+
+    def best(
+        self,
+        text: str,
+        default: Optional[Hashable] = None,
+    ) -> Tuple[Optional[Hashable], int]:
+        """(best label, score); (default, 0) when nothing matches."""
+        scores = self.score(text)
+        if not scores:
+            return default, 0
+        label = max(scores, key=scores.get)
+        if scores[label] == 0:
+            return default, 0
+        return label, scores[label]
+
+
+__all__ = ["KeywordMatch", "KeywordMatcher"]
@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+"""Append-only persistence for agent session state.
+
+``JSONSession`` rewrote ``{user}_{session}.json`` (the whole agent memory)
+after every turn and re-parsed it before the next one. ``SessionLog``
+keeps that file as a *snapshot* and appends the changes of each save to a
+JSON-lines log next to it (``{user}_{session}.json.log``):
+
+- ``put``: a message was added (or replaced, same id);
+- ``marks``: the marks of a message changed;
+- ``del``: messages were removed;
+- ``patch``: other state (summary, token counts, ...) changed, as a
+  key-level patch.
+
+Once the log holds ``compact_records`` records the next save rewrites the
+snapshot from the live state and empties the log. Replaying records is
+idempotent, so a crash between the two steps is harmless.
+
+The state of recently used sessions is cached together with the snapshot
+signature and the log offset it reflects. A load that finds both
+unchanged needs no disk read; if only the log grew, just the new tail is
+read.
+
+State layout: ``{module: state_dict}``; a module's messages are expected
+at ``state["memory"]["content"]`` as ``[msg_dict, marks]`` pairs (the
+``InMemoryMemory`` format). Messages are assumed immutable once older
+than the last ``recheck_tail`` entries; their marks are always compared.
+Compaction writes the live state, so a missed edit is repaired by the
+next snapshot.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_snapshot import file_signature
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPACT_RECORDS = int(
+    os.environ.get("COPAW_SESSION_LOG_COMPACT_RECORDS", "200"),
+)
+DEFAULT_MAX_CACHED = 64
+DEFAULT_RECHECK_TAIL = 4
+
+_Path = Tuple[str, ...]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _item_id(item: Any) -> Optional[str]:
+    msg = item[0] if isinstance(item, (list, tuple)) else item
+    return msg.get("id") if isinstance(msg, dict) else None
+
+
+def _item_parts(item: Any) -> Tuple[Any, list]:
+    """(msg_dict, marks) of a content item ([msg, marks] or legacy msg)."""
+    if isinstance(item, (list, tuple)) and len(item) == 2:
+        return item[0], item[1]
+    return item, []
+
+
+def _split(module_state: Any) -> Tuple[Any, Optional[list]]:
+    """Separate memory content from the rest of a module's state."""
+    if not isinstance(module_state, dict):
+        return module_state, None
+    memory = module_state.get("memory")
+    if not isinstance(memory, dict) or not isinstance(
+        memory.get("content"),
+        list,
+    ):
+        return module_state, None
+    meta = dict(module_state)
+    meta["memory"] = {k: v for k, v in memory.items() if k != "content"}
+    return meta, memory["content"]
+
+
+def _join(meta: Any, content: Optional[list]) -> Any:
+    if content is None:
+        return meta
+    state = dict(meta)
+    state["memory"] = {**meta.get("memory", {}), "content": content}
+    return state
+
+
+def _patch(
+    old: Any,
+    new: Any,
+    path: _Path = (),
+) -> Tuple[List[Tuple[_Path, Any]], List[_Path]]:
+    """(sets, unsets) turning old into new, at dict-key granularity."""
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return ([] if old == new else [(path, new)]), []
+    sets: List[Tuple[_Path, Any]] = []
+    unsets: List[_Path] = [path + (k,) for k in old if k not in new]
+    for k, v in new.items():
+        if k not in old:
+            sets.append((path + (k,), v))
+        else:
+            s, u = _patch(old[k], v, path + (k,))
+            sets += s
+            unsets += u
+    return sets, unsets
+
+
+def _apply_patch(meta: Any, sets: list, unsets: list) -> Any:
+    for path in unsets:
+        target = meta
+        for k in path[:-1]:
+            target = target.get(k, {})
+        if isinstance(target, dict):
+            target.pop(path[-1], None)
+    for path, value in sets:
+        if not path:
+            meta = value
+            continue
+        target = meta
+        for k in path[:-1]:
+            target = target.setdefault(k, {})
+        target[path[-1]] = value
+    return meta
+
+
+@dataclass
+class _Module:
+    meta: Any
+    # None: module has no memory content
+    ids: Optional[List[str]] = None
+    marks: List[list] = field(default_factory=list)
+    # Encoded messages, parallel to ids
+    msgs: List[str] = field(default_factory=list)
+    # id -> position in ids
+    pos: Dict[str, int] = field(default_factory=dict)
+
+    def content(self) -> Optional[list]:
+        if self.ids is None:
+            return None
+        return [
+            [json.loads(m), list(k)] for m, k in zip(self.msgs, self.marks)
+        ]
+
+    def put(self, msg_id: str, msg_json: str, marks: list) -> None:
+        if self.ids is None:
+            self.ids = []
+        i = self.pos.get(msg_id)
+        if i is not None:
+            self.msgs[i] = msg_json
+            self.marks[i] = list(marks)
+        else:
+            self.pos[msg_id] = len(self.ids)
+            self.ids.append(msg_id)
+            self.msgs.append(msg_json)
+            self.marks.append(list(marks))
+
+    def set_marks(self, msg_id: str, marks: list) -> None:
+        i = self.pos.get(msg_id)
+        if i is not None:
+            self.marks[i] = list(marks)
+
+    def delete(self, ids: List[str]) -> None:
+        drop = set(ids)
+        keep = [i for i, mid in enumerate(self.ids or ()) if mid not in drop]
+        self.ids = [self.ids[i] for i in keep]
+        self.msgs = [self.msgs[i] for i in keep]
+        self.marks = [self.marks[i] for i in keep]
+        self.pos = {mid: i for i, mid in enumerate(self.ids)}
+
+
+@dataclass
+class _Cached:
+    snapshot_sig: Any
+    log_offset: int
+    records: int
+    modules: Dict[str, _Module]
+
+
+def _modules_from_state(state: Dict[str, Any]) -> Dict[str, _Module]:
+    modules = {}
+    for name, module_state in state.items():
+        meta, content = _split(module_state)
+        module = _Module(meta=json.loads(_dumps(meta)))
+        if content is not None:
+            module.ids = []
+            for item in content:
+                msg, marks = _item_parts(item)
+                module.put(_item_id(item), _dumps(msg), marks)
+        modules[name] = module
+    return modules
+
+
+class SessionLog:
+    """Snapshot + append-only log store for session state dicts.
+
+    Methods are blocking; call them from a worker thread in async code.
+    """
+
+    def __init__(
+        self,
+        compact_records: int = DEFAULT_COMPACT_RECORDS,
+        max_cached: int = DEFAULT_MAX_CACHED,
+        recheck_tail: int = DEFAULT_RECHECK_TAIL,
+    ):
+        self.compact_records = compact_records
+        self.max_cached = max_cached
+        self.recheck_tail = recheck_tail
+        self._cache: "OrderedDict[str, _Cached]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def log_path(path: str) -> str:
+        return path + ".log"
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.Lock()
+            return lock
+
+    def _remember(self, path: str, cached: _Cached) -> None:
+        with self._lock:
+            self._cache[path] = cached
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def _log_size(self, path: str) -> int:
+        try:
+            return os.path.getsize(self.log_path(path))
+        except OSError:
+            return 0
+
+    # ---- read ----
+
+    def _read(self, path: str) -> Optional[_Cached]:
+        """Cached state brought up to date with the files."""
+        with self._lock:
+            cached = self._cache.get(path)
+        sig = file_signature(path)
+        size = self._log_size(path)
+        if (
+            cached is None
+            or cached.snapshot_sig != sig
+            or size < cached.log_offset
+        ):
+            if sig is None and size == 0:
+                return None
+            state: Dict[str, Any] = {}
+            if sig is not None:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            cached = _Cached(sig, 0, 0, _modules_from_state(state))
+        if size > cached.log_offset:
+            self._replay(path, cached)
+        self._remember(path, cached)
+        return cached
+
+    def _replay(self, path: str, cached: _Cached) -> None:
+        with open(self.log_path(path), "rb") as f:
+            f.seek(cached.log_offset)
+            data = f.read()
+        # Ignore a partially written last line
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(cached, json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("session log: skip bad record in %s", path)
+            cached.records += 1
+        cached.log_offset += end
+
+    @staticmethod
+    def _apply(cached: _Cached, record: Dict[str, Any]) -> None:
+        name = record["m"]
+        module = cached.modules.get(name)
+        if module is None:
+            module = cached.modules[name] = _Module(meta={})
+        op = record["op"]
+        if op == "put":
+            module.put(
+                record["msg"]["id"],
+                _dumps(record["msg"]),
+                record["marks"],
+            )
+        elif op == "marks":
+            module.set_marks(record["id"], record["marks"])
+        elif op == "del":
+            module.delete(record["ids"])
+        elif op == "patch":
+            module.meta = _apply_patch(
+                module.meta,
+                [(tuple(p), v) for p, v in record["set"]],
+                [tuple(p) for p in record["unset"]],
+            )
+
+    def load(self, path: str) -> Optional[Dict[str, Any]]:
+        """Full state saved at path, or None if there is none."""
+        with self._path_lock(path):
+            cached = self._read(path)
+            if cached is None:
+                return None
+            return {
+                name: _join(json.loads(_dumps(m.meta)), m.content())
+                for name, m in cached.modules.items()
+            }
+
+    # ---- write ----
+
+    def _diff(
+        self,
+        name: str,
+        module: _Module,
+        module_state: Any,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Records turning module into module_state (None: snapshot)."""
+        meta, content = _split(module_state)
+        records: List[Dict[str, Any]] = []
+        sets, unsets = _patch(module.meta, meta)
+        if sets or unsets:
+            records.append(
+                {
+                    "op": "patch",
+                    "m": name,
+                    "set": [[list(p), v] for p, v in sets],
+                    "unset": [list(p) for p in unsets],
+                },
+            )
+        if content is None:
+            return None if module.ids is not None else records
+        if module.ids is None:
+            return None
+
+        new_ids = [_item_id(item) for item in content]
+        if None in new_ids or len(set(new_ids)) != len(new_ids):
+            return None
+        new_set = set(new_ids)
+        removed = [i for i in module.ids if i not in new_set]
+        kept = len(module.ids) - len(removed)
+        if [i for i in module.ids if i in new_set] != new_ids[:kept]:
+            return None  # reordered, or inserted before existing messages
+        if removed:
+            records.append({"op": "del", "m": name, "ids": removed})
+
+        for pos, item in enumerate(content):
+            msg, marks = _item_parts(item)
+            old = module.pos.get(new_ids[pos])
+            if old is None or pos >= kept - self.recheck_tail:
+                msg_json = _dumps(msg)
+                if old is None or msg_json != module.msgs[old]:
+                    records.append(
+                        {"op": "put", "m": name, "msg": msg, "marks": marks},
+                    )
+                    continue
+            if list(marks) != module.marks[old]:
+                records.append(
+                    {
+                        "op": "marks",
+                        "m": name,
+                        "id": new_ids[pos],
+                        "marks": marks,
+                    },
+                )
+        return records
+
+    def _write_snapshot(self, path: str, state: Dict[str, Any]) -> _Cached:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(
+            tmp_path,
+            "w",
+            encoding="utf-8",
+            errors="surrogatepass",
+        ) as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        try:
+            os.remove(self.log_path(path))
+        except FileNotFoundError:
+            pass
+        return _Cached(file_signature(path), 0, 0, _modules_from_state(state))
+
+    def save(self, path: str, state: Dict[str, Any]) -> None:
+        """Persist state, appending only what changed since the last save."""
+        with self._path_lock(path):
+            try:
+                cached = self._read(path)
+            except (OSError, ValueError):
+                logger.warning("session log: unreadable %s, rewriting", path)
+                cached = None
+            records: Optional[List[Dict[str, Any]]] = None
+            if cached is not None and set(state) >= set(cached.modules):
+                records = []
+                for name, module_state in state.items():
+                    module = cached.modules.get(name)
+                    diff = (
+                        self._diff(name, module, module_state)
+                        if module is not None
+                        else None
+                    )
+                    if diff is None:
+                        records = None
+                        break
+                    records += diff
+            if (
+                records is None
+                or cached.records + len(records) > self.compact_records
+                # Torn last line: do not append after it
+                or self._log_size(path) != cached.log_offset
+            ):
+                self._remember(path, self._write_snapshot(path, state))
+                return
+            if not records:
+                return
+
+            lines = [_dumps(r) for r in records]
+            payload = "".join(line + "\n" for line in lines).encode(
+                "utf-8",
+                "surrogatepass",
+            )
+            with open(self.log_path(path), "ab") as f:
+                f.write(payload)
+            # Apply decoded copies: records may alias the live state.
+            for line in lines:
+                self._apply(cached, json.loads(line))
+            cached.records += len(records)
+            cached.log_offset += len(payload)
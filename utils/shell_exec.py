@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""Run shell commands with bounded, streamed output capture.
+
+``asyncio.create_subprocess_shell`` + ``proc.wait()`` + ``communicate()``
+deadlocks once a command writes more than the pipe buffer before
+exiting, and then holds all of its output in memory. ``run_shell``
+instead drains stdout and stderr concurrently while the command runs:
+
+- each stream keeps its first ``head_bytes`` and last ``tail_bytes``
+  (``OutputCapture``); what falls in between is not kept in memory;
+- once a stream outgrows head + tail, its full output is written to a
+  spill file so nothing is lost, and ``render()`` points at that file;
+- ``on_output`` sees every chunk as it arrives (for live progress).
+
+On timeout the whole process group is terminated, then killed.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEAD_BYTES = 8 * 1024
+DEFAULT_TAIL_BYTES = 24 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+# Spill files kept per directory (oldest removed first)
+DEFAULT_KEEP_SPILL_FILES = 50
+
+# Called with (stream name, chunk) for every chunk read
+OutputCallback = Callable[[str, bytes], None]
+
+
+class OutputCapture:
+    """Head + tail of one output stream, full copy spilled to disk."""
+
+    def __init__(
+        self,
+        name: str,
+        head_bytes: int = DEFAULT_HEAD_BYTES,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+        spill_dir: Optional[Path] = None,
+        spill_prefix: str = "",
+        keep_spill_files: int = DEFAULT_KEEP_SPILL_FILES,
+    ):
+        self.name = name
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_dir = spill_dir
+        self.spill_prefix = spill_prefix
+        self.keep_spill_files = keep_spill_files
+        self.total_bytes = 0
+        self.spill_path: Optional[Path] = None
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._spill: Optional[BinaryIO] = None
+
+    @property
+    def truncated(self) -> bool:
+        """Whether bytes between head and tail were dropped."""
+        return self.total_bytes > len(self._head) + len(self._tail)
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if self._spill is None and self.spill_dir is not None and (
+            self.total_bytes + len(chunk) > self.head_bytes + self.tail_bytes
+        ):
+            # Nothing dropped yet: head + tail still hold all output.
+            self._open_spill()
+        if self._spill is not None:
+            self._write_spill(chunk)
+        self.total_bytes += len(chunk)
+
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk and self.tail_bytes > 0:
+            self._tail += chunk
+            if len(self._tail) > self.tail_bytes:
+                del self._tail[: len(self._tail) - self.tail_bytes]
+
+    def _open_spill(self) -> None:
+        assert self.spill_dir is not None
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            _prune_spill_dir(self.spill_dir, self.keep_spill_files - 1)
+            path = self.spill_dir / f"{self.spill_prefix}{self.name}.log"
+            self._spill = open(path, "wb")
+            self.spill_path = path
+            self._write_spill(bytes(self._head) + bytes(self._tail))
+        except OSError:
+            logger.warning("cannot spill %s output", self.name, exc_info=True)
+            self._spill = None
+            self.spill_path = None
+            self.spill_dir = None
+
+    def _write_spill(self, data: bytes) -> None:
+        try:
+            self._spill.write(data)
+        except OSError:
+            logger.warning("spill write failed", exc_info=True)
+            self.close()
+            self.spill_path = None
+
+    def close(self) -> None:
+        if self._spill is not None:
+            try:
+                self._spill.close()
+            except OSError:
+                pass
+            self._spill = None
+
+    def tail_text(self, max_bytes: int, encoding: str = "utf-8") -> str:
+        """Last max_bytes of output seen so far (for progress updates)."""
+        data = bytes(self._tail or self._head)[-max_bytes:]
+        return data.decode(encoding, errors="replace")
+
+    def render(self, encoding: str = "utf-8") -> str:
+        """Captured text; a marker replaces any dropped middle part."""
+        head = bytes(self._head).decode(encoding, errors="replace")
+        tail = bytes(self._tail).decode(encoding, errors="replace")
+        if not self.truncated:
+            return head + tail
+        omitted = self.total_bytes - len(self._head) - len(self._tail)
+        where = (
+            f"full {self.name} ({self.total_bytes} bytes) saved to "
+            f"{self.spill_path}"
+            if self.spill_path is not None
+            else f"{self.name} was {self.total_bytes} bytes"
+        )
+        return f"{head}\n... [{omitted} bytes omitted; {where}] ...\n{tail}"
+
+
+def _prune_spill_dir(spill_dir: Path, keep: int) -> None:
+    try:
+        files = sorted(
+            (p for p in spill_dir.iterdir() if p.is_file()),
+            key=lambda p: p.stat().st_mtime,
+        )
+    except OSError:
+        return
+    for path in files[: max(0, len(files) - keep)]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+@dataclass
+class ShellResult:
+    returncode: int
+    stdout: OutputCapture
+    stderr: OutputCapture
+    timed_out: bool
+    duration: float
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    capture: OutputCapture,
+    on_output: Optional[OutputCallback],
+) -> None:
+    while True:
+        chunk = await stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return
+        capture.feed(chunk)
+        if on_output is not None:
+            on_output(capture.name, chunk)
+
+
+def _signal_group(proc: asyncio.subprocess.Process, sig: int) -> None:
+    try:
+        if sys.platform != "win32":
+            os.killpg(proc.pid, sig)
+        elif sig == signal.SIGTERM:
+            proc.terminate()
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_shell(
+    command: str,
+    *,
+    cwd: Optional[Path] = None,
+    timeout: Optional[float] = None,
+    on_output: Optional[OutputCallback] = None,
+    head_bytes: int = DEFAULT_HEAD_BYTES,
+    tail_bytes: int = DEFAULT_TAIL_BYTES,
+    spill_dir: Optional[Path] = None,
+    keep_spill_files: int = DEFAULT_KEEP_SPILL_FILES,
+) -> ShellResult:
+    """Run command, capturing bounded output; see module docstring.
+
+    A timed-out command reports returncode -1 and ``timed_out=True``.
+    """
+    prefix = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}."
+    stdout = OutputCapture(
+        "stdout",
+        head_bytes,
+        tail_bytes,
+        spill_dir,
+        prefix,
+        keep_spill_files,
+    )
+    stderr = OutputCapture(
+        "stderr",
+        head_bytes,
+        tail_bytes,
+        spill_dir,
+        prefix,
+        keep_spill_files,
+    )
+    extra = (
+        {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        if sys.platform == "win32"
+        else {"start_new_session": True}
+    )
+    started = time.monotonic()
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(cwd) if cwd is not None else None,
+        **extra,
+    )
+    pumps = asyncio.gather(
+        _pump(proc.stdout, stdout, on_output),
+        _pump(proc.stderr, stderr, on_output),
+    )
+    timed_out = False
+    try:
+        try:
+            await asyncio.wait_for(asyncio.shield(pumps), timeout)
+            await proc.wait()
+        except asyncio.TimeoutError:
+            timed_out = True
+            _signal_group(proc, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(proc.wait(), 1)
+            except asyncio.TimeoutError:
+                _signal_group(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+                await proc.wait()
+            # Collect what is left in the pipes; a surviving grandchild
+            # may keep them open, so do not wait for it.
+            try:
+                await asyncio.wait_for(asyncio.shield(pumps), 1)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        if not pumps.done():
+            pumps.cancel()
+            try:
+                await pumps
+            except (asyncio.CancelledError, Exception):
+                pass
+        if proc.returncode is None:
+            _signal_group(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+        stdout.close()
+        stderr.close()
+    return ShellResult(
+        returncode=-1 if timed_out else proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        timed_out=timed_out,
+        duration=time.monotonic() - started,
+    )